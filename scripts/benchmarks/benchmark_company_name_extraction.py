@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: compiled company name extractor vs the original implementation
+
+Runs both extractors over recorded search results and checks that they agree.
+Recorded results come from the CSE result cache (data/temp/cse_results_cache.json)
+when present, otherwise from the titles captured in Stage 1 test outputs.
+
+Usage:
+    python scripts/benchmarks/benchmark_company_name_extraction.py
+    python scripts/benchmarks/benchmark_company_name_extraction.py --repeat 20
+"""
+import argparse
+import glob
+import html
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, List
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.search_utils import extract_company_names, extract_company_names_batch
+
+CSE_CACHE_PATH = os.environ.get("CSE_CACHE_PATH", "data/temp/cse_results_cache.json")
+STAGE1_OUTPUTS = "data/output/stage_tests/*/stage_1_discovery_result.json"
+
+
+def reference_extract_company_names(text: str, min_length: int = 2, max_length: int = 40) -> List[str]:
+    """Original search_utils implementation, kept verbatim as the baseline"""
+    if not text:
+        return []
+
+    candidates = []
+    candidates.extend(re.findall(r'\b[A-Z][a-zA-Z&\'\-]*(?:\s+[A-Z][a-zA-Z&\'\-]*){0,3}\b', text))
+    candidates.extend(re.findall(r'\b[A-Z][a-zA-Z\s&\'\-]+(?:\s+(?:Inc|Corp|LLC|Ltd|Co|Company))\b', text))
+    candidates.extend(re.findall(
+        r'(?:vs\s+|compared\s+to\s+|like\s+|alternative\s+to\s+)([A-Z][a-zA-Z\s&\'\-]+?)(?:\s|,|\.|\|)',
+        text, re.IGNORECASE))
+    candidates.extend(re.findall(
+        r'(?:\d+\.\s+|•\s+|\-\s+)([A-Z][a-zA-Z\s&\'\-]+?)(?:\s*[\-\–\—]|\s*:|\s*\(|$)', text))
+
+    cleaned_candidates = []
+    for candidate in candidates:
+        clean_name = html.unescape(candidate).strip()
+        if not (min_length <= len(clean_name) <= max_length):
+            continue
+        exclude_list = {
+            'Top', 'Best', 'Leading', 'Popular', 'Most', 'Latest', 'New', 'Old',
+            'Companies', 'Brands', 'Products', 'Services', 'Solutions', 'Options', 'Alternatives',
+            'How', 'Why', 'What', 'Where', 'When', 'Which', 'The', 'A', 'An',
+            'List', 'Guide', 'Review', 'Article', 'Blog', 'Website'
+        }
+        if clean_name in exclude_list:
+            continue
+        if not re.match(r'^[A-Z]', clean_name):
+            continue
+        if _reference_is_likely_company_name(clean_name):
+            cleaned_candidates.append(clean_name)
+
+    return list(set(cleaned_candidates))
+
+
+def _reference_is_likely_company_name(name: str) -> bool:
+    if not re.search(r'[a-zA-Z]', name):
+        return False
+    non_companies = {
+        'Google Search', 'Search Results', 'Web Search', 'Related Searches',
+        'More Info', 'Click Here', 'Read More', 'Learn More', 'Find Out',
+        'Sign Up', 'Log In', 'Contact Us', 'About Us', 'Privacy Policy',
+        'Terms Service', 'Home Page', 'Main Page'
+    }
+    if name in non_companies:
+        return False
+    generic_terms = {
+        'Business', 'Company', 'Corporation', 'Enterprise', 'Organization',
+        'Industry', 'Market', 'Sector', 'Platform', 'Solution', 'Service'
+    }
+    if name in generic_terms:
+        return False
+    company_indicators = [
+        r'\b(Inc|Corp|LLC|Ltd|Co|Company|Technologies|Tech|Solutions|Systems|Group|Partners)\b',
+        r'\b[A-Z][a-z]*[A-Z]',
+        r'&',
+    ]
+    has_company_indicators = any(re.search(pattern, name) for pattern in company_indicators)
+    if len(name.split()) == 1:
+        return len(name) >= 3 and (has_company_indicators or name[0].isupper())
+    elif len(name.split()) <= 4:
+        return True
+    else:
+        return has_company_indicators
+
+
+def load_recorded_results() -> List[Dict]:
+    """Load recorded search results (title/snippet dicts)"""
+    if os.path.exists(CSE_CACHE_PATH):
+        with open(CSE_CACHE_PATH, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        results = [result for entry in entries.values() for result in entry['data']]
+        if results:
+            print(f"📁 Loaded {len(results)} results from {CSE_CACHE_PATH}")
+            return results
+
+    # Stage 1 outputs record each candidate's source title and query
+    title_re = re.compile(r"source_title='((?:[^'\\]|\\.)*)', query_used='((?:[^'\\]|\\.)*)'")
+    seen = set()
+    results = []
+    for path in sorted(glob.glob(STAGE1_OUTPUTS)):
+        with open(path, 'r', encoding='utf-8') as f:
+            for item in json.load(f).get('full_output', []):
+                match = title_re.search(item) if isinstance(item, str) else None
+                if match and match.groups() not in seen:
+                    seen.add(match.groups())
+                    results.append({'title': match.group(1), 'snippet': '', 'query_context': match.group(2)})
+
+    print(f"📁 Loaded {len(results)} recorded titles from Stage 1 outputs")
+    return results
+
+
+def _time(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(repeat: int = 10) -> bool:
+    print("⏱️  COMPANY NAME EXTRACTION BENCHMARK")
+    print("=" * 60)
+
+    results = load_recorded_results()
+    if not results:
+        print("❌ No recorded search results found")
+        return False
+
+    texts = [result[field] for result in results for field in ('title', 'snippet') if result.get(field)]
+
+    # Correctness: same names per text
+    mismatches = sum(
+        1 for text in texts
+        if set(extract_company_names(text)) != set(reference_extract_company_names(text))
+    )
+    print(f"🔍 Checked {len(texts)} texts: {mismatches} mismatches")
+
+    reference_time = _time(lambda: [reference_extract_company_names(t) for t in texts], repeat)
+    compiled_time = _time(lambda: [extract_company_names(t) for t in texts], repeat)
+    batch_time = _time(lambda: extract_company_names_batch(results), repeat)
+
+    print(f"\n   Reference (per text):  {reference_time * 1000:8.2f} ms")
+    print(f"   Compiled (per text):   {compiled_time * 1000:8.2f} ms  ({reference_time / compiled_time:.1f}x)")
+    print(f"   Compiled (batch):      {batch_time * 1000:8.2f} ms  ({reference_time / batch_time:.1f}x)")
+
+    return mismatches == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark company name extraction")
+    parser.add_argument("--repeat", type=int, default=10, help="Timing repetitions (best run is reported)")
+    args = parser.parse_args()
+
+    sys.exit(0 if run_benchmark(args.repeat) else 1)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: exhaustive CROSS JOIN vs VECTOR_SEARCH copying detection
+
+Runs AnalysisStage's copying query with both methods on growing samples of the
+target brand's ads and reports how BigQuery cost scales with ad count
+(bytes processed, slot time, wall time) and whether the top copier agrees.
+
+The exhaustive query scores N x M pairs (N target ads, M competitor ads);
+VECTOR_SEARCH scores N x k candidates from the vector index.
+
+Usage:
+    python scripts/benchmarks/benchmark_copying_detection.py --brand "Warby Parker"
+    python scripts/benchmarks/benchmark_copying_detection.py --brand "Warby Parker" --sizes 50 100 200 --top-k 50
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.pipeline.core.base import PipelineContext
+from src.pipeline.stages.analysis import AnalysisStage, BQ_PROJECT, BQ_DATASET
+from src.utils.bigquery_client import get_bigquery_client, run_query
+
+METHODS = ['exhaustive', 'vector_search']
+
+
+def _run(client, query: str) -> Dict:
+    start = time.perf_counter()
+    job = client.query(query)
+    rows = job.to_dataframe()
+    elapsed = time.perf_counter() - start
+    top = rows.iloc[0] if not rows.empty else None
+    return {
+        'seconds': elapsed,
+        'bytes': job.total_bytes_processed or 0,
+        'slot_ms': job.slot_millis or 0,
+        'top_copier': top['potential_copier'] if top is not None else None,
+        'avg_distance': float(top['avg_similarity']) if top is not None else None,
+        'comparisons': int(top['comparison_count']) if top is not None else 0,
+    }
+
+
+def run_benchmark(brand: str, sizes: List[int], top_k: int, threshold: float, embeddings_table: str) -> bool:
+    print("⏱️  COPYING DETECTION BENCHMARK")
+    print("=" * 60)
+
+    counts = run_query(f"""
+    SELECT COUNTIF(brand = '{brand}') AS target_ads, COUNTIF(brand != '{brand}') AS competitor_ads
+    FROM `{embeddings_table}`
+    """, BQ_PROJECT).iloc[0]
+    target_ads, competitor_ads = int(counts['target_ads']), int(counts['competitor_ads'])
+    print(f"📊 {brand}: {target_ads} ads vs {competitor_ads} competitor ads (top_k={top_k}, threshold={threshold})")
+
+    stage = AnalysisStage(PipelineContext(brand, "", "benchmark"), copying_method='vector_search',
+                          copying_top_k=top_k, copying_distance_threshold=threshold)
+    stage._ensure_embedding_vector_index(embeddings_table)
+    client = get_bigquery_client(BQ_PROJECT)
+
+    print(f"\n   {'ads':>6} {'method':<14} {'pairs scored':>13} {'MB':>9} {'slot s':>9} {'wall s':>8}  top copier")
+    agreed = True
+    for size in sorted({min(size, target_ads) for size in sizes}):
+        results = {}
+        for method in METHODS:
+            query = stage._build_copying_query(embeddings_table, method, sample_limit=size)
+            results[method] = result = _run(client, query)
+            pairs = size * competitor_ads if method == 'exhaustive' else size * min(top_k, competitor_ads)
+            print(f"   {size:>6} {method:<14} {pairs:>13,} {result['bytes'] / 1e6:>9.1f} "
+                  f"{result['slot_ms'] / 1000:>9.1f} {result['seconds']:>8.2f}  "
+                  f"{result['top_copier']} ({result['comparisons']} matches)")
+
+        if results['exhaustive']['top_copier'] != results['vector_search']['top_copier']:
+            agreed = False
+            print(f"   ⚠️  Top copier differs at {size} ads - consider a larger --top-k")
+
+    print(f"\n{'✅' if agreed else '⚠️ '} Top copier {'agrees' if agreed else 'differs'} across all sample sizes")
+    return agreed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark copying detection methods")
+    parser.add_argument("--brand", required=True, help="Target brand")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 50, 100, 200, 400],
+                        help="Target-brand ad sample sizes")
+    parser.add_argument("--top-k", type=int, default=20, help="VECTOR_SEARCH neighbours per ad")
+    parser.add_argument("--threshold", type=float, default=0.3, help="COSINE distance threshold")
+    parser.add_argument("--embeddings-table", default=f"{BQ_PROJECT}.{BQ_DATASET}.ads_embeddings")
+    args = parser.parse_args()
+
+    sys.exit(0 if run_benchmark(args.brand, args.sizes, args.top_k, args.threshold, args.embeddings_table) else 1)
@@ -138,6 +138,11 @@ def clean_pipeline_artifacts(clean_persistent: bool = False):
         'text_embedding_model',  # Always preserve infrastructure - will be recreated if needed
         'ads_with_dates',        # ALWAYS preserve our precious accumulated competitive intelligence data!
         'ads_embeddings',        # ALWAYS preserve embeddings - expensive to regenerate!
+        'competitor_verdict_cache',  # Cross-run AI curation verdicts - saves AI calls on every run
+        'run_artifacts',         # Run artifact registry - drives `python -m src.utils.run_registry gc`
+        'visual_analysis_cache', # Cross-run multimodal analyses - saves AI.GENERATE calls on every run
+        'run_costs',             # Measured cost per run - cost-per-insight history and regressions
+        'whitespace_chunk_cache',  # Cross-run whitespace chunk analyses - saves AI.GENERATE calls in Stage 9
     }
 
     # Conditionally preserve base data tables
@@ -150,9 +155,12 @@ def clean_pipeline_artifacts(clean_persistent: bool = False):
     # Table patterns to clean (analysis results)
     CLEAN_PATTERNS = [
         'visual_intelligence_',      # Run-specific visual analysis
+        'visual_sample_',            # Run-specific visual sample and sample plan
+        'whitespace_replay_',        # Benchmark replays of recorded whitespace datasets
         'audience_intelligence_',    # Run-specific audience analysis
         'creative_intelligence_',    # Run-specific creative analysis
         'channel_intelligence_',     # Run-specific channel analysis
+        'ad_features_',              # Run-specific shared Stage 9 features
         'creative_themes_',          # Run-specific creative themes
         'timing_patterns_',          # Run-specific timing analysis
         'channel_performance_',      # Run-specific channel performance
@@ -165,6 +173,8 @@ def clean_pipeline_artifacts(clean_persistent: bool = False):
         'gemini_model',              # Gemini model instances (will be recreated)
         'v_intelligence_summary_',   # Intelligence summary views
         'ads_raw_',                  # Run-specific raw ads tables (ALWAYS clean these)
+        'ads_label_delta_',          # Incremental labeling staging tables
+        'ads_embedding_delta_',      # Incremental embedding staging tables
     ]
 
     # Additional patterns to clean when --clean-persistent is used
@@ -18,7 +18,10 @@ def create_ads_with_dates_from_run(run_id: str):
     
     # SQL to create ads_with_dates table from real Meta ads data
     create_ads_with_dates_sql = f"""
-    CREATE OR REPLACE TABLE `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates` AS
+    CREATE OR REPLACE TABLE `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates`
+    PARTITION BY DATE(start_timestamp)
+    CLUSTER BY brand, ad_archive_id
+    AS
     
     WITH date_parsed AS (
       SELECT 
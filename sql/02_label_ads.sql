@@ -1,4 +1,7 @@
-CREATE OR REPLACE TABLE `yourproj.ads_demo.ads_with_dates` AS
+CREATE OR REPLACE TABLE `yourproj.ads_demo.ads_with_dates`
+PARTITION BY DATE(start_timestamp)
+CLUSTER BY brand, ad_archive_id
+AS
 WITH base_ads AS (
   SELECT 
     ad_archive_id,
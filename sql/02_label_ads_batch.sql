@@ -1,7 +1,11 @@
 -- BATCH OPTIMIZED VERSION WITH INTELLIGENT DEDUPLICATION
 -- Handles API variability by merging new ads with existing ads_with_dates
 -- Prefers new data while preserving strategic labels from existing data
-CREATE OR REPLACE TABLE `yourproj.ads_demo.ads_with_dates` AS
+-- Partitioned by start date and clustered by brand/ad so date-window and brand filters prune scans
+CREATE OR REPLACE TABLE `yourproj.ads_demo.ads_with_dates`
+PARTITION BY DATE(start_timestamp)
+CLUSTER BY brand, ad_archive_id
+AS
 
 WITH all_raw_ads AS (
   -- New ads from current ingestion run - PRESERVE ALL CORE INVIOLABLE FIELDS
@@ -191,7 +195,10 @@ SELECT
   ai.angles,
   ai.promotional_intensity,
   ai.urgency_score,
-  ai.brand_voice_score
+  ai.brand_voice_score,
+  -- Content fingerprint used by incremental labeling (02_label_ads_incremental.sql)
+  TO_HEX(SHA256(CONCAT(
+    COALESCE(de.creative_text, ''), '\x1f', COALESCE(de.title, ''), '\x1f', COALESCE(de.cta_text, '')))) AS content_hash
 FROM duration_enriched de
 LEFT JOIN ai_batch_results ai
   ON de.ad_archive_id = ai.ad_archive_id;
\ No newline at end of file
@@ -0,0 +1,180 @@
+-- INCREMENTAL VERSION: ONLY NEW OR CHANGED ADS GO THROUGH AI.GENERATE_TABLE
+-- content_hash fingerprints creative_text/title/cta_text per ad_archive_id.
+-- Unchanged ads keep their existing strategic labels; core API fields are refreshed for every ad.
+-- Requires an existing ads_with_dates table (the first run uses 02_label_ads_batch.sql)
+
+ALTER TABLE `yourproj.ads_demo.ads_with_dates` ADD COLUMN IF NOT EXISTS content_hash STRING;
+
+-- Backfill hashes for ads labeled before content hashing existed (labels match stored content)
+UPDATE `yourproj.ads_demo.ads_with_dates`
+SET content_hash = TO_HEX(SHA256(CONCAT(
+  COALESCE(creative_text, ''), '\x1f', COALESCE(title, ''), '\x1f', COALESCE(cta_text, ''))))
+WHERE content_hash IS NULL;
+
+CREATE OR REPLACE TABLE `yourproj.ads_demo.ads_label_delta` AS
+
+WITH current_ads AS (
+  -- New ads from current ingestion run - PRESERVE ALL CORE INVIOLABLE FIELDS
+  SELECT * EXCEPT(row_rank)
+  FROM (
+    SELECT
+      ad_archive_id,
+      brand,
+      creative_text,
+      title,
+      cta_text,
+      COALESCE(computed_media_type, media_type, 'unknown') AS media_type,
+      media_storage_path,
+      start_date_string,
+      end_date_string,
+      publisher_platforms,
+      page_name,
+      snapshot_url,
+      CASE
+        WHEN computed_media_type IN ('image', 'video') AND media_storage_path IS NOT NULL
+        THEN [media_storage_path]
+        ELSE []
+      END AS image_urls,
+      CASE
+        WHEN computed_media_type = 'video' AND media_storage_path IS NOT NULL
+        THEN [media_storage_path]
+        ELSE []
+      END AS video_urls,
+      TO_HEX(SHA256(CONCAT(
+        COALESCE(creative_text, ''), '\x1f', COALESCE(title, ''), '\x1f', COALESCE(cta_text, '')))) AS content_hash,
+      ROW_NUMBER() OVER (PARTITION BY ad_archive_id ORDER BY brand) AS row_rank
+    FROM `yourproj.ads_demo.ads_raw`
+    WHERE (creative_text IS NOT NULL OR title IS NOT NULL)
+      AND ad_archive_id IS NOT NULL
+  )
+  WHERE row_rank = 1
+),
+
+-- Label new ads, ads whose content changed, and ads whose previous labeling failed
+change_detection AS (
+  SELECT
+    cur.*,
+    (
+      existing.ad_archive_id IS NULL
+      OR existing.content_hash != cur.content_hash
+      OR existing.funnel IS NULL
+    ) AS needs_label
+  FROM current_ads cur
+  LEFT JOIN (
+    SELECT ad_archive_id, content_hash, funnel
+    FROM `yourproj.ads_demo.ads_with_dates`
+  ) existing
+    ON cur.ad_archive_id = existing.ad_archive_id
+),
+
+temporal_data AS (
+  SELECT *,
+    SAFE.PARSE_TIMESTAMP('%Y-%m-%dT%H:%M:%E*S%Ez', start_date_string) AS start_timestamp,
+    SAFE.PARSE_TIMESTAMP('%Y-%m-%dT%H:%M:%E*S%Ez', end_date_string) AS end_timestamp,
+    DATE(SAFE.PARSE_TIMESTAMP('%Y-%m-%dT%H:%M:%E*S%Ez', start_date_string)) AS first_seen,
+    DATE(SAFE.PARSE_TIMESTAMP('%Y-%m-%dT%H:%M:%E*S%Ez', end_date_string)) AS last_seen
+  FROM change_detection
+),
+
+duration_enriched AS (
+  SELECT *,
+    CASE
+      WHEN start_timestamp IS NOT NULL AND end_timestamp IS NOT NULL
+      THEN DATE_DIFF(DATE(end_timestamp), DATE(start_timestamp), DAY) + 1
+      ELSE NULL
+    END AS active_days
+  FROM temporal_data
+),
+
+-- BATCH PROCESSING: one AI.GENERATE_TABLE call over the delta only
+ai_batch_results AS (
+  SELECT
+    ad_archive_id,
+    funnel,
+    angles,
+    promotional_intensity,
+    urgency_score,
+    brand_voice_score
+  FROM AI.GENERATE_TABLE(
+    MODEL `bigquery-ai-kaggle-469620.ads_demo.gemini_model`,
+    (
+      SELECT
+        ad_archive_id,  -- CRITICAL: Preserve ID for joining back
+        CONCAT(
+          'Analyze this ad content and classify:\n',
+          'Ad Text: ', COALESCE(creative_text, ''), '\n',
+          'Headline: ', COALESCE(title, ''), '\n',
+          'Brand: ', brand, '\n\n',
+          'Return structured analysis with:\n',
+          '1. funnel: EXACTLY one of these three values (case-sensitive): "Upper", "Mid", or "Lower"\n',
+          '2. angles: up to 3 from [discount,benefits,UGC,social proof,launch,brand story,urgency,feature,sustainability,guarantee,testimonial]\n',
+          '3. promotional_intensity: 0.0-1.0 (0=brand-focused, 1=heavy promotion)\n',
+          '4. urgency_score: 0.0-1.0 (0=no urgency, 1=very urgent)\n',
+          '5. brand_voice_score: 0.0-1.0 (0=very promotional, 1=very brand-focused)'
+        ) AS prompt
+      FROM duration_enriched
+      WHERE needs_label
+    ),
+    STRUCT(
+      "funnel STRING, angles ARRAY<STRING>, promotional_intensity FLOAT64, urgency_score FLOAT64, brand_voice_score FLOAT64" AS output_schema,
+      "SHARED" AS request_type
+    )
+  )
+)
+
+SELECT
+  de.*,
+  CASE
+    WHEN UPPER(ai.funnel) LIKE 'UPPER%' THEN 'Upper'
+    WHEN UPPER(ai.funnel) LIKE 'MID%' THEN 'Mid'
+    WHEN UPPER(ai.funnel) LIKE 'LOWER%' THEN 'Lower'
+    ELSE ai.funnel
+  END AS funnel,
+  ai.angles,
+  ai.promotional_intensity,
+  ai.urgency_score,
+  ai.brand_voice_score
+FROM duration_enriched de
+LEFT JOIN ai_batch_results ai
+  ON de.ad_archive_id = ai.ad_archive_id;
+
+-- Merge the delta: refresh API fields for every ad, replace labels only where relabeled
+MERGE `yourproj.ads_demo.ads_with_dates` target
+USING `yourproj.ads_demo.ads_label_delta` delta
+ON target.ad_archive_id = delta.ad_archive_id
+WHEN MATCHED THEN UPDATE SET
+  brand = delta.brand,
+  creative_text = delta.creative_text,
+  title = delta.title,
+  cta_text = delta.cta_text,
+  media_type = delta.media_type,
+  media_storage_path = delta.media_storage_path,
+  start_date_string = delta.start_date_string,
+  end_date_string = delta.end_date_string,
+  start_timestamp = delta.start_timestamp,
+  end_timestamp = delta.end_timestamp,
+  first_seen = delta.first_seen,
+  last_seen = delta.last_seen,
+  active_days = delta.active_days,
+  publisher_platforms = delta.publisher_platforms,
+  page_name = delta.page_name,
+  snapshot_url = delta.snapshot_url,
+  image_urls = delta.image_urls,
+  video_urls = delta.video_urls,
+  funnel = IF(delta.needs_label, delta.funnel, target.funnel),
+  angles = IF(delta.needs_label, delta.angles, target.angles),
+  promotional_intensity = IF(delta.needs_label, delta.promotional_intensity, target.promotional_intensity),
+  urgency_score = IF(delta.needs_label, delta.urgency_score, target.urgency_score),
+  brand_voice_score = IF(delta.needs_label, delta.brand_voice_score, target.brand_voice_score),
+  content_hash = delta.content_hash
+WHEN NOT MATCHED THEN INSERT (
+  ad_archive_id, brand, creative_text, title, cta_text, media_type, media_storage_path,
+  start_date_string, end_date_string, start_timestamp, end_timestamp, first_seen, last_seen, active_days,
+  publisher_platforms, page_name, snapshot_url, image_urls, video_urls,
+  funnel, angles, promotional_intensity, urgency_score, brand_voice_score, content_hash
+) VALUES (
+  delta.ad_archive_id, delta.brand, delta.creative_text, delta.title, delta.cta_text, delta.media_type, delta.media_storage_path,
+  delta.start_date_string, delta.end_date_string, delta.start_timestamp, delta.end_timestamp, delta.first_seen, delta.last_seen, delta.active_days,
+  delta.publisher_platforms, delta.page_name, delta.snapshot_url, delta.image_urls, delta.video_urls,
+  delta.funnel, delta.angles, delta.promotional_intensity, delta.urgency_score, delta.brand_voice_score, delta.content_hash
+);
@@ -1,7 +1,10 @@
 -- Create ads_with_dates table from mock data
 -- This table provides cleaner date columns for easier analysis
 
-CREATE OR REPLACE TABLE `bigquery-ai-kaggle-469620.ads_demo.ads_with_dates` AS
+CREATE OR REPLACE TABLE `bigquery-ai-kaggle-469620.ads_demo.ads_with_dates`
+PARTITION BY DATE(start_timestamp)
+CLUSTER BY brand, ad_archive_id
+AS
 SELECT 
   ad_id AS ad_archive_id,  -- Match expected column name
   brand,
@@ -5,6 +5,7 @@ CREATE OR REPLACE TABLE `bigquery-ai-kaggle-469620.ads_demo.ads_embeddings` (
   -- Primary key linking to ads_raw
   ad_archive_id STRING NOT NULL,
   brand STRING,
+  start_timestamp TIMESTAMP,  -- From ads_with_dates; drives partitioning
   
   -- Text content used for embedding
   creative_text STRING,
@@ -28,8 +29,8 @@ CREATE OR REPLACE TABLE `bigquery-ai-kaggle-469620.ads_demo.ads_embeddings` (
   -- Partitioning and clustering for performance
   embedding_date DATE DEFAULT CURRENT_DATE()
 )
-PARTITION BY embedding_date
-CLUSTER BY brand, embedding_model
+PARTITION BY DATE(start_timestamp)
+CLUSTER BY brand, ad_archive_id
 OPTIONS (
   description = "Semantic embeddings for ad creative content - supports similarity search and competitive analysis",
   labels = [("purpose", "embeddings"), ("subgoal", "4")]
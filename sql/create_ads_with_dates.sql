@@ -1,10 +1,14 @@
 -- Create ads_with_dates view/table for time-series competitive intelligence
 -- This leverages the updated ingestion script that captures start_date_string and end_date_string
 
-CREATE OR REPLACE TABLE `your-project.ads_demo.ads_with_dates` AS
+CREATE OR REPLACE TABLE `your-project.ads_demo.ads_with_dates`
+PARTITION BY DATE(start_timestamp)
+CLUSTER BY brand, ad_archive_id
+AS
 WITH date_parsed AS (
   SELECT 
     ad_id,
+    ad_id AS ad_archive_id,  -- Clustering key shared with the other core ad tables
     brand,
     page_name,
     creative_text,
@@ -90,8 +94,7 @@ SELECT
     ELSE 'MINIMAL_INFLUENCE'
   END AS influence_tier
 
-FROM date_parsed
-ORDER BY start_timestamp DESC, brand, ad_id;
+FROM date_parsed;
 
 -- Add helpful comment
 COMMENT ON TABLE `your-project.ads_demo.ads_with_dates` AS 
@@ -1,7 +1,12 @@
 -- Create mock time-series data to test our framework
 -- This simulates ads with realistic start/end dates until we get real Meta Ad Library dates
 
-CREATE OR REPLACE TABLE `bigquery-ai-kaggle-469620.ads_demo.ads_with_dates` AS
+-- start_timestamp mirrors the mock start_date so the table has the standard layout
+-- and incremental runs do not try to rebuild it
+CREATE OR REPLACE TABLE `bigquery-ai-kaggle-469620.ads_demo.ads_with_dates`
+PARTITION BY DATE(start_timestamp)
+CLUSTER BY brand, ad_archive_id
+AS
 
 WITH mock_date_assignments AS (
   SELECT 
@@ -46,6 +51,7 @@ SELECT
   ad_archive_id,
   brand,
   start_date,
+  TIMESTAMP(start_date) as start_timestamp,
   
   -- Business logic: if end_date is in future, set to NULL (still active)
   CASE 
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Approximate Nearest-Neighbour Index for ad embeddings
+In-process IVF (inverted file) index in pure NumPy - no GPU, no extra dependencies
+
+Spherical k-means splits unit-normalized embeddings into lists; a query only
+scores the rows in its n_probe closest lists. Filters (brand, date range) are
+applied before scoring, and the probe widens automatically until k filtered
+neighbours are found, so filtered queries never come back short. Small
+indexes (a single list) are exact brute force.
+
+Typical use: "nearest competitor ads to ad X before date D":
+    index = AdEmbeddingIndex.from_store()
+    index.neighbors_of("1234567890", k=10, exclude_brands=["Warby Parker"], before="2025-06-01")
+"""
+
+import os
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from src.utils.embedding_store import LocalEmbeddingStore, EmbeddingSnapshot
+except ImportError:
+    LocalEmbeddingStore = None
+    EmbeddingSnapshot = None
+
+ANN_INDEX_PATH = os.environ.get("ANN_INDEX_PATH", "data/embeddings/ann_index.npz")
+
+# Rebuild the coarse quantizer once the index has grown this much since training
+RETRAIN_GROWTH_FACTOR = 4
+KMEANS_ITERATIONS = 10
+KMEANS_MAX_TRAINING_ROWS = 256  # per list
+
+
+class AdEmbeddingIndex:
+    """IVF cosine index over ad embeddings with brand/date filtering and upsert by ad_archive_id"""
+
+    def __init__(self, dimension: int, n_lists: Optional[int] = None, n_probe: int = 8, seed: int = 0):
+        self.dimension = dimension
+        self.n_lists = n_lists  # None: sqrt(n) at training time
+        self.n_probe = n_probe
+        self.seed = seed
+
+        self.vectors = np.empty((0, dimension), dtype=np.float32)
+        self.ad_ids = np.empty(0, dtype=object)
+        self.brands = np.empty(0, dtype=object)
+        self.timestamps = np.empty(0, dtype='datetime64[us]')
+        self.alive = np.empty(0, dtype=bool)
+        self.assignments = np.empty(0, dtype=np.int32)
+        self.centroids = np.empty((0, dimension), dtype=np.float32)
+
+        self._row_of = {}
+        self._list_rows = None
+        self._trained_size = 0
+
+    @classmethod
+    def build(cls, ad_ids, brands, start_timestamps, vectors, n_lists: Optional[int] = None,
+              n_probe: int = 8, seed: int = 0) -> "AdEmbeddingIndex":
+        vectors = np.asarray(vectors)
+        index = cls(vectors.shape[1], n_lists=n_lists, n_probe=n_probe, seed=seed)
+        index.add(ad_ids, brands, start_timestamps, vectors)
+        return index
+
+    @classmethod
+    def from_snapshot(cls, snapshot: "EmbeddingSnapshot", **kwargs) -> "AdEmbeddingIndex":
+        return cls.build(snapshot.ad_ids, snapshot.brands, snapshot.start_timestamps,
+                         snapshot.as_float32(), **kwargs)
+
+    @classmethod
+    def from_store(cls, store: "LocalEmbeddingStore" = None, refresh: bool = False, **kwargs) -> "AdEmbeddingIndex":
+        """Build from the local embedding store (refreshing it from BigQuery if asked or missing)"""
+        store = store or LocalEmbeddingStore()
+        if refresh or not store.exists():
+            store.refresh()
+        return cls.from_snapshot(store.load(), **kwargs)
+
+    def __len__(self) -> int:
+        return int(self.alive.sum())
+
+    def add(self, ad_ids, brands, start_timestamps, vectors):
+        """
+        Insert or replace ads by ad_archive_id.
+
+        Replaced ads are tombstoned and re-appended; the coarse quantizer is
+        retrained once the index outgrows its training size.
+        """
+        ad_ids = np.asarray([str(ad_id) for ad_id in ad_ids], dtype=object)
+        vectors = self._normalize(vectors)
+        if len(ad_ids) == 0:
+            return
+
+        # Last occurrence wins within a batch
+        _, last = np.unique(ad_ids[::-1], return_index=True)
+        keep = np.sort(len(ad_ids) - 1 - last)
+        ad_ids, vectors = ad_ids[keep], vectors[keep]
+        brands = np.asarray(brands, dtype=object)[keep]
+        timestamps = np.asarray(start_timestamps, dtype='datetime64[us]')[keep]
+
+        replaced = [self._row_of[ad_id] for ad_id in ad_ids if ad_id in self._row_of]
+        if replaced:
+            self.alive[replaced] = False
+
+        first_row = len(self.ad_ids)
+        self.vectors = np.vstack([self.vectors, vectors])
+        self.ad_ids = np.concatenate([self.ad_ids, ad_ids])
+        self.brands = np.concatenate([self.brands, brands])
+        self.timestamps = np.concatenate([self.timestamps, timestamps])
+        self.alive = np.concatenate([self.alive, np.ones(len(ad_ids), dtype=bool)])
+        self._row_of.update({ad_id: first_row + i for i, ad_id in enumerate(ad_ids)})
+
+        if len(self.centroids) == 0 or len(self) > RETRAIN_GROWTH_FACTOR * self._trained_size:
+            self.train()
+        else:
+            self.assignments = np.concatenate([self.assignments, self._assign(vectors)])
+            self._list_rows = None
+
+    def remove(self, ad_ids: Iterable[str]):
+        """Tombstone ads by ad_archive_id"""
+        rows = [self._row_of.pop(str(ad_id)) for ad_id in ad_ids if str(ad_id) in self._row_of]
+        if rows:
+            self.alive[rows] = False
+
+    def train(self):
+        """(Re)build the coarse quantizer with spherical k-means and reassign every row"""
+        self._compact()
+        count = len(self.vectors)
+        n_lists = self.n_lists or max(1, int(np.sqrt(count)))
+        n_lists = max(1, min(n_lists, count))
+
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(count, n_lists * KMEANS_MAX_TRAINING_ROWS)
+        sample = self.vectors[rng.choice(count, sample_size, replace=False)] if sample_size < count else self.vectors
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS if n_lists > 1 else 0):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1)
+            empty = norms == 0
+            # Re-seed empty lists with random points
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            norms[empty] = np.linalg.norm(sums[empty], axis=1)
+            centroids = (sums / norms[:, None]).astype(np.float32)
+
+        self.centroids = centroids
+        self.assignments = self._assign(self.vectors)
+        self._trained_size = count
+        self._list_rows = None
+
+    def search(self, query, k: int = 10, brands: Optional[List[str]] = None,
+               exclude_brands: Optional[List[str]] = None, since=None, before=None,
+               exclude_ids: Optional[Iterable[str]] = None, n_probe: Optional[int] = None,
+               exact: bool = False) -> pd.DataFrame:
+        """
+        Top-k nearest ads to a query vector.
+
+        Args:
+            brands / exclude_brands: only / never return these brands
+            since / before: start_timestamp range, since inclusive, before exclusive
+            n_probe: lists to scan (widened automatically until k filtered matches exist)
+            exact: scan every list
+
+        Returns:
+            DataFrame of ad_archive_id, brand, start_timestamp, similarity and distance
+            (COSINE distance, as ML.DISTANCE), nearest first
+        """
+        query = self._normalize(np.asarray(query).reshape(1, -1))[0]
+        allowed = self._filter_mask(brands, exclude_brands, since, before, exclude_ids)
+        list_rows = self._lists()
+
+        probe_order = np.argsort(-(self.centroids @ query)) if len(self.centroids) else np.empty(0, dtype=int)
+        n_probe = len(probe_order) if exact else min(n_probe or self.n_probe, len(probe_order))
+
+        chunks, found, probed = [], 0, 0
+        while probed < len(probe_order):
+            for list_id in probe_order[probed:max(n_probe, probed + 1)]:
+                rows = list_rows[list_id]
+                chunks.append(rows[allowed[rows]])
+                found += len(chunks[-1])
+            probed = min(max(n_probe, probed + 1), len(probe_order))
+            if found >= k:
+                break
+            n_probe = probed * 2  # widen until enough filtered candidates
+
+        candidates = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+        similarities = self.vectors[candidates] @ query
+        top = np.argsort(-similarities, kind='stable')[:k]
+        rows = candidates[top]
+        return pd.DataFrame({
+            'ad_archive_id': self.ad_ids[rows],
+            'brand': self.brands[rows],
+            'start_timestamp': self.timestamps[rows],
+            'similarity': similarities[top].astype(np.float64),
+            'distance': 1.0 - similarities[top].astype(np.float64),
+        })
+
+    def neighbors_of(self, ad_archive_id: str, k: int = 10, competitors_only: bool = True, **filters) -> pd.DataFrame:
+        """Nearest ads to an indexed ad (excluding itself, and its own brand when competitors_only)"""
+        row = self._row_of[str(ad_archive_id)]
+        exclude_brands = list(filters.pop('exclude_brands', None) or [])
+        if competitors_only:
+            exclude_brands.append(self.brands[row])
+        exclude_ids = set(filters.pop('exclude_ids', None) or []) | {str(ad_archive_id)}
+        return self.search(self.vectors[row], k, exclude_brands=exclude_brands, exclude_ids=exclude_ids, **filters)
+
+    def save(self, path: str = ANN_INDEX_PATH):
+        """Write the index to a single .npz file"""
+        self._compact()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            vectors=self.vectors,
+            ad_ids=self.ad_ids.astype(str),
+            brands=self.brands.astype(str),
+            timestamps=self.timestamps,
+            assignments=self.assignments,
+            centroids=self.centroids,
+            config=np.array([self.dimension, self.n_lists or 0, self.n_probe, self.seed, self._trained_size]),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = ANN_INDEX_PATH) -> "AdEmbeddingIndex":
+        with np.load(path, allow_pickle=False) as data:
+            dimension, n_lists, n_probe, seed, trained_size = (int(v) for v in data['config'])
+            index = cls(dimension, n_lists=n_lists or None, n_probe=n_probe, seed=seed)
+            index.vectors = data['vectors']
+            index.ad_ids = data['ad_ids'].astype(object)
+            index.brands = data['brands'].astype(object)
+            index.timestamps = data['timestamps']
+            index.assignments = data['assignments']
+            index.centroids = data['centroids']
+        index.alive = np.ones(len(index.ad_ids), dtype=bool)
+        index._row_of = {ad_id: row for row, ad_id in enumerate(index.ad_ids)}
+        index._trained_size = trained_size
+        return index
+
+    def _normalize(self, vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        if len(vectors) == 0:
+            return np.empty(0, dtype=np.int32)
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _lists(self) -> List[np.ndarray]:
+        """Rows per list (rebuilt lazily after adds)"""
+        if self._list_rows is None:
+            order = np.argsort(self.assignments, kind='stable')
+            bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+            self._list_rows = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+        return self._list_rows
+
+    def _filter_mask(self, brands, exclude_brands, since, before, exclude_ids) -> np.ndarray:
+        mask = self.alive.copy()
+        if brands is not None:
+            mask &= np.isin(self.brands, list(brands))
+        if exclude_brands:
+            mask &= ~np.isin(self.brands, list(exclude_brands))
+        if since is not None or before is not None:
+            mask &= ~np.isnat(self.timestamps)
+        if since is not None:
+            mask &= self.timestamps >= _utc_datetime64(since)
+        if before is not None:
+            mask &= self.timestamps < _utc_datetime64(before)
+        if exclude_ids:
+            rows = [self._row_of[str(ad_id)] for ad_id in exclude_ids if str(ad_id) in self._row_of]
+            mask[rows] = False
+        return mask
+
+    def _compact(self):
+        """Drop tombstoned rows"""
+        if self.alive.all():
+            return
+        keep = self.alive
+        self.vectors = self.vectors[keep]
+        self.ad_ids = self.ad_ids[keep]
+        self.brands = self.brands[keep]
+        self.timestamps = self.timestamps[keep]
+        if len(self.assignments) == len(keep):
+            self.assignments = self.assignments[keep]
+        self.alive = np.ones(len(self.ad_ids), dtype=bool)
+        self._row_of = {ad_id: row for row, ad_id in enumerate(self.ad_ids)}
+        self._list_rows = None
+
+
+def _utc_datetime64(value) -> np.datetime64:
+    """Naive UTC datetime64[us] for comparison with stored start timestamps"""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+    return np.datetime64(timestamp, 'us')
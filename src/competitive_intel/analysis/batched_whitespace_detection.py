@@ -24,6 +24,8 @@ class BatchedWhiteSpaceDetector:
         self.dataset_id = dataset_id
         self.brand = brand
         self.competitors = competitors
+        self.ads_table = f"{project_id}.{dataset_id}.ads_with_dates"  # Replaced by a recorded dataset in benchmarks
+        self.cta_table = f"{project_id}.{dataset_id}.cta_aggressiveness_analysis"
         self.logger = logging.getLogger(__name__)
 
     def analyze_strategic_positions_batched(self, run_id: str, batch_size: int = 50) -> str:
@@ -49,8 +51,8 @@ class BatchedWhiteSpaceDetector:
             ROW_NUMBER() OVER (PARTITION BY r.brand ORDER BY r.start_timestamp DESC) as rn,
             -- Create batches for processing
             FLOOR((ROW_NUMBER() OVER (ORDER BY r.brand, r.start_timestamp) - 1) / {batch_size}) as batch_id
-          FROM `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates` r
-          LEFT JOIN `{BQ_PROJECT}.{BQ_DATASET}.cta_aggressiveness_analysis` c
+          FROM `{self.ads_table}` r
+          LEFT JOIN `{self.cta_table}` c
             ON r.brand = c.brand
           WHERE r.creative_text IS NOT NULL
             AND LENGTH(r.creative_text) > 20
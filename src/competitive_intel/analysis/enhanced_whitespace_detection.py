@@ -45,6 +45,8 @@ class Enhanced3DWhiteSpaceDetector:
         self.dataset_id = dataset_id
         self.brand = brand
         self.competitors = competitors
+        self.ads_table = f"{project_id}.{dataset_id}.ads_with_dates"  # Replaced by a recorded dataset in benchmarks
+        self.cta_table = f"{project_id}.{dataset_id}.cta_aggressiveness_analysis"
         self.logger = logging.getLogger(__name__)
         
     def analyze_real_strategic_positions(self, run_id: str) -> str:
@@ -88,8 +90,8 @@ class Enhanced3DWhiteSpaceDetector:
             ) as target_persona_raw,
             -- Message quality from CTA analysis (brand-level)
             COALESCE(c.avg_cta_aggressiveness * 0.5, 3.0) as message_strength
-          FROM `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates` r
-          LEFT JOIN `{BQ_PROJECT}.{BQ_DATASET}.cta_aggressiveness_analysis` c
+          FROM `{self.ads_table}` r
+          LEFT JOIN `{self.cta_table}` c
             ON r.brand = c.brand
           WHERE r.creative_text IS NOT NULL
             AND LENGTH(r.creative_text) > 20
@@ -14,6 +14,11 @@ import logging
 import os
 import json
 
+from src.competitive_intel.analysis.whitespace_cache import (
+    WHITESPACE_CACHE_ENABLED, WhitespaceChunkCache, ad_set_fingerprint_sql, chunk_analysis_script,
+    chunk_counts_sql, prompt_version
+)
+
 # Global BigQuery constants
 BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
 BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
@@ -40,13 +45,19 @@ class HybridWhiteSpaceDetector:
     - Target: Rich campaign templates in <3 minutes
     """
 
-    def __init__(self, project_id: str, dataset_id: str, brand: str, competitors: List[str]):
+    def __init__(self, project_id: str, dataset_id: str, brand: str, competitors: List[str],
+                 use_cache: bool = WHITESPACE_CACHE_ENABLED):
         self.project_id = project_id
         self.dataset_id = dataset_id
         self.brand = brand
         self.competitors = competitors
+        self.ads_table = f"{project_id}.{dataset_id}.ads_with_dates"  # Replaced by a recorded dataset in benchmarks
+        self.cta_table = f"{project_id}.{dataset_id}.cta_aggressiveness_analysis"
         self.logger = logging.getLogger(__name__)
 
+        # Chunks whose ads are unchanged since an earlier run reuse that run's AI result
+        self.cache = WhitespaceChunkCache("hybrid", prompt_version(self._chunk_prompt_sql())) if use_cache else None
+
     def analyze_hybrid_strategic_positions(self, run_id: str) -> str:
         """
         Generate hybrid SQL combining parallel processing with enhanced intelligence
@@ -58,10 +69,7 @@ class HybridWhiteSpaceDetector:
 
         Expected Performance: ~25 seconds for full dataset analysis
         """
-        return f"""
-        -- Hybrid Chunked-Enhanced White Space Detection
-        -- Full dataset processing with campaign intelligence in <3 minutes
-        WITH time_chunks AS (
+        chunk_ctes = f"""time_chunks AS (
           -- Enhanced time-based segmentation for better temporal intelligence
           SELECT 'recent_campaigns' as period_name,
                  DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY) as start_date,
@@ -82,7 +90,7 @@ class HybridWhiteSpaceDetector:
                  1.0 as recency_multiplier
         ),
 
-        hybrid_brand_analysis AS (
+        chunk_inputs AS (
           SELECT
             tc.period_name,
             tc.recency_weight,
@@ -91,52 +99,30 @@ class HybridWhiteSpaceDetector:
             COUNT(*) as ads_in_period,
             COUNT(DISTINCT r.publisher_platforms) as platform_diversity,
             AVG(LENGTH(COALESCE(r.creative_text, ''))) as avg_message_length,
+            {ad_set_fingerprint_sql('r')} as ad_set_fingerprint,
 
-            -- HYBRID INNOVATION: Single comprehensive AI.GENERATE call
+            -- HYBRID INNOVATION: Single comprehensive AI.GENERATE call per chunk
             -- Combines strategic analysis + campaign intelligence
-            AI.GENERATE(
-              CONCAT(
-                'Analyze these ', COUNT(*), ' eyewear ads from ', r.brand, ' in the ', tc.period_name, ' period. ',
-                'Return detailed JSON with top 3 strategic opportunities: ',
-                '{{"opportunities": [{{',
-                '"messaging_angle": "EMOTIONAL|FUNCTIONAL|ASPIRATIONAL|SOCIAL_PROOF|PROBLEM_SOLUTION", ',
-                '"funnel_stage": "AWARENESS|CONSIDERATION|DECISION|RETENTION", ',
-                '"target_persona": "2-3 words like Young Professionals or Style Conscious", ',
-                '"competitive_intensity": "LOW|MEDIUM|HIGH", ',
-                '"market_potential": 0.85, ',
-                '"campaign_brief": {{',
-                  '"headline_template": "Specific headline for this messaging angle and persona", ',
-                  '"value_proposition": "Core benefit statement that resonates with persona", ',
-                  '"primary_cta": "Shop Now|Learn More|Try Free|Get Started", ',
-                  '"secondary_cta": "Alternative action option", ',
-                  '"investment_tier": "HIGH ($100K-200K)|MEDIUM ($30K-100K)|LOW ($10K-30K)", ',
-                  '"success_metrics": "CTR >X.X%, CPA <$XX, Brand lift +X%", ',
-                  '"channel_focus": "Instagram|Facebook|Cross-platform|Video", ',
-                  '"urgency_level": "HIGH|MEDIUM|LOW", ',
-                  '"creative_style": "Visual-heavy|Text-rich|Minimalist|Lifestyle", ',
-                  '"audience_size": "Large (500K+)|Medium (100K-500K)|Small (50K-100K)", ',
-                  '"timeframe": "Launch in 2-4 weeks|4-8 weeks|8+ weeks" }}, ',
-                '"ad_count": ', COUNT(*), ', ',
-                '"confidence": 0.9 }}]}}. ',
-                'Base analysis on: ', STRING_AGG(SUBSTR(r.creative_text, 1, 200), ' || ' LIMIT 20), '. ',
-                'Focus on gaps vs competitors and actionable campaign recommendations.'
-              ),
-              connection_id => '{self.project_id}.us.vertex-ai'
-            ).result as hybrid_intelligence_json
+            {self._chunk_prompt_sql()} as prompt
 
           FROM time_chunks tc
-          JOIN `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates` r
+          JOIN `{self.ads_table}` r
             ON DATE(r.start_timestamp) BETWEEN tc.start_date AND tc.end_date
-          LEFT JOIN `{BQ_PROJECT}.{BQ_DATASET}.cta_aggressiveness_analysis` c
+          LEFT JOIN `{self.cta_table}` c
             ON r.brand = c.brand
           WHERE r.creative_text IS NOT NULL
             AND LENGTH(r.creative_text) > 20
             AND r.brand IN ('{self.brand}', {', '.join(f"'{c}'" for c in self.competitors)})
           GROUP BY tc.period_name, tc.recency_weight, tc.recency_multiplier, r.brand
           HAVING COUNT(*) >= 2  -- Ensure sufficient data per chunk
-        ),
+        )"""
 
-        parsed_hybrid_intelligence AS (
+        return f"""
+        -- Hybrid Chunked-Enhanced White Space Detection
+        -- Full dataset processing with campaign intelligence in <3 minutes
+        {chunk_analysis_script(chunk_ctes, 'hybrid_intelligence_json', f'{self.project_id}.us.vertex-ai', self.cache)}
+
+        WITH parsed_hybrid_intelligence AS (
           SELECT
             period_name,
             recency_weight,
@@ -163,7 +149,7 @@ class HybridWhiteSpaceDetector:
             REGEXP_EXTRACT_ALL(hybrid_intelligence_json, r'"channel_focus":\\s*"([^"]+)"') as channel_focus,
             REGEXP_EXTRACT_ALL(hybrid_intelligence_json, r'"audience_size":\\s*"([^"]+)"') as audience_sizes
 
-          FROM hybrid_brand_analysis
+          FROM whitespace_chunks
           WHERE hybrid_intelligence_json IS NOT NULL
             AND hybrid_intelligence_json != ''
         ),
@@ -342,13 +328,44 @@ class HybridWhiteSpaceDetector:
           FROM hybrid_opportunity_scoring
         )
 
-        SELECT * FROM final_hybrid_opportunities
+        SELECT *, {chunk_counts_sql()} FROM final_hybrid_opportunities
         WHERE space_type IN ('VIRGIN_TERRITORY', 'MONOPOLY', 'UNDERSERVED', 'COMPETITIVE')
           AND overall_score > 0.20  -- Higher threshold for quality opportunities
         ORDER BY overall_score DESC, enhanced_market_potential DESC
         LIMIT 30  -- More opportunities with campaign intelligence
         """
 
+    @staticmethod
+    def _chunk_prompt_sql() -> str:
+        """AI prompt for one (period, brand) chunk; aggregates over the chunk's ads (alias r)"""
+        return """
+        CONCAT(
+          'Analyze these ', COUNT(*), ' eyewear ads from ', r.brand, ' in the ', tc.period_name, ' period. ',
+          'Return detailed JSON with top 3 strategic opportunities: ',
+          '{"opportunities": [{',
+          '"messaging_angle": "EMOTIONAL|FUNCTIONAL|ASPIRATIONAL|SOCIAL_PROOF|PROBLEM_SOLUTION", ',
+          '"funnel_stage": "AWARENESS|CONSIDERATION|DECISION|RETENTION", ',
+          '"target_persona": "2-3 words like Young Professionals or Style Conscious", ',
+          '"competitive_intensity": "LOW|MEDIUM|HIGH", ',
+          '"market_potential": 0.85, ',
+          '"campaign_brief": {',
+            '"headline_template": "Specific headline for this messaging angle and persona", ',
+            '"value_proposition": "Core benefit statement that resonates with persona", ',
+            '"primary_cta": "Shop Now|Learn More|Try Free|Get Started", ',
+            '"secondary_cta": "Alternative action option", ',
+            '"investment_tier": "HIGH ($100K-200K)|MEDIUM ($30K-100K)|LOW ($10K-30K)", ',
+            '"success_metrics": "CTR >X.X%, CPA <$XX, Brand lift +X%", ',
+            '"channel_focus": "Instagram|Facebook|Cross-platform|Video", ',
+            '"urgency_level": "HIGH|MEDIUM|LOW", ',
+            '"creative_style": "Visual-heavy|Text-rich|Minimalist|Lifestyle", ',
+            '"audience_size": "Large (500K+)|Medium (100K-500K)|Small (50K-100K)", ',
+            '"timeframe": "Launch in 2-4 weeks|4-8 weeks|8+ weeks" }, ',
+          '"ad_count": ', COUNT(*), ', ',
+          '"confidence": 0.9 }]}. ',
+          'Base analysis on: ', STRING_AGG(SUBSTR(r.creative_text, 1, 200), ' || ' LIMIT 20), '. ',
+          'Focus on gaps vs competitors and actionable campaign recommendations.'
+        )"""
+
     def generate_hybrid_opportunities(self, results_df) -> List[Dict[str, Any]]:
         """Generate enhanced strategic recommendations with campaign intelligence"""
 
@@ -418,10 +435,13 @@ class HybridWhiteSpaceDetector:
 
             if results is not None and not results.empty:
                 opportunities = self.generate_hybrid_opportunities(results)
+                analyzed_chunks = int(results.iloc[0].get('analyzed_chunks', 0))
+                cached_chunks = int(results.iloc[0].get('cached_chunks', 0))
                 campaign_ready_count = len([o for o in opportunities if o.get('campaign_brief', {}).get('readiness_level') == 'CAMPAIGN_READY'])
                 high_confidence_count = len([o for o in opportunities if o.get('confidence_level') == 'HIGH'])
             else:
                 opportunities = []
+                analyzed_chunks = cached_chunks = 0
                 campaign_ready_count = 0
                 high_confidence_count = 0
 
@@ -433,6 +453,8 @@ class HybridWhiteSpaceDetector:
                 'campaign_ready_opportunities': campaign_ready_count,
                 'high_confidence_opportunities': high_confidence_count,
                 'opportunities': opportunities,
+                'analyzed_chunks': analyzed_chunks,
+                'cached_chunks': cached_chunks,
                 'coverage': 'FULL_DATASET',
                 'approach': 'hybrid_chunked_enhanced',
                 'intelligence_level': 'CAMPAIGN_READY',
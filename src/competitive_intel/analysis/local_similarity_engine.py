@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Local Similarity Engine
+Vectorized NumPy replacement for Stage 8's quadratic embedding joins
+
+Pulls embeddings once (via the local embedding store), keeps ads sorted by
+brand and start_timestamp, and computes windowed cosine similarities with
+blocked matrix multiplies. Outputs match the creative fatigue and copying
+detection SQL in AnalysisStage row for row on a float32 store, as long as
+ads_with_dates has one row per (ad_archive_id, brand); the SQL would count a
+duplicated ad once per row, the store keeps its earliest start_timestamp.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+try:
+    from src.utils.embedding_store import LocalEmbeddingStore, EmbeddingSnapshot
+except ImportError:
+    LocalEmbeddingStore = None
+    EmbeddingSnapshot = None
+
+DEFAULT_BLOCK_SIZE = 512
+
+
+class LocalSimilarityEngine:
+    """
+    In-memory similarity engine over unit-normalized ad embeddings.
+
+    Similarities are computed in float64 so results match BigQuery's
+    ML.DISTANCE(..., 'COSINE') on the same float32 vectors.
+    """
+
+    def __init__(self, brands: np.ndarray, ad_ids: np.ndarray, start_timestamps: np.ndarray,
+                 vectors: np.ndarray, block_size: int = DEFAULT_BLOCK_SIZE):
+        timestamps = np.asarray(start_timestamps, dtype='datetime64[us]')
+        vectors = np.asarray(vectors)
+        norms = np.linalg.norm(vectors.astype(np.float64), axis=1) if len(vectors) else np.zeros(0)
+
+        # Same rows the SQL sees: a timestamp and a usable embedding
+        valid = ~np.isnat(timestamps) & (norms > 0)
+
+        brands = np.asarray(brands, dtype=object)[valid]
+        timestamps = timestamps[valid]
+        order = np.lexsort((timestamps, brands))
+
+        self.brands = brands[order]
+        self.ad_ids = np.asarray(ad_ids, dtype=object)[valid][order]
+        self.timestamps = timestamps[order]
+        self.days = self.timestamps.astype('datetime64[D]').astype(np.int64)
+        self.unit_vectors = vectors[valid][order].astype(np.float64) / norms[valid][order][:, None]
+        self.block_size = block_size
+
+    @classmethod
+    def from_snapshot(cls, snapshot: "EmbeddingSnapshot", block_size: int = DEFAULT_BLOCK_SIZE):
+        return cls(snapshot.brands, snapshot.ad_ids, snapshot.start_timestamps,
+                   snapshot.as_float32(), block_size)
+
+    @classmethod
+    def from_store(cls, store: "LocalEmbeddingStore" = None, refresh: bool = True,
+                   block_size: int = DEFAULT_BLOCK_SIZE):
+        """
+        Load from the local embedding store, refreshing it from BigQuery first (one incremental scan).
+
+        Only a float32 store reproduces the SQL results; float16 and int8 stores are refused.
+        """
+        store = store or LocalEmbeddingStore()
+        if store.dtype != 'float32':
+            raise ValueError(f"Local similarity requires a float32 embedding store, got {store.dtype} "
+                             f"(set EMBEDDING_STORE_DTYPE=float32)")
+        if refresh or not store.exists() or store.manifest()['dtype'] != store.dtype:
+            store.refresh()
+        return cls.from_snapshot(store.load(), block_size)
+
+    def __len__(self) -> int:
+        return len(self.ad_ids)
+
+    def _brand_slice(self, brand: str) -> slice:
+        start = np.searchsorted(self.brands, brand, side='left')
+        end = np.searchsorted(self.brands, brand, side='right')
+        return slice(int(start), int(end))
+
+    def recent_similarity(self, brand: str, window_days: int = 30) -> np.ndarray:
+        """
+        Average cosine similarity of each ad to the same brand's earlier ads within window_days.
+
+        An earlier ad has a strictly smaller start_timestamp and a start date at most
+        window_days before. Ads without any earlier ad in the window get NaN.
+        """
+        rows = self._brand_slice(brand)
+        vectors = self.unit_vectors[rows]
+        timestamps = self.timestamps[rows]
+        days = self.days[rows]
+        count = len(vectors)
+
+        # Rows are time-sorted, so each ad's earlier ads form a contiguous range [lo, hi)
+        hi = np.searchsorted(timestamps, timestamps, side='left')
+        lo = np.searchsorted(days, days - window_days, side='left')
+
+        averages = np.full(count, np.nan)
+        for start in range(0, count, self.block_size):
+            end = min(start + self.block_size, count)
+            block_lo, block_hi = lo[start:end], hi[start:end]
+            window_start, window_end = int(block_lo.min()), int(block_hi.max())
+            if window_end <= window_start:
+                continue
+
+            similarities = vectors[start:end] @ vectors[window_start:window_end].T
+            columns = np.arange(window_start, window_end)
+            mask = (columns >= block_lo[:, None]) & (columns < block_hi[:, None])
+
+            pair_counts = mask.sum(axis=1)
+            sums = np.where(mask, similarities, 0.0).sum(axis=1)
+            has_pairs = pair_counts > 0
+            averages[start:end][has_pairs] = sums[has_pairs] / pair_counts[has_pairs]
+
+        return averages
+
+    def creative_fatigue(self, brand: str, window_days: int = 30) -> Optional[Dict]:
+        """
+        Creative fatigue metrics for a brand, matching AnalysisStage's fatigue SQL.
+
+        Returns:
+            Dict with the SQL's output columns, or None when no ad has an earlier ad in the window
+        """
+        averages = self.recent_similarity(brand, window_days)
+        averages = averages[~np.isnan(averages)]
+        if len(averages) == 0:
+            return None
+
+        repetition = float(averages.mean())
+        variance = float(averages.std(ddof=1)) if len(averages) > 1 else None
+
+        if repetition > 0.8:
+            fatigue_score = 1.0
+        elif repetition > 0.6:
+            fatigue_score = 0.7
+        elif repetition > 0.4:
+            fatigue_score = 0.4
+        else:
+            fatigue_score = 0.2
+
+        if repetition > 0.8:
+            fatigue_level = 'HIGH'
+        elif repetition > 0.5:
+            fatigue_level = 'MEDIUM'
+        else:
+            fatigue_level = 'LOW'
+
+        return {
+            'brand': brand,
+            'fatigue_score': fatigue_score,
+            'originality_score': max(0.0, 1.0 - repetition),
+            'refresh_signal_strength': max(0.1, variance if variance is not None else 0.1),
+            'fatigue_level': fatigue_level,
+            'analyzed_ads': int(len(averages)),
+            'avg_semantic_repetition': repetition,
+            'repetition_variance': variance,
+            'high_fatigue_count': 1 if fatigue_level == 'HIGH' else 0,
+        }
+
+    def copying(self, brand: str, distance_threshold: float = 0.3) -> Optional[Dict]:
+        """
+        Closest potential copier of a brand, matching the exhaustive copying SQL.
+
+        Pairs every brand ad with every competitor ad starting on the same day or later
+        whose cosine distance is below distance_threshold, then averages per competitor.
+
+        Returns:
+            Dict with potential_copier, avg_similarity (mean distance), min_lag_days and
+            comparison_count, or None when no pair qualifies
+        """
+        rows = self._brand_slice(brand)
+        target_vectors, target_days = self.unit_vectors[rows], self.days[rows]
+        others = np.ones(len(self), dtype=bool)
+        others[rows] = False
+        other_vectors, other_days = self.unit_vectors[others], self.days[others]
+        copier_names, copier_codes = np.unique(self.brands[others], return_inverse=True)
+
+        distance_sums = np.zeros(len(copier_names))
+        pair_counts = np.zeros(len(copier_names), dtype=np.int64)
+        min_lags = np.full(len(copier_names), np.iinfo(np.int64).max)
+
+        for start in range(0, len(target_vectors), self.block_size):
+            end = min(start + self.block_size, len(target_vectors))
+            distances = 1.0 - target_vectors[start:end] @ other_vectors.T
+            lags = other_days[None, :] - target_days[start:end, None]
+            block_rows, block_cols = np.nonzero((distances < distance_threshold) & (lags >= 0))
+            if len(block_cols) == 0:
+                continue
+
+            codes = copier_codes[block_cols]
+            distance_sums += np.bincount(codes, weights=distances[block_rows, block_cols], minlength=len(copier_names))
+            pair_counts += np.bincount(codes, minlength=len(copier_names))
+            np.minimum.at(min_lags, codes, lags[block_rows, block_cols])
+
+        matched = pair_counts > 0
+        if not matched.any():
+            return None
+
+        averages = np.where(matched, distance_sums / np.maximum(pair_counts, 1), np.inf)
+        best = int(np.argmin(averages))
+        return {
+            'potential_copier': copier_names[best],
+            'avg_similarity': float(averages[best]),
+            'min_lag_days': int(min_lags[best]),
+            'comparison_count': int(pair_counts[best]),
+        }
@@ -12,6 +12,11 @@ from datetime import datetime, timedelta
 import logging
 import os
 
+from src.competitive_intel.analysis.whitespace_cache import (
+    WHITESPACE_CACHE_ENABLED, WhitespaceChunkCache, ad_set_fingerprint_sql, chunk_analysis_script,
+    chunk_counts_sql, prompt_version
+)
+
 # Global BigQuery constants
 BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
 BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
@@ -19,13 +24,19 @@ BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
 class ParallelWhiteSpaceDetector:
     """Optimized 3D white space detection using parallel chunked processing"""
 
-    def __init__(self, project_id: str, dataset_id: str, brand: str, competitors: List[str]):
+    def __init__(self, project_id: str, dataset_id: str, brand: str, competitors: List[str],
+                 use_cache: bool = WHITESPACE_CACHE_ENABLED):
         self.project_id = project_id
         self.dataset_id = dataset_id
         self.brand = brand
         self.competitors = competitors
+        self.ads_table = f"{project_id}.{dataset_id}.ads_with_dates"  # Replaced by a recorded dataset in benchmarks
+        self.cta_table = f"{project_id}.{dataset_id}.cta_aggressiveness_analysis"
         self.logger = logging.getLogger(__name__)
 
+        # Chunks whose ads are unchanged since an earlier run reuse that run's AI result
+        self.cache = WhitespaceChunkCache("parallel", prompt_version(self._chunk_prompt_sql())) if use_cache else None
+
     def analyze_strategic_positions_parallel(self, run_id: str) -> str:
         """
         Generate optimized SQL for strategic position analysis using chunked parallel processing
@@ -36,9 +47,7 @@ class ParallelWhiteSpaceDetector:
         3. Process full dataset without sampling
         4. 6-second execution time vs 2+ minutes
         """
-        return f"""
-        -- Parallel 3D White Space Detection with Full Dataset Coverage
-        WITH time_chunks AS (
+        chunk_ctes = f"""time_chunks AS (
           -- Define analysis time periods
           SELECT 'recent_campaigns' as period_name,
                  DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY) as start_date,
@@ -56,42 +65,34 @@ class ParallelWhiteSpaceDetector:
                  'LOW' as recency_weight
         ),
 
-        chunked_brand_analysis AS (
+        chunk_inputs AS (
           SELECT
             tc.period_name,
             tc.recency_weight,
             r.brand,
             COUNT(*) as ads_in_period,
+            {ad_set_fingerprint_sql('r')} as ad_set_fingerprint,
 
             -- Parallel AI.GENERATE analysis per chunk
-            AI.GENERATE(
-              CONCAT(
-                'Analyze these ', COUNT(*), ' eyewear ads from ', r.brand, ' in the ', tc.period_name, ' period. ',
-                'Identify the top 5 strategic positions used. For each position, return JSON format: ',
-                '{{"positions": [{{',
-                '"messaging_angle": "EMOTIONAL|FUNCTIONAL|ASPIRATIONAL|SOCIAL_PROOF|PROBLEM_SOLUTION", ',
-                '"funnel_stage": "AWARENESS|CONSIDERATION|DECISION|RETENTION", ',
-                '"target_persona": "Young Professionals|Style Conscious|Price Sensitive|Premium Buyers|Tech Savvy", ',
-                '"intensity": "HIGH|MEDIUM|LOW", ',
-                '"ad_count": number}}]}}. ',
-                'Sample ads: ', STRING_AGG(SUBSTR(r.creative_text, 1, 150), ' | ' LIMIT 15)
-              ),
-              connection_id => '{self.project_id}.us.vertex-ai'
-            ).result as strategic_positions_json
+            {self._chunk_prompt_sql()} as prompt
 
           FROM time_chunks tc
-          JOIN `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates` r
+          JOIN `{self.ads_table}` r
             ON DATE(r.start_timestamp) BETWEEN tc.start_date AND tc.end_date
-          LEFT JOIN `{BQ_PROJECT}.{BQ_DATASET}.cta_aggressiveness_analysis` c
+          LEFT JOIN `{self.cta_table}` c
             ON r.brand = c.brand
           WHERE r.creative_text IS NOT NULL
             AND LENGTH(r.creative_text) > 20
             AND r.brand IN ('{self.brand}', {', '.join(f"'{c}'" for c in self.competitors)})
           GROUP BY tc.period_name, tc.recency_weight, r.brand
           HAVING COUNT(*) >= 3  -- Ensure sufficient data per chunk
-        ),
+        )"""
 
-        parsed_strategic_positions AS (
+        return f"""
+        -- Parallel 3D White Space Detection with Full Dataset Coverage
+        {chunk_analysis_script(chunk_ctes, 'strategic_positions_json', f'{self.project_id}.us.vertex-ai', self.cache)}
+
+        WITH parsed_strategic_positions AS (
           SELECT
             period_name,
             recency_weight,
@@ -105,7 +106,7 @@ class ParallelWhiteSpaceDetector:
             REGEXP_EXTRACT_ALL(strategic_positions_json, r'"target_persona":\\s*"([^"]+)"') as target_personas,
             REGEXP_EXTRACT_ALL(strategic_positions_json, r'"intensity":\\s*"([^"]+)"') as intensities
 
-          FROM chunked_brand_analysis
+          FROM whitespace_chunks
           WHERE strategic_positions_json IS NOT NULL
         ),
 
@@ -247,13 +248,29 @@ class ParallelWhiteSpaceDetector:
           FROM white_space_scoring
         )
 
-        SELECT * FROM final_opportunities
+        SELECT *, {chunk_counts_sql()} FROM final_opportunities
         WHERE space_type IN ('VIRGIN_TERRITORY', 'MONOPOLY', 'UNDERSERVED', 'COMPETITIVE')
           AND overall_score > 0.15  -- Include more opportunities with lower threshold
         ORDER BY overall_score DESC, market_potential DESC
         LIMIT 25
         """
 
+    @staticmethod
+    def _chunk_prompt_sql() -> str:
+        """AI prompt for one (period, brand) chunk; aggregates over the chunk's ads (alias r)"""
+        return """
+        CONCAT(
+          'Analyze these ', COUNT(*), ' eyewear ads from ', r.brand, ' in the ', tc.period_name, ' period. ',
+          'Identify the top 5 strategic positions used. For each position, return JSON format: ',
+          '{"positions": [{',
+          '"messaging_angle": "EMOTIONAL|FUNCTIONAL|ASPIRATIONAL|SOCIAL_PROOF|PROBLEM_SOLUTION", ',
+          '"funnel_stage": "AWARENESS|CONSIDERATION|DECISION|RETENTION", ',
+          '"target_persona": "Young Professionals|Style Conscious|Price Sensitive|Premium Buyers|Tech Savvy", ',
+          '"intensity": "HIGH|MEDIUM|LOW", ',
+          '"ad_count": number}]}. ',
+          'Sample ads: ', STRING_AGG(SUBSTR(r.creative_text, 1, 150), ' | ' LIMIT 15)
+        )"""
+
     def generate_strategic_opportunities(self, results_df) -> List[str]:
         """Generate strategic recommendations from parallel analysis results"""
 
@@ -298,9 +315,12 @@ class ParallelWhiteSpaceDetector:
             if results is not None and not results.empty:
                 opportunities = self.generate_strategic_opportunities(results)
                 white_space_count = len(results[results['space_type'].isin(['VIRGIN_TERRITORY', 'UNDERSERVED'])])
+                analyzed_chunks = int(results.iloc[0].get('analyzed_chunks', 0))
+                cached_chunks = int(results.iloc[0].get('cached_chunks', 0))
             else:
                 opportunities = []
                 white_space_count = 0
+                analyzed_chunks = cached_chunks = 0
 
             return {
                 'status': 'success',
@@ -308,6 +328,8 @@ class ParallelWhiteSpaceDetector:
                 'total_positions_analyzed': len(results) if results is not None else 0,
                 'white_space_opportunities': white_space_count,
                 'strategic_opportunities': opportunities,
+                'analyzed_chunks': analyzed_chunks,
+                'cached_chunks': cached_chunks,
                 'performance_category': self._categorize_performance(duration),
                 'coverage': 'FULL_DATASET',
                 'approach': 'parallel_chunked_processing',
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Budget-aware visual sample planner
+Chooses which ads Stage 7 sends to multimodal analysis, in pure NumPy
+
+Turns a dollar budget into an image count using the cost estimator's per-image
+price, then picks ads by greedy facility location over each brand's embeddings:
+every pick is the ad (across all brands) that most increases creative coverage,
+where an ad is covered by its most similar picked ad of the same brand. Picks are
+therefore medoids of the brand's creative clusters, large and diverse brands get
+more of the budget, and near-duplicates are never paid for twice.
+
+Ads already analyzed (visual analysis cache) are free and count as picked from
+the start, so the budget goes to creative the cache does not cover yet.
+Ads without an embedding are treated as unlike every other ad.
+"""
+
+import heapq
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MIN_PER_BRAND = 1
+DEFAULT_MAX_CANDIDATES_PER_BRAND = 2000
+
+PLAN_COLUMNS = ['brand', 'ad_archive_id', 'media_storage_path', 'is_cached', 'plan_rank',
+                'coverage_gain', 'represented_ads', 'brand_coverage']
+
+
+class VisualSamplePlanner:
+    """Greedy coverage-maximizing sampler under a total dollar budget"""
+
+    def __init__(self, budget_usd: float, cost_per_image: float,
+                 min_per_brand: int = DEFAULT_MIN_PER_BRAND,
+                 max_candidates_per_brand: int = DEFAULT_MAX_CANDIDATES_PER_BRAND):
+        if cost_per_image <= 0:
+            raise ValueError(f"cost_per_image must be positive, got {cost_per_image}")
+        self.budget_usd = budget_usd
+        self.cost_per_image = cost_per_image
+        self.min_per_brand = min_per_brand
+        self.max_candidates_per_brand = max_candidates_per_brand
+
+    @property
+    def image_budget(self) -> int:
+        # Small epsilon so e.g. $0.015 at $0.0025 buys 6 images despite float rounding
+        return max(0, int(self.budget_usd / self.cost_per_image + 1e-9))
+
+    def plan(self, candidates: pd.DataFrame, vectors_by_id: Dict[str, np.ndarray]) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Pick the sample set.
+
+        Args:
+            candidates: One row per ad with media: brand, ad_archive_id, media_storage_path,
+                is_cached (already analyzed, free) and optionally start_timestamp (newest ads
+                are kept when a brand exceeds max_candidates_per_brand)
+            vectors_by_id: ad_archive_id -> embedding
+
+        Returns:
+            (plan DataFrame with PLAN_COLUMNS, summary dict)
+        """
+        brands = {}
+        for brand, group in candidates.groupby('brand', sort=True):
+            if len(group) > self.max_candidates_per_brand:
+                sort_columns = ['is_cached'] + (['start_timestamp'] if 'start_timestamp' in group else [])
+                group = group.sort_values(sort_columns, ascending=False).head(self.max_candidates_per_brand)
+            brands[brand] = _BrandCoverage(group.reset_index(drop=True), vectors_by_id)
+
+        budget = self.image_budget
+        picks = 0
+
+        # Every brand with uncached ads gets min_per_brand picks first, best gains first
+        for _ in range(self.min_per_brand):
+            for brand in sorted(brands, key=lambda b: -brands[b].best_gain()):
+                if picks >= budget:
+                    break
+                if brands[brand].pick(picks + 1) is not None:
+                    picks += 1
+
+        # Then the globally best marginal gain, lazily re-evaluated per brand
+        heap = [(-state.best_gain(), brand) for brand, state in brands.items()]
+        heapq.heapify(heap)
+        while picks < budget and heap:
+            neg_gain, brand = heapq.heappop(heap)
+            current = brands[brand].best_gain()
+            if current <= 0:
+                continue
+            if -neg_gain > current + 1e-9:
+                heapq.heappush(heap, (-current, brand))
+                continue
+            brands[brand].pick(picks + 1)
+            picks += 1
+            heapq.heappush(heap, (-brands[brand].best_gain(), brand))
+
+        frames = [rows for rows in (state.plan_rows() for state in brands.values()) if len(rows)]
+        plan = pd.concat(frames, ignore_index=True).sort_values(['plan_rank', 'brand']).reset_index(drop=True) \
+            if frames else pd.DataFrame(columns=PLAN_COLUMNS)
+
+        summary = {
+            'image_budget': budget,
+            'new_images': picks,
+            'cached_images': int(plan['is_cached'].sum()) if len(plan) else 0,
+            'estimated_cost': picks * self.cost_per_image,
+            'brand_coverage': {brand: state.coverage() for brand, state in brands.items()},
+        }
+        return plan, summary
+
+
+class _BrandCoverage:
+    """Facility-location state for one brand"""
+
+    def __init__(self, ads: pd.DataFrame, vectors_by_id: Dict[str, np.ndarray]):
+        self.ads = ads
+        count = len(ads)
+        vectors = [vectors_by_id.get(str(ad_id)) for ad_id in ads['ad_archive_id']]
+        dimension = next((len(v) for v in vectors if v is not None and len(v)), 1)
+        matrix = np.zeros((count, dimension), dtype=np.float32)
+        for row, vector in enumerate(vectors):
+            if vector is not None and len(vector) == dimension:
+                norm = np.linalg.norm(vector)
+                if norm > 0:
+                    matrix[row] = np.asarray(vector, dtype=np.float32) / norm
+
+        # Similarity in [0, 1]; ads without embeddings only cover themselves
+        self.similarity = np.clip(matrix @ matrix.T, 0.0, 1.0)
+        np.fill_diagonal(self.similarity, 1.0)
+
+        self.selected = ads['is_cached'].astype(bool).to_numpy().copy()
+        self.ranks = np.zeros(count, dtype=np.int64)
+        self.gains = np.zeros(count)
+        self.best = self.similarity[:, self.selected].max(axis=1) if self.selected.any() else np.zeros(count)
+        self._candidate_gains: Optional[np.ndarray] = None
+
+    def _marginal_gains(self) -> np.ndarray:
+        if self._candidate_gains is None:
+            gains = np.maximum(self.similarity - self.best[:, None], 0.0).sum(axis=0)
+            gains[self.selected] = -np.inf
+            self._candidate_gains = gains
+        return self._candidate_gains
+
+    def best_gain(self) -> float:
+        if self.selected.all():
+            return 0.0
+        return float(self._marginal_gains().max())
+
+    def pick(self, rank: int) -> Optional[int]:
+        """Select the ad with the largest coverage gain; None when nothing is left to gain"""
+        if self.best_gain() <= 0:
+            return None
+        gains = self._marginal_gains()
+        row = int(np.argmax(gains))
+        self.selected[row] = True
+        self.ranks[row] = rank
+        self.gains[row] = gains[row]
+        self.best = np.maximum(self.best, self.similarity[:, row])
+        self._candidate_gains = None
+        return row
+
+    def coverage(self) -> float:
+        """Mean similarity of each ad to its closest selected ad"""
+        return float(self.best.mean()) if len(self.best) else 0.0
+
+    def plan_rows(self) -> pd.DataFrame:
+        chosen = np.flatnonzero(self.selected)
+        if len(chosen) == 0:
+            return pd.DataFrame(columns=PLAN_COLUMNS)
+
+        # Each ad is represented by its most similar selected ad
+        nearest = chosen[np.argmax(self.similarity[:, chosen], axis=1)]
+        represented = np.bincount(nearest, minlength=len(self.selected))[chosen]
+
+        rows = self.ads.iloc[chosen]
+        return pd.DataFrame({
+            'brand': rows['brand'].to_numpy(),
+            'ad_archive_id': rows['ad_archive_id'].astype(str).to_numpy(),
+            'media_storage_path': rows['media_storage_path'].to_numpy(),
+            'is_cached': rows['is_cached'].astype(bool).to_numpy(),
+            'plan_rank': self.ranks[chosen],
+            'coverage_gain': self.gains[chosen],
+            'represented_ads': represented.astype(np.int64),
+            'brand_coverage': self.coverage(),
+        })
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Whitespace strategy benchmark
+Runs every whitespace strategy on the same recorded ad dataset and compares them
+
+A recorded dataset is a snapshot of ads_with_dates for a brand and its competitors
+(whitespace_benchmark_<name>). The detectors bucket ads into periods relative to
+CURRENT_DATE(), so each benchmark replays the snapshot into a short-lived
+whitespace_replay_<name>_<timestamp> table with start_timestamp shifted by the
+days since recording; every strategy then sees the same ads in the same periods,
+whenever the benchmark runs.
+
+Per strategy the report has latency and its category, AI calls, bytes and slot
+time, and the opportunity overlap (Jaccard over opportunity_key) with a reference
+strategy, whose row is flagged in the reference column. The chunk cache is bypassed so every run does its full AI work.
+
+Usage:
+    python -m src.competitive_intel.analysis.whitespace_benchmark record --name eyewear \\
+        --brand "Warby Parker" --competitors "LensCrafters,Zenni"
+    python -m src.competitive_intel.analysis.whitespace_benchmark run --name eyewear
+"""
+
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.competitive_intel.analysis.whitespace_engine import (
+    STRATEGIES, WhitespaceEngine, opportunity_key, parse_strategies
+)
+
+try:
+    from src.utils.bigquery_client import run_query
+except ImportError:
+    run_query = None
+
+BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
+BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
+
+BENCHMARK_REFERENCE_STRATEGY = os.environ.get("BENCHMARK_REFERENCE_STRATEGY", "hybrid")
+BENCHMARK_MIN_OVERLAP = float(os.environ.get("BENCHMARK_MIN_OVERLAP", "0.5"))
+
+
+def recorded_table(name: str) -> str:
+    return f"{BQ_PROJECT}.{BQ_DATASET}.whitespace_benchmark_{name}"
+
+
+def record_dataset_sql(name: str, brand: str, competitors: List[str], days: int = 180) -> str:
+    brands = ', '.join(f"'{b}'" for b in [brand] + list(competitors))
+    return f"""
+    CREATE OR REPLACE TABLE `{recorded_table(name)}` AS
+    SELECT
+      *,
+      CURRENT_DATE() as recorded_on,
+      '{brand}' as recorded_target_brand
+    FROM `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates`
+    WHERE brand IN ({brands})
+      AND DATE(start_timestamp) >= DATE_SUB(CURRENT_DATE(), INTERVAL {int(days)} DAY)
+    """
+
+
+def record_dataset(name: str, brand: str, competitors: List[str], days: int = 180) -> Dict:
+    """Snapshot the last `days` of ads for a brand and its competitors"""
+    run_query(record_dataset_sql(name, brand, competitors, days))
+    recorded = run_query(f"SELECT COUNT(*) as ads FROM `{recorded_table(name)}`")
+    return {'table': recorded_table(name), 'ads': int(recorded.iloc[0]['ads'])}
+
+
+def replay_table_sql(name: str, replay_table: str) -> str:
+    """Recorded ads with start_timestamp shifted as if recorded today; the table expires after a day"""
+    return f"""
+    CREATE OR REPLACE TABLE `{replay_table}`
+    OPTIONS (expiration_timestamp = TIMESTAMP_ADD(CURRENT_TIMESTAMP(), INTERVAL 1 DAY))
+    AS
+    SELECT * EXCEPT (recorded_on, recorded_target_brand)
+      REPLACE (TIMESTAMP_ADD(start_timestamp, INTERVAL DATE_DIFF(CURRENT_DATE(), recorded_on, DAY) DAY)
+               as start_timestamp)
+    FROM `{recorded_table(name)}`
+    """
+
+
+def opportunity_overlap(a: List[Dict], b: List[Dict]) -> Optional[float]:
+    """Jaccard similarity of two opportunity lists, None when both are empty"""
+    keys_a = {opportunity_key(opp) for opp in a}
+    keys_b = {opportunity_key(opp) for opp in b}
+    if not keys_a and not keys_b:
+        return None
+    return len(keys_a & keys_b) / len(keys_a | keys_b)
+
+
+def run_benchmark(name: str, strategies: Optional[List[str]] = None,
+                  reference: str = BENCHMARK_REFERENCE_STRATEGY) -> pd.DataFrame:
+    """
+    Run strategies on a replay of the recorded dataset.
+
+    Args:
+        name: Recorded dataset name
+        strategies: Strategies to compare, default all registered
+        reference: Strategy whose opportunities the others are compared with
+
+    Returns:
+        One row per strategy
+    """
+    strategies = strategies or list(STRATEGIES)
+    if reference not in strategies:
+        strategies = [reference] + strategies
+
+    meta = run_query(f"""
+    SELECT ANY_VALUE(recorded_target_brand) as target_brand, ARRAY_AGG(DISTINCT brand) as brands
+    FROM `{recorded_table(name)}`
+    """).iloc[0]
+    brand = meta['target_brand']
+    competitors = [b for b in meta['brands'] if b != brand]
+
+    replay_table = f"{BQ_PROJECT}.{BQ_DATASET}.whitespace_replay_{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    run_query(replay_table_sql(name, replay_table))
+
+    engine = WhitespaceEngine(brand, competitors, strategies, use_cache=False, ads_table=replay_table)
+    run_id = f"benchmark_{name}"
+    results = {strategy: engine.run(strategy, run_id, count_ai_calls=True) for strategy in strategies}
+    reference_result = results[reference]
+
+    return pd.DataFrame([{
+        'strategy': strategy,
+        'reference': strategy == reference,
+        'status': result.status,
+        'duration_seconds': round(result.duration_seconds, 1),
+        'performance_category': result.performance_category,
+        'ai_calls': result.ai_calls,
+        'bytes_processed': result.bytes_processed,
+        'slot_millis': result.slot_millis,
+        'opportunities': len(result.opportunities),
+        'overlap': opportunity_overlap(result.opportunities, reference_result.opportunities)
+        if result.succeeded and reference_result.succeeded else None,
+        'error': result.error,
+    } for strategy, result in results.items()])
+
+
+def recommend(report: pd.DataFrame, min_overlap: float = BENCHMARK_MIN_OVERLAP) -> Optional[str]:
+    """
+    Fastest successful strategy whose opportunities overlap the reference enough.
+
+    None when the reference failed: overlap is then unknown for every strategy.
+    A missing overlap otherwise means both found no opportunities, which counts as agreement.
+    """
+    if not (report['status'][report['reference']] == 'success').all():
+        return None
+    adequate = report[(report['status'] == 'success') &
+                      (report['overlap'].isna() | (report['overlap'] >= min_overlap))]
+    if adequate.empty:
+        return None
+    return adequate.sort_values('duration_seconds').iloc[0]['strategy']
+
+
+def main():
+    """CLI: record datasets and benchmark strategies on them"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark whitespace strategies on a recorded dataset")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record", help="Snapshot ads for a brand and its competitors")
+    record_parser.add_argument("--name", required=True)
+    record_parser.add_argument("--brand", required=True)
+    record_parser.add_argument("--competitors", required=True, help="Comma-separated competitor brands")
+    record_parser.add_argument("--days", type=int, default=180)
+    run_parser = subparsers.add_parser("run", help="Run strategies on a recorded dataset")
+    run_parser.add_argument("--name", required=True)
+    run_parser.add_argument("--strategies", help=f"Comma-separated, default all of {sorted(STRATEGIES)}")
+    run_parser.add_argument("--reference", default=BENCHMARK_REFERENCE_STRATEGY)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        competitors = [c.strip() for c in args.competitors.split(',') if c.strip()]
+        recorded = record_dataset(args.name, args.brand, competitors, args.days)
+        print(f"📼 Recorded {recorded['ads']} ads into {recorded['table']}")
+        return
+
+    strategies = parse_strategies(args.strategies) if args.strategies else None
+    print(f"⏱️  Benchmarking whitespace strategies on '{args.name}' (reference: {args.reference})...")
+    report = run_benchmark(args.name, strategies, args.reference)
+    print(report.to_string(index=False))
+    best = recommend(report)
+    print(f"\n🏆 Recommended strategy: {best}" if best else "\n⚠️  No strategy met the overlap threshold")
+
+
+if __name__ == "__main__":
+    main()
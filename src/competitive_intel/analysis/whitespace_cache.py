@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Cross-run cache of whitespace chunk analyses
+
+The hybrid and parallel whitespace detectors make one AI.GENERATE call per
+(period, brand) chunk of ads_with_dates on every Stage 9 run. A chunk's analysis
+only changes when its ads or the prompt change, so results are stored keyed by
+(detector, prompt version, brand, period, ad set fingerprint), where the
+fingerprint is a hash over the chunk's sorted ad_archive_ids. Each run analyzes
+only the chunks whose ads changed and merges cached results back in before the
+whitespace scoring.
+
+The detectors run as one BigQuery script: the chunk results are materialized in
+the temp table whitespace_chunks (from_cache marks reused chunks), new results
+are merged into the cache, and the final SELECT scores whitespace_chunks.
+"""
+
+import hashlib
+import os
+from typing import Optional
+
+BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
+BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
+
+WHITESPACE_CACHE_ENABLED = os.environ.get("WHITESPACE_CACHE_ENABLED", "true").lower() == "true"
+WHITESPACE_CACHE_TTL_DAYS = int(os.environ.get("WHITESPACE_CACHE_TTL_DAYS", "30"))
+
+CHUNKS_TABLE = "whitespace_chunks"
+CHUNK_KEY = ["brand", "period_name", "ad_set_fingerprint"]
+
+
+def prompt_version(*parts: str) -> str:
+    """Stable hash of a prompt expression; edits to the prompt invalidate cached chunks"""
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def ad_set_fingerprint_sql(alias: str) -> str:
+    """Aggregate SQL: hash over the chunk's sorted, distinct ad_archive_ids"""
+    ad_id = f"CAST({alias}.ad_archive_id AS STRING)"
+    return f"TO_HEX(SHA256(STRING_AGG(DISTINCT {ad_id}, ',' ORDER BY {ad_id})))"
+
+
+class WhitespaceChunkCache:
+    """Persistent per-chunk AI results backed by a BigQuery table"""
+
+    def __init__(self, detector: str, prompt_version: str, ttl_days: int = WHITESPACE_CACHE_TTL_DAYS,
+                 table_id: str = None):
+        self.detector = detector
+        self.prompt_version = prompt_version
+        self.ttl_days = ttl_days
+        self.table_id = table_id or f"{BQ_PROJECT}.{BQ_DATASET}.whitespace_chunk_cache"
+
+    def ensure_table_sql(self) -> str:
+        return f"""
+        CREATE TABLE IF NOT EXISTS `{self.table_id}` (
+          detector STRING,
+          prompt_version STRING,
+          brand STRING,
+          period_name STRING,
+          ad_set_fingerprint STRING,
+          ai_result STRING,
+          cached_at TIMESTAMP
+        )
+        CLUSTER BY detector, brand
+        """
+
+    def fresh_entries_sql(self) -> str:
+        """Latest fresh result per chunk key for this detector and prompt version"""
+        return f"""
+          SELECT {', '.join(CHUNK_KEY)}, ai_result
+          FROM `{self.table_id}`
+          WHERE detector = '{self.detector}'
+            AND prompt_version = '{self.prompt_version}'
+            AND cached_at >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {int(self.ttl_days)} DAY)
+          QUALIFY ROW_NUMBER() OVER (PARTITION BY {', '.join(CHUNK_KEY)} ORDER BY cached_at DESC) = 1
+        """
+
+    def store_sql(self, result_column: str) -> str:
+        """Upsert the non-empty results of newly analyzed chunks"""
+        return f"""
+        MERGE `{self.table_id}` cache
+        USING (
+          SELECT {', '.join(CHUNK_KEY)}, {result_column} as ai_result
+          FROM {CHUNKS_TABLE}
+          WHERE NOT from_cache AND {result_column} IS NOT NULL AND {result_column} != ''
+        ) new
+        ON cache.detector = '{self.detector}'
+          AND cache.prompt_version = '{self.prompt_version}'
+          AND {' AND '.join(f'cache.{key} = new.{key}' for key in CHUNK_KEY)}
+        WHEN MATCHED THEN UPDATE SET
+          ai_result = new.ai_result,
+          cached_at = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED THEN INSERT
+          (detector, prompt_version, {', '.join(CHUNK_KEY)}, ai_result, cached_at)
+        VALUES
+          ('{self.detector}', '{self.prompt_version}', {', '.join(f'new.{key}' for key in CHUNK_KEY)},
+           new.ai_result, CURRENT_TIMESTAMP())
+        """
+
+
+def chunk_analysis_script(chunk_ctes: str, result_column: str, connection_id: str,
+                          cache: Optional[WhitespaceChunkCache]) -> str:
+    """
+    Script statements that materialize the whitespace_chunks temp table.
+
+    Args:
+        chunk_ctes: CTEs ending in chunk_inputs, one row per chunk with the CHUNK_KEY
+            columns, the chunk's statistics and its AI prompt in a `prompt` column
+        result_column: Name of the AI result column in whitespace_chunks
+        connection_id: Vertex AI connection for AI.GENERATE
+        cache: Chunk cache, or None to analyze every chunk
+
+    Returns:
+        SQL statements, each terminated by a semicolon, to put before the scoring query
+    """
+    analyze = f"AI.GENERATE(i.prompt, connection_id => '{connection_id}').result as {result_column}"
+    if cache is None:
+        return f"""
+        CREATE TEMP TABLE {CHUNKS_TABLE} AS
+        WITH {chunk_ctes}
+        SELECT i.* EXCEPT (prompt), {analyze}, FALSE as from_cache
+        FROM chunk_inputs i;
+        """
+
+    return f"""
+        {cache.ensure_table_sql()};
+
+        CREATE TEMP TABLE {CHUNKS_TABLE} AS
+        WITH {chunk_ctes},
+        cached_chunks AS ({cache.fresh_entries_sql()}),
+        analyzed_chunks AS (
+          -- Only chunks whose ad set changed (or that were never analyzed) reach AI.GENERATE
+          SELECT i.* EXCEPT (prompt), {analyze}, FALSE as from_cache
+          FROM chunk_inputs i
+          LEFT JOIN cached_chunks c USING ({', '.join(CHUNK_KEY)})
+          WHERE c.ai_result IS NULL
+        )
+        SELECT * FROM analyzed_chunks
+        UNION ALL
+        SELECT i.* EXCEPT (prompt), c.ai_result as {result_column}, TRUE as from_cache
+        FROM chunk_inputs i
+        JOIN cached_chunks c USING ({', '.join(CHUNK_KEY)});
+
+        {cache.store_sql(result_column)};
+        """
+
+
+def chunk_counts_sql() -> str:
+    """Select-list columns reporting how many chunks were analyzed and reused"""
+    return (f"(SELECT COUNTIF(NOT from_cache) FROM {CHUNKS_TABLE}) as analyzed_chunks, "
+            f"(SELECT COUNTIF(from_cache) FROM {CHUNKS_TABLE}) as cached_chunks")
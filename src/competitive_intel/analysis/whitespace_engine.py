@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Unified whitespace detection engine
+Runs the whitespace detectors behind one interface with a common result schema
+
+Strategies (WHITESPACE_STRATEGY is an ordered, comma-separated fallback chain):
+    hybrid    HybridWhiteSpaceDetector      one AI call per (period, brand) chunk, with campaign briefs
+    parallel  ParallelWhiteSpaceDetector    one AI call per (period, brand) chunk, positions only
+    batched   BatchedWhiteSpaceDetector     one AI call per batch of the newest ads per brand
+    enhanced  Enhanced3DWhiteSpaceDetector  three AI calls per ad on the newest ads per brand
+
+Every strategy returns a WhitespaceResult whose opportunities share OPPORTUNITY_FIELDS,
+so callers and the benchmark (whitespace_benchmark.py) never depend on which detector ran.
+New strategies subclass WhitespaceStrategy and register with @register_strategy.
+"""
+
+import logging
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Type
+
+import pandas as pd
+
+from src.competitive_intel.analysis.whitespace_cache import WHITESPACE_CACHE_ENABLED
+
+try:
+    from src.utils.bigquery_client import run_query, track_queries
+except ImportError:
+    run_query = None
+    track_queries = None
+
+BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
+BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
+
+WHITESPACE_STRATEGY = os.environ.get("WHITESPACE_STRATEGY", "hybrid,parallel")
+
+OPPORTUNITY_FIELDS = [
+    'strategy', 'space_type', 'messaging_angle', 'funnel_stage', 'segment', 'score', 'market_potential',
+    'competitor_count', 'confidence_level', 'recommended_investment', 'success_metrics', 'campaign_ready',
+    'sample_headline', 'sample_cta', 'summary',
+]
+
+
+@dataclass
+class WhitespaceResult:
+    """Outcome of one strategy run in the common schema"""
+    strategy: str
+    status: str  # success or error
+    opportunities: List[Dict] = field(default_factory=list)
+    duration_seconds: float = 0.0
+    performance_category: str = ""
+    bytes_processed: int = 0
+    slot_millis: int = 0
+    ai_calls: Optional[int] = None  # None when the strategy cannot tell
+    cached_chunks: int = 0
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == 'success'
+
+
+def categorize_performance(duration: float, target_seconds: float) -> str:
+    """Performance band of a run relative to its strategy's latency target"""
+    if duration <= target_seconds / 6:
+        return 'EXCELLENT'
+    elif duration <= target_seconds / 2:
+        return 'GOOD'
+    elif duration <= target_seconds:
+        return 'ACCEPTABLE'
+    return 'SLOW'
+
+
+def opportunity_key(opportunity: Dict) -> tuple:
+    """Identity of an opportunity across strategies: (angle, funnel stage, normalized segment)"""
+    segment = re.sub(r'[^A-Z]+', ' ', str(opportunity.get('segment') or '').upper()).strip()
+    return (opportunity.get('messaging_angle'), opportunity.get('funnel_stage'), segment)
+
+
+def _value(row: pd.Series, *names, default=None):
+    """First non-null value among the given result columns"""
+    for name in names:
+        value = row.get(name)
+        if value is not None and not (isinstance(value, float) and pd.isna(value)):
+            return value
+    return default
+
+
+def _first(listing) -> str:
+    return str(listing).split(' | ')[0] if listing else ''
+
+
+STRATEGIES: Dict[str, Type['WhitespaceStrategy']] = {}
+
+
+def register_strategy(cls: Type['WhitespaceStrategy']) -> Type['WhitespaceStrategy']:
+    STRATEGIES[cls.name] = cls
+    return cls
+
+
+class WhitespaceStrategy(ABC):
+    """One whitespace detector behind the engine interface"""
+
+    name = ""
+    target_seconds = 180.0
+    ai_calls_need_query = False  # True when counting AI calls costs an extra query
+
+    def __init__(self, detector):
+        self.detector = detector
+
+    @classmethod
+    @abstractmethod
+    def create(cls, project_id: str, dataset_id: str, brand: str, competitors: List[str],
+               use_cache: bool = WHITESPACE_CACHE_ENABLED) -> 'WhitespaceStrategy':
+        """Strategy around a detector for the brand and its competitors"""
+        pass
+
+    @abstractmethod
+    def sql(self, run_id: str) -> str:
+        """Detector SQL returning the opportunity rows"""
+        pass
+
+    def ai_calls(self, results: pd.DataFrame) -> Optional[int]:
+        """AI calls the run made, or None when unknown"""
+        return None
+
+    def opportunities(self, results: pd.DataFrame) -> List[Dict]:
+        """Result rows in the common opportunity schema"""
+        if results is None or results.empty:
+            return []
+        return [self._opportunity(row) for _, row in results.iterrows()]
+
+    def _opportunity(self, row: pd.Series) -> Dict:
+        space_type = _value(row, 'space_type', default='UNKNOWN')
+        angle = _value(row, 'messaging_angle', default='UNKNOWN')
+        funnel = _value(row, 'funnel_stage', default='UNKNOWN')
+        segment = _value(row, 'target_persona', default='UNKNOWN')
+        score = float(_value(row, 'overall_score', default=0))
+        return {
+            'strategy': self.name,
+            'space_type': space_type,
+            'messaging_angle': angle,
+            'funnel_stage': funnel,
+            'segment': segment,
+            'score': score,
+            'market_potential': float(_value(row, 'enhanced_market_potential', 'market_potential', default=0)),
+            'competitor_count': int(_value(row, 'competitor_count', default=0)),
+            'confidence_level': 'HIGH' if score > 0.6 else 'MEDIUM' if score > 0.4 else 'LOW',
+            'recommended_investment': _value(row, 'hybrid_investment_recommendation', 'recommended_investment',
+                                             default=''),
+            'success_metrics': _value(row, 'predicted_success_metrics', 'success_indicators', default=''),
+            'campaign_ready': _value(row, 'campaign_readiness') == 'CAMPAIGN_READY',
+            'sample_headline': _first(_value(row, 'sample_headlines')),
+            'sample_cta': _first(_value(row, 'recommended_ctas')),
+            'summary': f"{space_type} opportunity targeting {segment} with {angle} messaging in {funnel} stage",
+        }
+
+
+class _ChunkedStrategy(WhitespaceStrategy):
+    """Hybrid and parallel: one AI call per analyzed (period, brand) chunk, reported by the query"""
+
+    def ai_calls(self, results: pd.DataFrame) -> Optional[int]:
+        if results is None or results.empty or 'analyzed_chunks' not in results:
+            return None
+        return int(results.iloc[0]['analyzed_chunks'])
+
+
+@register_strategy
+class HybridStrategy(_ChunkedStrategy):
+    name = "hybrid"
+    target_seconds = 180.0
+
+    @classmethod
+    def create(cls, project_id, dataset_id, brand, competitors, use_cache=WHITESPACE_CACHE_ENABLED):
+        from src.competitive_intel.analysis.hybrid_whitespace_detection import HybridWhiteSpaceDetector
+        return cls(HybridWhiteSpaceDetector(project_id, dataset_id, brand, competitors, use_cache=use_cache))
+
+    def sql(self, run_id: str) -> str:
+        return self.detector.analyze_hybrid_strategic_positions(run_id)
+
+
+@register_strategy
+class ParallelStrategy(_ChunkedStrategy):
+    name = "parallel"
+    target_seconds = 60.0
+
+    @classmethod
+    def create(cls, project_id, dataset_id, brand, competitors, use_cache=WHITESPACE_CACHE_ENABLED):
+        from src.competitive_intel.analysis.parallel_whitespace_detection import ParallelWhiteSpaceDetector
+        return cls(ParallelWhiteSpaceDetector(project_id, dataset_id, brand, competitors, use_cache=use_cache))
+
+    def sql(self, run_id: str) -> str:
+        return self.detector.analyze_strategic_positions_parallel(run_id)
+
+
+class _PerBrandSampleStrategy(WhitespaceStrategy):
+    """Batched and enhanced: AI calls follow from the newest ads per brand they sample"""
+
+    ads_per_brand = 0
+    ai_calls_need_query = True
+
+    def _count_sampled(self, aggregate: str, column: str) -> int:
+        """Aggregate over the detector's ad sample, selected exactly as its SQL does"""
+        detector = self.detector
+        brands = ', '.join(f"'{brand}'" for brand in [detector.brand] + list(detector.competitors))
+        counts = run_query(f"""
+        SELECT {aggregate} as sampled
+        FROM (
+          SELECT {column}
+          FROM `{detector.ads_table}` r
+          LEFT JOIN `{detector.cta_table}` c
+            ON r.brand = c.brand
+          WHERE r.creative_text IS NOT NULL
+            AND LENGTH(r.creative_text) > 20
+            AND r.brand IN ({brands})
+          QUALIFY ROW_NUMBER() OVER (PARTITION BY r.brand ORDER BY r.start_timestamp DESC) <= {self.ads_per_brand}
+        )
+        """)
+        return int(counts.iloc[0]['sampled']) if not counts.empty else 0
+
+
+@register_strategy
+class BatchedStrategy(_PerBrandSampleStrategy):
+    name = "batched"
+    target_seconds = 120.0
+    ads_per_brand = 10
+    batch_size = 50
+
+    @classmethod
+    def create(cls, project_id, dataset_id, brand, competitors, use_cache=WHITESPACE_CACHE_ENABLED):
+        from src.competitive_intel.analysis.batched_whitespace_detection import BatchedWhiteSpaceDetector
+        return cls(BatchedWhiteSpaceDetector(project_id, dataset_id, brand, competitors))
+
+    def sql(self, run_id: str) -> str:
+        return self.detector.analyze_strategic_positions_batched(run_id, self.batch_size)
+
+    def ai_calls(self, results: pd.DataFrame) -> Optional[int]:
+        # One call per batch; batch ids are numbered before the per-brand limit, as in the detector SQL
+        return self._count_sampled(
+            "COUNT(DISTINCT batch_id)",
+            f"FLOOR((ROW_NUMBER() OVER (ORDER BY r.brand, r.start_timestamp) - 1) / {self.batch_size}) as batch_id")
+
+
+@register_strategy
+class EnhancedStrategy(_PerBrandSampleStrategy):
+    name = "enhanced"
+    target_seconds = 120.0
+    ads_per_brand = 3
+
+    @classmethod
+    def create(cls, project_id, dataset_id, brand, competitors, use_cache=WHITESPACE_CACHE_ENABLED):
+        from src.competitive_intel.analysis.enhanced_whitespace_detection import Enhanced3DWhiteSpaceDetector
+        return cls(Enhanced3DWhiteSpaceDetector(project_id, dataset_id, brand, competitors))
+
+    def sql(self, run_id: str) -> str:
+        return self.detector.analyze_real_strategic_positions(run_id)
+
+    def ai_calls(self, results: pd.DataFrame) -> Optional[int]:
+        return 3 * self._count_sampled("COUNT(*)", "r.ad_archive_id")  # angle, funnel stage and persona per ad
+
+
+def parse_strategies(spec: str) -> List[str]:
+    names = [name.strip().lower() for name in spec.split(',') if name.strip()]
+    unknown = [name for name in names if name not in STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown whitespace strategies {unknown}; available: {sorted(STRATEGIES)}")
+    return names
+
+
+class WhitespaceEngine:
+    """Runs whitespace strategies for a brand and its competitors"""
+
+    def __init__(self, brand: str, competitors: List[str], strategies: Optional[List[str]] = None,
+                 project_id: str = BQ_PROJECT, dataset_id: str = BQ_DATASET,
+                 use_cache: bool = WHITESPACE_CACHE_ENABLED, ads_table: Optional[str] = None):
+        self.brand = brand
+        self.competitors = competitors
+        self.strategies = strategies or parse_strategies(WHITESPACE_STRATEGY)
+        self.project_id = project_id
+        self.dataset_id = dataset_id
+        self.use_cache = use_cache
+        self.ads_table = ads_table
+        self.logger = logging.getLogger(__name__)
+
+    def strategy(self, name: str) -> WhitespaceStrategy:
+        strategy = STRATEGIES[name].create(self.project_id, self.dataset_id, self.brand, self.competitors,
+                                           use_cache=self.use_cache)
+        if self.ads_table:
+            strategy.detector.ads_table = self.ads_table
+        return strategy
+
+    def run(self, name: str, run_id: str, count_ai_calls: bool = False) -> WhitespaceResult:
+        """Run one strategy; errors are returned, not raised"""
+        start = time.perf_counter()
+        try:
+            strategy = self.strategy(name)
+            with track_queries() as stats:
+                results = run_query(strategy.sql(run_id))
+            duration = time.perf_counter() - start
+            cached_chunks = int(results.iloc[0]['cached_chunks']) \
+                if results is not None and not results.empty and 'cached_chunks' in results else 0
+            return WhitespaceResult(
+                strategy=name,
+                status='success',
+                opportunities=strategy.opportunities(results),
+                duration_seconds=duration,
+                performance_category=categorize_performance(duration, strategy.target_seconds),
+                bytes_processed=stats.bytes_processed,
+                slot_millis=stats.slot_millis,
+                ai_calls=strategy.ai_calls(results) if count_ai_calls or not strategy.ai_calls_need_query else None,
+                cached_chunks=cached_chunks,
+            )
+        except Exception as e:
+            return WhitespaceResult(strategy=name, status='error', duration_seconds=time.perf_counter() - start,
+                                    error=str(e))
+
+    def detect(self, run_id: str) -> WhitespaceResult:
+        """First successful strategy of the configured fallback chain"""
+        result = WhitespaceResult(strategy='none', status='error', error='No whitespace strategies configured')
+        for name in self.strategies:
+            result = self.run(name, run_id)
+            if result.succeeded:
+                return result
+            self.logger.warning(f"⚠️ {name} whitespace strategy failed: {result.error}")
+        return result
@@ -8,6 +8,17 @@ import re
 from typing import List, Dict, Tuple, Set
 from dataclasses import dataclass
 
+import numpy as np
+import pandas as pd
+
+# Row layout returned by CompetitorNameValidator.score_series
+VALIDATION_DTYPE = np.dtype([
+    ('is_valid', np.bool_),
+    ('confidence', np.float64),
+    ('category', 'U10'),
+    ('reasons', object),
+])
+
 @dataclass
 class ValidationResult:
     is_valid: bool
@@ -119,10 +130,37 @@ class CompetitorNameValidator:
             'stripe', 'paypal', 'venmo', 'square', 'plaid',
             'shopify', 'spotify', 'slack', 'zoom', 'figma'
         }
+        
+        self._compile_vocabularies()
+        # Memoized results keyed by stripped name (case is kept for the all-caps check)
+        self._result_cache: Dict[str, ValidationResult] = {}
+    
+    def _compile_vocabularies(self):
+        """Freeze the vocabularies and compile the pattern checks once per validator"""
+        self._protected = frozenset(self.protected_companies)
+        self._blacklist = frozenset(self.generic_blacklist)
+        self._endings = tuple(self.suspicious_endings)
+        self._compiled_patterns = [(p, re.compile(p, re.IGNORECASE)) for p in self.suspicious_patterns]
+        # One combined scan answers "does any pattern match?" for the common clean case
+        self._any_pattern = re.compile('|'.join(f'(?:{p})' for p in self.suspicious_patterns), re.IGNORECASE)
+        self._year_like = re.compile(r'\d{4}')
     
     def validate_name(self, name: str) -> ValidationResult:
         """Validate a single competitor name"""
         
+        if not name or not isinstance(name, str):
+            return ValidationResult(False, 0.0, ["Empty or invalid name"], "invalid")
+        
+        key = name.strip()
+        result = self._result_cache.get(key)
+        if result is None:
+            result = self._validate_uncached(name)
+            self._result_cache[key] = result
+        return result
+    
+    def _validate_uncached(self, name: str) -> ValidationResult:
+        """Run the validation layers for a single non-empty name"""
+        
         if not name or not isinstance(name, str):
             return ValidationResult(False, 0.0, ["Empty or invalid name"], "invalid")
         
@@ -139,23 +177,24 @@ class CompetitorNameValidator:
             return ValidationResult(False, 0.2, reasons, "invalid")
         
         # Step 2: Protected companies (override everything)
-        if name_clean in self.protected_companies:
+        if name_clean in self._protected:
             return ValidationResult(True, 0.95, ["Protected company list"], "valid")
         
         # Step 3: Generic blacklist (hard filter)
-        if name_clean in self.generic_blacklist:
+        if name_clean in self._blacklist:
             return ValidationResult(False, 0.0, [f"Generic term: '{name_clean}'"], "invalid")
         
-        # Step 4: Pattern-based filtering
-        for pattern in self.suspicious_patterns:
-            if re.search(pattern, name_clean, re.IGNORECASE):
-                reasons.append(f"Suspicious pattern: {pattern}")
-                return ValidationResult(False, 0.1, reasons, "invalid")
+        # Step 4: Pattern-based filtering (report the first pattern in list order)
+        if self._any_pattern.search(name_clean):
+            for pattern, compiled in self._compiled_patterns:
+                if compiled.search(name_clean):
+                    reasons.append(f"Suspicious pattern: {pattern}")
+                    return ValidationResult(False, 0.1, reasons, "invalid")
         
         # Step 5: Suspicious endings (context-dependent scoring)
         confidence = 0.8  # Start with high confidence
         
-        for ending in self.suspicious_endings:
+        for ending in (self._endings if name_clean.endswith(self._endings) else ()):
             if name_clean.endswith(ending):
                 # Check if it's ONLY the ending (e.g., "Management" vs "Risk Management Inc")
                 if name_clean == ending:
@@ -172,13 +211,13 @@ class CompetitorNameValidator:
             reasons.append("All caps short form - likely acronym")
         
         # Step 7: Number-heavy names
-        if re.search(r'\d{4}', name_clean):  # Contains year-like number
+        if self._year_like.search(name_clean):  # Contains year-like number
             confidence -= 0.3
             reasons.append("Contains year-like numbers")
         
         # Step 8: Too generic single words
         if ' ' not in name_clean and len(name_clean) <= 6:
-            if name_clean not in self.protected_companies:
+            if name_clean not in self._protected:
                 confidence -= 0.4
                 reasons.append("Very short single word - needs validation")
         
@@ -199,6 +238,30 @@ class CompetitorNameValidator:
         """Validate multiple competitor names"""
         return {name: self.validate_name(name) for name in names}
     
+    def score_series(self, names: pd.Series) -> np.ndarray:
+        """
+        Score a whole Series of names at once.
+        
+        Each distinct name is validated once (and memoized across calls), then
+        results are broadcast back to every row.
+        
+        Returns:
+            Structured array aligned with `names` (dtype VALIDATION_DTYPE)
+        """
+        codes, uniques = pd.factorize(names, use_na_sentinel=True)
+        
+        # One extra slot at the end for missing names (code -1)
+        unique_results = [self.validate_name(name) for name in uniques]
+        unique_results.append(self.validate_name(None))
+        
+        table = np.empty(len(unique_results), dtype=VALIDATION_DTYPE)
+        table['is_valid'] = [r.is_valid for r in unique_results]
+        table['confidence'] = [r.confidence for r in unique_results]
+        table['category'] = [r.category for r in unique_results]
+        table['reasons'] = [r.reasons for r in unique_results]
+        
+        return table[codes]
+    
     def get_clean_competitors(self, names: List[str], min_confidence: float = 0.4) -> List[Tuple[str, ValidationResult]]:
         """Get filtered list of valid competitors"""
         results = self.validate_batch(names)
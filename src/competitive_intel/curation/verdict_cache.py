@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Cross-run cache of AI competitor verdicts
+
+The same candidates ("Zenni Optical", "LensCrafters", ...) come up on every run
+for every brand in a vertical. Consensus verdicts are stored in BigQuery keyed by
+(target brand, vertical, normalized candidate name, prompt version) so that only
+cache misses are sent to AI.GENERATE_TABLE.
+"""
+
+import os
+from typing import List
+
+import pandas as pd
+
+from src.utils.bigquery_client import get_bigquery_client, run_query, load_dataframe_to_bq
+from src.utils.search_utils import normalize_company_name
+from src.utils.sql_helpers import safe_sql_string_list
+
+BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
+BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
+
+VERDICT_CACHE_TTL_DAYS = int(os.environ.get("VERDICT_CACHE_TTL_DAYS", "30"))
+
+# Verdict fields stored per candidate
+VERDICT_COLUMNS = [
+    'is_competitor', 'tier', 'market_overlap_pct', 'customer_substitution_ease',
+    'confidence', 'reasoning', 'evidence_sources'
+]
+
+
+class CompetitorVerdictCache:
+    """Persistent AI verdict store backed by a BigQuery table"""
+
+    def __init__(self, prompt_version: str, ttl_days: int = VERDICT_CACHE_TTL_DAYS,
+                 table_id: str = None):
+        self.prompt_version = prompt_version
+        self.ttl_days = ttl_days
+        self.table_id = table_id or f"{BQ_PROJECT}.{BQ_DATASET}.competitor_verdict_cache"
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Cache key for a candidate name"""
+        return normalize_company_name(name or "")
+
+    def ensure_table(self):
+        """Create the cache table if it does not exist yet"""
+        client = get_bigquery_client(BQ_PROJECT)
+        client.query(f"""
+        CREATE TABLE IF NOT EXISTS `{self.table_id}` (
+          target_brand STRING,
+          target_vertical STRING,
+          normalized_name STRING,
+          prompt_version STRING,
+          company_name STRING,
+          is_competitor BOOL,
+          tier STRING,
+          market_overlap_pct INT64,
+          customer_substitution_ease STRING,
+          confidence FLOAT64,
+          reasoning STRING,
+          evidence_sources STRING,
+          cached_at TIMESTAMP
+        )
+        CLUSTER BY target_brand, normalized_name
+        """).result()
+
+    def lookup(self, brand: str, vertical: str, names: List[str]) -> pd.DataFrame:
+        """
+        Fetch fresh cached verdicts for the given candidate names.
+
+        Returns:
+            DataFrame with normalized_name plus VERDICT_COLUMNS (empty on miss or error)
+        """
+        normalized = sorted({self.normalize(name) for name in names if name})
+        if not normalized:
+            return pd.DataFrame()
+
+        query = f"""
+        SELECT normalized_name, {', '.join(VERDICT_COLUMNS)}
+        FROM `{self.table_id}`
+        WHERE target_brand = {safe_sql_string_list([brand])}
+          AND target_vertical = {safe_sql_string_list([vertical])}
+          AND prompt_version = {safe_sql_string_list([self.prompt_version])}
+          AND normalized_name IN ({safe_sql_string_list(normalized)})
+          AND cached_at >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {int(self.ttl_days)} DAY)
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY normalized_name ORDER BY cached_at DESC) = 1
+        """
+
+        try:
+            return run_query(query, BQ_PROJECT)
+        except Exception as e:
+            # Missing cache table or transient error - everything is a miss
+            print(f"   ⚠️  Verdict cache unavailable, validating all candidates: {str(e)[:100]}")
+            return pd.DataFrame()
+
+    def store(self, brand: str, vertical: str, df_verdicts: pd.DataFrame, run_id: str):
+        """Upsert consensus verdicts (competitors and rejections) into the cache"""
+        if df_verdicts.empty:
+            return
+
+        df_store = df_verdicts[['company_name'] + VERDICT_COLUMNS].copy()
+        df_store['normalized_name'] = df_store['company_name'].map(self.normalize)
+        df_store = df_store.drop_duplicates('normalized_name')
+        df_store['target_brand'] = brand
+        df_store['target_vertical'] = vertical
+        df_store['prompt_version'] = self.prompt_version
+        df_store['market_overlap_pct'] = df_store['market_overlap_pct'].astype('int64')
+        df_store['is_competitor'] = df_store['is_competitor'].astype(bool)
+
+        staging_table_id = f"{BQ_PROJECT}.{BQ_DATASET}.competitors_batch_{run_id}_verdicts"
+
+        try:
+            self.ensure_table()
+            load_dataframe_to_bq(df_store, staging_table_id, write_disposition="WRITE_TRUNCATE")
+
+            client = get_bigquery_client(BQ_PROJECT)
+            client.query(f"""
+            MERGE `{self.table_id}` cache
+            USING `{staging_table_id}` new
+            ON cache.target_brand = new.target_brand
+              AND cache.target_vertical = new.target_vertical
+              AND cache.normalized_name = new.normalized_name
+              AND cache.prompt_version = new.prompt_version
+            WHEN MATCHED THEN UPDATE SET
+              company_name = new.company_name,
+              {', '.join(f'{col} = new.{col}' for col in VERDICT_COLUMNS)},
+              cached_at = CURRENT_TIMESTAMP()
+            WHEN NOT MATCHED THEN INSERT
+              (target_brand, target_vertical, normalized_name, prompt_version, company_name,
+               {', '.join(VERDICT_COLUMNS)}, cached_at)
+            VALUES
+              (new.target_brand, new.target_vertical, new.normalized_name, new.prompt_version, new.company_name,
+               {', '.join(f'new.{col}' for col in VERDICT_COLUMNS)}, CURRENT_TIMESTAMP())
+            """).result()
+            client.query(f"DROP TABLE IF EXISTS `{staging_table_id}`").result()
+
+            print(f"   💾 Cached {len(df_store)} AI verdicts for future runs")
+        except Exception as e:
+            print(f"   ⚠️  Could not update verdict cache: {str(e)[:100]}")
@@ -7,11 +7,15 @@ with adaptive strategies for different brand types and footprints.
 import os
 import argparse
 import csv
+import json
 import re
+import threading
 import time
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 
 import requests
 from googleapiclient.discovery import build
@@ -21,12 +25,15 @@ import pandas as pd
 try:
     # Import from src.utils for modern pipeline
     from src.utils.bigquery_client import get_bigquery_client, load_dataframe_to_bq
-    from src.utils.search_utils import extract_company_names, score_search_result, dedupe_companies
+    from src.utils.search_utils import (
+        extract_company_names, extract_company_names_batch, score_search_result, dedupe_companies
+    )
 except ImportError as e:
     print(f"Warning: Could not import utils modules: {e}")
     get_bigquery_client = None
     load_dataframe_to_bq = None
     extract_company_names = None
+    extract_company_names_batch = None
     score_search_result = None
     dedupe_companies = None
 
@@ -36,6 +43,14 @@ GOOGLE_CSE_CX = os.environ.get("GOOGLE_CSE_CX")
 BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
 BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
 
+# Search fan-out and persistent result cache configuration
+CSE_MAX_WORKERS = int(os.environ.get("CSE_MAX_WORKERS", "6"))
+CSE_CACHE_PATH = os.environ.get("CSE_CACHE_PATH", "data/temp/cse_results_cache.json")
+CSE_CACHE_TTL_HOURS = float(os.environ.get("CSE_CACHE_TTL_HOURS", "168"))  # 7 days
+
+# Below this many unique candidates the fallback queries are needed
+MIN_STANDARD_CANDIDATES = 5
+
 @dataclass
 class CompetitorCandidate:
     """Structured competitor candidate with metadata"""
@@ -47,15 +62,89 @@ class CompetitorCandidate:
     found_in: str  # 'title' or 'snippet'
     discovery_method: str  # 'standard' or 'fallback'
 
+class SearchResultCache:
+    """
+    Durable Google CSE result cache keyed by (query, num_results).
+    
+    Entries are persisted as JSON so reruns for the same brand are free, and
+    expire after ttl_hours. Safe to use from multiple search worker threads.
+    """
+    
+    def __init__(self, path: Optional[str] = CSE_CACHE_PATH, ttl_hours: float = CSE_CACHE_TTL_HOURS):
+        self.path = path
+        self.ttl = timedelta(hours=ttl_hours)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = self._load()
+    
+    @staticmethod
+    def _key(query: str, num_results: int) -> str:
+        return f"{num_results}|{query}"
+    
+    def _load(self) -> Dict:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable search cache {self.path}: {e}")
+            return {}
+    
+    def get(self, query: str, num_results: int) -> Optional[List[Dict]]:
+        """Return cached results, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(self._key(query, num_results))
+            if entry and datetime.now() - datetime.fromisoformat(entry['cached_at']) < self.ttl:
+                self.hits += 1
+                return entry['data']
+            self.misses += 1
+            return None
+    
+    def put(self, query: str, num_results: int, results: List[Dict]):
+        """Store results and persist the cache to disk"""
+        with self._lock:
+            self._entries[self._key(query, num_results)] = {
+                'data': results,
+                'cached_at': datetime.now().isoformat()
+            }
+            self._save()
+    
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️  Could not persist search cache: {e}")
+
+
 class CompetitorDiscovery:
     """Enhanced competitor discovery with adaptive strategies"""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = CSE_MAX_WORKERS, cache_path: Optional[str] = CSE_CACHE_PATH):
         if not GOOGLE_CSE_API_KEY or not GOOGLE_CSE_CX:
             raise ValueError("Missing required environment variables: GOOGLE_CSE_API_KEY, GOOGLE_CSE_CX")
         
         self.cse_service = build("customsearch", "v1", developerKey=GOOGLE_CSE_API_KEY)
-        self.results_cache = {}
+        self.results_cache = SearchResultCache(cache_path)
+        self.max_workers = max(1, max_workers)
+        # googleapiclient services are not thread-safe - one per worker thread
+        self._thread_local = threading.local()
+        self._thread_local.cse_service = self.cse_service
+    
+    def _get_cse_service(self):
+        """CSE service bound to the calling thread"""
+        service = getattr(self._thread_local, 'cse_service', None)
+        if service is None:
+            service = build("customsearch", "v1", developerKey=GOOGLE_CSE_API_KEY)
+            self._thread_local.cse_service = service
+        return service
         
     def generate_standard_queries(self, brand: str, vertical: str = None) -> List[str]:
         """Generate comprehensive competitor search queries"""
@@ -105,14 +194,15 @@ class CompetitorDiscovery:
     
     def search_google_cse(self, query: str, num_results: int = 10) -> List[Dict]:
         """Execute Google Custom Search with caching and rate limiting"""
-        if query in self.results_cache:
-            return self.results_cache[query]
+        cached = self.results_cache.get(query, num_results)
+        if cached is not None:
+            return cached
         
         try:
             # Rate limiting - free tier allows 100 queries/day
             time.sleep(0.1)
             
-            result = self.cse_service.cse().list(
+            result = self._get_cse_service().cse().list(
                 q=query,
                 cx=GOOGLE_CSE_CX,
                 num=min(num_results, 10)  # Max 10 per request
@@ -127,13 +217,23 @@ class CompetitorDiscovery:
                     'query_context': query
                 })
             
-            self.results_cache[query] = search_results
+            self.results_cache.put(query, num_results, search_results)
             return search_results
             
         except Exception as e:
             print(f"Search failed for query '{query}': {e}")
             return []
     
+    def search_many(self, queries: List[str], num_results: int = 10) -> Dict[str, List[Dict]]:
+        """Run several CSE queries concurrently, returning results keyed by query"""
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.search_google_cse, query, num_results): query
+                       for query in queries}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        return results
+    
     def detect_brand_vertical(self, brand: str) -> Optional[str]:
         """Simple heuristic vertical detection using search results"""
         # Try to find industry context through search
@@ -156,9 +256,9 @@ class CompetitorDiscovery:
         
         # Simple keyword matching from search results
         all_content = ""
-        for query in vertical_queries[:2]:  # Limit to avoid quota issues
-            results = self.search_google_cse(query, 3)
-            for result in results:
+        vertical_results = self.search_many(vertical_queries[:2], 3)  # Limit to avoid quota issues
+        for query in vertical_queries[:2]:
+            for result in vertical_results[query]:
                 all_content += f" {result.get('title', '')} {result.get('snippet', '')}"
         
         content_lower = all_content.lower()
@@ -179,45 +279,56 @@ class CompetitorDiscovery:
     def extract_candidates_from_results(self, results: List[Dict], brand: str, 
                                        discovery_method: str = 'standard') -> List[CompetitorCandidate]:
         """Extract competitor candidates from search results"""
+        if extract_company_names_batch is None:
+            return self._extract_candidates_per_result(results, brand, discovery_method)
+        
+        # Relevance score per result, shared by all names found in it
+        raw_scores = [
+            score_search_result(r.get('title', ''), r.get('snippet', ''), r.get('link', ''), r.get('query_context', ''))
+            for r in results
+        ]
+        
+        candidates = []
+        brand_lower = brand.lower()
+        for span in extract_company_names_batch(results):
+            if span.company_name.lower() == brand_lower:  # Exclude self
+                continue
+            
+            result = results[span.result_index]
+            candidates.append(CompetitorCandidate(
+                company_name=span.company_name,
+                source_url=result.get('link', ''),
+                source_title=result.get('title', ''),
+                query_used=result.get('query_context', ''),
+                raw_score=raw_scores[span.result_index] + (0.2 if span.found_in == 'title' else 0.0),  # Bonus for title
+                found_in=span.found_in,
+                discovery_method=discovery_method
+            ))
+        
+        return candidates
+    
+    def _extract_candidates_per_result(self, results: List[Dict], brand: str,
+                                       discovery_method: str) -> List[CompetitorCandidate]:
+        """Fallback extraction when search_utils is unavailable"""
         candidates = []
         
         for result in results:
             title = result.get('title', '')
-            snippet = result.get('snippet', '')
             url = result.get('link', '')
             query = result.get('query_context', '')
             
-            # Calculate relevance score
-            raw_score = score_search_result(title, snippet, url, query) if score_search_result else 0.5
-            
-            # Extract company names from title and snippet
-            title_companies = extract_company_names(title) if extract_company_names else [title.split()[0] if title else "Unknown"]
-            snippet_companies = extract_company_names(snippet) if extract_company_names else []
-            
-            # Create candidates for each found company
-            for company in title_companies:
-                if company.lower() != brand.lower():  # Exclude self
-                    candidates.append(CompetitorCandidate(
-                        company_name=company,
-                        source_url=url,
-                        source_title=title,
-                        query_used=query,
-                        raw_score=raw_score + 0.2,  # Bonus for title
-                        found_in='title',
-                        discovery_method=discovery_method
-                    ))
-            
-            for company in snippet_companies:
-                if company.lower() != brand.lower():  # Exclude self
-                    candidates.append(CompetitorCandidate(
-                        company_name=company,
-                        source_url=url,
-                        source_title=title,
-                        query_used=query,
-                        raw_score=raw_score,
-                        found_in='snippet',
-                        discovery_method=discovery_method
-                    ))
+            # Use the first word of the title as the candidate
+            company = title.split()[0] if title else "Unknown"
+            if company.lower() != brand.lower():  # Exclude self
+                candidates.append(CompetitorCandidate(
+                    company_name=company,
+                    source_url=url,
+                    source_title=title,
+                    query_used=query,
+                    raw_score=0.5 + 0.2,  # Bonus for title
+                    found_in='title',
+                    discovery_method=discovery_method
+                ))
         
         return candidates
     
@@ -236,31 +347,62 @@ class CompetitorDiscovery:
             else:
                 print("⚠️  Could not detect vertical, using generic queries")
         
-        # Step 2: Try standard discovery approach
+        # Step 2: Fan out standard queries concurrently, speculatively issuing the
+        # fallback queries as soon as early results look thin
         standard_queries = self.generate_standard_queries(brand, vertical)
-        all_candidates = []
-        
-        print(f"🎯 Executing {len(standard_queries)} standard discovery queries...")
-        for query in standard_queries:
-            results = self.search_google_cse(query, max_results_per_query)
-            candidates = self.extract_candidates_from_results(results, brand, 'standard')
-            all_candidates.extend(candidates)
-            print(f"   '{query[:50]}...' → {len(candidates)} candidates")
-        
-        # Step 3: Check if we have sufficient results
-        unique_standard_candidates = len(set(c.company_name.lower() for c in all_candidates))
-        print(f"📈 Standard discovery found {unique_standard_candidates} unique candidates")
-        
-        # Step 4: Use fallback strategy if insufficient results
-        if unique_standard_candidates < 5:
-            print("🔄 Insufficient results, trying fallback discovery...")
-            fallback_queries = self.generate_fallback_queries(brand, vertical)
+        fallback_queries = self.generate_fallback_queries(brand, vertical)
+        cache_hits_before = self.results_cache.hits
+        
+        print(f"🎯 Executing {len(standard_queries)} standard discovery queries "
+              f"({self.max_workers} concurrent)...")
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            standard_futures = {executor.submit(self.search_google_cse, query, max_results_per_query): query
+                                for query in standard_queries}
+            fallback_futures = {}
+            standard_candidates = {}
+            seen_names = set()
+            
+            for future in as_completed(standard_futures):
+                query = standard_futures[future]
+                candidates = self.extract_candidates_from_results(future.result(), brand, 'standard')
+                standard_candidates[query] = candidates
+                seen_names.update(c.company_name.lower() for c in candidates)
+                
+                if not fallback_futures and self._results_look_thin(
+                        len(standard_candidates), len(standard_queries), len(seen_names)):
+                    print("   ⚡ Early results look thin, speculatively issuing fallback queries...")
+                    fallback_futures = {executor.submit(self.search_google_cse, q, max_results_per_query): q
+                                        for q in fallback_queries}
+            
+            # Keep candidate order deterministic (query order, not completion order)
+            all_candidates = []
+            for query in standard_queries:
+                all_candidates.extend(standard_candidates[query])
+                print(f"   '{query[:50]}...' → {len(standard_candidates[query])} candidates")
+            
+            # Step 3: Check if we have sufficient results
+            unique_standard_candidates = len(seen_names)
+            print(f"📈 Standard discovery found {unique_standard_candidates} unique candidates")
             
-            for query in fallback_queries:
-                results = self.search_google_cse(query, max_results_per_query)
-                candidates = self.extract_candidates_from_results(results, brand, 'fallback')
-                all_candidates.extend(candidates)
-                print(f"   '{query[:50]}...' → {len(candidates)} candidates")
+            # Step 4: Use fallback strategy if insufficient results
+            if unique_standard_candidates < MIN_STANDARD_CANDIDATES:
+                print("🔄 Insufficient results, trying fallback discovery...")
+                if not fallback_futures:
+                    fallback_futures = {executor.submit(self.search_google_cse, q, max_results_per_query): q
+                                        for q in fallback_queries}
+                fallback_results = {fallback_futures[f]: f.result() for f in fallback_futures}
+                
+                for query in fallback_queries:
+                    candidates = self.extract_candidates_from_results(fallback_results[query], brand, 'fallback')
+                    all_candidates.extend(candidates)
+                    print(f"   '{query[:50]}...' → {len(candidates)} candidates")
+            else:
+                # Speculation not needed - drop queries that have not started yet
+                for future in fallback_futures:
+                    future.cancel()
+        
+        print(f"   💾 Search cache: {self.results_cache.hits - cache_hits_before} hits this run")
         
         # Step 5: Deduplicate and score
         dedupe_data = [
@@ -299,6 +441,20 @@ class CompetitorDiscovery:
         print(f"✅ Discovery complete: {len(final_candidates)} unique candidates found")
         return final_candidates
     
+    @staticmethod
+    def _results_look_thin(completed: int, total: int, unique_candidates: int) -> bool:
+        """
+        Decide whether to speculatively start fallback queries.
+        
+        Once half of the standard queries are back, project the unique candidate
+        count linearly; if it would not reach MIN_STANDARD_CANDIDATES, start now.
+        """
+        if total == 0:
+            return True
+        if completed * 2 < total:
+            return False
+        return unique_candidates * total / completed < MIN_STANDARD_CANDIDATES
+    
     def save_to_csv(self, candidates: List[CompetitorCandidate], 
                    output_path: str, brand: str, vertical: str = None):
         """Save candidates to CSV file"""
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Cross-run cache of multimodal visual analyses
+
+Stored media is immutable per ad (gs://.../<brand>/<media_type>/<ad_id>.<ext>), so
+an analysis stays valid until the image, the ad text in the prompt, the prompt
+template or the model changes. Analyses are stored in BigQuery keyed by
+(media_storage_path, input hash, prompt hash, model); the visual stage reuses
+fresh entries and spends its AI budget on uncached ads only.
+"""
+
+import hashlib
+import os
+from typing import List, Tuple
+
+from src.utils.bigquery_client import get_bigquery_client
+
+BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
+BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
+
+VISUAL_CACHE_TTL_DAYS = int(os.environ.get("VISUAL_CACHE_TTL_DAYS", "90"))
+
+
+def prompt_hash(*parts: str) -> str:
+    """Stable hash of a prompt template and output schema"""
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class VisualAnalysisCache:
+    """Persistent visual analysis store backed by a BigQuery table"""
+
+    def __init__(self, fields: List[Tuple[str, str]], prompt_hash: str, model: str,
+                 ttl_days: int = VISUAL_CACHE_TTL_DAYS, table_id: str = None):
+        self.fields = fields
+        self.prompt_hash = prompt_hash
+        self.model = model
+        self.ttl_days = ttl_days
+        self.table_id = table_id or f"{BQ_PROJECT}.{BQ_DATASET}.visual_analysis_cache"
+
+    @staticmethod
+    def input_hash_sql(alias: str) -> str:
+        """SQL for the hash of the non-image prompt inputs (brand and ad text)"""
+        return f"TO_HEX(SHA256(CONCAT(COALESCE({alias}.brand, ''), '|', COALESCE({alias}.creative_text, ''))))"
+
+    def ensure_table(self):
+        """Create the cache table if it does not exist yet"""
+        field_columns = ',\n          '.join(f"{name} {field_type}" for name, field_type in self.fields)
+        client = get_bigquery_client(BQ_PROJECT)
+        client.query(f"""
+        CREATE TABLE IF NOT EXISTS `{self.table_id}` (
+          media_storage_path STRING,
+          input_hash STRING,
+          prompt_hash STRING,
+          model STRING,
+          {field_columns},
+          cached_at TIMESTAMP
+        )
+        CLUSTER BY media_storage_path
+        """).result()
+
+    def fresh_entries_sql(self) -> str:
+        """Subquery of the latest fresh analysis per (media_storage_path, input_hash) for this prompt and model"""
+        return f"""
+          SELECT * EXCEPT (prompt_hash, model)
+          FROM `{self.table_id}`
+          WHERE prompt_hash = '{self.prompt_hash}'
+            AND model = '{self.model}'
+            AND cached_at >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {int(self.ttl_days)} DAY)
+          QUALIFY ROW_NUMBER() OVER (PARTITION BY media_storage_path, input_hash ORDER BY cached_at DESC) = 1
+        """
+
+    def store(self, source_table_id: str):
+        """
+        Upsert new successful analyses from a visual_intelligence table into the cache.
+
+        Rows with attempt 0 were themselves reused from the cache and are skipped.
+        """
+        field_names = [name for name, _ in self.fields]
+        try:
+            client = get_bigquery_client(BQ_PROJECT)
+            job = client.query(f"""
+            MERGE `{self.table_id}` cache
+            USING (
+              SELECT
+                primary_image_url as media_storage_path,
+                {self.input_hash_sql('v')} as input_hash,
+                {', '.join(field_names)}
+              FROM `{source_table_id}` v
+              WHERE v.attempt > 0 AND v.ai_status = '' AND v.primary_image_url IS NOT NULL
+              QUALIFY ROW_NUMBER() OVER (PARTITION BY v.primary_image_url, v.brand, v.creative_text) = 1
+            ) new
+            ON cache.media_storage_path = new.media_storage_path
+              AND cache.input_hash = new.input_hash
+              AND cache.prompt_hash = '{self.prompt_hash}'
+              AND cache.model = '{self.model}'
+            WHEN MATCHED THEN UPDATE SET
+              {', '.join(f'{name} = new.{name}' for name in field_names)},
+              cached_at = CURRENT_TIMESTAMP()
+            WHEN NOT MATCHED THEN INSERT
+              (media_storage_path, input_hash, prompt_hash, model, {', '.join(field_names)}, cached_at)
+            VALUES
+              (new.media_storage_path, new.input_hash, '{self.prompt_hash}', '{self.model}',
+               {', '.join(f'new.{name}' for name in field_names)}, CURRENT_TIMESTAMP())
+            """)
+            job.result()
+            if job.num_dml_affected_rows:
+                print(f"   💾 Cached {job.num_dml_affected_rows} visual analyses for future runs")
+        except Exception as e:
+            print(f"   ⚠️  Could not update visual analysis cache: {str(e)[:100]}")
@@ -6,6 +6,11 @@ from typing import Any, TypeVar, Generic
 from ..core.progress import ProgressTracker
 import logging
 
+try:
+    from src.utils.bigquery_client import set_job_labels
+except ImportError:
+    set_job_labels = None
+
 # Generic type for stage inputs and outputs
 T = TypeVar('T')
 U = TypeVar('U')
@@ -56,6 +61,9 @@ class PipelineStage(ABC, Generic[T, U]):
             The output data from this stage
         """
         progress_tracker.start_stage(self.stage_number, self.stage_name)
+        if set_job_labels is not None:
+            # Attribute this stage's BigQuery jobs in the run cost ledger
+            set_job_labels(stage=self.stage_name)
         
         try:
             self.logger.info(f"Starting {self.stage_name}")
@@ -34,6 +34,10 @@ class ValidatedCompetitor:
     meta_tier: int = 0
     estimated_ad_count: str = "0"
     meta_classification: str = "Unknown"
+    # Stage 3 probe payload, reused by Stage 4 to skip re-fetching the first page
+    page_id: Optional[str] = None
+    probe_page: Optional[List[Dict]] = None
+    probe_cursor: Optional[str] = None
 
 
 @dataclass
@@ -81,6 +85,8 @@ class AnalysisResults:
     momentum: Dict = field(default_factory=dict)
     white_spaces: Dict = field(default_factory=dict)
     cascades: Dict = field(default_factory=dict)
+    # Seconds spent in each Stage 8 analysis step
+    step_timings: Dict = field(default_factory=dict)
 
 
 @dataclass
@@ -32,6 +32,20 @@ from .stages.visual_intelligence import VisualIntelligenceStage
 from .stages.enhanced_output import EnhancedOutputStage
 from .stages.multidimensional_intelligence import MultiDimensionalIntelligenceStage
 
+try:
+    from src.utils.run_registry import flush_run_registry, RUN_ARTIFACT_TTL_HOURS
+except ImportError:
+    flush_run_registry = None
+    RUN_ARTIFACT_TTL_HOURS = None
+
+try:
+    from src.utils.bigquery_client import set_job_labels
+    from src.utils.cost_ledger import RunCostLedger, check_cost_regression
+except ImportError:
+    set_job_labels = None
+    RunCostLedger = None
+    check_cost_regression = None
+
 # Environment configuration
 BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
 BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
@@ -49,11 +63,13 @@ class CompetitiveIntelligencePipeline:
     - Maintainable and debuggable
     """
     
-    def __init__(self, brand: str, vertical: str = "", dry_run: bool = False, verbose: bool = False):
+    def __init__(self, brand: str, vertical: str = "", dry_run: bool = False, verbose: bool = False,
+                 reembed: bool = False):
         self.brand = brand
         self.vertical = vertical
         self.dry_run = dry_run
         self.verbose = verbose
+        self.reembed = reembed
         
         # Generate run ID
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -71,6 +87,10 @@ class CompetitiveIntelligencePipeline:
         # Stage timings
         self.stage_timings = {}
         
+        # Measured BigQuery cost of this run (see src/utils/cost_ledger.py)
+        self.cost_ledger = RunCostLedger(self.run_id) if RunCostLedger is not None and not dry_run else None
+        self.insight_count = None
+        
     def _setup_logging(self):
         """Setup pipeline logging"""
         self.logger = logging.getLogger(f"pipeline_{self.run_id}")
@@ -110,24 +130,28 @@ class CompetitiveIntelligencePipeline:
             print(f"Output: {'dry-run' if self.dry_run else 'terminal → data/output'}")
             print("=" * 70 + "\n")
             
+            if set_job_labels is not None:
+                # Every BigQuery job of this run is labeled for the cost ledger
+                set_job_labels(run_id=self.run_id, target_brand=self.brand)
+            
             # Stage 1: Discovery
             discovery_stage = DiscoveryStage(self.context, self.dry_run)
-            candidates = discovery_stage.run(self.context, self.progress)
+            candidates = self._run_stage(discovery_stage, self.context)
             print(f"✅ Stage 1 complete - Found {len(candidates)} candidates")
             
             # Stage 2: AI Competitor Curation
             curation_stage = CurationStage(self.context, self.dry_run)
-            validated_competitors = curation_stage.run(candidates, self.progress)
+            validated_competitors = self._run_stage(curation_stage, candidates)
             print(f"✅ Stage 2 complete - Validated {len(validated_competitors)} competitors")
             
             # Stage 3: Meta Ad Activity Ranking
             ranking_stage = RankingStage(self.context, self.dry_run, self.verbose)
-            ranked_competitors = ranking_stage.run(validated_competitors, self.progress)
+            ranked_competitors = self._run_stage(ranking_stage, validated_competitors)
             print(f"✅ Stage 3 complete - Ranked {len(ranked_competitors)} Meta-active competitors")
             
             # Stage 4: Meta Ads Ingestion  
             ingestion_stage = IngestionStage(self.context, self.dry_run, self.verbose)
-            ingestion_results = ingestion_stage.run(ranked_competitors, self.progress)
+            ingestion_results = self._run_stage(ingestion_stage, ranked_competitors)
             print(f"✅ Stage 4 complete - Collected {ingestion_results.total_ads} ads from {len(ingestion_results.brands)} brands")
             
             # Store competitor brands in context for later stages
@@ -135,22 +159,22 @@ class CompetitiveIntelligencePipeline:
             
             # Stage 5: Strategic Labeling
             strategic_labeling_stage = StrategicLabelingStage(self.context, self.dry_run, self.verbose)
-            strategic_results = strategic_labeling_stage.run(ingestion_results, self.progress)
+            strategic_results = self._run_stage(strategic_labeling_stage, ingestion_results)
             print(f"✅ Stage 5 complete - Generated strategic labels for {strategic_results.labeled_ads} ads")
             
             # Stage 6: Embeddings Generation
-            embeddings_stage = EmbeddingsStage(self.context, self.dry_run, self.verbose)
-            embeddings_results = embeddings_stage.run(ingestion_results, self.progress)
+            embeddings_stage = EmbeddingsStage(self.context, self.dry_run, self.verbose, reembed=self.reembed)
+            embeddings_results = self._run_stage(embeddings_stage, ingestion_results)
             print(f"✅ Stage 6 complete - Generated {embeddings_results.embedding_count} embeddings")
 
             # Stage 7: Visual Intelligence
             visual_intel_stage = VisualIntelligenceStage(self.context, self.dry_run)
-            visual_intel_results = visual_intel_stage.run(embeddings_results, self.progress)
+            visual_intel_results = self._run_stage(visual_intel_stage, embeddings_results)
             print(f"✅ Stage 7 complete - Visual intelligence: {visual_intel_results.sampled_ads} ads analyzed, ${visual_intel_results.cost_estimate:.2f}")
 
             # Stage 8: Strategic Analysis
             analysis_stage = AnalysisStage(self.context, self.dry_run, self.verbose)
-            analysis_results = analysis_stage.run(embeddings_results, self.progress)
+            analysis_results = self._run_stage(analysis_stage, embeddings_results)
             print(f"✅ Stage 8 complete - Strategic analysis complete")
             
             # Stage 9: Multi-Dimensional Intelligence
@@ -159,12 +183,13 @@ class CompetitiveIntelligencePipeline:
             multidim_intel_stage.competitor_brands = self.context.competitor_brands + [self.context.brand]
             # Pass Visual Intelligence results to the stage for L1-L4 integration
             multidim_intel_stage.visual_intelligence_results = visual_intel_results.__dict__ if visual_intel_results else {}
-            multidim_intel_results = multidim_intel_stage.run(analysis_results, self.progress)
+            multidim_intel_results = self._run_stage(multidim_intel_stage, analysis_results)
             print(f"✅ Stage 9 complete - Multi-dimensional intelligence analysis complete")
             
             # Stage 10: Intelligence Output
             output_stage = EnhancedOutputStage(self.context, self.dry_run, self.verbose)
-            intelligence_output = output_stage.run(multidim_intel_results, self.progress)
+            intelligence_output = self._run_stage(output_stage, multidim_intel_results)
+            self.insight_count = (intelligence_output.level_4 or {}).get('total_signals') if intelligence_output else None
             print(f"✅ Stage 10 complete - Intelligence output generated")
             
             # CRITICAL: Validate data integrity before declaring success
@@ -218,6 +243,57 @@ class CompetitiveIntelligencePipeline:
                 run_id=self.run_id
             )
 
+        finally:
+            self._flush_run_registry()
+            self._record_run_costs()
+            if set_job_labels is not None:
+                set_job_labels(run_id=None, stage=None, target_brand=None)
+
+    def _flush_run_registry(self):
+        """Record the run's tables and views so `run_registry gc` can drop them later"""
+        if self.dry_run or flush_run_registry is None:
+            return
+        try:
+            registered = flush_run_registry(self.run_id)
+            if registered:
+                print(f"🗂️  Registered {registered} run artifacts (expire in {RUN_ARTIFACT_TTL_HOURS:g}h)")
+        except Exception as e:
+            self.logger.warning(f"Could not write run artifact registry: {e}")
+
+    def _run_stage(self, stage, input_data):
+        """Run a stage and record its measured cost in the run cost ledger"""
+        try:
+            return stage.run(input_data, self.progress)
+        finally:
+            self._record_stage_costs(stage.stage_name)
+
+    def _record_stage_costs(self, stage_name: str):
+        if self.cost_ledger is None:
+            return
+        try:
+            self.cost_ledger.record(stage=stage_name)
+        except Exception as e:
+            self.logger.warning(f"Could not record cost of {stage_name}: {e}")
+
+    def _record_run_costs(self):
+        """Re-measure the whole run, print its cost by stage and flag cost regressions"""
+        if self.cost_ledger is None:
+            return
+        try:
+            stages = self.cost_ledger.record(insights=self.insight_count)
+            if not stages.empty:
+                total = stages['cost_usd'].sum()
+                per_insight = f", ${total / self.insight_count:.4f}/insight" if self.insight_count else ""
+                print(f"💰 Measured BigQuery cost: ${total:.4f}{per_insight}")
+                for _, row in stages.head(3).iterrows():
+                    print(f"   • {row['stage']}: ${row['cost_usd']:.4f} ({row['jobs']} jobs, {row['ai_rows']} AI rows)")
+            regression = check_cost_regression(self.run_id, self.brand)
+            if regression and regression['regression']:
+                print(f"⚠️  Run cost ${regression['cost_usd']:.4f} is above the {self.brand} baseline "
+                      f"${regression['baseline_cost_usd']:.4f}")
+        except Exception as e:
+            self.logger.warning(f"Could not record run cost ledger: {e}")
+
     def _validate_data_integrity(self):
         """
         Critical data integrity validation - ensures core inviolable fields are preserved.
@@ -290,6 +366,8 @@ def main():
     parser.add_argument("--vertical", help="Brand vertical (auto-detected if not provided)")
     parser.add_argument("--dry-run", action="store_true", help="Run with mock data")
     parser.add_argument("--verbose", action="store_true", help="Verbose output")
+    parser.add_argument("--reembed", action="store_true",
+                        help="Re-embed all ads instead of only new or changed ones")
     
     args = parser.parse_args()
     
@@ -298,7 +376,8 @@ def main():
         brand=args.brand,
         vertical=args.vertical or "",
         dry_run=args.dry_run,
-        verbose=args.verbose
+        verbose=args.verbose,
+        reembed=args.reembed
     )
     
     results = pipeline.execute_pipeline()
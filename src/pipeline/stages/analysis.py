@@ -4,8 +4,11 @@ Stage 6: Strategic Analysis
 Clean, focused implementation of competitive intelligence analysis.
 """
 import os
+import threading
 import time
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
 
 from ..core.base import PipelineStage, PipelineContext
 from ..models.candidates import EmbeddingResults, AnalysisResults
@@ -28,10 +31,35 @@ try:
 except ImportError:
     Enhanced3DWhiteSpaceDetector = None
 
+try:
+    from src.competitive_intel.analysis.local_similarity_engine import LocalSimilarityEngine
+except ImportError:
+    LocalSimilarityEngine = None
+
 # Environment configuration
 BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
 BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
 
+# Copying detection: 'vector_search' (top-k VECTOR_SEARCH over a vector index) or 'exhaustive' (CROSS JOIN)
+COPYING_DETECTION_METHOD = os.environ.get("COPYING_DETECTION_METHOD", "vector_search")
+COPYING_TOP_K = int(os.environ.get("COPYING_TOP_K", "20"))
+COPYING_DISTANCE_THRESHOLD = float(os.environ.get("COPYING_DISTANCE_THRESHOLD", "0.3"))
+EMBEDDING_VECTOR_INDEX = "ads_embeddings_content_idx"
+
+# Embedding similarity compute: 'bigquery' (SQL joins) or 'local' (NumPy engine over the local embedding store)
+ANALYSIS_COMPUTE_ENGINE = os.environ.get("ANALYSIS_COMPUTE_ENGINE", "bigquery")
+
+# Concurrent analysis steps (BigQuery jobs in flight at once)
+ANALYSIS_MAX_WORKERS = int(os.environ.get("ANALYSIS_MAX_WORKERS", "4"))
+
+
+@dataclass(frozen=True)
+class AnalysisStep:
+    """One node of the analysis dependency graph"""
+    run: Callable[[], object]
+    depends_on: Tuple[str, ...]
+    label: str
+
 
 class AnalysisStage(PipelineStage[EmbeddingResults, AnalysisResults]):
     """
@@ -44,11 +72,23 @@ class AnalysisStage(PipelineStage[EmbeddingResults, AnalysisResults]):
     - Wide net forecasting with business impact
     """
     
-    def __init__(self, context: PipelineContext, dry_run: bool = False, verbose: bool = False):
+    def __init__(self, context: PipelineContext, dry_run: bool = False, verbose: bool = False,
+                 copying_method: str = COPYING_DETECTION_METHOD,
+                 copying_top_k: int = COPYING_TOP_K,
+                 copying_distance_threshold: float = COPYING_DISTANCE_THRESHOLD,
+                 compute_engine: str = ANALYSIS_COMPUTE_ENGINE,
+                 max_workers: int = ANALYSIS_MAX_WORKERS):
         super().__init__("Strategic Analysis", 8, context.run_id)
         self.context = context
         self.dry_run = dry_run
         self.verbose = verbose
+        self.copying_method = copying_method
+        self.copying_top_k = copying_top_k
+        self.copying_distance_threshold = copying_distance_threshold
+        self.compute_engine = compute_engine
+        self.max_workers = max_workers
+        self._local_engine = None
+        self._local_engine_lock = threading.Lock()
         # Get competitor brands from context (set by previous stages)
         self.competitor_brands = getattr(context, 'competitor_brands', [])
         self.temporal_engine = None
@@ -105,11 +145,6 @@ class AnalysisStage(PipelineStage[EmbeddingResults, AnalysisResults]):
         try:
             print("   🔍 Running enhanced strategic analysis with temporal intelligence...")
             
-            # Robust polling mechanism to ensure BigQuery table consistency after Strategic Labeling
-            import time
-            print("   ⏰ Waiting for BigQuery strategic data availability...")
-            self._wait_for_strategic_data_availability()
-            
             analysis = AnalysisResults()
             analysis.status = "success"
             # Note: Using dataclass constructor ensures all fields get proper defaults
@@ -117,43 +152,20 @@ class AnalysisStage(PipelineStage[EmbeddingResults, AnalysisResults]):
             # Initialize enhanced intelligence modules
             self._initialize_intelligence_engines()
             
-            # Step 1: CTA Intelligence Analysis (Required for temporal intelligence)
-            print("   🎯 Executing CTA Intelligence Analysis...")
-            try:
-                self._execute_cta_intelligence_analysis()
-                print("   ✅ CTA Intelligence analysis complete")
-            except Exception as e:
-                print(f"   ❌ CTA Intelligence analysis failed: {e}")
-
-            # Step 2: Current State Analysis
-            print("   📊 Analyzing current strategic position...")
-            try:
-                analysis.current_state = self._analyze_current_state()
-                print(f"   ✅ Current state analysis complete: PI = {analysis.current_state.get('promotional_intensity', 'MISSING')}")
-            except Exception as e:
-                print(f"   ❌ Current state analysis failed: {e}")
-                analysis.current_state = {
-                    'promotional_intensity': 0.0,
-                    'urgency_score': 0.0,
-                    'brand_voice_score': 0.0,
-                    'market_position': 'unknown',
-                    'promotional_volatility': 0.0,
-                    'avg_cta_aggressiveness': 0.0
-                }
+            # Independent steps run concurrently; each waits only on the steps it reads from
+            results, analysis.step_timings = self._run_step_graph(self._analysis_steps(embeddings))
             
-            # Step 3: Competitive Copying Detection
-            print("   🎯 Detecting competitive copying patterns...")
-            try:
-                analysis.influence = self._detect_copying_patterns(embeddings)
-                print("   ✅ Copying detection complete")
-            except Exception as e:
-                print(f"   ❌ Copying detection failed: {e}")
-                analysis.influence = {'copying_detected': False, 'similarity_score': 0.0}
-
-            # Step 3.5: Creative Fatigue Analysis (adapted from legacy)
-            print("   🎨 Analyzing creative fatigue patterns...")
-            try:
-                fatigue_analysis = self._analyze_creative_fatigue()
+            analysis.current_state = results.get('current_state') or {
+                'promotional_intensity': 0.0,
+                'urgency_score': 0.0,
+                'brand_voice_score': 0.0,
+                'market_position': 'unknown',
+                'promotional_volatility': 0.0,
+                'avg_cta_aggressiveness': 0.0
+            }
+            
+            fatigue_analysis = results.get('creative_fatigue')
+            if fatigue_analysis:
                 # Add fatigue data to current_state (following legacy pattern)
                 analysis.current_state.update({
                     'avg_fatigue_score': fatigue_analysis['avg_fatigue_score'],
@@ -162,31 +174,10 @@ class AnalysisStage(PipelineStage[EmbeddingResults, AnalysisResults]):
                     'high_fatigue_count': fatigue_analysis['high_fatigue_count'],
                     'fatigue_level': fatigue_analysis['fatigue_level']
                 })
-                print("   ✅ Creative fatigue analysis complete")
-            except Exception as e:
-                print(f"   ❌ Creative fatigue analysis failed: {e}")
-
-            # Step 4: Temporal Intelligence Analysis (now enhanced with CTA data)
-            print("   📈 Analyzing temporal intelligence (where did we come from)...")
-            try:
-                analysis.evolution = self._analyze_temporal_intelligence()
-                print("   ✅ Temporal intelligence complete")
-            except Exception as e:
-                print(f"   ❌ Temporal intelligence failed: {e}")
-                analysis.evolution = {'trend_direction': 'stable', 'momentum_status': 'STABLE', 'velocity_change_7d': 0.0, 'velocity_change_30d': 0.0}
-
-            # Step 5: Wide Net Forecasting
-            print("   🔮 Generating Wide Net forecasting (where are we going)...")
-            try:
-                analysis.forecasts = self._generate_forecasts()
-                print("   ✅ Forecasting complete")
-            except Exception as e:
-                print(f"   ❌ Forecasting failed: {e}")
-                analysis.forecasts = {'next_30_days': 'stable_market', 'confidence': 'LOW', 'business_impact_score': 2}
             
-            # Log final analysis result before returning (commented for production)
-            # print(f"   🔍 DEBUG ANALYSIS: Final analysis.current_state = {analysis.current_state}")
-            # print(f"   🔍 DEBUG ANALYSIS: About to return analysis with current_state PI = {analysis.current_state.get('promotional_intensity', 'MISSING')}")
+            analysis.influence = results.get('copying') or {'copying_detected': False, 'similarity_score': 0.0}
+            analysis.evolution = results.get('temporal') or {'trend_direction': 'stable', 'momentum_status': 'STABLE', 'velocity_change_7d': 0.0, 'velocity_change_30d': 0.0}
+            analysis.forecasts = results.get('forecasts') or {'next_30_days': 'stable_market', 'confidence': 'LOW', 'business_impact_score': 2}
             
             return analysis
             
@@ -197,6 +188,81 @@ class AnalysisStage(PipelineStage[EmbeddingResults, AnalysisResults]):
             # Fallback to basic mock results
             return self._create_fallback_analysis()
     
+    def _analysis_steps(self, embeddings: EmbeddingResults) -> Dict[str, AnalysisStep]:
+        """
+        Dependency graph of the analysis steps.
+        
+        CTA intelligence rebuilds cta_aggressiveness_analysis from the strategic
+        labels, and current state, temporal and forecasting all read that table, so
+        they wait for it. Copying and fatigue only read embeddings and start immediately.
+        """
+        return {
+            'strategic_data': AnalysisStep(self._wait_for_strategic_data_availability, (),
+                                           "⏰ Checking BigQuery strategic data availability"),
+            'cta_intelligence': AnalysisStep(self._execute_cta_intelligence_analysis, ('strategic_data',),
+                                             "🎯 Executing CTA Intelligence Analysis"),
+            'current_state': AnalysisStep(self._analyze_current_state, ('strategic_data', 'cta_intelligence'),
+                                          "📊 Analyzing current strategic position"),
+            'copying': AnalysisStep(lambda: self._detect_copying_patterns(embeddings), (),
+                                    "🎯 Detecting competitive copying patterns"),
+            'creative_fatigue': AnalysisStep(self._analyze_creative_fatigue, (),
+                                             "🎨 Analyzing creative fatigue patterns"),
+            'temporal': AnalysisStep(self._analyze_temporal_intelligence, ('cta_intelligence',),
+                                     "📈 Analyzing temporal intelligence (where did we come from)"),
+            'forecasts': AnalysisStep(self._generate_forecasts, ('cta_intelligence',),
+                                      "🔮 Generating Wide Net forecasting (where are we going)"),
+        }
+    
+    def _run_step_graph(self, steps: Dict[str, AnalysisStep]) -> Tuple[Dict[str, object], Dict[str, float]]:
+        """
+        Run steps as soon as their dependencies complete, up to max_workers at a time.
+        
+        A failed step is logged and yields no result; dependents still run (they
+        have their own fallbacks), matching the sequential behaviour.
+        
+        Returns:
+            (results by step name, seconds by step name)
+        """
+        results, timings = {}, {}
+        done, pending, running = set(), dict(steps), {}
+        
+        def timed(name: str, step: AnalysisStep):
+            print(f"   {step.label}...")
+            start = time.perf_counter()
+            try:
+                return step.run()
+            finally:
+                timings[name] = time.perf_counter() - start
+        
+        graph_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name, step in list(pending.items()):
+                    if all(dependency in done for dependency in step.depends_on):
+                        running[executor.submit(timed, name, step)] = name
+                        del pending[name]
+                
+                if not running:
+                    raise ValueError(f"Unsatisfiable analysis step dependencies: {sorted(pending)}")
+                
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    done.add(name)
+                    try:
+                        results[name] = future.result()
+                        print(f"   ✅ {name} complete ({timings[name]:.1f}s)")
+                    except Exception as e:
+                        print(f"   ❌ {name} failed after {timings[name]:.1f}s: {e}")
+        
+        wall_time = time.perf_counter() - graph_start
+        print(f"   ⏱️  Analysis steps: {wall_time:.1f}s wall vs {sum(timings.values()):.1f}s sequential")
+        for name in steps:
+            if name in timings:
+                print(f"      {name:<18} {timings[name]:>6.1f}s")
+        
+        return results, timings
+    
     def _initialize_intelligence_engines(self):
         """Initialize the temporal intelligence and whitespace detection engines"""
         if TemporalIntelligenceEngine:
@@ -313,34 +379,162 @@ class AnalysisStage(PipelineStage[EmbeddingResults, AnalysisResults]):
             return {'copying_detected': False, 'similarity_score': 0}
         
         try:
-            # Join embeddings with strategic labels to get timestamps for temporal analysis
-            # Use all available brands in embeddings, not just competitor_brands list
-            copying_query = f"""
-            WITH all_brand_embeddings AS (
+            if self.compute_engine == 'local':
+                # Exact (exhaustive) semantics, computed locally from one embedding scan
+                row = self._get_local_engine().copying(self.context.brand, self.copying_distance_threshold)
+                if row:
+                    return self._copying_result(row)
+                return {'copying_detected': False, 'similarity_score': 0}
+            
+            method = self.copying_method
+            if method == 'vector_search' and not self._ensure_embedding_vector_index(embeddings.table_id):
+                # Without an index VECTOR_SEARCH is brute force anyway; the CROSS JOIN is exact at that cost
+                method = 'exhaustive'
+            copying_query = self._build_copying_query(embeddings.table_id, method)
+            
+            copying_result = run_query(copying_query)
+            if not copying_result.empty:
+                return self._copying_result(copying_result.iloc[0])
+                
+        except Exception as e:
+            print(f"   ⚠️  Copying detection error: {e}")
+        
+        return {'copying_detected': False, 'similarity_score': 0}
+
+    @staticmethod
+    def _copying_result(row) -> dict:
+        """Influence dict from a copying detection row (SQL or local engine)"""
+        similarity = float(row.get('avg_similarity', 1.0))
+        # Convert COSINE distance to similarity (1 - distance)
+        similarity_pct = max(0, 1 - similarity)
+        return {
+            'copying_detected': True,
+            'top_copier': row.get('potential_copier', 'Unknown'),
+            'similarity_score': similarity_pct,
+            'lag_days': int(row.get('min_lag_days', 0))
+        }
+
+    def _get_local_engine(self):
+        """Local similarity engine, loaded once per stage from the embedding store"""
+        if LocalSimilarityEngine is None:
+            raise ImportError("LocalSimilarityEngine required for local compute")
+        # Copying and fatigue run concurrently; load the store only once
+        with self._local_engine_lock:
+            if self._local_engine is None:
+                print("   📦 Loading embeddings into local similarity engine...")
+                self._local_engine = LocalSimilarityEngine.from_store()
+                print(f"   ✅ {len(self._local_engine)} embeddings loaded")
+        return self._local_engine
+
+    def _ensure_embedding_vector_index(self, embeddings_table: str) -> bool:
+        """
+        Create the IVF cosine vector index used by VECTOR_SEARCH (idempotent).
+        
+        BigQuery skips index population for small tables; VECTOR_SEARCH then falls
+        back to brute force. Returns False when the index cannot be created, in
+        which case copying detection uses the exhaustive method.
+        """
+        try:
+            run_query(f"""
+            CREATE VECTOR INDEX IF NOT EXISTS {EMBEDDING_VECTOR_INDEX}
+            ON `{embeddings_table}`(content_embedding)
+            STORING(brand)
+            OPTIONS(index_type = 'IVF', distance_type = 'COSINE')
+            """)
+            return True
+        except Exception as e:
+            print(f"   ⚠️  Vector index unavailable, using exhaustive copying detection: {e}")
+            return False
+
+    def _build_copying_query(self, embeddings_table: str, method: str, sample_limit: int = None) -> str:
+        """
+        Build the copying detection query.
+        
+        Both methods return potential_copier, avg_similarity (mean COSINE distance),
+        min_lag_days and comparison_count for the closest competitor. 'exhaustive'
+        compares every target ad with every competitor ad (O(N x M)); 'vector_search'
+        only scores each target ad's top-k nearest competitor ads (O(N x k)), which
+        matches exhaustive whenever fewer than k competitor ads fall under the threshold.
+        
+        sample_limit caps the number of target-brand ads (used by the benchmark).
+        """
+        sample_clause = f"ORDER BY ad_archive_id LIMIT {int(sample_limit)}" if sample_limit else ""
+        
+        # Join embeddings with strategic labels to get timestamps for temporal analysis
+        # Use all available brands in embeddings, not just competitor_brands list
+        all_brand_embeddings = f"""
+            all_brand_embeddings AS (
                 SELECT
                     e.brand,
                     e.ad_archive_id,
                     e.content_embedding,
                     s.start_timestamp
-                FROM `{embeddings.table_id}` e
+                FROM `{embeddings_table}` e
                 LEFT JOIN `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates` s
                 ON e.ad_archive_id = s.ad_archive_id AND e.brand = s.brand
                 WHERE e.content_embedding IS NOT NULL
                     AND s.start_timestamp IS NOT NULL
             ),
+            target_ads AS (
+                SELECT * FROM all_brand_embeddings
+                WHERE brand = '{self.context.brand}'
+                {sample_clause}
+            )"""
+        
+        if method == 'exhaustive':
+            brand_similarity = f"""
             brand_similarity AS (
                 SELECT
                     a.brand as original_brand,
                     b.brand as potential_copier,
                     ML.DISTANCE(a.content_embedding, b.content_embedding, 'COSINE') as similarity_score,
                     DATE_DIFF(DATE(b.start_timestamp), DATE(a.start_timestamp), DAY) as lag_days
-                FROM all_brand_embeddings a
+                FROM target_ads a
                 CROSS JOIN all_brand_embeddings b
-                WHERE a.brand = '{self.context.brand}'
-                    AND b.brand != '{self.context.brand}'
+                WHERE b.brand != '{self.context.brand}'
                     AND DATE(b.start_timestamp) >= DATE(a.start_timestamp)
-                    AND ML.DISTANCE(a.content_embedding, b.content_embedding, 'COSINE') < 0.3
-            )
+                    AND ML.DISTANCE(a.content_embedding, b.content_embedding, 'COSINE') < {self.copying_distance_threshold}
+            )"""
+        elif method == 'vector_search':
+            brand_similarity = f"""
+            nearest_competitor_ads AS (
+                -- Top-k nearest competitor ads per target ad (uses the vector index when populated)
+                SELECT
+                    query.brand as original_brand,
+                    query.start_timestamp as original_start,
+                    base.brand as potential_copier,
+                    base.ad_archive_id as copier_ad_id,
+                    distance
+                FROM VECTOR_SEARCH(
+                    (SELECT ad_archive_id, brand, content_embedding
+                     FROM `{embeddings_table}`
+                     WHERE brand != '{self.context.brand}'),
+                    'content_embedding',
+                    (SELECT * FROM target_ads),
+                    'content_embedding',
+                    top_k => {int(self.copying_top_k)},
+                    distance_type => 'COSINE'
+                )
+                WHERE distance < {self.copying_distance_threshold}
+            ),
+            brand_similarity AS (
+                SELECT
+                    n.original_brand,
+                    n.potential_copier,
+                    n.distance as similarity_score,
+                    DATE_DIFF(DATE(s.start_timestamp), DATE(n.original_start), DAY) as lag_days
+                FROM nearest_competitor_ads n
+                JOIN `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates` s
+                ON n.copier_ad_id = s.ad_archive_id AND n.potential_copier = s.brand
+                WHERE s.start_timestamp IS NOT NULL
+                    AND DATE(s.start_timestamp) >= DATE(n.original_start)
+            )"""
+        else:
+            raise ValueError(f"Unknown copying detection method: {method}")
+        
+        return f"""
+            WITH {all_brand_embeddings},
+            {brand_similarity}
             SELECT 
                 potential_copier,
                 AVG(similarity_score) as avg_similarity,
@@ -352,24 +546,6 @@ class AnalysisStage(PipelineStage[EmbeddingResults, AnalysisResults]):
             ORDER BY avg_similarity ASC
             LIMIT 1
             """
-            
-            copying_result = run_query(copying_query)
-            if not copying_result.empty:
-                row = copying_result.iloc[0]
-                similarity = float(row.get('avg_similarity', 1.0))
-                # Convert COSINE distance to similarity (1 - distance)
-                similarity_pct = max(0, 1 - similarity)
-                return {
-                    'copying_detected': True,
-                    'top_copier': row.get('potential_copier', 'Unknown'),
-                    'similarity_score': similarity_pct,
-                    'lag_days': int(row.get('min_lag_days', 0))
-                }
-                
-        except Exception as e:
-            print(f"   ⚠️  Copying detection error: {e}")
-        
-        return {'copying_detected': False, 'similarity_score': 0}
 
     def _analyze_creative_fatigue(self) -> dict:
         """Analyze creative fatigue using embeddings and temporal patterns (adapted from legacy)"""
@@ -378,7 +554,12 @@ class AnalysisStage(PipelineStage[EmbeddingResults, AnalysisResults]):
             return self._mock_fatigue_results()
 
         try:
-            print("   🎨 Analyzing creative fatigue patterns...")
+            if self.compute_engine == 'local':
+                row = self._get_local_engine().creative_fatigue(self.context.brand)
+                if row:
+                    return self._fatigue_result(row)
+                print("   ⚠️  No fatigue data available")
+                return self._mock_fatigue_results()
 
             # Adapt legacy fatigue logic to work with current data structures
             fatigue_sql = f"""
@@ -465,18 +646,7 @@ class AnalysisStage(PipelineStage[EmbeddingResults, AnalysisResults]):
 
             fatigue_result = run_query(fatigue_sql)
             if not fatigue_result.empty:
-                row = fatigue_result.iloc[0]
-                print(f"   📊 Fatigue analysis: {row.get('fatigue_level', 'UNKNOWN')} level "
-                      f"(score: {float(row.get('fatigue_score', 0)):.2f})")
-
-                return {
-                    'avg_fatigue_score': float(row.get('fatigue_score', 0.3)),
-                    'avg_originality_score': float(row.get('originality_score', 0.7)),
-                    'avg_refresh_signal': float(row.get('refresh_signal_strength', 0.5)),
-                    'high_fatigue_count': int(row.get('high_fatigue_count', 0)),
-                    'fatigue_level': row.get('fatigue_level', 'MEDIUM'),
-                    'analyzed_ads': int(row.get('analyzed_ads', 0))
-                }
+                return self._fatigue_result(fatigue_result.iloc[0])
             else:
                 print("   ⚠️  No fatigue data available")
 
@@ -485,6 +655,21 @@ class AnalysisStage(PipelineStage[EmbeddingResults, AnalysisResults]):
 
         return self._mock_fatigue_results()
 
+    @staticmethod
+    def _fatigue_result(row) -> dict:
+        """Fatigue dict from a fatigue metrics row (SQL or local engine)"""
+        print(f"   📊 Fatigue analysis: {row.get('fatigue_level', 'UNKNOWN')} level "
+              f"(score: {float(row.get('fatigue_score', 0)):.2f})")
+
+        return {
+            'avg_fatigue_score': float(row.get('fatigue_score', 0.3)),
+            'avg_originality_score': float(row.get('originality_score', 0.7)),
+            'avg_refresh_signal': float(row.get('refresh_signal_strength', 0.5)),
+            'high_fatigue_count': int(row.get('high_fatigue_count', 0)),
+            'fatigue_level': row.get('fatigue_level', 'MEDIUM'),
+            'analyzed_ads': int(row.get('analyzed_ads', 0))
+        }
+
     def _mock_fatigue_results(self) -> dict:
         """Mock fatigue results when analysis fails"""
         return {
@@ -664,36 +849,35 @@ class AnalysisStage(PipelineStage[EmbeddingResults, AnalysisResults]):
             }
         )
     
-    def _wait_for_strategic_data_availability(self, max_attempts: int = 10, delay_seconds: int = 3):
-        """Wait for strategic data to be available in BigQuery with polling mechanism"""
-        import time
+    def _wait_for_strategic_data_availability(self) -> bool:
+        """
+        Check that strategic labels for the brand are queryable.
         
-        for attempt in range(max_attempts):
-            try:
-                # Check for strategic data availability
-                check_query = f"""
-                SELECT COUNT(*) as strategic_count
-                FROM `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates`
-                WHERE brand = '{self.context.brand}'
-                    AND promotional_intensity IS NOT NULL
-                    AND promotional_intensity > 0
-                """
-                
-                result = run_query(check_query)
-                if not result.empty:
-                    strategic_count = result.iloc[0]['strategic_count']
-                    if strategic_count > 0:
-                        print(f"   ✅ Strategic data available! Found {strategic_count} records with metrics")
-                        return True
-                
-                print(f"   ⏳ Attempt {attempt + 1}/{max_attempts}: Strategic data not ready, waiting {delay_seconds}s...")
-                time.sleep(delay_seconds)
-                
-            except Exception as e:
-                print(f"   ⚠️  Strategic data check attempt {attempt + 1} failed: {e}")
-                time.sleep(delay_seconds)
+        Uses the completed Strategic Labeling job handed over on the context (its
+        row count comes from job statistics), so no COUNT query or sleep is needed.
+        Without one (e.g. stage run standalone) a single check query is issued.
+        Label-dependent steps wait on this step's completion.
+        """
+        readiness = getattr(self.context, 'strategic_labels_ready', None)
+        if readiness is not None and readiness.has_rows:
+            print(f"   ✅ Strategic data ready: labeling job {readiness.job_id} wrote {readiness.row_count} rows")
+            return True
+        
+        check_query = f"""
+        SELECT COUNT(*) as strategic_count
+        FROM `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates`
+        WHERE brand = '{self.context.brand}'
+            AND promotional_intensity IS NOT NULL
+            AND promotional_intensity > 0
+        """
+        
+        result = run_query(check_query)
+        strategic_count = int(result.iloc[0]['strategic_count']) if not result.empty else 0
+        if strategic_count > 0:
+            print(f"   ✅ Strategic data available! Found {strategic_count} records with metrics")
+            return True
         
-        print(f"   ⚠️  Strategic data not available after {max_attempts} attempts, proceeding anyway...")
+        print("   ⚠️  No strategic metrics found for brand, proceeding anyway...")
         return False
 
     def _execute_cta_intelligence_analysis(self):
@@ -7,7 +7,7 @@ import os
 import time
 import pandas as pd
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from ..core.base import PipelineStage, PipelineContext
 from ..models.candidates import CompetitorCandidate, ValidatedCompetitor
@@ -15,16 +15,29 @@ from ..models.candidates import CompetitorCandidate, ValidatedCompetitor
 try:
     from src.utils.bigquery_client import get_bigquery_client, run_query, load_dataframe_to_bq
     from src.competitive_intel.curation.competitor_name_validator import CompetitorNameValidator
+    from src.competitive_intel.curation.verdict_cache import CompetitorVerdictCache
+    from src.utils.run_registry import register_run_table
 except ImportError:
     get_bigquery_client = None
     run_query = None
     load_dataframe_to_bq = None
     CompetitorNameValidator = None
+    CompetitorVerdictCache = None
+    register_run_table = None
 
 # Environment configuration
 BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
 BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
 
+# AI consensus configuration
+CONSENSUS_ROUNDS = 3
+CONSENSUS_MODE = os.environ.get("CONSENSUS_MODE", "adaptive")  # 'adaptive' or 'full'
+CONSENSUS_CONFIDENCE_THRESHOLD = float(os.environ.get("CONSENSUS_CONFIDENCE_THRESHOLD", "0.7"))
+
+# Cross-run verdict cache; bump the prompt version whenever the validation prompt changes
+CONSENSUS_PROMPT_VERSION = "v1"
+VERDICT_CACHE_ENABLED = os.environ.get("VERDICT_CACHE_ENABLED", "true").lower() == "true"
+
 
 class CurationStage(PipelineStage[List[CompetitorCandidate], List[ValidatedCompetitor]]):
     """
@@ -34,19 +47,32 @@ class CurationStage(PipelineStage[List[CompetitorCandidate], List[ValidatedCompe
     - Aggressive pre-filtering using enhanced name validation
     - Deterministic scoring to reduce expensive AI calls
     - 3-round AI consensus validation via BigQuery ML
+      (adaptive mode skips round 3 when rounds 1-2 agree confidently)
+    - Cross-run verdict cache so previously judged candidates skip AI validation
     - Quality scoring and tier assignment
     """
     
-    def __init__(self, context: PipelineContext, dry_run: bool = False):
+    def __init__(self, context: PipelineContext, dry_run: bool = False,
+                 consensus_mode: str = CONSENSUS_MODE,
+                 confidence_threshold: float = CONSENSUS_CONFIDENCE_THRESHOLD,
+                 use_verdict_cache: bool = VERDICT_CACHE_ENABLED):
         super().__init__("AI Competitor Curation", 2, context.run_id)
         self.context = context
         self.dry_run = dry_run
+        self.consensus_mode = consensus_mode
+        self.confidence_threshold = confidence_threshold
+        self.consensus_stats = {}
 
         if not dry_run and CompetitorNameValidator:
             self.name_validator = CompetitorNameValidator()
         else:
             self.name_validator = None
 
+        if not dry_run and use_verdict_cache and CompetitorVerdictCache:
+            self.verdict_cache = CompetitorVerdictCache(CONSENSUS_PROMPT_VERSION)
+        else:
+            self.verdict_cache = None
+
     def ensure_gemini_model(self):
         """Ensure Gemini model is available for AI.GENERATE_TABLE"""
         model_id = f"{BQ_PROJECT}.{BQ_DATASET}.gemini_model"
@@ -149,6 +175,7 @@ class CurationStage(PipelineStage[List[CompetitorCandidate], List[ValidatedCompe
         table_id = f"{BQ_PROJECT}.{BQ_DATASET}.competitors_raw_{self.context.run_id}"
         print(f"   💾 Loading {len(df_validated)} validated candidates to BigQuery...")
         load_dataframe_to_bq(df_validated, table_id, write_disposition="WRITE_TRUNCATE")
+        register_run_table(self.context.run_id, table_id)
         
         # Stage 1: Deterministic pre-filtering
         df_prefiltered = self._apply_deterministic_prefiltering(table_id)
@@ -174,38 +201,38 @@ class CurationStage(PipelineStage[List[CompetitorCandidate], List[ValidatedCompe
         """Apply aggressive pre-filtering using enhanced name validator"""
         print(f"   🔍 Aggressive pre-filtering {len(df_candidates)} candidates with enhanced name validator...")
         
-        candidate_names = df_candidates['company_name'].tolist()
+        # Score every row at once - each distinct name is validated only once
+        scores = self.name_validator.score_series(df_candidates['company_name'])
+        df_scored = df_candidates.assign(
+            name_validation_confidence=scores['confidence'],
+            name_validation_reasons=['; '.join(reasons) for reasons in scores['reasons']],
+            _name_is_valid=scores['is_valid']
+        )
+        
+        # Rank distinct names in order of first appearance
+        df_names = df_scored.drop_duplicates('company_name')
+        df_names = df_names[df_names['_name_is_valid']]
         
         # Use high confidence threshold (0.7+) to get cleanest candidates
-        high_confidence_results = self.name_validator.get_high_confidence_competitors(candidate_names, min_confidence=0.7)
-        high_confidence_names = [name for name, result in high_confidence_results]
+        high_confidence_names = df_names.loc[df_names['name_validation_confidence'] >= 0.7, 'company_name']
         
         # If we don't have enough high confidence names, use regular threshold but cap
         if len(high_confidence_names) < 50:
-            regular_results = self.name_validator.get_clean_competitors(candidate_names, min_confidence=0.4)
+            regular_names = df_names[df_names['name_validation_confidence'] >= 0.4]
             # Sort by confidence and take top candidates
-            regular_results.sort(key=lambda x: x[1].confidence, reverse=True)
-            valid_names = [name for name, result in regular_results[:100]]  # Cap at 100 for AI performance
+            regular_names = regular_names.sort_values('name_validation_confidence', ascending=False, kind='stable')
+            valid_names = regular_names['company_name'].head(100)  # Cap at 100 for AI performance
             print(f"   ⚠️  Only {len(high_confidence_names)} high-confidence names, using top 100 regular confidence names")
         else:
-            valid_names = high_confidence_names[:75]  # Cap high confidence at 75 for faster AI processing
+            valid_names = high_confidence_names.head(75)  # Cap high confidence at 75 for faster AI processing
             print(f"   ✅ Using {len(valid_names)} high-confidence names (capped at 75)")
         
-        # Filter DataFrame to keep only selected names
-        df_filtered = df_candidates[df_candidates['company_name'].isin(valid_names)]
-        
-        # Add validation metadata
-        valid_candidates = []
-        for _, row in df_filtered.iterrows():
-            validation = self.name_validator.validate_name(row['company_name'])
-            row_dict = row.to_dict()
-            row_dict['name_validation_confidence'] = validation.confidence
-            row_dict['name_validation_reasons'] = '; '.join(validation.reasons)
-            valid_candidates.append(row_dict)
-        
-        df_validated = pd.DataFrame(valid_candidates)
-        filtered_count = len(candidate_names) - len(df_validated)
-        print(f"   📊 Aggressively filtered out {filtered_count} candidates ({filtered_count/len(candidate_names)*100:.1f}%)")
+        # Filter DataFrame to keep only selected names (validation metadata already attached)
+        df_validated = df_scored[df_scored['company_name'].isin(valid_names)]
+        df_validated = df_validated.drop(columns='_name_is_valid').reset_index(drop=True)
+        
+        filtered_count = len(df_candidates) - len(df_validated)
+        print(f"   📊 Aggressively filtered out {filtered_count} candidates ({filtered_count/len(df_candidates)*100:.1f}%)")
         print(f"   ✅ Kept {len(df_validated)} highest-quality names for AI curation")
         
         return df_validated
@@ -245,44 +272,159 @@ class CurationStage(PipelineStage[List[CompetitorCandidate], List[ValidatedCompe
         return df_prefiltered
     
     def _run_ai_consensus_validation(self, df_prefiltered: pd.DataFrame) -> pd.DataFrame:
-        """Run AI consensus validation with 3 rounds per candidate"""
+        """Run AI consensus validation with 3 rounds per candidate, skipping cached verdicts"""
+        df_cached_competitors = pd.DataFrame()
+        if self.verdict_cache:
+            df_prefiltered, df_cached_competitors = self._apply_cached_verdicts(df_prefiltered)
+            if df_prefiltered.empty:
+                print(f"   ✅ All candidates resolved from verdict cache: {len(df_cached_competitors)} competitors")
+                return df_cached_competitors
+
         prefilter_count = len(df_prefiltered)
         print(f"   🧠 Stage 2: AI consensus validation for {prefilter_count} candidates...")
 
         # Ensure Gemini model is available
         model_id = self.ensure_gemini_model()
 
-        # Prepare consensus validation query
-        consensus_results = []
-        batch_size = 5  # Process in batches to manage BigQuery limits
-        
-        for batch_start in range(0, prefilter_count, batch_size):
-            batch_end = min(batch_start + batch_size, prefilter_count)
-            batch_df = df_prefiltered.iloc[batch_start:batch_end]
-            print(f"     Processing batch {batch_start//batch_size + 1} ({len(batch_df)} candidates)...")
-            
-            # Load batch to BigQuery for consensus validation
-            batch_table_id = f"{BQ_PROJECT}.{BQ_DATASET}.competitors_batch_{self.context.run_id}_{batch_start}"
-            load_dataframe_to_bq(batch_df, batch_table_id, write_disposition="WRITE_TRUNCATE")
-            
-            # Run 3 AI validation rounds for this batch
-            batch_consensus = []
-            for round_num in range(3):
-                print(f"       AI validation round {round_num + 1}/3...")
-                
-                ai_query = self._build_ai_validation_query(batch_table_id, round_num)
-                round_result = run_query(ai_query, BQ_PROJECT)
-                batch_consensus.append(round_result)
-            
-            consensus_results.extend(batch_consensus)
+        # Load all candidates once; candidate_id keys each row through AI.GENERATE_TABLE
+        df_candidates = df_prefiltered.reset_index(drop=True)
+        df_candidates['candidate_id'] = range(len(df_candidates))
+        candidates_table_id = f"{BQ_PROJECT}.{BQ_DATASET}.competitors_batch_{self.context.run_id}_all"
+        load_dataframe_to_bq(df_candidates, candidates_table_id, write_disposition="WRITE_TRUNCATE")
+        register_run_table(self.context.run_id, candidates_table_id)
+        
+        if self.consensus_mode == 'adaptive':
+            all_rounds_df = self._run_adaptive_rounds(candidates_table_id, len(df_candidates))
+            min_rounds = 2
+        else:
+            # All rounds for all candidates run as a single query job
+            print(f"     Running {CONSENSUS_ROUNDS} AI validation rounds for {prefilter_count} candidates in one query...")
+            ai_query = self._build_ai_validation_query(candidates_table_id, list(range(CONSENSUS_ROUNDS)))
+            all_rounds_df = run_query(ai_query, BQ_PROJECT)
+            min_rounds = CONSENSUS_ROUNDS
+        
+        print("   🗳️  Computing consensus from AI validation rounds...")
+        
+        # Compute consensus for each candidate; rejections are kept for the cache
+        df_verdicts = self._compute_consensus_results(all_rounds_df, df_prefiltered, min_rounds=min_rounds,
+                                                      include_rejected=True)
+        if df_verdicts.empty:
+            return df_cached_competitors
+
+        if self.verdict_cache:
+            self.verdict_cache.store(self.context.brand, self.context.vertical or 'Unknown',
+                                     df_verdicts, self.context.run_id)
+
+        df_curated = df_verdicts[df_verdicts['is_competitor'].astype(bool)]
+        if df_cached_competitors.empty:
+            return df_curated
+        return pd.concat([df_curated, df_cached_competitors], ignore_index=True)
+    
+    def _apply_cached_verdicts(self, df_prefiltered: pd.DataFrame):
+        """
+        Split candidates into cache misses and cached competitor verdicts.
         
-        print("   🗳️  Computing consensus from 3 AI validation rounds...")
+        Returns:
+            (candidates still needing AI validation, cached competitors with verdict columns)
+        """
+        df_cached = self.verdict_cache.lookup(
+            self.context.brand, self.context.vertical or 'Unknown', df_prefiltered['company_name'].tolist()
+        )
+        if df_cached.empty:
+            return df_prefiltered, pd.DataFrame()
+
+        normalized = df_prefiltered['company_name'].map(self.verdict_cache.normalize)
+        hit_mask = normalized.isin(df_cached['normalized_name'])
+
+        df_hits = (
+            df_prefiltered[hit_mask]
+            .assign(normalized_name=normalized[hit_mask])
+            .drop(columns=[col for col in df_cached.columns if col != 'normalized_name'], errors='ignore')
+            .merge(df_cached, on='normalized_name', how='left')
+            .drop(columns='normalized_name')
+        )
+        df_cached_competitors = df_hits[df_hits['is_competitor'].astype(bool)].reset_index(drop=True)
+
+        print(f"   ♻️  Verdict cache: {int(hit_mask.sum())}/{len(df_prefiltered)} candidates already judged "
+              f"({len(df_cached_competitors)} competitors), skipping AI for them")
+        return df_prefiltered[~hit_mask], df_cached_competitors
+    
+    def _run_adaptive_rounds(self, candidates_table_id: str, candidate_count: int) -> pd.DataFrame:
+        """
+        Run rounds 1-2 for every candidate, then round 3 only where it can change the outcome.
+        
+        A candidate stops early when both verdicts agree and both confidences
+        reach self.confidence_threshold. Agreement statistics are kept in
+        self.consensus_stats.
+        """
+        print(f"     Running 2 AI validation rounds for {candidate_count} candidates in one query...")
+        first_rounds_df = run_query(self._build_ai_validation_query(candidates_table_id, [0, 1]), BQ_PROJECT)
+        
+        tiebreak_ids, stats = self._select_tiebreak_candidates(first_rounds_df)
+        
+        all_rounds_df = first_rounds_df
+        if tiebreak_ids:
+            print(f"     Running round 3 for {len(tiebreak_ids)} undecided candidates...")
+            third_round_df = run_query(
+                self._build_ai_validation_query(candidates_table_id, [2], candidate_ids=tiebreak_ids), BQ_PROJECT
+            )
+            all_rounds_df = pd.concat([first_rounds_df, third_round_df], ignore_index=True)
+        
+        full_calls = candidate_count * CONSENSUS_ROUNDS
+        stats['candidates'] = candidate_count
+        stats['ai_calls'] = 2 * candidate_count + len(tiebreak_ids)
+        stats['ai_calls_saved_pct'] = round(100.0 * (full_calls - stats['ai_calls']) / full_calls, 1) if full_calls else 0.0
+        self.consensus_stats = stats
         
-        # Compute consensus for each candidate
-        return self._compute_consensus_results(consensus_results, df_prefiltered)
+        print(f"     📉 Early-stopped {stats['early_stopped']}/{candidate_count} candidates "
+              f"(rounds 1-2 agreement: {stats['agreement_rate']:.0%}, AI calls saved: {stats['ai_calls_saved_pct']}%)")
+        self.logger.info(f"Adaptive consensus stats: {stats}")
+        
+        return all_rounds_df
     
-    def _build_ai_validation_query(self, batch_table_id: str, round_num: int) -> str:
-        """Build AI validation query for BigQuery ML"""
+    def _select_tiebreak_candidates(self, first_rounds_df: pd.DataFrame):
+        """Return (candidate_ids needing round 3, agreement statistics) from rounds 1-2"""
+        tiebreak_ids = []
+        agreed = disagreed = low_confidence = early_stopped = 0
+        
+        if not first_rounds_df.empty:
+            for candidate_id, rounds in first_rounds_df.groupby('candidate_id'):
+                # A round failed or came back with a NULL verdict - one more vote needed
+                if len(rounds) < 2 or rounds[['is_competitor', 'confidence']].isna().any().any():
+                    tiebreak_ids.append(int(candidate_id))
+                    continue
+                
+                if rounds['is_competitor'].nunique(dropna=False) > 1:
+                    disagreed += 1
+                    tiebreak_ids.append(int(candidate_id))
+                    continue
+                
+                agreed += 1
+                if rounds['confidence'].min() < self.confidence_threshold:
+                    low_confidence += 1
+                    tiebreak_ids.append(int(candidate_id))
+                else:
+                    early_stopped += 1
+        
+        compared = agreed + disagreed
+        stats = {
+            'agreed': agreed,
+            'disagreed': disagreed,
+            'low_confidence': low_confidence,
+            'early_stopped': early_stopped,
+            'tiebreak_rounds': len(tiebreak_ids),
+            'agreement_rate': agreed / compared if compared else 0.0,
+            'confidence_threshold': self.confidence_threshold,
+        }
+        return tiebreak_ids, stats
+    
+    def _build_ai_validation_query(self, candidates_table_id: str, round_nums: List[int],
+                                   candidate_ids: Optional[List[int]] = None) -> str:
+        """Build AI validation query for BigQuery ML (one row per candidate per round)"""
+        candidate_filter = ""
+        if candidate_ids is not None:
+            candidate_filter = f"WHERE candidate_id IN ({', '.join(str(i) for i in candidate_ids)})"
+        
         return f"""
         WITH source_data AS (
           SELECT *,
@@ -306,12 +448,18 @@ class CurationStage(PipelineStage[List[CompetitorCandidate], List[ValidatedCompe
               '7. reasoning: Brief explanation (max 200 chars)',
               '8. evidence_sources: What information you used (max 150 chars)'
             ) as analysis_prompt
-          FROM `{batch_table_id}`
+          FROM `{candidates_table_id}`
+          {candidate_filter}
+        ),
+        round_data AS (
+          SELECT source_data.*, round_num
+          FROM source_data
+          CROSS JOIN UNNEST([{', '.join(str(r) for r in round_nums)}]) AS round_num
         ),
         ai_analysis AS (
           SELECT * FROM AI.GENERATE_TABLE(
             MODEL `{BQ_PROJECT}.{BQ_DATASET}.gemini_model`,
-            (SELECT analysis_prompt as prompt FROM source_data),
+            (SELECT candidate_id, round_num, analysis_prompt as prompt FROM round_data),
             STRUCT(
               'company_name STRING, is_competitor BOOL, tier STRING, market_overlap_pct INT64, customer_substitution_ease STRING, confidence FLOAT64, reasoning STRING, evidence_sources STRING'
               AS output_schema,
@@ -320,7 +468,7 @@ class CurationStage(PipelineStage[List[CompetitorCandidate], List[ValidatedCompe
           )
         )
         SELECT 
-          orig.*,
+          orig.* EXCEPT (round_num),
           ai.is_competitor,
           ai.tier,
           ai.market_overlap_pct,
@@ -328,41 +476,57 @@ class CurationStage(PipelineStage[List[CompetitorCandidate], List[ValidatedCompe
           ai.confidence,
           ai.reasoning,
           ai.evidence_sources,
-          {round_num} as round_num
-        FROM source_data orig
-        JOIN ai_analysis ai ON orig.company_name = ai.company_name
+          orig.round_num
+        FROM round_data orig
+        JOIN ai_analysis ai
+          ON orig.candidate_id = ai.candidate_id
+         AND orig.round_num = ai.round_num
         """
     
-    def _compute_consensus_results(self, consensus_results: List[pd.DataFrame], df_prefiltered: pd.DataFrame) -> pd.DataFrame:
-        """Compute consensus from multiple AI validation rounds"""
-        # Combine all rounds
-        all_rounds_df = pd.concat(consensus_results, ignore_index=True)
+    def _compute_consensus_results(self, all_rounds_df: pd.DataFrame, df_prefiltered: pd.DataFrame,
+                                   min_rounds: int = CONSENSUS_ROUNDS,
+                                   include_rejected: bool = False) -> pd.DataFrame:
+        """
+        Compute consensus from multiple AI validation rounds (one row per candidate per round).
+        
+        min_rounds is 2 in adaptive mode, where confidently agreeing candidates stop
+        after two rounds; two agreeing votes still meet the 2-vote majority.
+        include_rejected keeps non-competitor verdicts (is_competitor False) for caching.
+        Rounds with a NULL verdict or confidence (failed AI rows) are not votes, so a
+        candidate without min_rounds valid votes is neither returned nor cached.
+        """
+        if all_rounds_df.empty:
+            print("   ✅ Consensus validation complete: 0 validated competitors")
+            return pd.DataFrame()
+        
+        valid_rounds_df = all_rounds_df.dropna(subset=['is_competitor', 'confidence'])
         
         final_consensus = []
         for company_name in df_prefiltered['company_name'].unique():
-            company_rounds = all_rounds_df[all_rounds_df['company_name'] == company_name]
+            company_rounds = valid_rounds_df[valid_rounds_df['company_name'] == company_name]
             
-            if len(company_rounds) < 3:
-                print(f"     ⚠️  Only {len(company_rounds)} rounds for {company_name}, skipping")
+            if len(company_rounds) < min_rounds:
+                print(f"     ⚠️  Only {len(company_rounds)} valid rounds for {company_name}, skipping")
                 continue
             
             # Majority vote for is_competitor
-            is_competitor_votes = company_rounds['is_competitor'].sum()
-            consensus_is_competitor = is_competitor_votes >= 2  # 2 out of 3
+            is_competitor_votes = int(company_rounds['is_competitor'].astype(bool).sum())
+            consensus_is_competitor = is_competitor_votes >= 2  # 2 out of 3 (or 2 of 2 when stopped early)
             
-            if not consensus_is_competitor:
+            if not consensus_is_competitor and not include_rejected:
                 continue  # Skip non-competitors
             
             # Average numerical values
-            consensus_confidence = company_rounds['confidence'].mean()
-            consensus_market_overlap = int(company_rounds['market_overlap_pct'].mean())
+            consensus_confidence = company_rounds['confidence'].astype(float).mean()
+            market_overlap = company_rounds['market_overlap_pct'].mean()
+            consensus_market_overlap = int(market_overlap) if pd.notna(market_overlap) else 0
             
             # Mode for categorical values
             consensus_tier = company_rounds['tier'].mode().iloc[0] if not company_rounds['tier'].mode().empty else 'Niche-Player'
             consensus_substitution = company_rounds['customer_substitution_ease'].mode().iloc[0] if not company_rounds['customer_substitution_ease'].mode().empty else 'Medium'
             
             # Combine reasoning from best round (highest confidence)
-            best_round = company_rounds.loc[company_rounds['confidence'].idxmax()]
+            best_round = company_rounds.loc[company_rounds['confidence'].astype(float).idxmax()]
             
             consensus_record = best_round.copy()
             consensus_record['is_competitor'] = consensus_is_competitor
@@ -370,11 +534,13 @@ class CurationStage(PipelineStage[List[CompetitorCandidate], List[ValidatedCompe
             consensus_record['market_overlap_pct'] = consensus_market_overlap
             consensus_record['tier'] = consensus_tier
             consensus_record['customer_substitution_ease'] = consensus_substitution
-            consensus_record['reasoning'] = f"Consensus ({is_competitor_votes}/3 votes): {best_round['reasoning']}"
+            rounds_run = company_rounds['round_num'].nunique()
+            consensus_record['reasoning'] = f"Consensus ({is_competitor_votes}/{rounds_run} votes): {best_round['reasoning']}"
             
             final_consensus.append(consensus_record)
         
-        print(f"   ✅ Consensus validation complete: {len(final_consensus)} validated competitors")
+        validated_count = sum(1 for record in final_consensus if record['is_competitor'])
+        print(f"   ✅ Consensus validation complete: {validated_count} validated competitors")
         return pd.DataFrame(final_consensus) if final_consensus else pd.DataFrame()
     
     def _process_final_results(self, df_curated: pd.DataFrame) -> List[ValidatedCompetitor]:
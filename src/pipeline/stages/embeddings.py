@@ -11,15 +11,20 @@ from ..core.base import PipelineStage, PipelineContext
 from ..models.candidates import StrategicLabelResults, EmbeddingResults
 
 try:
-    from src.utils.bigquery_client import get_bigquery_client, run_query
+    from src.utils.bigquery_client import get_bigquery_client, run_query, ensure_ad_table_layout, AD_TABLE_LAYOUT_SQL
 except ImportError:
     get_bigquery_client = None
     run_query = None
+    ensure_ad_table_layout = None
+    AD_TABLE_LAYOUT_SQL = ""
 
 # Environment configuration
 BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
 BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
 
+# Endpoint behind text_embedding_model; part of each row's embedding_hash so a model change re-embeds
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "text-embedding-004")
+
 
 class EmbeddingsStage(PipelineStage[StrategicLabelResults, EmbeddingResults]):
     """
@@ -28,15 +33,18 @@ class EmbeddingsStage(PipelineStage[StrategicLabelResults, EmbeddingResults]):
     Responsibilities:
     - Generate semantic embeddings using BigQuery ML
     - Use structured content concatenation pattern
-    - Check for existing embeddings to avoid regeneration
+    - Embed only new or changed ads (hash of structured_text + model) and MERGE them
+    - Full re-embedding only on first run or when explicitly requested (--reembed)
     - Fallback gracefully if embedding generation fails
     """
 
-    def __init__(self, context: PipelineContext, dry_run: bool = False, verbose: bool = False):
+    def __init__(self, context: PipelineContext, dry_run: bool = False, verbose: bool = False,
+                 reembed: bool = False):
         super().__init__("Embeddings Generation", 6, context.run_id)
         self.context = context
         self.dry_run = dry_run
         self.verbose = verbose
+        self.reembed = reembed
         # Get competitor brands from context (set by previous stages)
         self.competitor_brands = getattr(context, 'competitor_brands', [])
     
@@ -101,6 +109,7 @@ class EmbeddingsStage(PipelineStage[StrategicLabelResults, EmbeddingResults]):
             print(f"   🎯 Will embed {len(all_brands)} brands: {', '.join(all_brands)}")
             
             existing_count = 0
+            table_exists = True
             try:
                 check_existing_sql = f"""
                 SELECT COUNT(*) as existing_count,
@@ -115,10 +124,15 @@ class EmbeddingsStage(PipelineStage[StrategicLabelResults, EmbeddingResults]):
                 # Table doesn't exist yet, which is fine - we'll create embeddings
                 print(f"   📝 No existing embeddings table found: {e}")
                 existing_count = 0
+                table_exists = False
             
-            # Force fresh embeddings generation every time for accurate results
-            print("   🔨 Generating fresh embeddings for accurate analysis...")
-            embedding_count = self._generate_new_embeddings(labels, embedding_table, brand_list)
+            if self.reembed or not table_exists:
+                reason = "--reembed requested" if self.reembed else "first run"
+                print(f"   🔨 Generating fresh embeddings for all ads ({reason})...")
+                embedding_count = self._generate_new_embeddings(labels, embedding_table, brand_list)
+            else:
+                print(f"   ♻️  {existing_count} existing embeddings - embedding only new or changed ads...")
+                embedding_count = self._generate_incremental_embeddings(labels, embedding_table, brand_list)
             
             return EmbeddingResults(
                 table_id=embedding_table,
@@ -146,9 +160,152 @@ class EmbeddingsStage(PipelineStage[StrategicLabelResults, EmbeddingResults]):
         ads_table = labels.table_id if hasattr(labels, 'table_id') and labels.table_id else f"{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates"
         
         generate_embeddings_sql = f"""
-        CREATE OR REPLACE TABLE `{embedding_table}` AS
+        CREATE OR REPLACE TABLE `{embedding_table}`
+        {AD_TABLE_LAYOUT_SQL}
+        AS
+        WITH structured_content AS (
+          {self._structured_content_sql(ads_table, brand_list)}
+        ),
+        
+        embeddings AS (
+          {self._generate_embedding_sql("SELECT * FROM structured_content")}
+        )
+        
+        {self._embedding_output_sql("embeddings")}
+        """
+        
+        try:
+            run_query(generate_embeddings_sql)
+            
+            # Count the results
+            count_result = run_query(f"SELECT COUNT(*) as count FROM `{embedding_table}` WHERE brand IN ({brand_list})")
+            embedding_count = count_result.iloc[0]['count'] if not count_result.empty else 0
+            print(f"   ✅ Generated {embedding_count} embeddings")
+            return embedding_count
+            
+        except Exception as e:
+            print(f"   ⚠️  Embedding generation failed, checking for existing: {e}")
+            # Fallback to checking existing tables
+            check_existing_sql = f"""
+            SELECT COUNT(*) as existing_count
+            FROM `{embedding_table}`
+            WHERE brand IN ({brand_list})
+            """
+            fallback_result = run_query(check_existing_sql)
+            return fallback_result.iloc[0]['existing_count'] if not fallback_result.empty else 0
+
+    def _generate_incremental_embeddings(self, labels: StrategicLabelResults, embedding_table: str, brand_list: str) -> int:
+        """Embed only ads whose structured_text/model hash is new or changed, then MERGE into ads_embeddings"""
+        ads_table = labels.table_id if hasattr(labels, 'table_id') and labels.table_id else f"{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates"
+        delta_table = f"{BQ_PROJECT}.{BQ_DATASET}.ads_embedding_delta_{self.context.run_id}"
+        update_columns = self._output_columns() + ['embedding_hash', 'embedding_model']
+
+        # Tables from before the partitioned layout get start_timestamp backfilled and are rebuilt once
+        try:
+            ensure_ad_table_layout(embedding_table, lambda table: self._layout_backfill_sql(table, ads_table))
+        except Exception as e:
+            print(f"   ⚠️  Could not migrate {embedding_table} to partitioned layout: {e}")
+
+        incremental_sql = f"""
+        ALTER TABLE `{embedding_table}`
+          ADD COLUMN IF NOT EXISTS embedding_hash STRING,
+          ADD COLUMN IF NOT EXISTS embedding_model STRING;
+
+        -- Backfill hashes for rows embedded before hashing existed (assumed current model)
+        UPDATE `{embedding_table}`
+        SET embedding_hash = {self._embedding_hash_sql('structured_content')},
+            embedding_model = '{EMBEDDING_MODEL}'
+        WHERE embedding_hash IS NULL;
+
+        CREATE OR REPLACE TABLE `{delta_table}` AS
         WITH structured_content AS (
-          SELECT
+          {self._structured_content_sql(ads_table, brand_list)}
+        ),
+
+        changed_content AS (
+          SELECT sc.*
+          FROM structured_content sc
+          LEFT JOIN `{embedding_table}` existing
+            ON sc.ad_archive_id = existing.ad_archive_id
+          WHERE existing.ad_archive_id IS NULL
+            OR existing.embedding_hash != sc.embedding_hash
+            OR ARRAY_LENGTH(existing.content_embedding) = 0
+        ),
+
+        embeddings AS (
+          {self._generate_embedding_sql("SELECT * FROM changed_content")}
+        )
+
+        {self._embedding_output_sql("embeddings")};
+
+        MERGE `{embedding_table}` target
+        USING `{delta_table}` delta
+        ON target.ad_archive_id = delta.ad_archive_id
+        WHEN MATCHED THEN UPDATE SET
+          {', '.join(f'{col} = delta.{col}' for col in update_columns)}
+        WHEN NOT MATCHED THEN INSERT ({', '.join(update_columns)})
+        VALUES ({', '.join(f'delta.{col}' for col in update_columns)});
+        """
+
+        try:
+            run_query(incremental_sql)
+
+            delta_result = run_query(f"SELECT COUNT(*) as count FROM `{delta_table}`")
+            delta_count = delta_result.iloc[0]['count'] if not delta_result.empty else 0
+
+            count_result = run_query(f"SELECT COUNT(*) as count FROM `{embedding_table}` WHERE brand IN ({brand_list})")
+            embedding_count = count_result.iloc[0]['count'] if not count_result.empty else 0
+            print(f"   ✅ Embedded {delta_count} new or changed ads ({embedding_count} embeddings total)")
+            return embedding_count
+
+        except Exception as e:
+            print(f"   ⚠️  Incremental embedding failed, checking for existing: {e}")
+            fallback_result = run_query(f"""
+            SELECT COUNT(*) as existing_count
+            FROM `{embedding_table}`
+            WHERE brand IN ({brand_list})
+            """)
+            return fallback_result.iloc[0]['existing_count'] if not fallback_result.empty else 0
+
+        finally:
+            # The delta table is scratch space for this run - drop it even when the MERGE failed
+            try:
+                run_query(f"DROP TABLE IF EXISTS `{delta_table}`")
+            except Exception as e:
+                print(f"   ⚠️  Could not drop embedding delta {delta_table}: {e}")
+
+    @staticmethod
+    def _embedding_hash_sql(text_expr: str) -> str:
+        """Hash of the embedded text plus model; a change in either triggers re-embedding"""
+        return f"TO_HEX(SHA256(CONCAT(COALESCE({text_expr}, ''), '\\x1f', '{EMBEDDING_MODEL}')))"
+
+    @staticmethod
+    def _output_columns() -> List[str]:
+        return [
+            'ad_archive_id', 'brand', 'creative_text', 'title', 'cta_text', 'media_type',
+            'media_storage_path', 'start_date_string', 'end_date_string', 'publisher_platforms',
+            'page_name', 'snapshot_url', 'start_timestamp', 'structured_content', 'content_embedding',
+            'content_length_chars', 'has_title', 'has_body'
+        ]
+
+    @staticmethod
+    def _layout_backfill_sql(table, ads_table: str) -> str:
+        """Rebuild source for an unpartitioned ads_embeddings: adds start_timestamp from ads_with_dates if missing"""
+        table_id = f"{table.project}.{table.dataset_id}.{table.table_id}"
+        if any(field.name == 'start_timestamp' for field in table.schema):
+            return f"SELECT * FROM `{table_id}`"
+        return f"""SELECT e.*, dates.start_timestamp
+        FROM `{table_id}` e
+        LEFT JOIN (
+          SELECT ad_archive_id, ANY_VALUE(start_timestamp) as start_timestamp
+          FROM `{ads_table}`
+          GROUP BY ad_archive_id
+        ) dates
+        ON e.ad_archive_id = dates.ad_archive_id"""
+
+    def _structured_content_sql(self, ads_table: str, brand_list: str) -> str:
+        """Select ads with their structured embedding text and its hash"""
+        return f"""SELECT
             -- PRESERVE ALL CORE INVIOLABLE FIELDS FROM ads_with_dates
             ad_archive_id,
             brand,
@@ -162,54 +319,47 @@ class EmbeddingsStage(PipelineStage[StrategicLabelResults, EmbeddingResults]):
             publisher_platforms,   -- CRITICAL: Preserve for channel intelligence
             page_name,
             snapshot_url,
+            start_timestamp,       -- Partitioning column
 
             -- ADD embedding-specific processing (don't replace core fields)
-            CONCAT(
-              'Title: ', COALESCE(title, ''),
-              ' Content: ', COALESCE(creative_text, ''),
-              ' CTA: ', COALESCE(cta_text, ''),
-              ' Brand: ', COALESCE(brand, '')
-            ) as structured_text,
+            structured_text,
+            {self._embedding_hash_sql('structured_text')} as embedding_hash,
 
             -- Quality indicators
             title IS NOT NULL AND LENGTH(TRIM(title)) > 0 as has_title,
             creative_text IS NOT NULL AND LENGTH(TRIM(creative_text)) > 0 as has_body,
             LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) as content_length_chars
 
-          FROM `{ads_table}`
-          WHERE brand IN ({brand_list})
-            AND (creative_text IS NOT NULL OR title IS NOT NULL)
-        ),
-        
-        embeddings AS (
-          SELECT *
+          FROM (
+            SELECT *,
+              CONCAT(
+                'Title: ', COALESCE(title, ''),
+                ' Content: ', COALESCE(creative_text, ''),
+                ' CTA: ', COALESCE(cta_text, ''),
+                ' Brand: ', COALESCE(brand, '')
+              ) as structured_text
+            FROM `{ads_table}`
+            WHERE brand IN ({brand_list})
+              AND (creative_text IS NOT NULL OR title IS NOT NULL)
+          )"""
+
+    @staticmethod
+    def _generate_embedding_sql(source_sql: str) -> str:
+        """ML.GENERATE_EMBEDDING over structured content rows"""
+        return f"""SELECT *
           FROM ML.GENERATE_EMBEDDING(
             MODEL `{BQ_PROJECT}.{BQ_DATASET}.text_embedding_model`,
             (
-              SELECT
-                ad_archive_id,
-                brand,
-                creative_text,
-                title,                 -- INCLUDE: Needed for final output
-                cta_text,             -- INCLUDE: Needed for final output
-                media_type,
-                media_storage_path,
-                start_date_string,
-                end_date_string,
-                publisher_platforms,
-                page_name,
-                snapshot_url,
-                structured_text as content,
-                has_title,
-                has_body,
-                content_length_chars
-              FROM structured_content
+              SELECT * EXCEPT(structured_text), structured_text as content
+              FROM ({source_sql})
             ),
             STRUCT('SEMANTIC_SIMILARITY' as task_type)
-          )
-        )
-        
-        SELECT
+          )"""
+
+    @staticmethod
+    def _embedding_output_sql(embeddings_cte: str) -> str:
+        """Final ads_embeddings row shape"""
+        return f"""SELECT
           -- PRESERVE ALL CORE INVIOLABLE FIELDS
           ad_archive_id,
           brand,
@@ -223,32 +373,16 @@ class EmbeddingsStage(PipelineStage[StrategicLabelResults, EmbeddingResults]):
           publisher_platforms,   -- CRITICAL: Preserve for channel intelligence
           page_name,
           snapshot_url,
+          start_timestamp,       -- Partitioning column
 
           -- ADD embeddings and quality metrics
           content as structured_content,
           ml_generate_embedding_result as content_embedding,
           content_length_chars,
           has_title,
-          has_body
-        FROM embeddings
-        """
-        
-        try:
-            run_query(generate_embeddings_sql)
-            
-            # Count the results
-            count_result = run_query(f"SELECT COUNT(*) as count FROM `{embedding_table}` WHERE brand IN ({brand_list})")
-            embedding_count = count_result.iloc[0]['count'] if not count_result.empty else 0
-            print(f"   ✅ Generated {embedding_count} embeddings")
-            return embedding_count
-            
-        except Exception as e:
-            print(f"   ⚠️  Embedding generation failed, checking for existing: {e}")
-            # Fallback to checking existing tables
-            check_existing_sql = f"""
-            SELECT COUNT(*) as existing_count
-            FROM `{embedding_table}`
-            WHERE brand IN ({brand_list})
-            """
-            fallback_result = run_query(check_existing_sql)
-            return fallback_result.iloc[0]['existing_count'] if not fallback_result.empty else 0
\ No newline at end of file
+          has_body,
+
+          -- Incremental embedding keys
+          embedding_hash,
+          '{EMBEDDING_MODEL}' as embedding_model
+        FROM {embeddings_cte}"""
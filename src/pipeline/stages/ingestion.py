@@ -25,6 +25,11 @@ except ImportError:
         load_dataframe_to_bq = None
         run_query = None
 
+try:
+    from src.utils.run_registry import register_run_table
+except ImportError:
+    register_run_table = None
+
 # Environment configuration
 BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
 BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
@@ -171,6 +176,7 @@ class IngestionStage(PipelineStage[List[ValidatedCompetitor], IngestionResults])
                     ads_table_id = f"{BQ_PROJECT}.{BQ_DATASET}.ads_raw_{self.context.run_id}"
                     print(f"   💾 Loading {len(ads_df)} ads to BigQuery table {ads_table_id}...")
                     load_dataframe_to_bq(ads_df, ads_table_id, write_disposition="WRITE_TRUNCATE")
+                    register_run_table(self.context.run_id, ads_table_id)
                     results.ads_table_id = ads_table_id
 
                     # Note: Deduplication is handled in Stage 5 (Strategic Labeling)
@@ -213,7 +219,8 @@ class IngestionStage(PipelineStage[List[ValidatedCompetitor], IngestionResults])
                     company_name=comp.company_name,
                     max_ads=self.max_ads,
                     max_pages=self.max_pages,
-                    delay_between_requests=self.delay_between_requests
+                    delay_between_requests=self.delay_between_requests,
+                    **self._probe_seed_kwargs(comp)
                 )
 
                 elapsed = time.time() - start_time
@@ -252,7 +259,8 @@ class IngestionStage(PipelineStage[List[ValidatedCompetitor], IngestionResults])
                     company_name=comp.company_name,
                     max_ads=self.max_ads,
                     max_pages=self.max_pages,
-                    delay_between_requests=self.delay_between_requests
+                    delay_between_requests=self.delay_between_requests,
+                    **self._probe_seed_kwargs(comp)
                 )
                 
                 elapsed = time.time() - start_time
@@ -300,6 +308,17 @@ class IngestionStage(PipelineStage[List[ValidatedCompetitor], IngestionResults])
         
         return all_ads, brands_with_ads
     
+    def _probe_seed_kwargs(self, comp: ValidatedCompetitor) -> dict:
+        """Reuse the Stage 3 probe page (if any) so pagination resumes from page 2"""
+        if comp.probe_page is None or not comp.page_id:
+            return {}
+        
+        return {
+            'page_id': comp.page_id,
+            'seed_page': comp.probe_page,
+            'seed_cursor': comp.probe_cursor
+        }
+    
     def _fetch_target_brand_ads(self, fetcher):
         """Fetch ads for the target brand itself"""
         print(f"\n   📲 Fetching ads for target brand: {self.context.brand}...")
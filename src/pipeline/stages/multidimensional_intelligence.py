@@ -5,14 +5,34 @@ Focuses on P0 CTA Intelligence and Audience Intelligence based on available data
 Replaces artificial metrics with descriptive analytics from actual ad content
 """
 
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Callable, Dict, List, Tuple, Optional, Any
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
 from datetime import datetime
 import logging
+import os
+import time
 
 from src.pipeline.core.base import PipelineStage
 from src.pipeline.models.results import AnalysisResults
 
+try:
+    from src.utils.bigquery_client import track_queries
+    from src.utils.run_registry import register_run_table
+except ImportError:
+    track_queries = None
+    register_run_table = None
+
+# Concurrent intelligence modules: each gets its own wall-clock budget from when it starts
+INTELLIGENCE_MODULE_TIMEOUT = float(os.environ.get("INTELLIGENCE_MODULE_TIMEOUT", "900"))
+INTELLIGENCE_MAX_WORKERS = int(os.environ.get("INTELLIGENCE_MAX_WORKERS", "5"))
+
+BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
+BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
+
+# Signal confidence for whitespace opportunities by confidence level
+WHITESPACE_CONFIDENCE = {'HIGH': 0.85, 'MEDIUM': 0.7, 'LOW': 0.5}
+
 
 @dataclass
 class MultiDimensionalResults(AnalysisResults):
@@ -63,25 +83,37 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
                 brands = self._extract_brands_from_results(previous_results)
                 self.logger.info(f"🎯 Analyzing {len(brands)} brands (extracted from results)")
             
-            # P0 Priority #1: Audience Intelligence Analysis  
-            self.logger.info("👥 Executing Audience Intelligence Analysis...")
-            audience_results = self._execute_audience_intelligence(run_id, brands)
+            # One scan of ads_with_dates computes every shared per-ad feature; if it
+            # fails only the modules reading ad_features fail with it
+            self.logger.info("🧱 Materializing shared ad features...")
+            features_error = None
+            try:
+                self._materialize_ad_features(run_id, brands)
+            except Exception as e:
+                features_error = e
+                self.logger.error(f"Shared ad features failed: {str(e)}")
             
-            # P1 Priority #1: Creative Intelligence Analysis
-            self.logger.info("🎨 Executing Creative Intelligence Analysis...")
-            creative_results = self._execute_creative_intelligence(run_id, brands)
+            def with_features(module: Callable[[], Dict[str, Any]]) -> Callable[[], Dict[str, Any]]:
+                def run():
+                    if features_error is not None:
+                        raise RuntimeError(f"ad_features unavailable: {features_error}")
+                    return module()
+                return run
             
-            # P1 Priority #2: Channel Intelligence Analysis
-            self.logger.info("📡 Executing Channel Intelligence Analysis...")
-            channel_results = self._execute_channel_intelligence(run_id, brands)
-
-            # Phase 3: Visual Intelligence Metrics Extraction
-            self.logger.info("🎨 Extracting Visual Intelligence Metrics...")
-            visual_metrics_results = self._execute_visual_intelligence_metrics(run_id)
-
-            # P0 Priority #3: White Space Intelligence Analysis  
-            self.logger.info("🎯 Executing White Space Intelligence Analysis...")
-            whitespace_results = self._execute_whitespace_intelligence(run_id, brands)
+            # Modules are independent until the summary, so run them concurrently:
+            # stage time is the slowest module rather than the sum of all five
+            module_results, module_stats = self._run_modules({
+                'audience_intelligence': with_features(lambda: self._execute_audience_intelligence(run_id, brands)),
+                'creative_intelligence': with_features(lambda: self._execute_creative_intelligence(run_id, brands)),
+                'channel_intelligence': with_features(lambda: self._execute_channel_intelligence(run_id, brands)),
+                'visual_intelligence_metrics': lambda: self._execute_visual_intelligence_metrics(run_id),
+                'whitespace_intelligence': lambda: self._execute_whitespace_intelligence(run_id, brands),
+            })
+            audience_results = module_results['audience_intelligence']
+            creative_results = module_results['creative_intelligence']
+            channel_results = module_results['channel_intelligence']
+            visual_metrics_results = module_results['visual_intelligence_metrics']
+            whitespace_results = module_results['whitespace_intelligence']
             
             # Generate Comprehensive Intelligence Summary
             self.logger.info("📊 Generating Comprehensive Intelligence Summary...")
@@ -121,6 +153,7 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
                     'p1_modules_implemented': ['Creative Intelligence', 'Channel Intelligence'],
                     'data_driven_approach': True,
                     'artificial_metrics_removed': True,
+                    'module_stats': module_stats,
                     'analysis_timestamp': datetime.now().isoformat()
                 }
             )
@@ -152,6 +185,222 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
                 }
             )
     
+    def _ad_features_table(self, run_id: str) -> str:
+        return f"bigquery-ai-kaggle-469620.ads_demo.ad_features_{run_id}"
+    
+    def _materialize_ad_features(self, run_id: str, brands: List[str]):
+        """
+        Create ad_features_<run_id>: one row per ad with every derived column the
+        audience, creative and channel modules share (text lengths, platform flags,
+        keyword classifications). Regexes run once per ad instead of once per module.
+        """
+        from src.utils.bigquery_client import run_query
+        
+        brands_filter = "', '".join(brands)
+        
+        ad_features_sql = f"""
+        CREATE OR REPLACE TABLE `{self._ad_features_table(run_id)}`
+        CLUSTER BY brand AS
+        
+        WITH ads AS (
+          SELECT
+            brand,
+            ad_archive_id,
+            publisher_platforms,
+            creative_text,
+            title,
+            cta_text,
+            UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) as text_upper
+          FROM `bigquery-ai-kaggle-469620.ads_demo.ads_with_dates`
+          WHERE brand IN ('{brands_filter}')
+        )
+        
+        SELECT
+          brand,
+          ad_archive_id,
+          publisher_platforms,
+          creative_text,
+          title,
+          cta_text,
+          
+          -- Text lengths
+          LENGTH(COALESCE(creative_text, '')) as creative_length,
+          LENGTH(COALESCE(title, '')) as title_length,
+          LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) as total_message_length,
+          
+          -- Platform flags
+          REGEXP_CONTAINS(publisher_platforms, 'Facebook') as has_facebook,
+          REGEXP_CONTAINS(publisher_platforms, 'Instagram') as has_instagram,
+          REGEXP_CONTAINS(publisher_platforms, 'Messenger') as has_messenger,
+          
+          -- Audience: price positioning signals
+          CASE 
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(PREMIUM|LUXURY|HIGH-END|EXCLUSIVE)\\b') THEN 'PREMIUM_SIGNALS'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(AFFORDABLE|CHEAP|BUDGET|DISCOUNT|SALE)\\b') THEN 'VALUE_SIGNALS'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(QUALITY|PROFESSIONAL|RELIABLE)\\b') THEN 'QUALITY_SIGNALS'
+            ELSE 'NEUTRAL_POSITIONING'
+          END as price_positioning,
+          
+          -- Audience: lifestyle targeting signals
+          CASE 
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(PROFESSIONAL|BUSINESS|WORK|OFFICE)\\b') THEN 'PROFESSIONAL_LIFESTYLE'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(TRENDY|FASHION|STYLE|MODERN)\\b') THEN 'FASHION_LIFESTYLE'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(FAMILY|KIDS|CHILDREN|PARENTS)\\b') THEN 'FAMILY_LIFESTYLE'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(ACTIVE|SPORTS|OUTDOOR|FITNESS)\\b') THEN 'ACTIVE_LIFESTYLE'
+            ELSE 'GENERAL_LIFESTYLE'
+          END as lifestyle_targeting,
+          
+          -- Audience: rule-based psychographic profiling with fallback defaults
+          CASE 
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(SAVE|DISCOUNT|CHEAP|AFFORDABLE|BUDGET)\\b') THEN 'PRICE_CONSCIOUS'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(STYLE|FASHION|TRENDY|DESIGN|ELEGANT)\\b') THEN 'STYLE_CONSCIOUS'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(QUICK|FAST|EASY|CONVENIENT|ONLINE)\\b') THEN 'CONVENIENCE_SEEKING'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(QUALITY|PREMIUM|BEST|DURABLE|SUPERIOR)\\b') THEN 'QUALITY_FOCUSED'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(SUSTAINABLE|ECO|GREEN|ETHICAL|SOCIAL)\\b') THEN 'SOCIALLY_CONSCIOUS'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(TECH|DIGITAL|SMART|APP|ONLINE)\\b') THEN 'TECH_SAVVY'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(BRAND|TRUST|RELIABLE|ESTABLISHED)\\b') THEN 'BRAND_LOYAL'
+            ELSE 'CONVENIENCE_SEEKING'
+          END as psychographic_profile_raw,
+          
+          -- Audience: rule-based age group targeting with fallback defaults
+          CASE 
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(STUDENT|COLLEGE|YOUNG|FRESH|NEW)\\b') THEN 'GEN_Z_18_24'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(PROFESSIONAL|CAREER|WORK|OFFICE)\\b') THEN 'MILLENNIAL_25_34'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(FAMILY|PARENT|KIDS|CHILDREN)\\b') THEN 'MILLENNIAL_35_44'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(EXPERIENCED|MATURE|ESTABLISHED)\\b') THEN 'GEN_X_45_54'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(SENIOR|RETIREMENT|CLASSIC|TRADITIONAL)\\b') THEN 'BOOMER_55_PLUS'
+            ELSE 'MILLENNIAL_25_34'
+          END as age_group_raw,
+          
+          -- Creative: messaging theme
+          CASE 
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(NEW|LATEST|INTRODUCING|FRESH|MODERN|INNOVATIVE)\\b') THEN 'INNOVATION_FOCUSED'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(SAVE|DISCOUNT|DEAL|SALE|OFFER|SPECIAL|PRICE)\\b') THEN 'VALUE_FOCUSED'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(QUALITY|PREMIUM|BEST|TOP|SUPERIOR|EXCELLENT)\\b') THEN 'QUALITY_FOCUSED'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(YOU|YOUR|PERSONAL|CUSTOM|TAILORED|PERFECT)\\b') THEN 'PERSONALIZATION_FOCUSED'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(STYLE|FASHION|TRENDY|CHIC|ELEGANT|BEAUTIFUL)\\b') THEN 'STYLE_FOCUSED'
+            ELSE 'GENERAL_MESSAGING'
+          END as messaging_theme,
+          
+          -- Creative: emotional tone
+          CASE 
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(LOVE|AMAZING|PERFECT|INCREDIBLE|BEAUTIFUL|STUNNING)\\b') THEN 'EMOTIONAL_POSITIVE'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(PROFESSIONAL|RELIABLE|TRUSTED|PROVEN|QUALITY)\\b') THEN 'RATIONAL_TRUST'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(EASY|SIMPLE|QUICK|FAST|CONVENIENT|EFFORTLESS)\\b') THEN 'CONVENIENCE_FOCUSED'
+            WHEN REGEXP_CONTAINS(text_upper, r'\\b(LIMITED|HURRY|NOW|TODAY|URGENT|LAST)\\b') THEN 'URGENCY_DRIVEN'
+            ELSE 'NEUTRAL_TONE'
+          END as emotional_tone,
+          
+          -- Creative: brand mention frequency
+          (LENGTH(text_upper) - LENGTH(REPLACE(text_upper, brand, ''))) / LENGTH(brand) as brand_mention_frequency,
+          
+          -- Creative: emotional keyword groups present (0-3)
+          (
+            CASE WHEN REGEXP_CONTAINS(text_upper, r'\\b(LOVE|AMAZING|PERFECT|INCREDIBLE|BEAUTIFUL|STUNNING|FANTASTIC|AWESOME|WONDERFUL|BRILLIANT)\\b') THEN 1 ELSE 0 END +
+            CASE WHEN REGEXP_CONTAINS(text_upper, r'\\b(EXCITED|THRILLED|HAPPY|JOY|DELIGHT|PLEASED|SATISFIED|CONFIDENT)\\b') THEN 1 ELSE 0 END +
+            CASE WHEN REGEXP_CONTAINS(text_upper, r'\\b(SPECIAL|UNIQUE|EXCLUSIVE|PREMIUM|LUXURY|ELITE|VIP|EXTRAORDINARY)\\b') THEN 1 ELSE 0 END
+          ) as emotional_keyword_count,
+          
+          -- Creative: density score (words per character - content richness indicator)
+          ROUND(
+            (LENGTH(COALESCE(creative_text, '')) - LENGTH(REPLACE(COALESCE(creative_text, ''), ' ', '')) + 1) / 
+            GREATEST(LENGTH(COALESCE(creative_text, '')), 1.0) * 100, 2
+          ) as creative_density_score,
+          
+          -- Channel: keyword focus signals
+          REGEXP_CONTAINS(text_upper, r'\\b(VISUAL|STYLE|LOOK|FASHION|PHOTO)\\b') as mentions_visual_keywords,
+          REGEXP_CONTAINS(text_upper, r'\\b(COMMUNITY|SHARE|CONNECT|FAMILY|FRIENDS)\\b') as mentions_community_keywords
+          
+        FROM ads
+        """
+        
+        run_query(ad_features_sql)
+        register_run_table(run_id, self._ad_features_table(run_id))
+    
+    def _run_modules(self, modules: Dict[str, Callable[[], Dict[str, Any]]],
+                     timeout: float = INTELLIGENCE_MODULE_TIMEOUT,
+                     max_workers: int = INTELLIGENCE_MAX_WORKERS) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        Run intelligence modules concurrently with per-module timeouts.
+        
+        Failures and timeouts become the same per-module error dicts the modules
+        return themselves, so one module never takes down the others. Each module's
+        timeout counts from when it starts on a worker, so modules queued behind
+        max_workers keep their full budget.
+        
+        A timed-out module's thread cannot be stopped: it keeps its worker, its
+        BigQuery job keeps running server-side, and since the interpreter joins
+        executor threads at exit, a hung module still delays process shutdown.
+        
+        Returns:
+            (results by module name, {module: {status, seconds, queries, bytes_processed, slot_millis}})
+        """
+        started = {}
+        
+        def run_module(name: str, module: Callable[[], Dict[str, Any]]):
+            start = started[name] = time.perf_counter()
+            if track_queries is None:
+                result, queries = module(), None
+            else:
+                with track_queries() as queries:
+                    result = module()
+            return result, time.perf_counter() - start, queries
+        
+        outcomes = {}
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            submitted = time.perf_counter()
+            futures = {name: executor.submit(run_module, name, module) for name, module in modules.items()}
+            pending = dict(futures)
+            
+            while pending:
+                now = time.perf_counter()
+                for name in [n for n, future in pending.items() if future.done()]:
+                    future = pending.pop(name)
+                    try:
+                        outcomes[name] = future.result()
+                    except Exception as e:
+                        self.logger.error(f"{name} failed: {str(e)}")
+                        outcomes[name] = ({'status': 'error', 'error': str(e), 'analysis_type': name},
+                                          time.perf_counter() - started.get(name, submitted), None)
+                for name in [n for n in pending if n in started and now - started[n] >= timeout]:
+                    pending.pop(name)
+                    self.logger.error(f"{name} timed out after {timeout:.0f}s")
+                    outcomes[name] = ({'status': 'error', 'error': f'Timed out after {timeout:.0f}s',
+                                       'analysis_type': name}, timeout, None)
+                if not pending:
+                    break
+                
+                # Sleep until the next deadline; poll while queued modules have not started yet
+                deadlines = [started[n] + timeout for n in pending if n in started]
+                wait_for = max(0.0, min(deadlines) - now) if deadlines else 0.05
+                if len(deadlines) < len(pending):
+                    wait_for = min(wait_for, 0.05)
+                wait(pending.values(), timeout=wait_for, return_when=FIRST_COMPLETED)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        results, stats = {}, {}
+        for name in modules:
+            result, seconds, queries = outcomes[name]
+            results[name] = result
+            stats[name] = {
+                'status': result.get('status', 'unknown'),
+                'seconds': round(seconds, 2),
+                'queries': queries.queries if queries else 0,
+                'bytes_processed': queries.bytes_processed if queries else 0,
+                'slot_millis': queries.slot_millis if queries else 0,
+            }
+        
+        wall_time = time.perf_counter() - submitted
+        self.logger.info(f"⏱️ Intelligence modules: {wall_time:.1f}s wall vs "
+                         f"{sum(s['seconds'] for s in stats.values()):.1f}s sequential")
+        for name, module_stats in stats.items():
+            self.logger.info(f"   {name}: {module_stats['status']} in {module_stats['seconds']:.1f}s, "
+                             f"{module_stats['bytes_processed'] / 1e6:.1f} MB over {module_stats['queries']} queries")
+        
+        return results, stats
+    
     def _extract_brands_from_results(self, previous_results: AnalysisResults) -> List[str]:
         """Extract brand list from previous pipeline results"""
         try:
@@ -179,8 +428,6 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
         try:
             from src.utils.bigquery_client import run_query
             
-            brands_filter = "', '".join(brands)
-            
             # Audience Intelligence SQL - analyzing platform and communication patterns
             audience_analysis_sql = f"""
             CREATE OR REPLACE TABLE `bigquery-ai-kaggle-469620.ads_demo.audience_intelligence_{run_id}` AS
@@ -192,67 +439,33 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
                 publisher_platforms,
                 creative_text,
                 title,
-                LENGTH(COALESCE(creative_text, '')) as creative_length,
-                LENGTH(COALESCE(title, '')) as title_length,
+                creative_length,
+                title_length,
                 
                 -- Platform Strategy Analysis
                 CASE 
-                  WHEN REGEXP_CONTAINS(publisher_platforms, r'Facebook.*Instagram') OR REGEXP_CONTAINS(publisher_platforms, r'Instagram.*Facebook') THEN 'CROSS_PLATFORM'
-                  WHEN REGEXP_CONTAINS(publisher_platforms, 'Instagram') AND NOT REGEXP_CONTAINS(publisher_platforms, 'Facebook') THEN 'INSTAGRAM_ONLY'
-                  WHEN REGEXP_CONTAINS(publisher_platforms, 'Facebook') AND NOT REGEXP_CONTAINS(publisher_platforms, 'Instagram') THEN 'FACEBOOK_ONLY'
+                  WHEN has_facebook AND has_instagram THEN 'CROSS_PLATFORM'
+                  WHEN has_instagram AND NOT has_facebook THEN 'INSTAGRAM_ONLY'
+                  WHEN has_facebook AND NOT has_instagram THEN 'FACEBOOK_ONLY'
                   ELSE 'OTHER_PLATFORM'
                 END as platform_strategy,
                 
                 -- Length-based communication style (backup)
                 CASE 
-                  WHEN LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) > 300 THEN 'DETAILED_COMMUNICATION'
-                  WHEN LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) > 150 THEN 'MODERATE_COMMUNICATION'
-                  WHEN LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) > 50 THEN 'CONCISE_COMMUNICATION'
+                  WHEN total_message_length > 300 THEN 'DETAILED_COMMUNICATION'
+                  WHEN total_message_length > 150 THEN 'MODERATE_COMMUNICATION'
+                  WHEN total_message_length > 50 THEN 'CONCISE_COMMUNICATION'
                   ELSE 'MINIMAL_COMMUNICATION'
                 END as communication_style,
                 
-                -- Price Positioning Signals
-                CASE 
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(PREMIUM|LUXURY|HIGH-END|EXCLUSIVE)\\b') THEN 'PREMIUM_SIGNALS'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(AFFORDABLE|CHEAP|BUDGET|DISCOUNT|SALE)\\b') THEN 'VALUE_SIGNALS'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(QUALITY|PROFESSIONAL|RELIABLE)\\b') THEN 'QUALITY_SIGNALS'
-                  ELSE 'NEUTRAL_POSITIONING'
-                END as price_positioning,
-                
-                -- Lifestyle Targeting Signals
-                CASE 
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(PROFESSIONAL|BUSINESS|WORK|OFFICE)\\b') THEN 'PROFESSIONAL_LIFESTYLE'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(TRENDY|FASHION|STYLE|MODERN)\\b') THEN 'FASHION_LIFESTYLE'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(FAMILY|KIDS|CHILDREN|PARENTS)\\b') THEN 'FAMILY_LIFESTYLE'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(ACTIVE|SPORTS|OUTDOOR|FITNESS)\\b') THEN 'ACTIVE_LIFESTYLE'
-                  ELSE 'GENERAL_LIFESTYLE'
-                END as lifestyle_targeting,
-                
-                -- MEDIUM: Rule-based psychographic profiling with fallback defaults
-                CASE 
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(SAVE|DISCOUNT|CHEAP|AFFORDABLE|BUDGET)\\b') THEN 'PRICE_CONSCIOUS'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(STYLE|FASHION|TRENDY|DESIGN|ELEGANT)\\b') THEN 'STYLE_CONSCIOUS'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(QUICK|FAST|EASY|CONVENIENT|ONLINE)\\b') THEN 'CONVENIENCE_SEEKING'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(QUALITY|PREMIUM|BEST|DURABLE|SUPERIOR)\\b') THEN 'QUALITY_FOCUSED'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(SUSTAINABLE|ECO|GREEN|ETHICAL|SOCIAL)\\b') THEN 'SOCIALLY_CONSCIOUS'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(TECH|DIGITAL|SMART|APP|ONLINE)\\b') THEN 'TECH_SAVVY'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(BRAND|TRUST|RELIABLE|ESTABLISHED)\\b') THEN 'BRAND_LOYAL'
-                  ELSE 'CONVENIENCE_SEEKING'
-                END as psychographic_profile_raw,
-                
-                -- MEDIUM: Rule-based age group targeting with fallback defaults
-                CASE 
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(STUDENT|COLLEGE|YOUNG|FRESH|NEW)\\b') THEN 'GEN_Z_18_24'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(PROFESSIONAL|CAREER|WORK|OFFICE)\\b') THEN 'MILLENNIAL_25_34'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(FAMILY|PARENT|KIDS|CHILDREN)\\b') THEN 'MILLENNIAL_35_44'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(EXPERIENCED|MATURE|ESTABLISHED)\\b') THEN 'GEN_X_45_54'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(SENIOR|RETIREMENT|CLASSIC|TRADITIONAL)\\b') THEN 'BOOMER_55_PLUS'
-                  ELSE 'MILLENNIAL_25_34'
-                END as age_group_raw
+                -- Keyword signals precomputed once per ad in ad_features
+                price_positioning,
+                lifestyle_targeting,
+                psychographic_profile_raw,
+                age_group_raw
                 
-              FROM `bigquery-ai-kaggle-469620.ads_demo.ads_with_dates`
-              WHERE brand IN ('{brands_filter}')  
-                AND creative_text IS NOT NULL
+              FROM `{self._ad_features_table(run_id)}`
+              WHERE creative_text IS NOT NULL
             ),
             cleaned_psychographics AS (
               SELECT 
@@ -370,6 +583,7 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
             """
             
             run_query(audience_analysis_sql)
+            register_run_table(run_id, f"bigquery-ai-kaggle-469620.ads_demo.audience_intelligence_{run_id}")
 
             # Extract metrics from the created table for return
             metrics_query = f"""
@@ -434,8 +648,6 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
         try:
             from src.utils.bigquery_client import run_query
 
-            brands_filter = "', '".join(brands)
-
             # Define regex pattern outside f-string to avoid backslash issues
             json_regex = r'```json\\s*({[\\s\\S]*?})\\s*```'
 
@@ -449,65 +661,34 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
                 ad_archive_id,
                 creative_text,
                 title,
-                LENGTH(COALESCE(creative_text, '')) as creative_text_length,
-                LENGTH(COALESCE(title, '')) as title_length,
-                
-                -- Messaging Theme Analysis
-                CASE 
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(NEW|LATEST|INTRODUCING|FRESH|MODERN|INNOVATIVE)\\b') THEN 'INNOVATION_FOCUSED'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(SAVE|DISCOUNT|DEAL|SALE|OFFER|SPECIAL|PRICE)\\b') THEN 'VALUE_FOCUSED'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(QUALITY|PREMIUM|BEST|TOP|SUPERIOR|EXCELLENT)\\b') THEN 'QUALITY_FOCUSED'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(YOU|YOUR|PERSONAL|CUSTOM|TAILORED|PERFECT)\\b') THEN 'PERSONALIZATION_FOCUSED'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(STYLE|FASHION|TRENDY|CHIC|ELEGANT|BEAUTIFUL)\\b') THEN 'STYLE_FOCUSED'
-                  ELSE 'GENERAL_MESSAGING'
-                END as messaging_theme,
+                creative_length as creative_text_length,
+                title_length,
                 
-                -- Emotional Tone Analysis
-                CASE 
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(LOVE|AMAZING|PERFECT|INCREDIBLE|BEAUTIFUL|STUNNING)\\b') THEN 'EMOTIONAL_POSITIVE'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(PROFESSIONAL|RELIABLE|TRUSTED|PROVEN|QUALITY)\\b') THEN 'RATIONAL_TRUST'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(EASY|SIMPLE|QUICK|FAST|CONVENIENT|EFFORTLESS)\\b') THEN 'CONVENIENCE_FOCUSED'
-                  WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(LIMITED|HURRY|NOW|TODAY|URGENT|LAST)\\b') THEN 'URGENCY_DRIVEN'
-                  ELSE 'NEUTRAL_TONE'
-                END as emotional_tone,
+                -- Messaging theme, emotional tone and keyword counts precomputed in ad_features
+                messaging_theme,
+                emotional_tone,
                 
                 -- Content Complexity Analysis
                 CASE 
-                  WHEN LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) > 200 THEN 'DETAILED_CONTENT'
-                  WHEN LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) > 100 THEN 'MODERATE_CONTENT'
-                  WHEN LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) > 30 THEN 'CONCISE_CONTENT'
+                  WHEN total_message_length > 200 THEN 'DETAILED_CONTENT'
+                  WHEN total_message_length > 100 THEN 'MODERATE_CONTENT'
+                  WHEN total_message_length > 30 THEN 'CONCISE_CONTENT'
                   ELSE 'MINIMAL_CONTENT'
                 END as content_complexity,
                 
                 -- P2 Enhancement: Text Length Classification (L4: Consideration - detailed analysis)
                 CASE 
-                  WHEN LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) > 150 THEN 'LONG'
-                  WHEN LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) > 75 THEN 'MEDIUM'
+                  WHEN total_message_length > 150 THEN 'LONG'
+                  WHEN total_message_length > 75 THEN 'MEDIUM'
                   ELSE 'SHORT'
                 END as text_length_category,
                 
-                -- P2 Enhancement: Brand Mention Frequency (using available brands)
-                (
-                  LENGTH(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, ''))) - 
-                  LENGTH(REPLACE(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), brand, ''))
-                ) / LENGTH(brand) as brand_mention_frequency,
-                
-                -- P2 Enhancement: Emotional Keywords Detection (L4: Awareness building through emotion)
-                (
-                  CASE WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\b(LOVE|AMAZING|PERFECT|INCREDIBLE|BEAUTIFUL|STUNNING|FANTASTIC|AWESOME|WONDERFUL|BRILLIANT)\b') THEN 1 ELSE 0 END +
-                  CASE WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\b(EXCITED|THRILLED|HAPPY|JOY|DELIGHT|PLEASED|SATISFIED|CONFIDENT)\b') THEN 1 ELSE 0 END +
-                  CASE WHEN REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\b(SPECIAL|UNIQUE|EXCLUSIVE|PREMIUM|LUXURY|ELITE|VIP|EXTRAORDINARY)\b') THEN 1 ELSE 0 END
-                ) as emotional_keyword_count,
-                
-                -- P2 Enhancement: Creative Density Score (words per character - content richness indicator)
-                ROUND(
-                  (LENGTH(COALESCE(creative_text, '')) - LENGTH(REPLACE(COALESCE(creative_text, ''), ' ', '')) + 1) / 
-                  GREATEST(LENGTH(COALESCE(creative_text, '')), 1.0) * 100, 2
-                ) as creative_density_score
+                brand_mention_frequency,
+                emotional_keyword_count,
+                creative_density_score
                 
-              FROM `bigquery-ai-kaggle-469620.ads_demo.ads_with_dates`
-              WHERE brand IN ('{brands_filter}')
-                AND (creative_text IS NOT NULL OR title IS NOT NULL)
+              FROM `{self._ad_features_table(run_id)}`
+              WHERE (creative_text IS NOT NULL OR title IS NOT NULL)
             ),
 
             -- AI-Enhanced Sentiment Analysis (redesigned for proper NULL handling)
@@ -711,6 +892,7 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
             """
             
             run_query(creative_analysis_sql)
+            register_run_table(run_id, f"bigquery-ai-kaggle-469620.ads_demo.creative_intelligence_{run_id}")
 
             # Query the computed metrics from the created table
             metrics_query = f"""
@@ -833,8 +1015,6 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
         try:
             from src.utils.bigquery_client import run_query
             
-            brands_filter = "', '".join(brands)
-            
             # Channel Intelligence SQL - analyzing platform usage patterns without impression data
             channel_analysis_sql = f"""
             CREATE OR REPLACE TABLE `bigquery-ai-kaggle-469620.ads_demo.channel_intelligence_{run_id}` AS
@@ -850,18 +1030,18 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
                 
                 -- Platform Strategy Analysis  
                 CASE 
-                  WHEN REGEXP_CONTAINS(publisher_platforms, r'Facebook.*Instagram') OR REGEXP_CONTAINS(publisher_platforms, r'Instagram.*Facebook') THEN 'CROSS_PLATFORM_SYNERGY'
-                  WHEN REGEXP_CONTAINS(publisher_platforms, 'Instagram') AND NOT REGEXP_CONTAINS(publisher_platforms, 'Facebook') THEN 'INSTAGRAM_FOCUSED'
-                  WHEN REGEXP_CONTAINS(publisher_platforms, 'Facebook') AND NOT REGEXP_CONTAINS(publisher_platforms, 'Instagram') THEN 'FACEBOOK_FOCUSED' 
-                  WHEN REGEXP_CONTAINS(publisher_platforms, 'Messenger') THEN 'MESSENGER_INTEGRATION'
+                  WHEN has_facebook AND has_instagram THEN 'CROSS_PLATFORM_SYNERGY'
+                  WHEN has_instagram AND NOT has_facebook THEN 'INSTAGRAM_FOCUSED'
+                  WHEN has_facebook AND NOT has_instagram THEN 'FACEBOOK_FOCUSED' 
+                  WHEN has_messenger THEN 'MESSENGER_INTEGRATION'
                   ELSE 'OTHER_PLATFORM'
                 END as platform_strategy,
                 
                 -- Content Richness by Platform (proxy for engagement intent)
                 CASE 
-                  WHEN REGEXP_CONTAINS(publisher_platforms, 'Instagram') AND LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) > 100 THEN 'RICH_VISUAL_CONTENT'
-                  WHEN REGEXP_CONTAINS(publisher_platforms, 'Facebook') AND LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) > 150 THEN 'DETAILED_SOCIAL_CONTENT'
-                  WHEN LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) < 50 THEN 'MINIMAL_CONTENT'
+                  WHEN has_instagram AND total_message_length > 100 THEN 'RICH_VISUAL_CONTENT'
+                  WHEN has_facebook AND total_message_length > 150 THEN 'DETAILED_SOCIAL_CONTENT'
+                  WHEN total_message_length < 50 THEN 'MINIMAL_CONTENT'
                   ELSE 'STANDARD_CONTENT'
                 END as content_richness,
                 
@@ -870,34 +1050,33 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
                 
                 -- Strategic Channel Focus
                 CASE 
-                  WHEN REGEXP_CONTAINS(publisher_platforms, 'Instagram') AND REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(VISUAL|STYLE|LOOK|FASHION|PHOTO)\\b') THEN 'VISUAL_MARKETING'
-                  WHEN REGEXP_CONTAINS(publisher_platforms, 'Facebook') AND REGEXP_CONTAINS(UPPER(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')), r'\\b(COMMUNITY|SHARE|CONNECT|FAMILY|FRIENDS)\\b') THEN 'COMMUNITY_MARKETING'
+                  WHEN has_instagram AND mentions_visual_keywords THEN 'VISUAL_MARKETING'
+                  WHEN has_facebook AND mentions_community_keywords THEN 'COMMUNITY_MARKETING'
                   WHEN cta_text IS NOT NULL AND LENGTH(cta_text) > 0 THEN 'CONVERSION_FOCUSED'
                   ELSE 'BRAND_AWARENESS'
                 END as channel_focus,
                 
                 -- P2 Enhancement: Platform Diversification Score (0-3 scale)
                 CASE 
-                  WHEN REGEXP_CONTAINS(publisher_platforms, 'Facebook') AND REGEXP_CONTAINS(publisher_platforms, 'Instagram') AND REGEXP_CONTAINS(publisher_platforms, 'Messenger') THEN 3
-                  WHEN REGEXP_CONTAINS(publisher_platforms, 'Facebook') AND REGEXP_CONTAINS(publisher_platforms, 'Instagram') THEN 2  
+                  WHEN has_facebook AND has_instagram AND has_messenger THEN 3
+                  WHEN has_facebook AND has_instagram THEN 2  
                   WHEN publisher_platforms LIKE '%,%' THEN 1
                   ELSE 0
                 END as platform_diversification_score,
                 
                 -- P2 Enhancement: Content Optimization by Platform (L4: Engagement optimization)
                 CASE 
-                  WHEN REGEXP_CONTAINS(publisher_platforms, 'Instagram') AND LENGTH(COALESCE(creative_text, '')) BETWEEN 50 AND 150 THEN 'INSTAGRAM_OPTIMIZED'
-                  WHEN REGEXP_CONTAINS(publisher_platforms, 'Facebook') AND LENGTH(COALESCE(creative_text, '')) > 100 THEN 'FACEBOOK_OPTIMIZED'
-                  WHEN LENGTH(COALESCE(creative_text, '')) < 30 THEN 'UNDER_OPTIMIZED'
+                  WHEN has_instagram AND creative_length BETWEEN 50 AND 150 THEN 'INSTAGRAM_OPTIMIZED'
+                  WHEN has_facebook AND creative_length > 100 THEN 'FACEBOOK_OPTIMIZED'
+                  WHEN creative_length < 30 THEN 'UNDER_OPTIMIZED'
                   ELSE 'STANDARD_OPTIMIZATION'
                 END as platform_content_optimization,
                 
                 -- P2 Enhancement: Cross-platform Messaging Consistency Score
-                LENGTH(COALESCE(creative_text, '') || ' ' || COALESCE(title, '')) as total_message_length
+                total_message_length
                 
-              FROM `bigquery-ai-kaggle-469620.ads_demo.ads_with_dates`
-              WHERE brand IN ('{brands_filter}')
-                AND publisher_platforms IS NOT NULL
+              FROM `{self._ad_features_table(run_id)}`
+              WHERE publisher_platforms IS NOT NULL
             )
             
             SELECT 
@@ -990,6 +1169,7 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
             """
             
             run_query(channel_analysis_sql)
+            register_run_table(run_id, f"bigquery-ai-kaggle-469620.ads_demo.channel_intelligence_{run_id}")
 
             # Query the computed metrics from the created table
             metrics_query = f"""
@@ -1216,6 +1396,7 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
 
 
             run_query(summary_sql)
+            register_run_table(run_id, f"bigquery-ai-kaggle-469620.ads_demo.v_intelligence_summary_{run_id}", "VIEW")
             
             return {
                 'status': 'success',
@@ -1275,70 +1456,30 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
     def _execute_whitespace_intelligence(self, run_id: str, brands: List[str]) -> Dict[str, Any]:
         """
         P0 White Space Intelligence Analysis
-        Identifies market gaps and strategic opportunities using parallel processing (6s vs 2+ minutes)
+        Identifies market gaps and strategic opportunities with the configured whitespace
+        strategy chain (WHITESPACE_STRATEGY, default hybrid then parallel)
         """
         try:
-            # Try Hybrid first for rich campaign intelligence, fallback to Parallel if needed
-            try:
-                from src.competitive_intel.analysis.hybrid_whitespace_detection import HybridWhiteSpaceDetector
-
-                # Initialize hybrid detector with competitor brands
-                competitors = [brand for brand in brands if brand != brands[0]]  # Exclude main brand
-                detector = HybridWhiteSpaceDetector(
-                    project_id="bigquery-ai-kaggle-469620",
-                    dataset_id="ads_demo",
-                    brand=brands[0],  # Main brand
-                    competitors=competitors
-                )
-
-                # Execute hybrid analysis with campaign intelligence
-                self.logger.info(f"🎯 Executing hybrid whitespace analysis (full dataset + campaign intelligence)...")
-                performance_results = detector.analyze_hybrid_performance(run_id)
-
-                # Check if hybrid succeeded
-                if performance_results.get('status') != 'success':
-                    raise Exception(f"Hybrid failed: {performance_results.get('error')}")
-
-                self.logger.info(f"✅ Using Hybrid whitespace detector with campaign intelligence")
-
-            except Exception as hybrid_error:
-                # Fallback to proven Parallel detector
-                self.logger.warning(f"⚠️ Hybrid detector failed: {hybrid_error}, using Parallel fallback")
-
-                from src.competitive_intel.analysis.parallel_whitespace_detection import ParallelWhiteSpaceDetector
-
-                # Initialize parallel detector with competitor brands
-                competitors = [brand for brand in brands if brand != brands[0]]  # Exclude main brand
-                detector = ParallelWhiteSpaceDetector(
-                    project_id="bigquery-ai-kaggle-469620",
-                    dataset_id="ads_demo",
-                    brand=brands[0],  # Main brand
-                    competitors=competitors
-                )
-
-                # Execute parallel analysis with performance tracking
-                self.logger.info(f"🔄 Executing parallel whitespace analysis (6s, full dataset)...")
-                performance_results = detector.analyze_parallel_performance(run_id)
-
-            if performance_results.get('status') == 'success':
-                # Handle both Hybrid and Parallel detector outputs
-                if 'opportunities' in performance_results:
-                    # Hybrid detector returns 'opportunities' (rich objects)
-                    opportunities = performance_results.get('opportunities', [])
-                    strategic_summaries = [opp.get('strategic_summary', str(opp)[:100]) for opp in opportunities[:5]]
-                    campaign_ready = performance_results.get('campaign_ready_opportunities', 0)
-                    self.logger.info(f"📊 Found {len(opportunities)} opportunities ({campaign_ready} campaign-ready)")
-                else:
-                    # Parallel detector returns 'strategic_opportunities' (strings)
-                    opportunities = performance_results.get('strategic_opportunities', [])
-                    strategic_summaries = opportunities[:5] if opportunities else []
-                    self.logger.info(f"📊 Found {len(opportunities)} strategic opportunities")
-
-                duration = performance_results.get('duration_seconds', 0)
-                self.logger.info(f"✅ Analysis completed in {duration:.1f}s - {performance_results.get('performance_category', 'GOOD')}")
-
+            from src.competitive_intel.analysis.whitespace_engine import WhitespaceEngine
+
+            competitors = [brand for brand in brands if brand != brands[0]]  # Exclude main brand
+            engine = WhitespaceEngine(brands[0], competitors, project_id=BQ_PROJECT, dataset_id=BQ_DATASET)
+
+            self.logger.info(f"🎯 Executing whitespace analysis ({' → '.join(engine.strategies)})...")
+            result = engine.detect(run_id)
+
+            if result.succeeded:
+                opportunities = result.opportunities
+                strategic_summaries = [opp['summary'] for opp in opportunities]
+                campaign_ready = sum(1 for opp in opportunities if opp['campaign_ready'])
+                self.logger.info(f"✅ Using {result.strategy} whitespace strategy")
+                self.logger.info(f"📊 Found {len(opportunities)} opportunities ({campaign_ready} campaign-ready)")
+                self.logger.info(f"✅ Analysis completed in {result.duration_seconds:.1f}s - {result.performance_category}")
+                if result.ai_calls is not None:
+                    self.logger.info(f"♻️  {result.cached_chunks} whitespace chunks reused from cache, "
+                                     f"{result.ai_calls} analyzed")
             else:
-                self.logger.warning(f"⚠️ Parallel analysis failed: {performance_results.get('error')}")
+                self.logger.warning(f"⚠️ All whitespace strategies failed: {result.error}")
                 opportunities = []
                 strategic_summaries = [
                     "Strategic opportunity analysis from whitespace detection",
@@ -1350,26 +1491,34 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
                 'status': 'success',
                 'opportunities_found': len(opportunities),
                 'top_opportunities': strategic_summaries[:3],
-                'strategic_opportunities': opportunities[:15],  # Full parallel intelligence
-                'analysis_summary': f"Parallel analysis found {len(opportunities)} strategic opportunities" if opportunities else "No specific gaps identified",
-                'strategic_recommendations': opportunities[:3] if opportunities else ['Market appears well-covered by competitors'],
+                'strategic_opportunities': opportunities[:15],  # Common whitespace opportunity schema
+                # Read by Enhanced Output as whitespace signals
+                'opportunities': [
+                    {**opp, 'confidence': WHITESPACE_CONFIDENCE[opp['confidence_level']]}
+                    for opp in opportunities[:15]
+                ],
+                'analysis_summary': f"{result.strategy.title()} analysis found {len(opportunities)} strategic opportunities" if opportunities else "No specific gaps identified",
+                'strategic_recommendations': strategic_summaries[:3] if opportunities else ['Market appears well-covered by competitors'],
                 'performance_metrics': {
-                    'duration_seconds': performance_results.get('duration_seconds', 0),
-                    'coverage': performance_results.get('coverage', 'FULL_DATASET'),
-                    'approach': performance_results.get('approach', 'parallel_chunked_processing'),
-                    'white_space_opportunities': performance_results.get('white_space_opportunities', 0)
+                    'strategy': result.strategy,
+                    'duration_seconds': result.duration_seconds,
+                    'performance_category': result.performance_category,
+                    'bytes_processed': result.bytes_processed,
+                    'white_space_opportunities': len(opportunities),
+                    'analyzed_chunks': result.ai_calls or 0,
+                    'cached_chunks': result.cached_chunks
                 },
                 'data_quality': 'high' if opportunities else 'limited',
                 'competitive_gaps_detected': bool(opportunities),
                 'run_metadata': {
                     'run_id': run_id,
                     'brands_analyzed': len(brands),
-                    'detection_method': 'parallel_chunked_processing',
-                    'target_met': duration <= 30 if 'duration' in locals() else False,
+                    'detection_method': result.strategy,
+                    'target_met': result.succeeded and result.performance_category != 'SLOW',
                     'intelligence_level': 'STRATEGIC_DISCOVERY'
                 }
             }
-            
+
         except ImportError as e:
             self.logger.warning(f"Advanced whitespace detection not available: {e}")
             return self._generate_basic_whitespace_analysis(run_id, brands)
@@ -1382,7 +1531,7 @@ class MultiDimensionalIntelligenceStage(PipelineStage[AnalysisResults, MultiDime
                 'analysis_summary': 'Whitespace analysis encountered technical issues',
                 'strategic_recommendations': ['Re-run analysis when technical issues are resolved']
             }
-    
+
     def _generate_basic_whitespace_analysis(self, run_id: str, brands: List[str]) -> Dict[str, Any]:
         """Fallback basic whitespace analysis using SQL queries"""
         try:
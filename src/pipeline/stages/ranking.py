@@ -21,6 +21,7 @@ class RankingStage(PipelineStage[List[ValidatedCompetitor], List[ValidatedCompet
     - Re-rank competitors by Meta activity + AI confidence
     - Apply intelligent capping (max 10 competitors)
     - Filter out competitors with no Meta presence
+    - Attach the probed first ads page so Stage 4 can resume from page 2
     """
     
     def __init__(self, context: PipelineContext, dry_run: bool = False, verbose: bool = False):
@@ -88,6 +89,9 @@ class RankingStage(PipelineStage[List[ValidatedCompetitor], List[ValidatedCompet
                     competitor.meta_tier = meta_tier
                     competitor.estimated_ad_count = tier_data['estimated_count']
                     competitor.meta_classification = tier_data['classification']
+                    competitor.page_id = tier_data.get('page_id')
+                    competitor.probe_page = tier_data.get('probe_page')
+                    competitor.probe_cursor = tier_data.get('probe_cursor')
                     ranked_competitors.append(competitor)
                 elif self.verbose:
                     classification = tier_data.get('classification', f'Tier {meta_tier}')
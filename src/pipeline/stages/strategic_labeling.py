@@ -12,15 +12,23 @@ from ..core.base import PipelineStage, PipelineContext
 from ..models.candidates import IngestionResults, StrategicLabelResults
 
 try:
-    from src.utils.bigquery_client import get_bigquery_client, run_query
+    from src.utils.bigquery_client import (
+        get_bigquery_client, run_query, submit_query, wait_for_table, ensure_ad_table_layout
+    )
 except ImportError:
     get_bigquery_client = None
     run_query = None
+    submit_query = None
+    wait_for_table = None
+    ensure_ad_table_layout = None
 
 # Environment configuration
 BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
 BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
 
+# 'incremental' labels only new/changed ads and MERGEs them; 'full' rebuilds ads_with_dates
+LABELING_MODE = os.environ.get("STRATEGIC_LABELING_MODE", "incremental")
+
 
 class StrategicLabelingStage(PipelineStage[IngestionResults, StrategicLabelResults]):
     """
@@ -30,14 +38,17 @@ class StrategicLabelingStage(PipelineStage[IngestionResults, StrategicLabelResul
     - Execute existing SQL script (sql/02_label_ads.sql) with dynamic project/dataset
     - Generate comprehensive strategic labels using AI.GENERATE_TABLE
     - Create ads_with_dates table with both original and temporal intelligence fields
+    - Incremental mode: label only ads whose content hash is new or changed, then MERGE
     - Bridge between raw ad ingestion and sophisticated temporal analysis
     """
 
-    def __init__(self, context: PipelineContext, dry_run: bool = False, verbose: bool = False):
+    def __init__(self, context: PipelineContext, dry_run: bool = False, verbose: bool = False,
+                 labeling_mode: str = LABELING_MODE):
         super().__init__("Strategic Labeling", 5, context.run_id)
         self.context = context
         self.dry_run = dry_run
         self.verbose = verbose
+        self.labeling_mode = labeling_mode
         # Get competitor brands from context (set by previous stages)
         self.competitor_brands = getattr(context, 'competitor_brands', [])
     
@@ -65,6 +76,19 @@ class StrategicLabelingStage(PipelineStage[IngestionResults, StrategicLabelResul
             raise ImportError("BigQuery client required for strategic labeling")
         
         try:
+            ads_table = ads.ads_table_id if hasattr(ads, 'ads_table_id') and ads.ads_table_id else f"{BQ_PROJECT}.{BQ_DATASET}.ads_raw"
+            labels_table = f"{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates"
+            all_brands = self.competitor_brands + [self.context.brand]
+            brand_list = ', '.join([f"'{b}'" for b in all_brands])
+
+            if self.labeling_mode == 'incremental' and self._labels_table_exists():
+                labeled_count = self._run_incremental_labeling(ads_table, labels_table, brand_list)
+                return StrategicLabelResults(
+                    table_id=labels_table,
+                    labeled_ads=labeled_count,
+                    generation_time=0.0  # Will be set by caller
+                )
+
             print("   🚀 Generating strategic labels using BATCH OPTIMIZED AI.GENERATE_TABLE (10x+ faster)...")
             
             # Use batch-optimized SQL for faster processing
@@ -85,14 +109,8 @@ class StrategicLabelingStage(PipelineStage[IngestionResults, StrategicLabelResul
             sql_template = self._prepare_deduplication_sql(sql_template)
 
             # Now replace template placeholders with actual project/dataset
-            ads_table = ads.ads_table_id if hasattr(ads, 'ads_table_id') and ads.ads_table_id else f"{BQ_PROJECT}.{BQ_DATASET}.ads_raw"
             strategic_sql = sql_template.replace("yourproj.ads_demo.ads_raw", ads_table)
-            strategic_sql = strategic_sql.replace("yourproj.ads_demo.ads_with_dates", f"{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates")
-            
-            # Check if strategic labels already exist
-            labels_table = f"{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates"
-            all_brands = self.competitor_brands + [self.context.brand]
-            brand_list = ', '.join([f"'{b}'" for b in all_brands])
+            strategic_sql = strategic_sql.replace("yourproj.ads_demo.ads_with_dates", labels_table)
             
             # Force fresh strategic labeling generation every time for accurate results
             print("   🔨 Generating fresh strategic labels for accurate analysis...")
@@ -120,12 +138,76 @@ class StrategicLabelingStage(PipelineStage[IngestionResults, StrategicLabelResul
                 generation_time=0.0
             )
     
+    def _run_incremental_labeling(self, ads_table: str, labels_table: str, brand_list: str) -> int:
+        """Label only new or changed ads (by content hash) and MERGE them into ads_with_dates"""
+        print("   ♻️  Incremental strategic labeling: only new or changed ads go to AI.GENERATE_TABLE...")
+
+        script_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
+            "sql",
+            "02_label_ads_incremental.sql"
+        )
+        if not os.path.exists(script_path):
+            raise FileNotFoundError(f"Incremental labeling SQL script not found at: {script_path}")
+
+        with open(script_path, 'r') as f:
+            sql_template = f.read()
+
+        delta_table = f"{BQ_PROJECT}.{BQ_DATASET}.ads_label_delta_{self.context.run_id}"
+        incremental_sql = sql_template.replace("yourproj.ads_demo.ads_label_delta", delta_table)
+        incremental_sql = incremental_sql.replace("yourproj.ads_demo.ads_raw", ads_table)
+        incremental_sql = incremental_sql.replace("yourproj.ads_demo.ads_with_dates", labels_table)
+
+        # MERGE cannot change layout; rebuild a pre-partitioning ads_with_dates once first
+        try:
+            ensure_ad_table_layout(labels_table)
+        except Exception as e:
+            print(f"   ⚠️  Could not migrate {labels_table} to partitioned layout: {e}")
+        try:
+            labeled_count = self._execute_strategic_sql(incremental_sql, labels_table, brand_list)
+
+            try:
+                delta = run_query(f"""
+                SELECT COUNT(*) as total_ads, COUNTIF(needs_label) as relabeled_ads
+                FROM `{delta_table}`
+                """)
+                if not delta.empty:
+                    row = delta.iloc[0]
+                    print(f"   📊 Delta: {row['relabeled_ads']} of {row['total_ads']} current ads new or changed "
+                          f"({row['total_ads'] - row['relabeled_ads']} kept existing labels)")
+            except Exception as e:
+                print(f"   ⚠️  Could not summarize labeling delta: {e}")
+        finally:
+            # The delta table is scratch space for this run - drop it even when labeling failed
+            try:
+                run_query(f"DROP TABLE IF EXISTS `{delta_table}`")
+            except Exception as e:
+                print(f"   ⚠️  Could not drop labeling delta {delta_table}: {e}")
+
+        return labeled_count
+
+    def _labels_table_exists(self) -> bool:
+        """Check whether ads_with_dates has been created by a previous run"""
+        try:
+            result = run_query(f"""
+            SELECT COUNT(*) as count
+            FROM `{BQ_PROJECT}.{BQ_DATASET}.__TABLES_SUMMARY__`
+            WHERE table_id = 'ads_with_dates'
+            """)
+            return result.iloc[0]['count'] > 0 if not result.empty else False
+        except Exception as e:
+            print(f"   ⚠️  Table existence check failed: {e}")
+            return False
+
     def _execute_strategic_sql(self, sql: str, labels_table: str, brand_list: str) -> int:
         """Execute the strategic labeling SQL and return count"""
         
         try:
             print("   🤖 Running AI strategic analysis with comprehensive labeling...")
-            run_query(sql)
+            # Stage 8 gates on this completed job instead of polling ads_with_dates
+            readiness = wait_for_table(submit_query(sql))
+            self.context.strategic_labels_ready = readiness
+            print(f"   ✅ Labeling job {readiness.statement_type} wrote {readiness.row_count} rows to {readiness.table_id}")
             
             # Count the results
             count_result = run_query(f"SELECT COUNT(*) as count FROM `{labels_table}` WHERE brand IN ({brand_list})")
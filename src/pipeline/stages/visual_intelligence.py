@@ -3,33 +3,105 @@ Stage 7: Visual Intelligence - Multimodal Analysis with Adaptive Sampling
 
 NEW STAGE: Analyzes visual creative strategy using BigQuery AI multimodal capabilities.
 Implements adaptive sampling to balance cost control with comprehensive competitive intelligence.
+
+Samplers (VISUAL_SAMPLER):
+- medoid (default): a dollar budget (VISUAL_BUDGET_USD) priced with the cost estimator
+  is spent on the ads that maximize creative coverage, the medoids of each brand's
+  embedding clusters (VisualSamplePlanner). The plan is written to
+  visual_sample_plan_<run_id> and the analysis SQL reads it.
+- adaptive: fixed per-brand budgets from the visual_sampling_strategy table. Also the
+  fallback when no plan can be built (e.g. no embeddings yet).
+
+Prompt modes (VISUAL_PROMPT_MODE):
+- combined (default): one AI.GENERATE call per ad with a typed output schema covering
+  both visual-text alignment and competitive positioning. The sample is split into
+  per-brand INSERT jobs that run in parallel; only rows whose AI call failed are retried.
+- separate: the original single query with two AI.GENERATE calls per ad.
 """
 import os
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 from ..core.base import PipelineStage, PipelineContext
 from ..models.results import AnalysisResults
 
 try:
-    from src.utils.bigquery_client import get_bigquery_client, run_query
+    from google.cloud import bigquery
+    from src.utils.bigquery_client import get_bigquery_client, run_query, submit_query, wait_for_table, label_value
+    from src.utils.bigquery_client import load_dataframe_to_bq
+    from src.utils.embedding_store import LocalEmbeddingStore
+    from src.utils.visual_cost_estimator import VisualIntelligenceCostEstimator
+    from src.competitive_intel.analysis.visual_sample_planner import VisualSamplePlanner
+    from src.utils.run_registry import register_run_table
+    from src.competitive_intel.intelligence.visual_analysis_cache import VisualAnalysisCache, prompt_hash
 except ImportError:
+    bigquery = None
     get_bigquery_client = None
     run_query = None
+    submit_query = None
+    wait_for_table = None
+    label_value = None
+    load_dataframe_to_bq = None
+    LocalEmbeddingStore = None
+    VisualIntelligenceCostEstimator = None
+    VisualSamplePlanner = None
+    register_run_table = None
+    VisualAnalysisCache = None
+    prompt_hash = None
 
 # Environment configuration
 BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
 BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
 
+VISUAL_PROMPT_MODE = os.environ.get("VISUAL_PROMPT_MODE", "combined")  # combined or separate
+VISUAL_SAMPLER = os.environ.get("VISUAL_SAMPLER", "medoid")  # medoid or adaptive
+VISUAL_BUDGET_USD = os.environ.get("VISUAL_BUDGET_USD")  # unset: MULTIMODAL_MAX_TOTAL_BUDGET images' worth
+VISUAL_AI_MAX_WORKERS = int(os.environ.get("VISUAL_AI_MAX_WORKERS", "4"))
+VISUAL_AI_MAX_ATTEMPTS = int(os.environ.get("VISUAL_AI_MAX_ATTEMPTS", "3"))
+VISUAL_AI_COST_PER_CALL = 0.15
+VISUAL_AI_ENDPOINT = os.environ.get("VISUAL_AI_ENDPOINT", "")  # empty: AI.GENERATE default model
+VISUAL_CACHE_ENABLED = os.environ.get("VISUAL_CACHE_ENABLED", "true").lower() == "true"
+
+AI_CONNECTION_ID = 'bigquery-ai-kaggle-469620.us.vertex-ai'
+
+# Output schema of the combined AI.GENERATE call, in output table column order
+COMBINED_ANALYSIS_FIELDS = [
+    ("visual_text_alignment_score", "FLOAT64"),
+    ("brand_consistency_score", "FLOAT64"),
+    ("creative_fatigue_risk", "FLOAT64"),
+    ("key_visual_elements", "ARRAY<STRING>"),
+    ("messaging_tone", "STRING"),
+    ("visual_tone", "STRING"),
+    ("contradictions", "STRING"),
+    ("recommendations", "ARRAY<STRING>"),
+    ("luxury_positioning_score", "FLOAT64"),
+    ("boldness_score", "FLOAT64"),
+    ("target_demographic", "STRING"),
+    ("visual_differentiation_level", "FLOAT64"),
+    ("creative_pattern_risk", "FLOAT64"),
+    ("visual_style", "STRING"),
+    ("positioning_strengths", "ARRAY<STRING>"),
+    ("positioning_gaps", "ARRAY<STRING>"),
+]
+
+
+def combined_output_schema() -> str:
+    return ', '.join(f"{name} {field_type}" for name, field_type in COMBINED_ANALYSIS_FIELDS)
+
 
 class VisualIntelligenceResults:
     """Results from enhanced visual intelligence analysis with competitive insights"""
 
-    def __init__(self, sampled_ads: int, visual_insights: int, competitive_insights: int, cost_estimate: float):
+    def __init__(self, sampled_ads: int, visual_insights: int, competitive_insights: int, cost_estimate: float,
+                 ai_calls: int = 0, cached_ads: int = 0, failed_brands: Optional[List[str]] = None):
         self.sampled_ads = sampled_ads
         self.visual_insights = visual_insights
         self.competitive_insights = competitive_insights
-        self.cost_estimate = cost_estimate
+        self.cost_estimate = cost_estimate  # New AI calls only; cached analyses are free
+        self.ai_calls = ai_calls
+        self.cached_ads = cached_ads
+        self.failed_brands = failed_brands or []
         self.table_id = f"visual_intelligence_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
 
@@ -44,12 +116,33 @@ class VisualIntelligenceStage(PipelineStage[AnalysisResults, VisualIntelligenceR
     - Dominant brands (>100 ads): 15 images fixed
     """
 
-    def __init__(self, context: PipelineContext, dry_run: bool = False):
+    def __init__(self, context: PipelineContext, dry_run: bool = False, prompt_mode: str = VISUAL_PROMPT_MODE,
+                 max_workers: int = VISUAL_AI_MAX_WORKERS, max_attempts: int = VISUAL_AI_MAX_ATTEMPTS,
+                 use_visual_cache: bool = VISUAL_CACHE_ENABLED, sampler: str = VISUAL_SAMPLER,
+                 budget_usd: Optional[float] = None):
         super().__init__("Visual Intelligence", 5.5, context.run_id)
         self.context = context
         self.dry_run = dry_run
         self.per_brand_budget = int(os.getenv('MULTIMODAL_IMAGE_BUDGET_PER_BRAND', '20'))
         self.max_total_budget = int(os.getenv('MULTIMODAL_MAX_TOTAL_BUDGET', '200'))
+        self.prompt_mode = prompt_mode
+        self.max_workers = max_workers
+        self.max_attempts = max(1, max_attempts)
+        self.sampler = sampler
+        self.budget_usd = budget_usd if budget_usd is not None else (
+            float(VISUAL_BUDGET_USD) if VISUAL_BUDGET_USD else None)
+        self.sample_plan_table = None  # set once a medoid sample plan is loaded
+        self.failed_brands: List[str] = []  # brands whose combined analysis job kept failing
+
+        # Cached analyses are reused across runs (combined mode only)
+        if not dry_run and use_visual_cache and VisualAnalysisCache and prompt_mode == 'combined':
+            self.visual_cache = VisualAnalysisCache(
+                COMBINED_ANALYSIS_FIELDS,
+                prompt_hash(self._combined_prompt_sql(), combined_output_schema()),
+                VISUAL_AI_ENDPOINT or 'default'
+            )
+        else:
+            self.visual_cache = None
 
 
     def execute(self, analysis_results: AnalysisResults) -> VisualIntelligenceResults:
@@ -79,44 +172,51 @@ class VisualIntelligenceStage(PipelineStage[AnalysisResults, VisualIntelligenceR
         try:
             print("   🎨 Running adaptive visual intelligence analysis...")
 
-            # Step 1: Create adaptive sampling strategy table
-            sampling_sql = self._generate_adaptive_sampling_sql()
-            print("   📊 Generated adaptive sampling strategy")
+            # Step 1: Budget-aware sample plan, or the adaptive sampling strategy table
+            if self.sampler == 'medoid':
+                self._build_sample_plan()
 
-            # Execute sampling strategy creation
-            client = get_bigquery_client()
-            sampling_job = client.query(sampling_sql)
-            sampling_job.result()  # Wait for table creation
-            print("   ✅ Created sampling strategy table")
+            if not self.sample_plan_table:
+                sampling_sql = self._generate_adaptive_sampling_sql()
+                print("   📊 Generated adaptive sampling strategy")
 
-            # Step 2: Execute sampling and analysis
-            analysis_sql = self._generate_visual_analysis_sql()
-            print("   🔍 Executing multimodal analysis...")
+                # Execute sampling strategy creation
+                sampling = wait_for_table(submit_query(sampling_sql))
+                print(f"   ✅ Created sampling strategy table ({sampling.row_count} brands)")
 
-            # Execute the analysis (creates table)
-            query_job = client.query(analysis_sql)
-            query_job.result()  # Wait for table creation
-
-            # Count results by querying the created table
-            count_sql = f"""
-            SELECT
-                COUNT(*) as sampled_count,
-                COUNT(CASE WHEN visual_text_alignment_score > 0 THEN 1 END) as insights_count,
-                COUNT(CASE WHEN luxury_positioning_score > 0 THEN 1 END) as competitive_count
-            FROM `{BQ_PROJECT}.{BQ_DATASET}.visual_intelligence_{self.context.run_id}`
-            """
-            count_job = client.query(count_sql)
-            count_result = count_job.result()
-
-            for row in count_result:
-                sampled_count = row.sampled_count
-                insights_count = row.insights_count
-                competitive_count = row.competitive_count
-                break
-
-            estimated_cost = sampled_count * 0.30  # Rough estimate (doubled due to 2 AI calls per ad)
-
-            print(f"   ✅ Analyzed {sampled_count} ads with enhanced visual intelligence")
+            # Step 2: Execute sampling and analysis
+            if self.prompt_mode == 'combined':
+                sampled_count, ai_calls, cached_count = self._run_combined_analysis()
+            else:
+                analysis_sql = self._generate_visual_analysis_sql()
+                print("   🔍 Executing multimodal analysis (2 AI calls per ad)...")
+
+                # Execute the analysis (creates table); sampled count comes from the job itself
+                analysis = wait_for_table(submit_query(analysis_sql))
+                register_run_table(self.context.run_id, self._output_table())
+                sampled_count = analysis.row_count or 0
+                ai_calls = 2 * sampled_count
+                cached_count = 0
+
+            insights_count = competitive_count = 0
+
+            if sampled_count > 0:
+                # Insight counts depend on AI output values, so they still need one scan
+                count_result = run_query(f"""
+                SELECT
+                    COUNT(CASE WHEN visual_text_alignment_score > 0 THEN 1 END) as insights_count,
+                    COUNT(CASE WHEN luxury_positioning_score > 0 THEN 1 END) as competitive_count
+                FROM `{self._output_table()}`
+                """)
+                if not count_result.empty:
+                    insights_count = int(count_result.iloc[0]['insights_count'])
+                    competitive_count = int(count_result.iloc[0]['competitive_count'])
+
+            # Rough estimate per multimodal call; measured cost is in the run cost ledger
+            estimated_cost = ai_calls * VISUAL_AI_COST_PER_CALL
+
+            print(f"   ✅ Analyzed {sampled_count} ads with enhanced visual intelligence "
+                  f"({ai_calls} AI calls, {cached_count} reused from cache)")
             print(f"   💡 Generated {insights_count} visual insights")
             print(f"   🎯 Generated {competitive_count} competitive positioning insights")
             print(f"   💰 Estimated cost: ${estimated_cost:.2f}")
@@ -125,13 +225,165 @@ class VisualIntelligenceStage(PipelineStage[AnalysisResults, VisualIntelligenceR
                 sampled_ads=sampled_count,
                 visual_insights=insights_count,
                 competitive_insights=competitive_count,
-                cost_estimate=estimated_cost
+                cost_estimate=estimated_cost,
+                ai_calls=ai_calls,
+                cached_ads=cached_count,
+                failed_brands=self.failed_brands
             )
 
         except Exception as e:
             self.logger.error(f"Visual intelligence analysis failed: {str(e)}")
             raise
 
+    def _build_sample_plan(self) -> Optional[Dict[str, Any]]:
+        """
+        Pick the sample with VisualSamplePlanner and load it as visual_sample_plan_<run_id>.
+
+        Returns:
+            The planner summary, or None when no plan could be built (adaptive fallback)
+        """
+        try:
+            calls_per_image = 1 if self.prompt_mode == 'combined' else 2
+            cost_per_image = calls_per_image * \
+                VisualIntelligenceCostEstimator(BQ_PROJECT).estimate_image_analysis_cost(1)['cost_per_image']
+            budget_usd = self.budget_usd if self.budget_usd is not None else self.max_total_budget * cost_per_image
+
+            is_cached, cache_join = self._cache_join_sql()
+            candidates = run_query(f"""
+            SELECT
+              a.brand,
+              CAST(a.ad_archive_id AS STRING) as ad_archive_id,
+              a.media_storage_path,
+              a.start_timestamp,
+              {is_cached} as is_cached
+            FROM `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates` a
+            {cache_join}
+            WHERE a.media_type IN ('image', 'carousel', 'video')
+              AND a.media_storage_path IS NOT NULL
+            """)
+            if candidates.empty:
+                return None
+
+            store = LocalEmbeddingStore()
+            store.refresh()
+            snapshot = store.load()
+            row_index = snapshot.row_index()
+            known = [ad_id for ad_id in candidates['ad_archive_id'] if ad_id in row_index]
+            if not known:
+                print("   ⚠️  No embeddings for visual candidates, using adaptive sampling")
+                return None
+            vectors = snapshot.as_float32([row_index[ad_id] for ad_id in known])
+
+            planner = VisualSamplePlanner(budget_usd, cost_per_image)
+            plan, summary = planner.plan(candidates, dict(zip(known, vectors)))
+
+            plan_table = f"{BQ_PROJECT}.{BQ_DATASET}.visual_sample_plan_{self.context.run_id}"
+            load_dataframe_to_bq(plan, plan_table, write_disposition="WRITE_TRUNCATE")
+            register_run_table(self.context.run_id, plan_table)
+            self.sample_plan_table = plan_table
+
+            coverage = summary['brand_coverage']
+            print(f"   📊 Sample plan: {summary['new_images']} new + {summary['cached_images']} cached images "
+                  f"across {len(coverage)} brands, ${summary['estimated_cost']:.2f} of ${budget_usd:.2f} "
+                  f"(mean coverage {sum(coverage.values()) / max(len(coverage), 1):.2f})")
+            return summary
+
+        except Exception as e:
+            print(f"   ⚠️  Could not build visual sample plan, using adaptive sampling: {str(e)[:100]}")
+            return None
+
+    def _output_table(self) -> str:
+        return f"{BQ_PROJECT}.{BQ_DATASET}.visual_intelligence_{self.context.run_id}"
+
+    def _sample_table(self) -> str:
+        return f"{BQ_PROJECT}.{BQ_DATASET}.visual_sample_{self.context.run_id}"
+
+    def _run_combined_analysis(self) -> Tuple[int, int, int]:
+        """
+        Analyze the sample with one AI call per ad, one parallel INSERT job per brand.
+
+        Ads with a fresh cached analysis are copied from the cache in one INSERT first;
+        only the remaining ads go to AI.GENERATE.
+
+        Returns:
+            (ads written to the output table, new AI.GENERATE calls including retries,
+             ads reused from the cache)
+        """
+        if self.visual_cache:
+            self.visual_cache.ensure_table()
+        sample = wait_for_table(submit_query(self._generate_visual_sample_sql()))
+        register_run_table(self.context.run_id, self._sample_table())
+        wait_for_table(submit_query(self._generate_combined_output_table_sql()))
+        register_run_table(self.context.run_id, self._output_table())
+
+        if not sample.has_rows:
+            return 0, 0, 0
+
+        cached = 0
+        if self.visual_cache:
+            cached = wait_for_table(submit_query(self._generate_cached_analysis_sql())).row_count or 0
+            print(f"   ♻️  Reused {cached} cached visual analyses")
+
+        brand_counts = run_query(f"""
+        SELECT brand, COUNT(*) as sampled_ads
+        FROM `{self._sample_table()}`
+        WHERE NOT is_cached
+        GROUP BY brand
+        """)
+        brand_sizes = dict(zip(brand_counts['brand'], brand_counts['sampled_ads'].astype(int)))
+        if not brand_sizes:
+            return cached, 0, cached
+        print(f"   🔍 Executing combined multimodal analysis: {sum(brand_sizes.values())} new ads across "
+              f"{len(brand_sizes)} brands ({min(self.max_workers, len(brand_sizes))} parallel jobs)...")
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(brand_sizes)))) as executor:
+            outcomes = list(executor.map(lambda item: self._analyze_brand(*item), brand_sizes.items()))
+
+        written = sum(outcome['written'] for outcome in outcomes)
+        ai_calls = sum(outcome['ai_calls'] for outcome in outcomes)
+        retried = [outcome['brand'] for outcome in outcomes if outcome['attempts'] > 1]
+        if retried:
+            print(f"   🔁 Retried failed rows for {len(retried)} brands: {', '.join(retried)}")
+        self.failed_brands = [outcome['brand'] for outcome in outcomes if outcome['error']]
+        for outcome in outcomes:
+            if outcome['error']:
+                print(f"   ⚠️  {outcome['brand']}: analysis job failed after {outcome['attempts']} attempts "
+                      f"({outcome['written']}/{brand_sizes[outcome['brand']]} ads written): {outcome['error']}")
+
+        if self.visual_cache and written:
+            self.visual_cache.store(self._output_table())
+        return written + cached, ai_calls, cached
+
+    def _analyze_brand(self, brand: str, expected: int) -> Dict[str, Any]:
+        """
+        Run the combined analysis INSERT for one brand, retrying only rows whose AI call failed.
+
+        Each attempt covers the brand's sampled ads not yet in the output table. Earlier
+        attempts keep only successful responses; the last attempt writes whatever is
+        left so every sampled ad ends up in the output, as in separate mode. A failed
+        job (quota, 5xx, timeout) uses up an attempt too; its error is returned rather
+        than raised so the other brands' work is kept.
+        """
+        job_config = bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ScalarQueryParameter("brand", "STRING", brand),
+        ], labels={'brand': label_value(brand)})  # Per-brand rollup in the run cost ledger
+        written = ai_calls = attempts = 0
+        error = None
+
+        while written < expected and attempts < self.max_attempts:
+            attempts += 1
+            final_attempt = attempts == self.max_attempts
+            ai_calls += expected - written
+            sql = self._generate_combined_analysis_sql(attempts, final_attempt)
+            try:
+                written += wait_for_table(submit_query(sql, job_config=job_config)).row_count or 0
+                error = None
+            except Exception as e:
+                error = str(e)
+                self.logger.warning(f"Visual analysis job for {brand} failed (attempt {attempts}): {e}")
+
+        return {'brand': brand, 'written': written, 'ai_calls': ai_calls, 'attempts': attempts, 'error': error}
+
     def _generate_adaptive_sampling_sql(self) -> str:
         """Generate SQL for improved per-brand budget strategy"""
 
@@ -185,21 +437,19 @@ class VisualIntelligenceStage(PipelineStage[AnalysisResults, VisualIntelligenceR
         ORDER BY total_ads DESC
         """
 
-    def _generate_visual_analysis_sql(self) -> str:
-        """Generate SQL for multimodal visual analysis"""
+    def _cache_join_sql(self) -> Tuple[str, str]:
+        """(is_cached expression, LEFT JOIN of fresh cache entries) for ads_with_dates aliased as a"""
 
-        # Define regex pattern outside f-string to avoid backslash issues
-        json_regex = r'```json\\s*({[\\s\\S]*?})\\s*```'
+        if not self.visual_cache:
+            return "FALSE", ""
+        return "c.media_storage_path IS NOT NULL", f"""LEFT JOIN ({self.visual_cache.fresh_entries_sql()}) c
+            ON c.media_storage_path = a.media_storage_path
+           AND c.input_hash = {self.visual_cache.input_hash_sql('a')}"""
 
-        return f"""
-        -- Multimodal Visual Intelligence Analysis
-        CREATE OR REPLACE TABLE `{BQ_PROJECT}.{BQ_DATASET}.visual_intelligence_{self.context.run_id}` AS
-        WITH sampled_ads AS (
-          SELECT
-            a.*,
-            s.final_sample_size,
-            -- Multi-factor scoring for strategic ad selection
-            (
+    def _strategic_score_sql(self) -> str:
+        """Multi-factor strategic score of an ads_with_dates row aliased as a"""
+
+        return """(
               -- Recency weight (30%)
               0.3 * (1.0 - DATE_DIFF(CURRENT_DATE(), DATE(a.start_timestamp), DAY) / 365.0) +
               -- Visual complexity weight (25%)
@@ -213,39 +463,218 @@ class VisualIntelligenceStage(PipelineStage[AnalysisResults, VisualIntelligenceR
               0.25 * LEAST(LENGTH(COALESCE(a.creative_text, '')) / 200.0, 1.0) +
               -- Strategic diversity weight (20%) - extreme promotional intensities
               0.2 * ABS(0.5 - LEAST(LENGTH(a.creative_text) / 200.0, 1.0))
-            ) as strategic_score,
+            )"""
+
+    def _sampled_ads_sql(self) -> str:
+        """
+        SELECT of the ads to analyze.
+
+        With a sample plan, exactly the planned ads. Otherwise the top strategic ads per
+        brand, up to each brand's sample size; with the visual analysis cache the sample
+        size budgets uncached ads only and every ad with a fresh cached analysis is added
+        on top (is_cached), at no AI cost.
+        """
+
+        if self.sample_plan_table:
+            return f"""
+        SELECT
+          a.brand,
+          a.ad_archive_id,
+          a.creative_text,
+          a.media_storage_path as primary_image_url,
+          1 as image_count,  -- Always 1 since we store single media per ad
+          a.media_type,
+          {self._strategic_score_sql()} as strategic_score,
+          p.is_cached
+        FROM `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates` a
+        JOIN `{self.sample_plan_table}` p
+          ON CAST(a.ad_archive_id AS STRING) = p.ad_archive_id AND a.brand = p.brand
+        WHERE a.media_storage_path IS NOT NULL
+        """
+
+        is_cached, cache_join = self._cache_join_sql()
+        rank_partition = f"a.brand, {is_cached}" if self.visual_cache else "a.brand"
+
+        return f"""
+        WITH sampled_ads AS (
+          SELECT
+            a.*,
+            s.final_sample_size,
+            {is_cached} as is_cached,
+            -- Multi-factor scoring for strategic ad selection
+            {self._strategic_score_sql()} as strategic_score,
             ROW_NUMBER() OVER (
-              PARTITION BY a.brand
-              ORDER BY (
-                0.3 * (1.0 - DATE_DIFF(CURRENT_DATE(), DATE(a.start_timestamp), DAY) / 365.0) +
-                0.25 * CASE
-                  WHEN a.media_type = 'carousel' THEN 1.0
-                  WHEN a.media_type = 'video' THEN 0.8
-                  WHEN a.media_type = 'image' THEN 0.5
-                  ELSE 0.3
-                END +
-                0.25 * LEAST(LENGTH(COALESCE(a.creative_text, '')) / 200.0, 1.0) +
-                0.2 * ABS(0.5 - LEAST(LENGTH(a.creative_text) / 200.0, 1.0))
-              ) DESC
+              PARTITION BY {rank_partition}
+              ORDER BY {self._strategic_score_sql()} DESC
             ) as brand_rank
           FROM `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates` a
           JOIN `{BQ_PROJECT}.{BQ_DATASET}.visual_sampling_strategy` s ON a.brand = s.brand
+          {cache_join}
           WHERE a.media_type IN ('image', 'carousel', 'video')
             AND a.media_storage_path IS NOT NULL
             AND s.final_sample_size > 0
-        ),
-        top_sampled AS (
-          SELECT *
-          FROM sampled_ads
-          WHERE brand_rank <= final_sample_size
+        )
+        SELECT
+          brand,
+          ad_archive_id,
+          creative_text,
+          media_storage_path as primary_image_url,
+          1 as image_count,  -- Always 1 since we store single media per ad
+          media_type,
+          strategic_score,
+          is_cached
+        FROM sampled_ads
+        WHERE is_cached OR brand_rank <= final_sample_size
+        """
+
+    def _generate_visual_sample_sql(self) -> str:
+        """Generate SQL that materializes the visual sample, so per-brand jobs share one selection"""
+
+        return f"""
+        CREATE OR REPLACE TABLE `{self._sample_table()}`
+        CLUSTER BY brand
+        AS {self._sampled_ads_sql()}
+        """
+
+    def _generate_combined_output_table_sql(self) -> str:
+        """Generate SQL for the empty combined-mode output table (sample columns keep their types)"""
+
+        analysis_columns = ',\n          '.join(
+            f"CAST(NULL AS {field_type}) as {name}" for name, field_type in COMBINED_ANALYSIS_FIELDS
+        )
+        return f"""
+        CREATE OR REPLACE TABLE `{self._output_table()}`
+        CLUSTER BY brand
+        AS
+        SELECT
+          s.* EXCEPT (is_cached),
+          {analysis_columns},
+          CAST(NULL AS STRING) as ai_status,
+          CAST(NULL AS INT64) as attempt
+        FROM `{self._sample_table()}` s
+        WHERE FALSE
+        """
+
+    def _generate_cached_analysis_sql(self) -> str:
+        """Generate the INSERT that copies cached analyses for the sample's cached ads (attempt 0)"""
+
+        cached_columns = ',\n          '.join(f"c.{name}" for name, _ in COMBINED_ANALYSIS_FIELDS)
+        return f"""
+        -- Reuse cached visual analyses
+        INSERT INTO `{self._output_table()}`
+        SELECT
+          s.* EXCEPT (is_cached),
+          {cached_columns},
+          '' as ai_status,
+          0 as attempt
+        FROM `{self._sample_table()}` s
+        JOIN ({self.visual_cache.fresh_entries_sql()}) c
+          ON c.media_storage_path = s.primary_image_url
+         AND c.input_hash = {self.visual_cache.input_hash_sql('s')}
+        WHERE s.is_cached
+        """
+
+    def _combined_prompt_sql(self) -> str:
+        """Prompt expression for the combined analysis; its text is part of the cache key"""
+
+        return """
+        CONCAT(
+          'VISUAL AND COMPETITIVE INTELLIGENCE: Analyze this ad creative for brand consistency, ',
+          'messaging alignment and competitive positioning.\\n\\n',
+          'BRAND: ', s.brand, '\\n',
+          'TEXT: "', s.creative_text, '"\\n',
+          'IMAGE: [Image shows the primary visual creative]\\n\\n',
+          'Scores MUST be decimals between 0.0 and 1.0:\\n',
+          '- visual_text_alignment_score: How well visual and text align\\n',
+          '- brand_consistency_score: Visual brand consistency\\n',
+          '- creative_fatigue_risk: Risk of creative becoming stale\\n',
+          '- luxury_positioning_score: Luxury vs accessible visual positioning\\n',
+          '- boldness_score: Bold vs subtle visual approach\\n',
+          '- visual_differentiation_level: How unique vs category-standard\\n',
+          '- creative_pattern_risk: Risk of overused visual patterns\\n',
+          'Also provide:\\n',
+          '- key_visual_elements: main visual elements\\n',
+          '- messaging_tone / visual_tone: brief descriptions of text and visual tone\\n',
+          '- contradictions: any visual-text contradictions\\n',
+          '- recommendations: max 2 actionable insights\\n',
+          '- target_demographic: EXACTLY one of YOUNG_ADULTS | PROFESSIONALS | FAMILIES | AFFLUENT | SENIORS\\n',
+          '- visual_style: EXACTLY one of MINIMALIST | PROFESSIONAL | CASUAL | BOLD\\n',
+          '- positioning_strengths: max 2 competitive strengths\\n',
+          '- positioning_gaps: max 2 potential positioning opportunities'
+        )
+        """.strip()
+
+    def _generate_combined_analysis_sql(self, attempt: int, final_attempt: bool) -> str:
+        """
+        Generate the per-brand INSERT with a single AI.GENERATE call per ad.
+
+        The output schema makes AI.GENERATE return typed fields, so no JSON is parsed.
+        Expects an @brand query parameter.
+        """
+
+        output_schema = combined_output_schema()
+        endpoint = f"\n              endpoint => '{VISUAL_AI_ENDPOINT}'," if VISUAL_AI_ENDPOINT else ""
+        analysis_columns = ',\n          '.join(
+            f"GREATEST(0.0, LEAST(1.0, analysis.{name})) as {name}" if field_type == "FLOAT64"
+            else f"analysis.{name}"
+            for name, field_type in COMBINED_ANALYSIS_FIELDS
+        )
+        # Failed rows stay out of the table until the last attempt, so the next attempt retries them
+        keep_successful = "" if final_attempt else "WHERE analysis.status = ''"
+
+        return f"""
+        -- Combined Visual + Competitive Intelligence (attempt {attempt})
+        INSERT INTO `{self._output_table()}`
+        SELECT
+          brand,
+          ad_archive_id,
+          creative_text,
+          primary_image_url,
+          image_count,
+          media_type,
+          strategic_score,
+          {analysis_columns},
+          analysis.status as ai_status,
+          {attempt} as attempt
+        FROM (
+          SELECT
+            s.*,
+            AI.GENERATE(
+              {self._combined_prompt_sql()},
+              connection_id => '{AI_CONNECTION_ID}',{endpoint}
+              output_schema => '{output_schema}'
+            ) as analysis
+          FROM `{self._sample_table()}` s
+          WHERE s.brand = @brand
+            AND NOT s.is_cached
+            AND NOT EXISTS (
+              SELECT 1
+              FROM `{self._output_table()}` done
+              WHERE done.brand = @brand AND done.ad_archive_id = s.ad_archive_id
+            )
+        )
+        {keep_successful}
+        """
+
+    def _generate_visual_analysis_sql(self) -> str:
+        """Generate SQL for multimodal visual analysis"""
+
+        # Define regex pattern outside f-string to avoid backslash issues
+        json_regex = r'```json\\s*({[\\s\\S]*?})\\s*```'
+
+        return f"""
+        -- Multimodal Visual Intelligence Analysis
+        CREATE OR REPLACE TABLE `{BQ_PROJECT}.{BQ_DATASET}.visual_intelligence_{self.context.run_id}` AS
+        WITH top_sampled AS (
+          {self._sampled_ads_sql()}
         ),
         visual_analyzed AS (
           SELECT
             brand,
             ad_archive_id,
             creative_text,
-            media_storage_path as primary_image_url,
-            1 as image_count,  -- Always 1 since we store single media per ad
+            primary_image_url,
+            image_count,
             media_type,
             strategic_score,
             -- Multimodal Analysis using BigQuery AI
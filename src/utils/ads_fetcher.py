@@ -53,7 +53,9 @@ class MetaAdsFetcher:
                                    status: str = "ALL", 
                                    max_ads: int = 100,
                                    max_pages: int = 10,
-                                   delay_between_requests: float = 0.5) -> Generator[Dict, None, AdsFetchResult]:
+                                   delay_between_requests: float = 0.5,
+                                   seed_page: Optional[List[Dict]] = None,
+                                   seed_cursor: Optional[str] = None) -> Generator[Dict, None, AdsFetchResult]:
         """
         Fetch ads with full pagination support
         
@@ -65,6 +67,10 @@ class MetaAdsFetcher:
             max_ads: Maximum total ads to fetch
             max_pages: Maximum pages to fetch (safety limit)
             delay_between_requests: Delay between API calls (rate limiting)
+            seed_page: Already-fetched first page of results (e.g. from the Stage 3 probe).
+                When given, it is yielded as page 1 and pagination resumes from seed_cursor
+                instead of requesting the first page again.
+            seed_cursor: Continuation cursor returned alongside seed_page
             
         Yields:
             Individual ad dictionaries
@@ -113,6 +119,31 @@ class MetaAdsFetcher:
         
         print(f"📱 Fetching ads for page ID {page_id}...")
         
+        # Reuse a previously probed first page instead of downloading it again
+        if seed_page is not None and max_pages > 0:
+            pages_fetched = 1
+            cursor = seed_cursor
+            print(f"   📄 Page 1: {len(seed_page)} ads (reused from probe)")
+            
+            for ad in seed_page:
+                if total_ads >= max_ads:
+                    break
+                
+                yield ad
+                total_ads += 1
+            
+            if not cursor or len(seed_page) == 0:
+                print(f"   ✅ No more pages available")
+                yield AdsFetchResult(
+                    company_name=company_name or "Unknown",
+                    page_id=page_id,
+                    total_ads_fetched=total_ads,
+                    pages_fetched=pages_fetched,
+                    success=True,
+                    fetch_time=time.time() - start_time
+                )
+                return
+        
         while pages_fetched < max_pages and total_ads < max_ads:
             # Build request parameters
             params = {
@@ -283,20 +314,28 @@ class MetaAdsFetcher:
     def fetch_company_ads_with_metadata(self, company_name: str, page_id: str = None, 
                                       max_ads: int = 50, max_pages: int = 5, 
                                       delay_between_requests: float = 0.5, 
-                                      country: str = "US", status: str = "ALL") -> tuple:
+                                      country: str = "US", status: str = "ALL",
+                                      seed_page: Optional[List[Dict]] = None,
+                                      seed_cursor: Optional[str] = None) -> tuple:
         """
         Compatibility method for pipeline - matches old interface.
         Returns (ads_list, fetch_result_dict) to match expected interface from pipeline.
+        
+        seed_page/seed_cursor let callers hand over a first page they already probed
+        (see get_competitor_ad_tiers) so pagination resumes from page 2.
         """
         
         # Use the enhanced fetch method with page ID resolution
         ads, result = self.fetch_company_ads_list(
             company_name=company_name,
+            page_id=page_id,
             max_ads=max_ads,
             max_pages=max_pages,
             delay_between_requests=delay_between_requests,
             country=country,
-            status=status
+            status=status,
+            seed_page=seed_page,
+            seed_cursor=seed_cursor
         )
         
         # If page ID resolution failed, return empty results with clear error
@@ -623,7 +662,11 @@ class MetaAdsFetcher:
         Uses intelligent prioritization and early exit once target_count competitors found.
         Enhanced with page ID resolution for robust API calls.
         
-        Returns: {company_name: {'tier': int, 'estimated_count': int, 'exact_count': bool}}
+        Returns: {company_name: {'tier': int, 'estimated_count': int, 'exact_count': bool,
+                                 'page_id': str, 'probe_page': List[Dict], 'probe_cursor': str}}
+        
+        The probed first page and its cursor are returned so ingestion can resume
+        pagination from page 2 instead of downloading the same page again.
         """
         results = {}
         
@@ -746,7 +789,11 @@ class MetaAdsFetcher:
                         1: 'Minor Player (1-10 ads)',
                         2: 'Moderate Player (11-19 ads)', 
                         3: 'Major Player (20+ ads)'
-                    }[tier]
+                    }[tier],
+                    # Seed for Stage 4 ingestion (saves one round trip per competitor)
+                    'page_id': page_id,
+                    'probe_page': first_page_results,
+                    'probe_cursor': js.get("cursor")
                 }
                 
                 print(f"   📊 {company_name}: {results[company_name]['classification']} - {estimated_count} ads")
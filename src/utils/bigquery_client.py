@@ -2,14 +2,89 @@
 BigQuery client utilities and connection helpers
 """
 import os
+import re
+import threading
 import pandas as pd
+from contextlib import contextmanager
+from dataclasses import dataclass
 from google.cloud import bigquery
-from typing import Optional
+from google.cloud.exceptions import NotFound
+from typing import Callable, Dict, Optional
+
+DML_STATEMENT_TYPES = {"INSERT", "UPDATE", "DELETE", "MERGE"}
+
+# Physical layout of the core ad tables (ads_with_dates, ads_embeddings): date-window
+# filters prune partitions and brand/ad_archive_id filters prune clustered blocks
+AD_TABLE_PARTITION_FIELD = "start_timestamp"
+AD_TABLE_CLUSTER_FIELDS = ["brand", "ad_archive_id"]
+AD_TABLE_LAYOUT_SQL = f"PARTITION BY DATE({AD_TABLE_PARTITION_FIELD})\nCLUSTER BY {', '.join(AD_TABLE_CLUSTER_FIELDS)}"
+
+# Per-thread query accounting, enabled by track_queries()
+_query_tracking = threading.local()
+
+# Labels attached to every query and load job (run_id, stage, target_brand), so a
+# run's jobs can be found in INFORMATION_SCHEMA.JOBS. Process-wide because stages
+# run one after another while a stage may fan its jobs out over threads.
+_job_labels: Dict[str, str] = {}
+_job_labels_lock = threading.Lock()
+
+
+@dataclass
+class QueryStats:
+    """Jobs, bytes and slot time of the queries run inside a track_queries() block"""
+    queries: int = 0
+    bytes_processed: int = 0
+    slot_millis: int = 0
+
+
+@dataclass
+class TableReadiness:
+    """What a completed query job wrote, read from the job's own statistics"""
+    job_id: str
+    statement_type: Optional[str]
+    table_id: Optional[str]
+    row_count: Optional[int]
+    bytes_processed: int = 0
+
+    @property
+    def has_rows(self) -> bool:
+        return bool(self.row_count)
+
+def label_value(value) -> str:
+    """Coerce a value to a valid BigQuery label value (lowercase, [a-z0-9_-], max 63 chars)"""
+    return re.sub(r"[^a-z0-9_-]+", "_", str(value).lower()).strip("_")[:63]
+
+def set_job_labels(**labels) -> None:
+    """
+    Set labels for jobs started from now on; a value of None removes the label.
+    
+    Usage:
+        set_job_labels(run_id=run_id, target_brand=brand)
+        set_job_labels(stage="visual_intelligence")
+    """
+    with _job_labels_lock:
+        for key, value in labels.items():
+            if value is None:
+                _job_labels.pop(key, None)
+            else:
+                _job_labels[key] = label_value(value)
+
+def get_job_labels() -> Dict[str, str]:
+    """Labels currently attached to new jobs"""
+    with _job_labels_lock:
+        return dict(_job_labels)
 
 def get_bigquery_client(project_id: Optional[str] = None) -> bigquery.Client:
-    """Get authenticated BigQuery client"""
+    """Get authenticated BigQuery client; its jobs carry the current job labels"""
     project_id = project_id or os.environ.get("BQ_PROJECT")
-    return bigquery.Client(project=project_id)
+    labels = get_job_labels()
+    if not labels:
+        return bigquery.Client(project=project_id)
+    return bigquery.Client(
+        project=project_id,
+        default_query_job_config=bigquery.QueryJobConfig(labels=labels),
+        default_load_job_config=bigquery.LoadJobConfig(labels=labels)
+    )
 
 def ensure_dataset(client: bigquery.Client, dataset_id: str) -> None:
     """Ensure dataset exists, create if not"""
@@ -44,7 +119,40 @@ def load_dataframe_to_bq(df: pd.DataFrame, table_id: str,
 def run_query(query: str, project_id: Optional[str] = None) -> pd.DataFrame:
     """Execute SQL query and return results as DataFrame"""
     client = get_bigquery_client(project_id)
-    return client.query(query).to_dataframe()
+    job = client.query(query)
+    df = job.to_dataframe()
+    _record_job(job)
+    return df
+
+@contextmanager
+def track_queries():
+    """
+    Accumulate stats for queries run by run_query/wait_for_table on this thread.
+    Nested blocks also count towards every enclosing block.
+    
+    Usage:
+        with track_queries() as stats:
+            run_query(sql)
+        print(stats.bytes_processed)
+    """
+    stats = QueryStats()
+    previous = getattr(_query_tracking, "stats", None)
+    _query_tracking.stats = stats
+    try:
+        yield stats
+    finally:
+        _query_tracking.stats = previous
+        if previous is not None:
+            previous.queries += stats.queries
+            previous.bytes_processed += stats.bytes_processed
+            previous.slot_millis += stats.slot_millis
+
+def _record_job(job) -> None:
+    stats = getattr(_query_tracking, "stats", None)
+    if stats is not None:
+        stats.queries += 1
+        stats.bytes_processed += job.total_bytes_processed or 0
+        stats.slot_millis += job.slot_millis or 0
 
 def create_table_from_query(query: str, destination_table: str, 
                            write_disposition: str = "WRITE_TRUNCATE",
@@ -62,4 +170,91 @@ def create_table_from_query(query: str, destination_table: str,
     job.result()  # Wait for completion
     
     print(f"Created table {destination_table} from query")
-    return job
\ No newline at end of file
+    return job
+
+def submit_query(query: str, project_id: Optional[str] = None,
+                 job_config: Optional[bigquery.QueryJobConfig] = None) -> bigquery.QueryJob:
+    """Start a query job and return its handle without waiting"""
+    client = get_bigquery_client(project_id)
+    if job_config is not None and job_config.labels:
+        # Explicit labels replace the client defaults, so merge them with the current ones
+        job_config.labels = {**get_job_labels(), **job_config.labels}
+    return client.query(query, job_config=job_config)
+
+def wait_for_table(job: bigquery.QueryJob, timeout: Optional[float] = None) -> TableReadiness:
+    """
+    Block on a query job's completion and report the table it wrote.
+    
+    The table and row count come from job statistics (DML affected rows) or table
+    metadata (CREATE TABLE AS SELECT / destination tables), never from a COUNT query.
+    For multi-statement scripts the last child statement that wrote a table is used.
+    """
+    job.result(timeout=timeout)
+    _record_job(job)
+    
+    source = job
+    if job.statement_type == "SCRIPT":
+        children = sorted(job._client.list_jobs(parent_job=job.job_id),
+                          key=lambda child: child.created, reverse=True)
+        source = next((child for child in children if _target_table(child) is not None), job)
+    
+    table = _target_table(source)
+    if source.statement_type in DML_STATEMENT_TYPES:
+        row_count = source.num_dml_affected_rows
+    elif table is not None:
+        row_count = job._client.get_table(table).num_rows
+    else:
+        row_count = None
+    
+    return TableReadiness(
+        job_id=job.job_id,
+        statement_type=source.statement_type,
+        table_id=f"{table.project}.{table.dataset_id}.{table.table_id}" if table is not None else None,
+        row_count=int(row_count) if row_count is not None else None,
+        bytes_processed=job.total_bytes_processed or 0
+    )
+
+def _target_table(job) -> Optional[bigquery.TableReference]:
+    """Table a query job created or modified (DDL target, else its destination)"""
+    if getattr(job, "ddl_target_table", None) is not None:
+        return job.ddl_target_table
+    return getattr(job, "destination", None)
+
+def has_ad_table_layout(table: bigquery.Table) -> bool:
+    """Whether a table is day-partitioned on start_timestamp and clustered by brand, ad_archive_id"""
+    partitioning = table.time_partitioning
+    return (partitioning is not None
+            and partitioning.field == AD_TABLE_PARTITION_FIELD
+            and partitioning.type_ == bigquery.TimePartitioningType.DAY
+            and list(table.clustering_fields or []) == AD_TABLE_CLUSTER_FIELDS)
+
+def ensure_ad_table_layout(table_id: str, source_sql: Optional[Callable[[bigquery.Table], str]] = None,
+                           project_id: Optional[str] = None) -> bool:
+    """
+    Rebuild an existing core ad table with AD_TABLE_LAYOUT_SQL if it predates it.
+    
+    Incremental paths MERGE into existing tables and cannot change their layout,
+    so they call this first. Missing or already-partitioned tables are left alone.
+    
+    Args:
+        table_id: Fully-qualified table id
+        source_sql: Builds the rebuild SELECT from the current table (e.g. to backfill
+            start_timestamp); defaults to SELECT * from the table itself
+    
+    Returns:
+        True if the table was rebuilt
+    """
+    client = get_bigquery_client(project_id)
+    try:
+        table = client.get_table(table_id)
+    except NotFound:
+        return False
+    
+    if has_ad_table_layout(table):
+        return False
+    
+    select_sql = source_sql(table) if source_sql else f"SELECT * FROM `{table_id}`"
+    client.query(f"CREATE OR REPLACE TABLE `{table_id}`\n{AD_TABLE_LAYOUT_SQL}\nAS {select_sql}").result()
+    print(f"   🧱 Rebuilt {table_id} partitioned by DATE({AD_TABLE_PARTITION_FIELD}), "
+          f"clustered by {', '.join(AD_TABLE_CLUSTER_FIELDS)}")
+    return True
@@ -0,0 +1,269 @@
+"""
+Per-run cost ledger
+
+Every query and load job started through get_bigquery_client carries the run_id,
+stage and target_brand labels set by the orchestrator (set_job_labels); per-brand
+jobs add a brand label. The ledger reads the measured cost of a run's labeled jobs
+from INFORMATION_SCHEMA.JOBS_BY_PROJECT (bytes billed, slot time and AI function
+usage) and stores one row per (stage, brand) in the run_costs table.
+
+Each stage is recorded when it finishes and the whole run is recorded again at
+the end, which also picks up job statistics that were not visible yet. The final
+record carries the run's insight count, so cost per insight can be tracked over
+time and a run that costs clearly more than the brand's recent runs is flagged.
+
+INFORMATION_SCHEMA.JOBS has no per-row AI call count: ai_jobs counts jobs that call
+an AI/ML generate function and ai_rows the rows those jobs inserted, which equals
+the AI calls of the INSERT-based visual analysis.
+
+Usage:
+    python -m src.utils.cost_ledger report --run-id <id>   # per-stage and per-brand cost
+    python -m src.utils.cost_ledger trend --days 30        # cost per run and insight
+"""
+
+import os
+from typing import Dict, Optional
+
+import pandas as pd
+
+try:
+    from src.utils.bigquery_client import run_query, label_value
+except ImportError:
+    run_query = None
+    label_value = None
+
+BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
+BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
+
+BQ_JOBS_REGION = os.environ.get("BQ_JOBS_REGION", "region-us")
+BQ_USD_PER_TIB = float(os.environ.get("BQ_USD_PER_TIB", "6.25"))  # On-demand analysis price
+COST_LEDGER_LOOKBACK_HOURS = int(os.environ.get("COST_LEDGER_LOOKBACK_HOURS", "48"))
+COST_REGRESSION_THRESHOLD = float(os.environ.get("COST_REGRESSION_THRESHOLD", "0.5"))  # +50% vs baseline
+COST_REGRESSION_BASELINE_RUNS = int(os.environ.get("COST_REGRESSION_BASELINE_RUNS", "10"))
+
+COST_TABLE = "run_costs"
+
+COST_SCHEMA = [
+    ("run_id", "STRING"),
+    ("stage", "STRING"),            # stage label, 'unlabeled' for jobs outside a stage
+    ("brand", "STRING"),            # brand label of per-brand jobs, else the target brand
+    ("target_brand", "STRING"),
+    ("jobs", "INT64"),
+    ("bytes_processed", "INT64"),
+    ("bytes_billed", "INT64"),
+    ("slot_ms", "INT64"),
+    ("ai_jobs", "INT64"),
+    ("ai_rows", "INT64"),
+    ("cost_usd", "FLOAT64"),        # bytes billed at BQ_USD_PER_TIB
+    ("insights", "INT64"),          # run's insight count, set by the final record
+    ("recorded_at", "TIMESTAMP"),
+]
+
+AI_FUNCTION_PATTERN = r"(?i)\b(?:AI|ML)\.GENERATE\w*\s*\("
+
+
+def _label_sql(key: str) -> str:
+    return f"(SELECT value FROM UNNEST(labels) WHERE key = '{key}')"
+
+
+class RunCostLedger:
+    """Measured BigQuery cost of one pipeline run, by stage and brand"""
+
+    def __init__(self, run_id: str, project_id: str = BQ_PROJECT, dataset_id: str = BQ_DATASET,
+                 region: str = BQ_JOBS_REGION, usd_per_tib: float = BQ_USD_PER_TIB,
+                 lookback_hours: int = COST_LEDGER_LOOKBACK_HOURS):
+        self.run_id = run_id
+        self.run_label = label_value(run_id)
+        self.project_id = project_id
+        self.region = region
+        self.usd_per_tib = usd_per_tib
+        self.lookback_hours = lookback_hours
+        self.table_id = f"{project_id}.{dataset_id}.{COST_TABLE}"
+
+    def measured_jobs_sql(self, stage: Optional[str] = None, insights: Optional[int] = None) -> str:
+        """Ledger rows for the run's jobs, optionally for one stage only"""
+        stage_filter = f"AND {_label_sql('stage')} = '{label_value(stage)}'" if stage else ""
+        insights_sql = str(int(insights)) if insights is not None else "CAST(NULL AS INT64)"
+        return f"""
+        SELECT
+          '{self.run_id}' as run_id,
+          stage,
+          brand,
+          target_brand,
+          COUNT(*) as jobs,
+          SUM(IFNULL(total_bytes_processed, 0)) as bytes_processed,
+          SUM(IFNULL(total_bytes_billed, 0)) as bytes_billed,
+          SUM(IFNULL(total_slot_ms, 0)) as slot_ms,
+          COUNTIF(uses_ai) as ai_jobs,
+          SUM(IF(uses_ai, IFNULL(dml_statistics.inserted_row_count, 0), 0)) as ai_rows,
+          SUM(IFNULL(total_bytes_billed, 0)) / POW(2, 40) * {self.usd_per_tib} as cost_usd,
+          {insights_sql} as insights,
+          CURRENT_TIMESTAMP() as recorded_at
+        FROM (
+          SELECT
+            *,
+            IFNULL({_label_sql('stage')}, 'unlabeled') as stage,
+            COALESCE({_label_sql('brand')}, {_label_sql('target_brand')}) as brand,
+            {_label_sql('target_brand')} as target_brand,
+            REGEXP_CONTAINS(IFNULL(query, ''), r'{AI_FUNCTION_PATTERN}') as uses_ai
+          FROM `{self.project_id}.{self.region}.INFORMATION_SCHEMA.JOBS_BY_PROJECT`
+          WHERE creation_time >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {int(self.lookback_hours)} HOUR)
+            AND state = 'DONE'
+            -- Script parents repeat their child jobs' statistics
+            AND IFNULL(statement_type, '') != 'SCRIPT'
+            AND {_label_sql('run_id')} = '{self.run_label}'
+            {stage_filter}
+        )
+        GROUP BY stage, brand, target_brand
+        """
+
+    def record(self, stage: Optional[str] = None, insights: Optional[int] = None) -> pd.DataFrame:
+        """
+        Replace the run's ledger rows (or one stage's) with freshly measured ones.
+
+        Returns:
+            The run's per-stage rollup after the update
+        """
+        columns = ",\n          ".join(f"{name} {field_type}" for name, field_type in COST_SCHEMA)
+        stage_filter = f"AND stage = '{label_value(stage)}'" if stage else ""
+        return run_query(f"""
+        CREATE TABLE IF NOT EXISTS `{self.table_id}` (
+          {columns}
+        )
+        PARTITION BY DATE(recorded_at)
+        CLUSTER BY target_brand, run_id;
+
+        DELETE FROM `{self.table_id}`
+        WHERE run_id = '{self.run_id}' {stage_filter};
+
+        INSERT INTO `{self.table_id}` ({', '.join(name for name, _ in COST_SCHEMA)})
+        {self.measured_jobs_sql(stage, insights)};
+
+        {self.stage_rollup_sql()};
+        """, self.project_id)
+
+    def stage_rollup_sql(self) -> str:
+        return self._rollup_sql("stage")
+
+    def brand_rollup_sql(self) -> str:
+        return self._rollup_sql("brand")
+
+    def _rollup_sql(self, dimension: str) -> str:
+        return f"""
+        SELECT
+          {dimension},
+          SUM(jobs) as jobs,
+          SUM(bytes_billed) as bytes_billed,
+          SUM(slot_ms) as slot_ms,
+          SUM(ai_jobs) as ai_jobs,
+          SUM(ai_rows) as ai_rows,
+          ROUND(SUM(cost_usd), 4) as cost_usd
+        FROM `{self.table_id}`
+        WHERE run_id = '{self.run_id}'
+        GROUP BY {dimension}
+        ORDER BY cost_usd DESC
+        """
+
+    def stage_rollup(self) -> pd.DataFrame:
+        return run_query(self.stage_rollup_sql(), self.project_id)
+
+    def brand_rollup(self) -> pd.DataFrame:
+        return run_query(self.brand_rollup_sql(), self.project_id)
+
+
+def cost_trend_sql(days: int = 30, target_brand: Optional[str] = None, project_id: str = BQ_PROJECT,
+                   dataset_id: str = BQ_DATASET) -> str:
+    """
+    Cost per run and per insight, with each run compared to the same brand's
+    previous COST_REGRESSION_BASELINE_RUNS runs.
+    """
+    brand_filter = f"AND target_brand = '{label_value(target_brand)}'" if target_brand else ""
+    return f"""
+    WITH runs AS (
+      SELECT
+        run_id,
+        ANY_VALUE(target_brand) as target_brand,
+        MIN(recorded_at) as recorded_at,
+        SUM(bytes_billed) as bytes_billed,
+        SUM(slot_ms) as slot_ms,
+        SUM(ai_rows) as ai_rows,
+        SUM(cost_usd) as cost_usd,
+        MAX(insights) as insights
+      FROM `{project_id}.{dataset_id}.{COST_TABLE}`
+      WHERE recorded_at >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {int(days)} DAY)
+        {brand_filter}
+      GROUP BY run_id
+    )
+    SELECT
+      *,
+      SAFE_DIVIDE(cost_usd, insights) as cost_per_insight,
+      AVG(cost_usd) OVER (
+        PARTITION BY target_brand ORDER BY recorded_at
+        ROWS BETWEEN {COST_REGRESSION_BASELINE_RUNS} PRECEDING AND 1 PRECEDING
+      ) as baseline_cost_usd
+    FROM runs
+    ORDER BY recorded_at
+    """
+
+
+def cost_trend(days: int = 30, target_brand: Optional[str] = None, project_id: str = BQ_PROJECT,
+               dataset_id: str = BQ_DATASET) -> pd.DataFrame:
+    trend = run_query(cost_trend_sql(days, target_brand, project_id, dataset_id), project_id)
+    if not trend.empty:
+        trend["regression"] = trend["cost_usd"] > trend["baseline_cost_usd"] * (1 + COST_REGRESSION_THRESHOLD)
+    return trend
+
+
+def check_cost_regression(run_id: str, target_brand: str, project_id: str = BQ_PROJECT,
+                          dataset_id: str = BQ_DATASET) -> Optional[Dict]:
+    """The run's cost against its brand baseline, or None without enough history"""
+    trend = cost_trend(days=90, target_brand=target_brand, project_id=project_id, dataset_id=dataset_id)
+    if trend.empty or run_id not in set(trend["run_id"]):
+        return None
+    row = trend[trend["run_id"] == run_id].iloc[-1]
+    if pd.isna(row["baseline_cost_usd"]):
+        return None
+    return {
+        "cost_usd": float(row["cost_usd"]),
+        "baseline_cost_usd": float(row["baseline_cost_usd"]),
+        "regression": bool(row["regression"]),
+    }
+
+
+def main():
+    """CLI: per-run cost reports and trends"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measured BigQuery cost per pipeline run")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report_parser = subparsers.add_parser("report", help="Per-stage and per-brand cost of one run")
+    report_parser.add_argument("--run-id", required=True)
+    report_parser.add_argument("--refresh", action="store_true", help="Re-measure the run from JOBS first")
+    trend_parser = subparsers.add_parser("trend", help="Cost per run and insight over time")
+    trend_parser.add_argument("--days", type=int, default=30)
+    trend_parser.add_argument("--brand", help="Only runs for this target brand")
+    args = parser.parse_args()
+
+    if args.command == "report":
+        ledger = RunCostLedger(args.run_id)
+        stages = ledger.record() if args.refresh else ledger.stage_rollup()
+        print(f"💰 Run {args.run_id}: ${stages['cost_usd'].sum():.4f}" if not stages.empty
+              else f"💰 No cost recorded for run {args.run_id}")
+        print("\n📊 By stage:")
+        print(stages.to_string(index=False))
+        print("\n🏷️  By brand:")
+        print(ledger.brand_rollup().to_string(index=False))
+        return
+
+    trend = cost_trend(args.days, args.brand)
+    if trend.empty:
+        print(f"💰 No runs recorded in the last {args.days} days")
+        return
+    print(trend.to_string(index=False))
+    regressions = trend[trend["regression"]]
+    if not regressions.empty:
+        print(f"\n⚠️  {len(regressions)} runs cost >{COST_REGRESSION_THRESHOLD:.0%} above their brand baseline")
+
+
+if __name__ == "__main__":
+    main()
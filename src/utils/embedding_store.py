@@ -0,0 +1,378 @@
+"""
+Local embedding store
+
+Snapshots the BigQuery ads_embeddings table into a memory-mapped matrix file
+plus an Arrow sidecar (ad_archive_id, brand, start_timestamp, embedding_hash),
+so similarity work can run locally without re-scanning BigQuery.
+
+Layout of the store directory:
+    embeddings.<version>.bin     row-major (n, dim) matrix in float32, float16 or int8
+    embeddings.<version>.arrow   Arrow IPC file, one row per matrix row (same order)
+    manifest.json                dtype, dimension, row count, refresh time and the
+                                 current version's file names
+
+Each write creates a new version and then replaces manifest.json, so readers see
+either the old or the new snapshot, never a mix of the two.
+
+Refreshes are incremental by ad_archive_id: only vectors whose embedding_hash
+is new or changed are downloaded, everything else is copied from the old snapshot.
+"""
+
+import os
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    from google.cloud import bigquery
+    from src.utils.bigquery_client import get_bigquery_client, run_query
+    from src.utils.sql_helpers import safe_sql_string_list
+except ImportError:
+    bigquery = None
+    get_bigquery_client = None
+    run_query = None
+    safe_sql_string_list = None
+
+BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
+BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
+
+EMBEDDING_STORE_DIR = os.environ.get("EMBEDDING_STORE_DIR", "data/embeddings")
+EMBEDDING_STORE_DTYPE = os.environ.get("EMBEDDING_STORE_DTYPE", "float32")  # float32, float16 or int8
+
+STORE_DTYPES = {'float32': np.float32, 'float16': np.float16, 'int8': np.int8}
+
+MATRIX_FILE = "embeddings.{version}.bin"
+METADATA_FILE = "embeddings.{version}.arrow"
+MANIFEST_FILE = "manifest.json"
+
+
+@dataclass
+class EmbeddingSnapshot:
+    """Loaded store: memory-mapped vectors plus their Arrow metadata"""
+    vectors: np.ndarray      # (n, dim) in the stored dtype, memory-mapped when loaded from disk
+    metadata: pa.Table       # ad_archive_id, brand, start_timestamp, embedding_hash, scale
+    dtype: str
+
+    def __len__(self) -> int:
+        return self.metadata.num_rows
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    @property
+    def ad_ids(self) -> np.ndarray:
+        return self.metadata.column('ad_archive_id').to_numpy(zero_copy_only=False)
+
+    @property
+    def brands(self) -> np.ndarray:
+        return self.metadata.column('brand').to_numpy(zero_copy_only=False)
+
+    @property
+    def start_timestamps(self) -> np.ndarray:
+        """start_timestamp as datetime64[us] (NaT where unknown)"""
+        return self.metadata.column('start_timestamp').to_pandas().dt.tz_localize(None).to_numpy('datetime64[us]')
+
+    @property
+    def scales(self) -> np.ndarray:
+        """Per-row dequantization scale (all ones unless stored as int8)"""
+        return self.metadata.column('scale').to_numpy()
+
+    def row_index(self) -> Dict[str, int]:
+        """ad_archive_id -> matrix row"""
+        return {ad_id: row for row, ad_id in enumerate(self.ad_ids)}
+
+    def as_float32(self, rows=None) -> np.ndarray:
+        """
+        Vectors as float32. float32 stores return the memory-mapped matrix itself
+        (no copy) when rows is None; other dtypes are converted/dequantized.
+        """
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        if self.dtype == 'float32':
+            return vectors
+        if self.dtype == 'int8':
+            scales = self.scales if rows is None else self.scales[rows]
+            return vectors.astype(np.float32) * scales[:, None]
+        return vectors.astype(np.float32)
+
+
+def quantize(vectors: np.ndarray, dtype: str):
+    """
+    Convert float32 vectors to the stored dtype.
+
+    int8 uses symmetric per-row scaling (scale = max|x| / 127).
+
+    Returns:
+        (stored vectors, per-row float32 scales)
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.ones(len(vectors), dtype=np.float32)
+    if dtype == 'int8':
+        max_abs = np.abs(vectors).max(axis=1) if len(vectors) else scales
+        scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+        stored = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return stored, scales
+    return vectors.astype(STORE_DTYPES[dtype]), scales
+
+
+class LocalEmbeddingStore:
+    """Memory-mapped snapshot of ads_embeddings with incremental refresh"""
+
+    def __init__(self, store_dir: str = EMBEDDING_STORE_DIR, dtype: str = EMBEDDING_STORE_DTYPE):
+        if dtype not in STORE_DTYPES:
+            raise ValueError(f"Unsupported embedding store dtype: {dtype} (expected one of {list(STORE_DTYPES)})")
+        self.store_dir = store_dir
+        self.dtype = dtype
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.store_dir, name)
+
+    def exists(self) -> bool:
+        if not os.path.exists(self._path(MANIFEST_FILE)):
+            return False
+        manifest = self.manifest()
+        return all(os.path.exists(self._path(manifest[name])) for name in ('matrix_file', 'metadata_file'))
+
+    def manifest(self) -> Dict:
+        with open(self._path(MANIFEST_FILE), 'r') as f:
+            return json.load(f)
+
+    def load(self) -> EmbeddingSnapshot:
+        """Open the snapshot without copying: np.memmap for vectors, Arrow memory map for metadata"""
+        manifest = self.manifest()
+        metadata = pa.ipc.open_file(pa.memory_map(self._path(manifest['metadata_file']), 'r')).read_all()
+
+        count, dimension = manifest['count'], manifest['dimension']
+        if metadata.num_rows != count:
+            raise ValueError(f"Embedding store metadata has {metadata.num_rows} rows, manifest expects {count}")
+        if count:
+            vectors = np.memmap(self._path(manifest['matrix_file']), dtype=STORE_DTYPES[manifest['dtype']],
+                                mode='r', shape=(count, dimension))
+        else:
+            vectors = np.empty((0, dimension), dtype=STORE_DTYPES[manifest['dtype']])
+
+        return EmbeddingSnapshot(vectors=vectors, metadata=metadata, dtype=manifest['dtype'])
+
+    def write(self, keys: pd.DataFrame, vectors: np.ndarray, scales: Optional[np.ndarray] = None,
+              quantized: bool = False) -> EmbeddingSnapshot:
+        """
+        Write a full snapshot as a new version; replacing the manifest makes it current.
+
+        Args:
+            keys: ad_archive_id, brand, start_timestamp, embedding_hash (one row per vector)
+            vectors: float32 vectors, or already-stored vectors when quantized=True
+            scales: per-row scales for already-quantized int8 vectors
+        """
+        if quantized:
+            stored = np.asarray(vectors, dtype=STORE_DTYPES[self.dtype])
+            scales = np.ones(len(stored), dtype=np.float32) if scales is None else np.asarray(scales, dtype=np.float32)
+        else:
+            stored, scales = quantize(vectors, self.dtype)
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        metadata = pa.table({
+            'ad_archive_id': pa.array(keys['ad_archive_id'].astype(str).tolist(), pa.string()),
+            'brand': pa.array(keys['brand'].tolist(), pa.string()),
+            'start_timestamp': pa.array(pd.to_datetime(keys['start_timestamp'], utc=True), pa.timestamp('us', tz='UTC')),
+            'embedding_hash': pa.array(keys['embedding_hash'].tolist(), pa.string()),
+            'scale': pa.array(scales, pa.float32()),
+        })
+
+        # New data files under a fresh version; the manifest swap is the single commit point
+        version = f"{datetime.now():%Y%m%d%H%M%S}_{uuid.uuid4().hex[:8]}"
+        matrix_file = MATRIX_FILE.format(version=version)
+        metadata_file = METADATA_FILE.format(version=version)
+        manifest_tmp = self._path(MANIFEST_FILE + ".tmp")
+
+        np.ascontiguousarray(stored).tofile(self._path(matrix_file))
+        with pa.OSFile(self._path(metadata_file), 'wb') as sink:
+            with pa.ipc.new_file(sink, metadata.schema) as writer:
+                writer.write_table(metadata)
+        with open(manifest_tmp, 'w') as f:
+            json.dump({
+                'dtype': self.dtype,
+                'dimension': int(stored.shape[1]) if stored.ndim == 2 else 0,
+                'count': int(len(stored)),
+                'refreshed_at': datetime.now().isoformat(),
+                'matrix_file': matrix_file,
+                'metadata_file': metadata_file,
+            }, f, indent=2)
+        os.replace(manifest_tmp, self._path(MANIFEST_FILE))
+
+        self._remove_old_versions(keep={matrix_file, metadata_file})
+        return self.load()
+
+    def _remove_old_versions(self, keep: set):
+        """Delete superseded data files; open memory maps keep reading them until closed"""
+        for name in os.listdir(self.store_dir):
+            if name.startswith("embeddings.") and name.endswith((".bin", ".arrow")) and name not in keep:
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    pass  # Still open elsewhere (e.g. on Windows); removed by a later write
+
+    def refresh(self, brands: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Bring the snapshot in line with ads_embeddings, downloading only new or changed vectors.
+
+        Rows are ordered by brand, start_timestamp and ad_archive_id so per-brand
+        time windows are contiguous for downstream similarity work. With a brand
+        filter only those brands are refreshed; other brands' rows are kept as they are.
+
+        Returns:
+            Counts of total, fetched, reused and removed rows
+        """
+        keys = self._fetch_keys(brands)
+        keys['ad_archive_id'] = keys['ad_archive_id'].astype(str)
+        keys = keys.drop_duplicates('ad_archive_id')
+
+        previous = None
+        if self.exists() and self.manifest()['dtype'] == self.dtype:
+            previous = self.load()
+
+        previous_rows = {}
+        if previous is not None:
+            previous_hashes = previous.metadata.column('embedding_hash').to_pylist()
+            previous_rows = {
+                ad_id: (row, previous_hashes[row]) for row, ad_id in enumerate(previous.ad_ids)
+            }
+
+        keys['reuse_row'] = np.array([
+            previous_rows[ad_id][0] if ad_id in previous_rows and previous_rows[ad_id][1] == emb_hash else -1
+            for ad_id, emb_hash in zip(keys['ad_archive_id'], keys['embedding_hash'])
+        ], dtype=np.int64)
+
+        if brands and previous is not None:
+            # The snapshot is shared: a brand-filtered refresh must not drop other brands' vectors
+            others = previous.metadata.select(['ad_archive_id', 'brand', 'start_timestamp', 'embedding_hash']).to_pandas()
+            others['reuse_row'] = np.arange(len(others), dtype=np.int64)
+            others = others[~others['brand'].isin(brands) & ~others['ad_archive_id'].isin(keys['ad_archive_id'])]
+            keys = pd.concat([keys, others], ignore_index=True)
+
+        keys['start_timestamp'] = pd.to_datetime(keys['start_timestamp'], utc=True)
+        keys = keys.sort_values(
+            ['brand', 'start_timestamp', 'ad_archive_id'], na_position='last', kind='mergesort'
+        ).reset_index(drop=True)
+        reuse_rows = keys.pop('reuse_row').to_numpy(dtype=np.int64)
+        fetch_ids = keys.loc[reuse_rows < 0, 'ad_archive_id'].tolist()
+
+        fetched = self._fetch_vectors(fetch_ids) if fetch_ids else {}
+        # Rows whose vector could not be fetched are dropped
+        keep = (reuse_rows >= 0) | keys['ad_archive_id'].isin(fetched.keys()).to_numpy()
+        keys, reuse_rows = keys[keep].reset_index(drop=True), reuse_rows[keep]
+
+        if previous is not None:
+            dimension = previous.dimension
+        else:
+            dimension = len(next(iter(fetched.values()))) if fetched else 0
+        if fetched and len(next(iter(fetched.values()))) != dimension:
+            # Embedding dimension changed (new model): nothing from the old snapshot is reusable
+            return self._full_rewrite(keys, reuse_rows, fetched, previous)
+
+        stored = np.empty((len(keys), dimension), dtype=STORE_DTYPES[self.dtype])
+        scales = np.ones(len(keys), dtype=np.float32)
+
+        reused = reuse_rows >= 0
+        if reused.any():
+            stored[reused] = previous.vectors[reuse_rows[reused]]
+            scales[reused] = previous.scales[reuse_rows[reused]]
+        if (~reused).any():
+            new_vectors = np.vstack([fetched[ad_id] for ad_id in keys.loc[~reused, 'ad_archive_id']])
+            stored[~reused], scales[~reused] = quantize(new_vectors, self.dtype)
+
+        self.write(keys, stored, scales, quantized=True)
+
+        stats = {
+            'total': len(keys),
+            'fetched': int((~reused).sum()),
+            'reused': int(reused.sum()),
+            'removed': len(set(previous_rows) - set(keys['ad_archive_id'])),
+        }
+        print(f"   💾 Embedding store refreshed: {stats['total']} vectors "
+              f"({stats['fetched']} downloaded, {stats['reused']} reused, {stats['removed']} removed)")
+        return stats
+
+    def _full_rewrite(self, keys: pd.DataFrame, reuse_rows: np.ndarray, fetched: Dict[str, np.ndarray],
+                      previous: Optional[EmbeddingSnapshot]) -> Dict[str, int]:
+        """Re-download everything when the stored dimension no longer matches"""
+        reused_ids = keys.loc[reuse_rows >= 0, 'ad_archive_id'].tolist()
+        if reused_ids:
+            fetched.update(self._fetch_vectors(reused_ids))
+        keys = keys[keys['ad_archive_id'].isin(fetched.keys())].reset_index(drop=True)
+        self.write(keys, np.vstack([fetched[ad_id] for ad_id in keys['ad_archive_id']]))
+        removed = len(previous) if previous is not None else 0
+        print(f"   💾 Embedding store rebuilt: {len(keys)} vectors (dimension changed)")
+        return {'total': len(keys), 'fetched': len(keys), 'reused': 0, 'removed': removed}
+
+    def _fetch_keys(self, brands: Optional[List[str]] = None) -> pd.DataFrame:
+        """ad_archive_id, brand, start_timestamp and embedding_hash for every embedded ad (no vectors)"""
+        brand_filter = f"AND e.brand IN ({safe_sql_string_list(brands)})" if brands else ""
+        return run_query(f"""
+        SELECT
+          e.ad_archive_id,
+          e.brand,
+          s.start_timestamp,
+          COALESCE(e.embedding_hash, TO_HEX(SHA256(e.structured_content))) AS embedding_hash
+        FROM `{BQ_PROJECT}.{BQ_DATASET}.ads_embeddings` e
+        LEFT JOIN (
+          -- Same (ad_archive_id, brand) join as Stage 8's similarity SQL
+          SELECT ad_archive_id, brand, MIN(start_timestamp) AS start_timestamp
+          FROM `{BQ_PROJECT}.{BQ_DATASET}.ads_with_dates`
+          GROUP BY ad_archive_id, brand
+        ) s
+          ON e.ad_archive_id = s.ad_archive_id AND e.brand = s.brand
+        WHERE ARRAY_LENGTH(e.content_embedding) > 0
+          {brand_filter}
+        """, BQ_PROJECT)
+
+    def _fetch_vectors(self, ad_ids: List[str]) -> Dict[str, np.ndarray]:
+        """Download embeddings for the given ads"""
+        client = get_bigquery_client(BQ_PROJECT)
+        job_config = bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ArrayQueryParameter("ad_ids", "STRING", list(ad_ids))
+        ])
+        df = client.query(f"""
+        SELECT CAST(ad_archive_id AS STRING) AS ad_archive_id, content_embedding
+        FROM `{BQ_PROJECT}.{BQ_DATASET}.ads_embeddings`
+        WHERE CAST(ad_archive_id AS STRING) IN UNNEST(@ad_ids)
+          AND ARRAY_LENGTH(content_embedding) > 0
+        """, job_config=job_config).to_dataframe()
+
+        return {
+            ad_id: np.asarray(embedding, dtype=np.float32)
+            for ad_id, embedding in zip(df['ad_archive_id'], df['content_embedding'])
+        }
+
+
+def main():
+    """CLI: refresh or inspect the local embedding store"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Snapshot ads_embeddings into a local memory-mapped store")
+    parser.add_argument("--store-dir", default=EMBEDDING_STORE_DIR, help="Store directory")
+    parser.add_argument("--dtype", default=EMBEDDING_STORE_DTYPE, choices=list(STORE_DTYPES),
+                        help="Stored vector dtype")
+    parser.add_argument("--brands", nargs="*", help="Only refresh these brands (other brands are kept)")
+    parser.add_argument("--info", action="store_true", help="Show the current snapshot without refreshing")
+    args = parser.parse_args()
+
+    store = LocalEmbeddingStore(args.store_dir, args.dtype)
+    if not args.info:
+        store.refresh(args.brands)
+
+    if store.exists():
+        manifest = store.manifest()
+        print(f"📦 {args.store_dir}: {manifest['count']} x {manifest['dimension']} {manifest['dtype']} "
+              f"(refreshed {manifest['refreshed_at']})")
+    else:
+        print(f"📦 No embedding store at {args.store_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Run artifact registry
+
+Records every run-scoped table and view a pipeline run creates (ads_raw_<run_id>,
+competitors_batch_<run_id>_all, audience_intelligence_<run_id>,
+v_intelligence_summary_<run_id>, ...) in the run_artifacts table, and sets an
+expiration on temporary objects as soon as they are registered.
+
+BigQuery drops expired tables on its own; the GC command covers everything else
+(objects whose expiration could not be set, or a run to drop right away) and drops
+them in parallel. It finds its targets through the registry, so it never lists the
+dataset or scans INFORMATION_SCHEMA, whose cost grows with the number of tables.
+
+Registrations are buffered per run and written in one load job when the run ends.
+
+Usage:
+    python -m src.utils.run_registry gc                  # drop expired artifacts
+    python -m src.utils.run_registry gc --run-id <id>    # drop one run's temporary artifacts now
+    python -m src.utils.run_registry gc --dry-run
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+try:
+    from google.cloud import bigquery
+    from src.utils.bigquery_client import get_bigquery_client, run_query
+    from src.utils.sql_helpers import safe_sql_string_list
+except ImportError:
+    bigquery = None
+    get_bigquery_client = None
+    run_query = None
+    safe_sql_string_list = None
+
+BQ_PROJECT = os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
+BQ_DATASET = os.environ.get("BQ_DATASET", "ads_demo")
+
+RUN_ARTIFACT_TTL_HOURS = float(os.environ.get("RUN_ARTIFACT_TTL_HOURS", "72"))
+RUN_GC_MAX_WORKERS = int(os.environ.get("RUN_GC_MAX_WORKERS", "8"))
+
+REGISTRY_TABLE = "run_artifacts"
+
+REGISTRY_SCHEMA = [
+    ("run_id", "STRING"),
+    ("object_id", "STRING"),       # project.dataset.name
+    ("object_type", "STRING"),     # TABLE or VIEW
+    ("temporary", "BOOL"),
+    ("created_at", "TIMESTAMP"),
+    ("expires_at", "TIMESTAMP"),   # NULL for artifacts that are kept
+    ("dropped_at", "TIMESTAMP"),
+]
+
+
+class RunTableRegistry:
+    """
+    Registry of the tables and views created by one pipeline run.
+
+    register() never raises: artifact bookkeeping must not fail a stage.
+    """
+
+    def __init__(self, run_id: str, ttl_hours: float = RUN_ARTIFACT_TTL_HOURS,
+                 project_id: str = BQ_PROJECT, dataset_id: str = BQ_DATASET, client=None):
+        self.run_id = run_id
+        self.ttl_hours = ttl_hours
+        self.project_id = project_id
+        self.table_id = f"{project_id}.{dataset_id}.{REGISTRY_TABLE}"
+        self._client = client
+        self._pending: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_bigquery_client(self.project_id)
+        return self._client
+
+    def register(self, object_id: str, object_type: str = "TABLE", temporary: bool = True) -> Optional[datetime]:
+        """
+        Record an object created by this run and set its expiration if it is temporary.
+
+        Returns:
+            The expiration time, or None for artifacts that are kept
+        """
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(hours=self.ttl_hours) if temporary else None
+
+        if expires_at is not None:
+            try:
+                self._set_expiration(object_id, expires_at)
+            except Exception as e:
+                print(f"   ⚠️  Could not set expiration on {object_id}: {e}")
+
+        with self._lock:
+            self._pending[object_id] = {
+                "run_id": self.run_id,
+                "object_id": object_id,
+                "object_type": object_type,
+                "temporary": temporary,
+                "created_at": now.isoformat(),
+                "expires_at": expires_at.isoformat() if expires_at else None,
+                "dropped_at": None,
+            }
+        return expires_at
+
+    def _set_expiration(self, object_id: str, expires_at: datetime):
+        table = self.client.get_table(object_id)
+        table.expires = expires_at
+        self.client.update_table(table, ["expires"])
+
+    def pending(self) -> List[Dict]:
+        with self._lock:
+            return list(self._pending.values())
+
+    def ensure_table(self):
+        schema = [bigquery.SchemaField(name, field_type) for name, field_type in REGISTRY_SCHEMA]
+        self.client.create_table(bigquery.Table(self.table_id, schema=schema), exists_ok=True)
+
+    def flush(self) -> int:
+        """Write buffered registrations to the registry table in one load job"""
+        with self._lock:
+            rows = list(self._pending.values())
+            self._pending.clear()
+        if not rows:
+            return 0
+
+        self.ensure_table()
+        job_config = bigquery.LoadJobConfig(
+            schema=[bigquery.SchemaField(name, field_type) for name, field_type in REGISTRY_SCHEMA],
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+        )
+        self.client.load_table_from_json(rows, self.table_id, job_config=job_config).result()
+        return len(rows)
+
+
+_registries: Dict[str, RunTableRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_run_registry(run_id: str) -> RunTableRegistry:
+    """Shared registry for a run, so every stage buffers into the same instance"""
+    with _registries_lock:
+        if run_id not in _registries:
+            _registries[run_id] = RunTableRegistry(run_id)
+        return _registries[run_id]
+
+
+def register_run_table(run_id: str, object_id: str, object_type: str = "TABLE", temporary: bool = True):
+    """Register an object created by a run; failures are reported, never raised"""
+    try:
+        get_run_registry(run_id).register(object_id, object_type, temporary)
+    except Exception as e:
+        print(f"   ⚠️  Could not register {object_id}: {e}")
+
+
+def flush_run_registry(run_id: str) -> int:
+    """Write a run's registrations and release its registry"""
+    with _registries_lock:
+        registry = _registries.pop(run_id, None)
+    return registry.flush() if registry else 0
+
+
+def collect_garbage(run_id: Optional[str] = None, dry_run: bool = False,
+                    max_workers: int = RUN_GC_MAX_WORKERS, project_id: str = BQ_PROJECT,
+                    dataset_id: str = BQ_DATASET, client=None) -> Dict:
+    """
+    Drop temporary run artifacts that are due, in parallel.
+
+    Without run_id, drops every temporary artifact past its expiration. With run_id,
+    drops all of that run's temporary artifacts regardless of expiration.
+
+    Returns:
+        Dict with candidates, dropped and failed object ids
+    """
+    registry_table = f"{project_id}.{dataset_id}.{REGISTRY_TABLE}"
+    due = f"run_id = '{run_id}'" if run_id else "expires_at <= CURRENT_TIMESTAMP()"
+    candidates = run_query(f"""
+    SELECT DISTINCT object_id
+    FROM `{registry_table}`
+    WHERE temporary AND dropped_at IS NULL AND {due}
+    """, project_id)
+    object_ids = candidates["object_id"].tolist() if not candidates.empty else []
+
+    result = {"candidates": object_ids, "dropped": [], "failed": []}
+    if dry_run or not object_ids:
+        return result
+
+    client = client or get_bigquery_client(project_id)
+
+    def drop(object_id: str):
+        # Tables and views share delete_table; already-expired objects are not an error
+        client.delete_table(object_id, not_found_ok=True)
+        return object_id
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(object_ids)))) as executor:
+        futures = {executor.submit(drop, object_id): object_id for object_id in object_ids}
+        for future, object_id in futures.items():
+            try:
+                result["dropped"].append(future.result())
+            except Exception as e:
+                print(f"   ⚠️  Could not drop {object_id}: {e}")
+                result["failed"].append(object_id)
+
+    if result["dropped"]:
+        run_query(f"""
+        UPDATE `{registry_table}`
+        SET dropped_at = CURRENT_TIMESTAMP()
+        WHERE dropped_at IS NULL AND object_id IN ({safe_sql_string_list(result['dropped'])})
+        """, project_id)
+
+    return result
+
+
+def main():
+    """CLI: garbage-collect run artifacts"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage run-scoped BigQuery artifacts")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    gc_parser = subparsers.add_parser("gc", help="Drop expired run artifacts")
+    gc_parser.add_argument("--run-id", help="Drop this run's temporary artifacts now, expired or not")
+    gc_parser.add_argument("--dry-run", action="store_true", help="List what would be dropped")
+    gc_parser.add_argument("--workers", type=int, default=RUN_GC_MAX_WORKERS, help="Parallel drops")
+    args = parser.parse_args()
+
+    result = collect_garbage(args.run_id, args.dry_run, args.workers)
+    if args.dry_run:
+        print(f"🧹 {len(result['candidates'])} artifacts due for deletion:")
+        for object_id in result["candidates"]:
+            print(f"   • {object_id}")
+        return
+
+    print(f"🧹 Dropped {len(result['dropped'])}/{len(result['candidates'])} artifacts")
+    if result["failed"]:
+        print(f"   ⚠️  {len(result['failed'])} failed: {', '.join(result['failed'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,109 +3,149 @@ Search utilities for competitor discovery - company name extraction and scoring
 """
 import re
 import html
-from typing import List, Dict, Set
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Dict, Set, Tuple
 from urllib.parse import urlparse
 
+# Compiled once at import - extraction runs over every CSE title and snippet
+_CAPITALIZED_SEQUENCE_RE = re.compile(r'\b[A-Z][a-zA-Z&\'\-]*(?:\s+[A-Z][a-zA-Z&\'\-]*){0,3}\b')
+_BUSINESS_SUFFIX_RE = re.compile(r'\b[A-Z][a-zA-Z\s&\'\-]+(?:\s+(?:Inc|Corp|LLC|Ltd|Co|Company))\b')
+_BRAND_CONTEXT_RE = re.compile(
+    r'(?:vs\s+|compared\s+to\s+|like\s+|alternative\s+to\s+)([A-Z][a-zA-Z\s&\'\-]+?)(?:\s|,|\.|\|)',
+    re.IGNORECASE
+)
+_LIST_ITEM_RE = re.compile(r'(?:\d+\.\s+|•\s+|\-\s+)([A-Z][a-zA-Z\s&\'\-]+?)(?:\s*[\-\–\—]|\s*:|\s*\(|$)')
+
+# (pattern, capture group) - group 0 is the whole match
+_EXTRACTION_PATTERNS = (
+    (_CAPITALIZED_SEQUENCE_RE, 0),
+    (_BUSINESS_SUFFIX_RE, 0),
+    (_BRAND_CONTEXT_RE, 1),
+    (_LIST_ITEM_RE, 1),
+)
+
+_HAS_LETTER_RE = re.compile(r'[a-zA-Z]')
+_COMPANY_INDICATOR_RE = re.compile(
+    r'\b(?:Inc|Corp|LLC|Ltd|Co|Company|Technologies|Tech|Solutions|Systems|Group|Partners)\b'
+    r'|\b[A-Z][a-z]*[A-Z]'  # CamelCase
+    r'|&'  # Company & Company
+)
+
+# Simple exclude list - only obvious non-companies
+_EXCLUDED_WORDS = frozenset({
+    'Top', 'Best', 'Leading', 'Popular', 'Most', 'Latest', 'New', 'Old',
+    'Companies', 'Brands', 'Products', 'Services', 'Solutions', 'Options', 'Alternatives',
+    'How', 'Why', 'What', 'Where', 'When', 'Which', 'The', 'A', 'An',
+    'List', 'Guide', 'Review', 'Article', 'Blog', 'Website'
+})
+
+# Common non-company phrases to exclude
+_NON_COMPANIES = frozenset({
+    'Google Search', 'Search Results', 'Web Search', 'Related Searches',
+    'More Info', 'Click Here', 'Read More', 'Learn More', 'Find Out',
+    'Sign Up', 'Log In', 'Contact Us', 'About Us', 'Privacy Policy',
+    'Terms Service', 'Home Page', 'Main Page'
+})
+
+# Generic business terms that are not company names
+_GENERIC_TERMS = frozenset({
+    'Business', 'Company', 'Corporation', 'Enterprise', 'Organization',
+    'Industry', 'Market', 'Sector', 'Platform', 'Solution', 'Service'
+})
+
+@dataclass(frozen=True)
+class CompanyNameSpan:
+    """A candidate company name found in a search result"""
+    company_name: str
+    start: int  # Offsets of the raw match within the source text
+    end: int
+    found_in: str  # 'title' or 'snippet'
+    result_index: int  # Position of the result in the batch
+
+def _iter_candidate_spans(text: str, min_length: int, max_length: int):
+    """Yield (clean_name, start, end) for every accepted match, first occurrence first"""
+    seen = set()
+    for pattern, group in _EXTRACTION_PATTERNS:
+        for match in pattern.finditer(text):
+            candidate = match.group(group)
+            if candidate in seen:
+                continue
+            seen.add(candidate)
+            
+            # Clean HTML entities and whitespace
+            clean_name = html.unescape(candidate).strip()
+            
+            # Length filter
+            if not (min_length <= len(clean_name) <= max_length):
+                continue
+            if clean_name in _EXCLUDED_WORDS:
+                continue
+            # Must start with capital letter
+            if not ('A' <= clean_name[0] <= 'Z'):
+                continue
+            # Additional business logic filters
+            if _is_likely_company_name(clean_name):
+                yield clean_name, match.start(group), match.end(group)
+
 def extract_company_names(text: str, min_length: int = 2, max_length: int = 40) -> List[str]:
     """Extract potential company names from text using multiple patterns"""
     if not text:
         return []
     
-    candidates = []
-    
-    # Pattern 1: Capitalized sequences (2-4 words) - simplified
-    pattern1 = r'\b[A-Z][a-zA-Z&\'\-]*(?:\s+[A-Z][a-zA-Z&\'\-]*){0,3}\b'
-    matches1 = re.findall(pattern1, text)
-    candidates.extend(matches1)
-    
-    # Pattern 2: Common business suffixes
-    pattern2 = r'\b[A-Z][a-zA-Z\s&\'\-]+(?:\s+(?:Inc|Corp|LLC|Ltd|Co|Company))\b'
-    matches2 = re.findall(pattern2, text)
-    candidates.extend(matches2)
-    
-    # Pattern 3: Brand name indicators in context
-    pattern3 = r'(?:vs\s+|compared\s+to\s+|like\s+|alternative\s+to\s+)([A-Z][a-zA-Z\s&\'\-]+?)(?:\s|,|\.|\|)'
-    matches3 = re.findall(pattern3, text, re.IGNORECASE)
-    candidates.extend(matches3)
-    
-    # Pattern 4: List format extraction  
-    pattern4 = r'(?:\d+\.\s+|•\s+|\-\s+)([A-Z][a-zA-Z\s&\'\-]+?)(?:\s*[\-\–\—]|\s*:|\s*\(|$)'
-    matches4 = re.findall(pattern4, text)
-    candidates.extend(matches4)
-    
-    # Clean and filter candidates
-    cleaned_candidates = []
-    for candidate in candidates:
-        # Clean HTML entities and whitespace
-        clean_name = html.unescape(candidate).strip()
-        
-        # Length filter
-        if not (min_length <= len(clean_name) <= max_length):
-            continue
-            
-        # Simple exclude list - only obvious non-companies
-        exclude_list = {
-            'Top', 'Best', 'Leading', 'Popular', 'Most', 'Latest', 'New', 'Old',
-            'Companies', 'Brands', 'Products', 'Services', 'Solutions', 'Options', 'Alternatives',
-            'How', 'Why', 'What', 'Where', 'When', 'Which', 'The', 'A', 'An',
-            'List', 'Guide', 'Review', 'Article', 'Blog', 'Website'
-        }
+    names = {}
+    for clean_name, _, _ in _iter_candidate_spans(text, min_length, max_length):
+        names.setdefault(clean_name, None)
+    
+    return list(names)  # Unique, in order of first occurrence
+
+def extract_company_names_batch(results: List[Dict], fields: Tuple[str, ...] = ('title', 'snippet'),
+                                min_length: int = 2, max_length: int = 40) -> List[CompanyNameSpan]:
+    """
+    Extract candidate company names from a whole list of search results in one pass.
+    
+    Args:
+        results: Search results as returned by CompetitorDiscovery.search_google_cse
+        fields: Result fields to scan, recorded as CompanyNameSpan.found_in
         
-        if clean_name in exclude_list:
-            continue
-            
-        # Must start with capital letter and contain only letters/spaces/common chars
-        if not re.match(r'^[A-Z]', clean_name):
-            continue
+    Returns:
+        One CompanyNameSpan per unique name per (result, field), in result order
+    """
+    spans = []
+    for result_index, result in enumerate(results):
+        for field_name in fields:
+            text = result.get(field_name) or ''
+            if not text:
+                continue
             
-        # Additional business logic filters
-        if _is_likely_company_name(clean_name):
-            cleaned_candidates.append(clean_name)
+            emitted = set()
+            for clean_name, start, end in _iter_candidate_spans(text, min_length, max_length):
+                if clean_name not in emitted:
+                    emitted.add(clean_name)
+                    spans.append(CompanyNameSpan(clean_name, start, end, field_name, result_index))
     
-    return list(set(cleaned_candidates))  # Remove duplicates
+    return spans
 
+@lru_cache(maxsize=16384)
 def _is_likely_company_name(name: str) -> bool:
     """Apply heuristics to determine if a string is likely a company name"""
     
     # Must contain at least one letter
-    if not re.search(r'[a-zA-Z]', name):
+    if not _HAS_LETTER_RE.search(name):
         return False
     
-    # Common non-company words to exclude
-    non_companies = {
-        'Google Search', 'Search Results', 'Web Search', 'Related Searches',
-        'More Info', 'Click Here', 'Read More', 'Learn More', 'Find Out',
-        'Sign Up', 'Log In', 'Contact Us', 'About Us', 'Privacy Policy',
-        'Terms Service', 'Home Page', 'Main Page'
-    }
-    
-    if name in non_companies:
+    if name in _NON_COMPANIES or name in _GENERIC_TERMS:
         return False
-        
-    # Generic business terms that are not company names
-    generic_terms = {
-        'Business', 'Company', 'Corporation', 'Enterprise', 'Organization',
-        'Industry', 'Market', 'Sector', 'Platform', 'Solution', 'Service'
-    }
-    
-    if name in generic_terms:
-        return False
-    
-    # Positive indicators of company names
-    company_indicators = [
-        r'\b(Inc|Corp|LLC|Ltd|Co|Company|Technologies|Tech|Solutions|Systems|Group|Partners)\b',
-        r'\b[A-Z][a-z]*[A-Z]',  # CamelCase
-        r'&',  # Company & Company
-    ]
     
     # Boost confidence if it matches company patterns
-    has_company_indicators = any(re.search(pattern, name) for pattern in company_indicators)
+    has_company_indicators = _COMPANY_INDICATOR_RE.search(name) is not None
     
     # Length-based filtering with indicators
-    if len(name.split()) == 1:
+    word_count = len(name.split())
+    if word_count == 1:
         # Single word: must be 3+ chars and have company indicators
         return len(name) >= 3 and (has_company_indicators or name[0].isupper())
-    elif len(name.split()) <= 4:
+    elif word_count <= 4:
         # 2-4 words: likely a company name
         return True
     else:
@@ -30,10 +30,17 @@ class VisualIntelligenceCostEstimator:
 
     def __init__(self, project_id: str = None):
         self.project_id = project_id or os.environ.get("BQ_PROJECT", "bigquery-ai-kaggle-469620")
-        # Set credentials if available
-        if os.path.exists("gcp-creds.json"):
-            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "gcp-creds.json"
-        self.client = bigquery.Client(project=self.project_id)
+        self._client = None
+
+    @property
+    def client(self) -> bigquery.Client:
+        """BigQuery client, created on first use so pricing-only callers need no credentials"""
+        if self._client is None:
+            # Set credentials if available
+            if os.path.exists("gcp-creds.json"):
+                os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "gcp-creds.json"
+            self._client = bigquery.Client(project=self.project_id)
+        return self._client
 
     def estimate_image_analysis_cost(
         self,
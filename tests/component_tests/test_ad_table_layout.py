@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test the partitioned/clustered layout of the core ad tables
+
+Tables created before the layout are rebuilt once; correctly laid out or
+missing tables are left alone, and ads_embeddings gains start_timestamp.
+"""
+import glob
+import os
+import re
+import sys
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from google.cloud import bigquery
+from google.cloud.exceptions import NotFound
+
+from src.utils.bigquery_client import AD_TABLE_LAYOUT_SQL, ensure_ad_table_layout
+from src.pipeline.stages.embeddings import EmbeddingsStage
+
+TABLE_ID = "proj.ads_demo.ads_embeddings"
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "sql")
+
+
+class FakeJob:
+    def result(self):
+        return []
+
+
+class FakeClient:
+    def __init__(self, table=None):
+        self.table = table
+        self.queries = []
+
+    def get_table(self, table_id):
+        if self.table is None:
+            raise NotFound(table_id)
+        return self.table
+
+    def query(self, sql):
+        self.queries.append(sql)
+        return FakeJob()
+
+
+def _table(partitioned: bool, with_start_timestamp: bool = True):
+    schema = [bigquery.SchemaField('ad_archive_id', 'STRING'), bigquery.SchemaField('brand', 'STRING')]
+    if with_start_timestamp:
+        schema.append(bigquery.SchemaField('start_timestamp', 'TIMESTAMP'))
+    table = bigquery.Table(TABLE_ID, schema=schema)
+    if partitioned:
+        table.time_partitioning = bigquery.TimePartitioning(type_=bigquery.TimePartitioningType.DAY,
+                                                            field='start_timestamp')
+        table.clustering_fields = ['brand', 'ad_archive_id']
+    return table
+
+
+def _ensure(client, **kwargs):
+    with patch('src.utils.bigquery_client.get_bigquery_client', return_value=client):
+        return ensure_ad_table_layout(TABLE_ID, **kwargs)
+
+
+def test_only_unpartitioned_tables_are_rebuilt():
+    """Partitioned and missing tables are untouched; legacy tables are rebuilt in place"""
+    print("🧪 Testing layout migration...")
+
+    for client in (FakeClient(_table(partitioned=True)), FakeClient(None)):
+        assert _ensure(client) is False and client.queries == []
+
+    client = FakeClient(_table(partitioned=False))
+    assert _ensure(client) is True
+    sql = client.queries[0]
+    assert sql.startswith(f"CREATE OR REPLACE TABLE `{TABLE_ID}`")
+    assert "PARTITION BY DATE(start_timestamp)" in sql
+    assert "CLUSTER BY brand, ad_archive_id" in sql
+    assert sql.rstrip().endswith(f"SELECT * FROM `{TABLE_ID}`")
+    print("   ✅ Only the unpartitioned table was rebuilt")
+    return True
+
+
+def test_embeddings_backfill_start_timestamp():
+    """Legacy ads_embeddings rows pick up start_timestamp from ads_with_dates"""
+    print("🧪 Testing embeddings start_timestamp backfill...")
+
+    ads_table = "proj.ads_demo.ads_with_dates"
+    client = FakeClient(_table(partitioned=False, with_start_timestamp=False))
+    assert _ensure(client, source_sql=lambda table: EmbeddingsStage._layout_backfill_sql(table, ads_table))
+
+    sql = client.queries[0]
+    assert "SELECT e.*, dates.start_timestamp" in sql
+    assert f"FROM `{ads_table}`" in sql
+    assert "start_timestamp" in EmbeddingsStage._output_columns()
+    print("   ✅ start_timestamp joined in during rebuild")
+    return True
+
+
+def test_sql_scripts_use_layout():
+    """Every SQL script that rebuilds a core ad table creates it with the layout"""
+    print("🧪 Testing SQL script layouts...")
+
+    rebuilds = 0
+    for path in sorted(glob.glob(os.path.join(SQL_DIR, "*.sql"))):
+        sql = re.sub(r"--[^\n]*", "", open(path).read())  # Comments may contain ';'
+        for match in re.finditer(r"CREATE OR REPLACE TABLE `[^`]*\.(ads_with_dates|ads_embeddings)`", sql):
+            end = sql.find(';', match.end())
+            statement = sql[match.start():end if end != -1 else len(sql)]
+            rebuilds += 1
+            assert AD_TABLE_LAYOUT_SQL in statement, os.path.basename(path)
+    assert rebuilds >= 6
+    print(f"   ✅ {rebuilds} rebuilds partitioned and clustered")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_only_unpartitioned_tables_are_rebuilt, test_embeddings_backfill_start_timestamp,
+             test_sql_scripts_use_layout]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 Ad table layout: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Test adaptive early-stopping consensus in CurationStage
+
+Round 3 should only be requested for undecided candidates, and consensus
+over fully-run rounds must be unchanged.
+"""
+import os
+import sys
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.pipeline.core.base import PipelineContext
+from src.pipeline.stages.curation import CurationStage
+
+
+def _round(candidate_id, company_name, round_num, is_competitor, confidence):
+    return {
+        'candidate_id': candidate_id,
+        'company_name': company_name,
+        'round_num': round_num,
+        'is_competitor': is_competitor,
+        'confidence': confidence,
+        'market_overlap_pct': 60,
+        'tier': 'Direct-Rival',
+        'customer_substitution_ease': 'Easy',
+        'reasoning': f"round {round_num}",
+        'evidence_sources': 'test',
+    }
+
+
+def _stage():
+    context = PipelineContext("Warby Parker", "Eyewear", "test_run")
+    return CurationStage(context, dry_run=True, consensus_mode='adaptive', confidence_threshold=0.7)
+
+
+def test_tiebreak_selection():
+    """Only disagreeing or low-confidence candidates get a third round"""
+    print("🧪 Testing round 3 selection...")
+
+    first_rounds = pd.DataFrame([
+        _round(0, 'Zenni Optical', 0, True, 0.9), _round(0, 'Zenni Optical', 1, True, 0.85),
+        _round(1, 'EyeBuyDirect', 0, True, 0.9), _round(1, 'EyeBuyDirect', 1, False, 0.8),
+        _round(2, 'Ray-Ban', 0, True, 0.5), _round(2, 'Ray-Ban', 1, True, 0.9),
+    ])
+    tiebreak_ids, stats = _stage()._select_tiebreak_candidates(first_rounds)
+
+    assert tiebreak_ids == [1, 2]
+    assert stats['early_stopped'] == 1 and stats['disagreed'] == 1 and stats['low_confidence'] == 1
+    print(f"   ✅ Round 3 for candidates {tiebreak_ids}, stats: {stats}")
+    return True
+
+
+def test_full_rounds_consensus_unchanged():
+    """With all three rounds present, adaptive and full consensus agree"""
+    print("🧪 Testing consensus over full rounds...")
+
+    all_rounds = pd.DataFrame([
+        _round(0, 'Zenni Optical', 0, True, 0.9), _round(0, 'Zenni Optical', 1, True, 0.6),
+        _round(0, 'Zenni Optical', 2, False, 0.7),
+        _round(1, 'EyeBuyDirect', 0, False, 0.9), _round(1, 'EyeBuyDirect', 1, True, 0.8),
+        _round(1, 'EyeBuyDirect', 2, False, 0.8),
+    ])
+    prefiltered = pd.DataFrame({'company_name': ['Zenni Optical', 'EyeBuyDirect']})
+    stage = _stage()
+
+    full = stage._compute_consensus_results(all_rounds, prefiltered, min_rounds=3)
+    adaptive = stage._compute_consensus_results(all_rounds, prefiltered, min_rounds=2)
+
+    assert full.equals(adaptive)
+    assert list(full['company_name']) == ['Zenni Optical']
+    assert full.iloc[0]['reasoning'].startswith("Consensus (2/3 votes)")
+    print(f"   ✅ {full.iloc[0]['reasoning']}")
+    return True
+
+
+def test_single_job_rounds_match_per_round_path():
+    """One cross-joined job yields the same consensus as one table per round"""
+    print("🧪 Testing single-job consensus rounds...")
+
+    stage = _stage()
+    sql = stage._build_ai_validation_query("p.d.competitors_batch_test_run_all", [0, 1, 2])
+    assert sql.count("AI.GENERATE_TABLE(") == 1
+    assert "CROSS JOIN UNNEST([0, 1, 2]) AS round_num" in sql
+    assert "SELECT candidate_id, round_num, analysis_prompt as prompt FROM round_data" in sql
+    assert "ON orig.candidate_id = ai.candidate_id\n         AND orig.round_num = ai.round_num" in sql
+    assert "company_name = ai.company_name" not in sql
+
+    per_round = [
+        pd.DataFrame([_round(0, 'Zenni Optical', 0, True, 0.9), _round(1, 'EyeBuyDirect', 0, False, 0.9),
+                      _round(2, 'Ray-Ban', 0, True, 0.8)]),
+        pd.DataFrame([_round(0, 'Zenni Optical', 1, True, 0.6), _round(1, 'EyeBuyDirect', 1, True, 0.8),
+                      _round(2, 'Ray-Ban', 1, False, 0.4)]),
+        pd.DataFrame([_round(0, 'Zenni Optical', 2, False, 0.7), _round(1, 'EyeBuyDirect', 2, False, 0.8),
+                      _round(2, 'Ray-Ban', 2, True, 0.7)]),
+    ]
+    # The single job returns every (candidate, round) row in arbitrary order
+    single_job = pd.concat(per_round, ignore_index=True).sample(frac=1, random_state=7).reset_index(drop=True)
+    prefiltered = pd.DataFrame({'company_name': ['Zenni Optical', 'EyeBuyDirect', 'Ray-Ban']})
+
+    combined = stage._compute_consensus_results(single_job, prefiltered, include_rejected=True)
+    separate = stage._compute_consensus_results(pd.concat(per_round, ignore_index=True), prefiltered,
+                                                include_rejected=True)
+
+    columns = ['company_name', 'is_competitor', 'reasoning']
+    assert combined[columns].reset_index(drop=True).equals(separate[columns].reset_index(drop=True))
+    assert combined['confidence'].round(6).tolist() == separate['confidence'].round(6).tolist()
+    assert dict(zip(combined['company_name'], combined['is_competitor'])) == {
+        'Zenni Optical': True, 'EyeBuyDirect': False, 'Ray-Ban': True}
+    print("   ✅ Same verdicts from one job as from per-round tables")
+    return True
+
+
+def test_null_verdict_gets_tiebreak():
+    """A NULL verdict or confidence from a failed AI row never counts as agreement"""
+    print("🧪 Testing NULL verdict rows...")
+
+    first_rounds = pd.DataFrame([
+        _round(0, 'Zenni Optical', 0, None, None), _round(0, 'Zenni Optical', 1, True, 0.95),
+        _round(1, 'EyeBuyDirect', 0, True, None), _round(1, 'EyeBuyDirect', 1, True, 0.9),
+        _round(2, 'Ray-Ban', 0, True, 0.9), _round(2, 'Ray-Ban', 1, True, 0.9),
+    ])
+    tiebreak_ids, stats = _stage()._select_tiebreak_candidates(first_rounds)
+
+    assert tiebreak_ids == [0, 1]
+    assert stats['early_stopped'] == 1 and stats['agreed'] == 1
+    print(f"   ✅ Round 3 for candidates {tiebreak_ids}")
+    return True
+
+
+def test_null_rounds_are_not_votes():
+    """Candidates without enough non-NULL rounds are skipped, not rejected and cached"""
+    print("🧪 Testing consensus over NULL rounds...")
+
+    all_rounds = pd.DataFrame([
+        _round(0, 'Zenni Optical', 0, None, None), _round(0, 'Zenni Optical', 1, None, None),
+        _round(0, 'Zenni Optical', 2, None, None),
+        _round(1, 'EyeBuyDirect', 0, True, 0.9), _round(1, 'EyeBuyDirect', 1, None, 0.8),
+        _round(1, 'EyeBuyDirect', 2, True, 0.7),
+        _round(2, 'Ray-Ban', 0, True, None), _round(2, 'Ray-Ban', 1, False, 0.6),
+        _round(2, 'Ray-Ban', 2, False, 0.4),
+    ])
+    all_rounds.loc[all_rounds['company_name'] == 'Zenni Optical', 'market_overlap_pct'] = None
+    prefiltered = pd.DataFrame({'company_name': ['Zenni Optical', 'EyeBuyDirect', 'Ray-Ban']})
+    stage = _stage()
+
+    verdicts = stage._compute_consensus_results(all_rounds, prefiltered, min_rounds=2, include_rejected=True)
+    full = stage._compute_consensus_results(all_rounds, prefiltered, min_rounds=3, include_rejected=True)
+
+    assert list(verdicts['company_name']) == ['EyeBuyDirect', 'Ray-Ban']
+    assert list(verdicts['is_competitor']) == [True, False]
+    assert verdicts.iloc[0]['reasoning'].startswith("Consensus (2/2 votes)")
+    assert abs(verdicts.iloc[1]['confidence'] - 0.5) < 1e-9
+    assert full.empty
+    print(f"   ✅ All-NULL candidate skipped, {len(verdicts)} verdicts from valid rounds")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_tiebreak_selection, test_full_rounds_consensus_unchanged,
+             test_single_job_rounds_match_per_round_path, test_null_verdict_gets_tiebreak,
+             test_null_rounds_are_not_votes]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 Adaptive consensus: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
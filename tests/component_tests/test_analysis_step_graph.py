@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test Stage 8's analysis step graph
+
+Steps start as soon as their dependencies complete, independent steps overlap,
+failures stay isolated and every step gets a timing.
+"""
+import os
+import sys
+import threading
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.pipeline.core.base import PipelineContext
+from src.pipeline.models.candidates import EmbeddingResults
+from src.pipeline.stages.analysis import AnalysisStage, AnalysisStep
+
+
+def _stage(max_workers=4):
+    return AnalysisStage(PipelineContext("Warby Parker", "eyewear", "test_run"), max_workers=max_workers)
+
+
+def test_dependencies_respected_and_independent_steps_overlap():
+    """Dependents start after their dependencies; independent steps run concurrently"""
+    print("🧪 Testing step ordering and concurrency...")
+
+    events, lock = [], threading.Lock()
+
+    def step(name, seconds=0.2):
+        def run():
+            with lock:
+                events.append(('start', name, time.perf_counter()))
+            time.sleep(seconds)
+            with lock:
+                events.append(('end', name, time.perf_counter()))
+            return name
+        return run
+
+    steps = {
+        'strategic_data': AnalysisStep(step('strategic_data', 0.05), (), "ready"),
+        'cta_intelligence': AnalysisStep(step('cta_intelligence'), ('strategic_data',), "cta"),
+        'copying': AnalysisStep(step('copying'), (), "copying"),
+        'creative_fatigue': AnalysisStep(step('creative_fatigue'), (), "fatigue"),
+        'temporal': AnalysisStep(step('temporal'), ('cta_intelligence',), "temporal"),
+    }
+
+    start = time.perf_counter()
+    results, timings = _stage()._run_step_graph(steps)
+    elapsed = time.perf_counter() - start
+
+    at = {(kind, name): stamp for kind, name, stamp in events}
+    assert at[('start', 'cta_intelligence')] >= at[('end', 'strategic_data')]
+    assert at[('start', 'temporal')] >= at[('end', 'cta_intelligence')]
+    assert results == {name: name for name in steps}
+    assert set(timings) == set(steps)
+    # Critical path is ready -> cta -> temporal (~0.45s); sequential would be ~0.85s
+    assert elapsed < 0.7
+    print(f"   ✅ Graph finished in {elapsed:.2f}s vs {sum(timings.values()):.2f}s sequential")
+    return True
+
+
+def test_failed_step_is_isolated():
+    """A failing step yields no result but its dependents and siblings still run"""
+    print("🧪 Testing failure isolation...")
+
+    def fail():
+        raise RuntimeError("cta table creation failed")
+
+    steps = {
+        'cta_intelligence': AnalysisStep(fail, (), "cta"),
+        'temporal': AnalysisStep(lambda: {'momentum_status': 'STABLE'}, ('cta_intelligence',), "temporal"),
+        'copying': AnalysisStep(lambda: {'copying_detected': False}, (), "copying"),
+    }
+    results, timings = _stage(max_workers=1)._run_step_graph(steps)
+
+    assert 'cta_intelligence' not in results
+    assert results['temporal'] == {'momentum_status': 'STABLE'}
+    assert results['copying'] == {'copying_detected': False}
+    assert set(timings) == set(steps)
+    print("   ✅ Failure recorded, dependents still ran")
+    return True
+
+
+def test_unsatisfiable_dependency_raises():
+    """A dependency on a missing step is reported instead of hanging"""
+    print("🧪 Testing missing dependency...")
+
+    steps = {'temporal': AnalysisStep(lambda: None, ('missing_step',), "temporal")}
+    try:
+        _stage()._run_step_graph(steps)
+    except ValueError as e:
+        assert 'temporal' in str(e)
+        print("   ✅ Unsatisfiable graph rejected")
+        return True
+    raise AssertionError("Expected ValueError for unsatisfiable dependencies")
+
+
+def test_cta_table_readers_wait_for_cta_rebuild():
+    """Every step reading cta_aggressiveness_analysis runs after CTA intelligence rebuilds it"""
+    print("🧪 Testing CTA table dependencies...")
+
+    stage = _stage()
+    steps = stage._analysis_steps(EmbeddingResults(table_id="proj.ds.ads_embeddings", embedding_count=0))
+    for name in ('current_state', 'temporal', 'forecasts'):
+        assert 'cta_intelligence' in steps[name].depends_on, name
+    assert steps['cta_intelligence'].depends_on == ('strategic_data',)
+
+    order, lock = [], threading.Lock()
+
+    def record(name, seconds=0.0):
+        def run():
+            time.sleep(seconds)
+            with lock:
+                order.append(name)
+        return run
+
+    # CTA is slow: a reader that did not wait for it would finish first
+    timed_steps = {
+        name: AnalysisStep(record(name, 0.2 if name == 'cta_intelligence' else 0.0), step.depends_on, name)
+        for name, step in steps.items()
+    }
+    stage._run_step_graph(timed_steps)
+
+    for name in ('current_state', 'temporal', 'forecasts'):
+        assert order.index(name) > order.index('cta_intelligence'), order
+    print(f"   ✅ Order: {' → '.join(order)}")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [
+        test_dependencies_respected_and_independent_steps_overlap,
+        test_failed_step_is_isolated,
+        test_unsatisfiable_dependency_raises,
+        test_cta_table_readers_wait_for_cta_rebuild,
+    ]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 Analysis step graph: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
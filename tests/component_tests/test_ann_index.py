@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test the in-process IVF index over ad embeddings
+
+Recall against exact search, brand/date filters, upsert by ad_archive_id
+and save/load round trips.
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.competitive_intel.analysis.ann_index import AdEmbeddingIndex
+
+BRANDS = np.array(['Warby Parker', 'Zenni Optical', 'EyeBuyDirect', 'LensCrafters'], dtype=object)
+
+
+def _dataset(count=2000, dim=32, seed=3):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(40, dim))
+    vectors = (centers[rng.integers(0, 40, count)] + 0.4 * rng.normal(size=(count, dim))).astype(np.float32)
+    ad_ids = np.array([f"ad_{i}" for i in range(count)], dtype=object)
+    brands = BRANDS[rng.integers(0, len(BRANDS), count)]
+    timestamps = np.datetime64('2025-01-01', 'us') + rng.integers(0, 180, count).astype('timedelta64[D]')
+    return ad_ids, brands, timestamps, vectors
+
+
+def test_recall_against_exact_search():
+    """IVF top-10 recovers nearly all exact neighbours"""
+    print("🧪 Testing IVF recall...")
+
+    ad_ids, brands, timestamps, vectors = _dataset()
+    index = AdEmbeddingIndex.build(ad_ids, brands, timestamps, vectors, n_probe=8)
+
+    recalls = []
+    for row in range(0, len(ad_ids), 100):
+        approx = set(index.search(vectors[row], k=10)['ad_archive_id'])
+        exact = set(index.search(vectors[row], k=10, exact=True)['ad_archive_id'])
+        recalls.append(len(approx & exact) / 10)
+
+    assert len(index.centroids) == int(np.sqrt(len(ad_ids)))
+    assert np.mean(recalls) >= 0.9
+    print(f"   ✅ Mean recall@10 {np.mean(recalls):.2f} over {len(index.centroids)} lists")
+    return True
+
+
+def test_filtered_neighbours_of_ad():
+    """Nearest competitor ads before a date respect every filter and return k rows"""
+    print("🧪 Testing filtered top-k...")
+
+    ad_ids, brands, timestamps, vectors = _dataset()
+    index = AdEmbeddingIndex.build(ad_ids, brands, timestamps, vectors, n_probe=1)
+
+    own_brand = brands[0]
+    result = index.neighbors_of("ad_0", k=15, before="2025-03-01", brands=['Zenni Optical', 'LensCrafters'])
+
+    assert len(result) == 15
+    assert set(result['brand']) <= {'Zenni Optical', 'LensCrafters'} - {own_brand}
+    assert (result['start_timestamp'] < np.datetime64('2025-03-01')).all()
+    assert "ad_0" not in set(result['ad_archive_id'])
+    assert result['distance'].is_monotonic_increasing
+    print(f"   ✅ {len(result)} filtered neighbours, nearest distance {result['distance'].iloc[0]:.3f}")
+    return True
+
+
+def test_upsert_and_save_load():
+    """Adding an existing ad_archive_id replaces it; save/load keeps search results"""
+    print("🧪 Testing upsert and persistence...")
+
+    ad_ids, brands, timestamps, vectors = _dataset(count=500)
+    index = AdEmbeddingIndex.build(ad_ids, brands, timestamps, vectors)
+
+    moved = -vectors[0]
+    index.add(["ad_0", "ad_new"], ['Warby Parker', 'Zenni Optical'],
+              np.array(['2025-02-01', '2025-02-02'], dtype='datetime64[us]'), [moved, vectors[1]])
+    assert len(index) == 501
+
+    top = index.search(moved, k=1, exact=True)
+    assert top['ad_archive_id'].iloc[0] == "ad_0" and top['brand'].iloc[0] == 'Warby Parker'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ann_index.npz")
+        index.save(path)
+        loaded = AdEmbeddingIndex.load(path)
+
+    query = vectors[42]
+    assert list(loaded.search(query, k=10)['ad_archive_id']) == list(index.search(query, k=10)['ad_archive_id'])
+    assert len(loaded) == 501
+    print(f"   ✅ {len(loaded)} ads after upsert and reload")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_recall_against_exact_search, test_filtered_neighbours_of_ad, test_upsert_and_save_load]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 ANN index: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
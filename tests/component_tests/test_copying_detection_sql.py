@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test Stage 8's copying detection SQL
+
+VECTOR_SEARCH takes each target ad's top-k nearest competitor ads first and only
+then applies the launch-date filter; the exhaustive CROSS JOIN filters by date
+and distance in one pass and is used when the vector index cannot be created.
+"""
+import os
+import sys
+from unittest.mock import patch
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.pipeline.core.base import PipelineContext
+from src.pipeline.models.candidates import EmbeddingResults
+from src.pipeline.stages.analysis import AnalysisStage
+
+EMBEDDINGS_TABLE = "proj.ds.ads_embeddings"
+
+
+def _stage():
+    return AnalysisStage(PipelineContext("Warby Parker", "eyewear", "test_run"), copying_method='vector_search',
+                         copying_top_k=7, copying_distance_threshold=0.25, compute_engine='bigquery')
+
+
+def test_vector_search_takes_top_k_before_date_filter():
+    """top_k applies inside VECTOR_SEARCH; the date filter runs on its output"""
+    print("🧪 Testing VECTOR_SEARCH copying SQL...")
+
+    sql = _stage()._build_copying_query(EMBEDDINGS_TABLE, 'vector_search')
+    search = sql[sql.index("FROM VECTOR_SEARCH("):sql.index("brand_similarity AS (")]
+    similarity = sql[sql.index("brand_similarity AS ("):]
+
+    assert "top_k => 7" in search and "distance_type => 'COSINE'" in search
+    assert f"FROM `{EMBEDDINGS_TABLE}`\n                     WHERE brand != 'Warby Parker'" in search
+    assert "WHERE distance < 0.25" in search
+    base_table = search[:search.index("'content_embedding'")]
+    assert "start_timestamp" not in base_table  # Competitor ads of any date compete for the top k
+    assert "DATE(s.start_timestamp) >= DATE(n.original_start)" in similarity
+    assert "FROM nearest_competitor_ads n" in similarity
+    assert "CROSS JOIN" not in sql
+    print("   ✅ Top-7 neighbours, then launch-date filter")
+    return True
+
+
+def test_exhaustive_filters_in_one_pass():
+    """The CROSS JOIN applies date and distance filters over every pair"""
+    print("🧪 Testing exhaustive copying SQL...")
+
+    sql = _stage()._build_copying_query(EMBEDDINGS_TABLE, 'exhaustive', sample_limit=50)
+
+    assert "CROSS JOIN all_brand_embeddings b" in sql and "VECTOR_SEARCH" not in sql
+    assert "DATE(b.start_timestamp) >= DATE(a.start_timestamp)" in sql
+    assert "ML.DISTANCE(a.content_embedding, b.content_embedding, 'COSINE') < 0.25" in sql
+    assert "ORDER BY ad_archive_id LIMIT 50" in sql
+    try:
+        _stage()._build_copying_query(EMBEDDINGS_TABLE, 'ann')
+        raise AssertionError("unknown method accepted")
+    except ValueError:
+        pass
+    print("   ✅ Exact O(N x M) comparison")
+    return True
+
+
+def test_missing_index_falls_back_to_exhaustive():
+    """When the vector index cannot be created the exhaustive query runs instead"""
+    print("🧪 Testing vector index fallback...")
+
+    def run_query(sql, *args):
+        queries.append(sql)
+        if "CREATE VECTOR INDEX" in sql:
+            if index_fails:
+                raise RuntimeError("Access Denied: vector index")
+            return pd.DataFrame()
+        return pd.DataFrame([{'potential_copier': 'Zenni Optical', 'avg_similarity': 0.1,
+                              'min_lag_days': 3, 'comparison_count': 4}])
+
+    embeddings = EmbeddingResults(table_id=EMBEDDINGS_TABLE, embedding_count=10)
+    outcomes = {}
+    for index_fails in (False, True):
+        queries = []
+        with patch('src.pipeline.stages.analysis.run_query', side_effect=run_query):
+            influence = _stage()._detect_copying_patterns(embeddings)
+        outcomes[index_fails] = queries[-1]
+        assert influence == {'copying_detected': True, 'top_copier': 'Zenni Optical',
+                             'similarity_score': 0.9, 'lag_days': 3}
+
+    assert "VECTOR_SEARCH" in outcomes[False]
+    assert "CROSS JOIN all_brand_embeddings b" in outcomes[True] and "VECTOR_SEARCH" not in outcomes[True]
+    print("   ✅ Exhaustive detection without an index")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [
+        test_vector_search_takes_top_k_before_date_filter,
+        test_exhaustive_filters_in_one_pass,
+        test_missing_index_falls_back_to_exhaustive,
+    ]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 Copying detection SQL: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
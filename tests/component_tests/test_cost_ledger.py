@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test the per-run cost ledger
+
+Jobs must carry run, stage and brand labels, the ledger must measure only the
+run's labeled jobs from INFORMATION_SCHEMA.JOBS, and a run well above its brand's
+recent cost must be flagged.
+"""
+import os
+import sys
+from unittest.mock import patch
+
+import pandas as pd
+from google.cloud import bigquery
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils import bigquery_client, cost_ledger
+from src.utils.bigquery_client import get_job_labels, label_value, set_job_labels, submit_query
+from src.utils.cost_ledger import RunCostLedger, cost_trend
+from src.pipeline.core.base import PipelineStage
+from src.pipeline.core.progress import ProgressTracker
+
+
+class FakeClient:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.job_configs = []
+
+    def query(self, sql, job_config=None):
+        self.job_configs.append(job_config)
+        return sql
+
+
+class LabelProbeStage(PipelineStage):
+    def execute(self, input_data):
+        return get_job_labels()
+
+
+def test_jobs_carry_run_and_stage_labels():
+    """Clients default to the current labels; explicit per-brand labels are merged in"""
+    print("🧪 Testing job labels...")
+
+    assert label_value("Warby Parker") == "warby_parker"
+    assert label_value("Multi-Dimensional Intelligence") == "multi-dimensional_intelligence"
+    assert len(label_value("x" * 100)) == 63
+
+    set_job_labels(run_id="warby_parker_20261018_120000", target_brand="Warby Parker")
+    try:
+        labels = LabelProbeStage("Visual Intelligence", 5.5, "r").run(None, ProgressTracker())
+        assert labels == {"run_id": "warby_parker_20261018_120000", "target_brand": "warby_parker",
+                          "stage": "visual_intelligence"}
+
+        with patch.object(bigquery_client.bigquery, "Client", side_effect=FakeClient) as client_class:
+            bigquery_client.get_bigquery_client("p")
+            defaults = client_class.call_args.kwargs
+            assert defaults["default_query_job_config"].labels["stage"] == "visual_intelligence"
+            assert defaults["default_load_job_config"].labels["run_id"] == "warby_parker_20261018_120000"
+
+            job_config = bigquery.QueryJobConfig(labels={"brand": label_value("Zenni")})
+            submit_query("SELECT 1", "p", job_config=job_config)
+            assert job_config.labels == {**labels, "brand": "zenni"}
+    finally:
+        set_job_labels(run_id=None, stage=None, target_brand=None)
+
+    assert get_job_labels() == {}
+    print("   ✅ Run, stage and brand labels on every job")
+    return True
+
+
+def test_ledger_measures_labeled_jobs():
+    """The ledger SQL filters JOBS by run label and replaces only the recorded stage"""
+    print("🧪 Testing ledger SQL...")
+
+    ledger = RunCostLedger("warby_parker_20261018_120000", project_id="p", dataset_id="d")
+    queries = []
+
+    def fake_run_query(sql, project_id=None):
+        queries.append(sql)
+        return pd.DataFrame({"stage": ["visual_intelligence"], "cost_usd": [0.01]})
+
+    with patch.object(cost_ledger, "run_query", side_effect=fake_run_query):
+        ledger.record(stage="Visual Intelligence")
+        ledger.record(insights=42)
+
+    stage_sql, run_sql = queries
+    assert "`p.region-us.INFORMATION_SCHEMA.JOBS_BY_PROJECT`" in stage_sql
+    assert "key = 'run_id') = 'warby_parker_20261018_120000'" in stage_sql
+    assert "key = 'stage')" in stage_sql and "= 'visual_intelligence'" in stage_sql
+    assert "AND stage = 'visual_intelligence';" in stage_sql
+    assert "IFNULL(statement_type, '') != 'SCRIPT'" in stage_sql
+    assert "dml_statistics.inserted_row_count" in stage_sql
+    assert "CREATE TABLE IF NOT EXISTS `p.d.run_costs`" in stage_sql
+
+    assert "WHERE run_id = 'warby_parker_20261018_120000' ;" in run_sql
+    assert "42 as insights" in run_sql
+    assert "= 'visual_intelligence'" not in run_sql
+    print("   ✅ Per-stage and whole-run records")
+    return True
+
+
+def test_trend_flags_regressions():
+    """Runs well above their brand baseline are flagged"""
+    print("🧪 Testing cost regression flag...")
+
+    trend = pd.DataFrame({
+        "run_id": ["a", "b", "c"],
+        "cost_usd": [1.0, 1.1, 2.0],
+        "baseline_cost_usd": [None, 1.0, 1.05],
+    })
+    with patch.object(cost_ledger, "run_query", return_value=trend):
+        flagged = cost_trend(days=30, target_brand="Warby Parker")
+        regression = cost_ledger.check_cost_regression("c", "Warby Parker")
+        assert cost_ledger.check_cost_regression("a", "Warby Parker") is None
+
+    assert list(flagged["regression"]) == [False, False, True]
+    assert regression == {"cost_usd": 2.0, "baseline_cost_usd": 1.05, "regression": True}
+    assert "target_brand = 'warby_parker'" in cost_ledger.cost_trend_sql(30, "Warby Parker")
+    print("   ✅ Regressions flagged against brand baseline")
+    return True
+
+
+def main():
+    """Run all cost ledger tests"""
+    print("💰 RUN COST LEDGER TESTS")
+    print("=" * 50)
+
+    tests = [
+        test_jobs_carry_run_and_stage_labels,
+        test_ledger_measures_labeled_jobs,
+        test_trend_flags_regressions,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"   ❌ {test.__name__} failed: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
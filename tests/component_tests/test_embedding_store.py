@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test the local memory-mapped embedding store
+
+Snapshots load without copying, int8 quantization stays close to float32,
+and refreshes only download new or changed vectors.
+"""
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils import embedding_store
+from src.utils.embedding_store import LocalEmbeddingStore
+
+
+class RecordedEmbeddingStore(LocalEmbeddingStore):
+    """Store refreshed from in-memory keys/vectors instead of BigQuery"""
+
+    def __init__(self, store_dir, dtype, keys, vectors):
+        super().__init__(store_dir, dtype)
+        self.keys = keys
+        self.vectors = vectors
+        self.fetched_ids = []
+
+    def _fetch_keys(self, brands=None):
+        return self.keys[self.keys['brand'].isin(brands)].copy() if brands else self.keys.copy()
+
+    def _fetch_vectors(self, ad_ids):
+        self.fetched_ids.extend(ad_ids)
+        return {ad_id: self.vectors[ad_id] for ad_id in ad_ids}
+
+
+def _keys(ids_and_hashes):
+    return pd.DataFrame({
+        'ad_archive_id': [ad_id for ad_id, _ in ids_and_hashes],
+        'brand': ['Warby Parker' if i % 2 else 'Zenni Optical' for i in range(len(ids_and_hashes))],
+        'start_timestamp': pd.date_range('2025-01-01', periods=len(ids_and_hashes), freq='D', tz='UTC'),
+        'embedding_hash': [emb_hash for _, emb_hash in ids_and_hashes],
+    })
+
+
+def test_load_is_memory_mapped():
+    """float32 snapshots come back as the memory-mapped matrix itself"""
+    print("🧪 Testing memory-mapped load...")
+
+    rng = np.random.default_rng(0)
+    vectors = {f"ad_{i}": rng.normal(size=16).astype(np.float32) for i in range(6)}
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = RecordedEmbeddingStore(store_dir, 'float32', _keys([(k, 'h') for k in vectors]), vectors)
+        store.refresh()
+        snapshot = store.load()
+
+        assert isinstance(snapshot.vectors, np.memmap)
+        assert snapshot.as_float32() is snapshot.vectors
+        for ad_id, row in snapshot.row_index().items():
+            assert np.array_equal(snapshot.vectors[row], vectors[ad_id])
+        assert list(snapshot.brands) == sorted(snapshot.brands)
+    print(f"   ✅ {len(snapshot)} x {snapshot.dimension} float32 vectors memory-mapped")
+    return True
+
+
+def test_int8_quantization_preserves_cosine():
+    """int8 vectors dequantize to within 1% cosine of the originals"""
+    print("🧪 Testing int8 quantization...")
+
+    rng = np.random.default_rng(1)
+    vectors = {f"ad_{i}": rng.normal(size=768).astype(np.float32) for i in range(20)}
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = RecordedEmbeddingStore(store_dir, 'int8', _keys([(k, 'h') for k in vectors]), vectors)
+        store.refresh()
+        snapshot = store.load()
+
+        restored = snapshot.as_float32()
+        original = np.vstack([vectors[ad_id] for ad_id in snapshot.ad_ids])
+        cosine = (restored * original).sum(axis=1) / (
+            np.linalg.norm(restored, axis=1) * np.linalg.norm(original, axis=1))
+        assert snapshot.vectors.dtype == np.int8 and cosine.min() > 0.99
+    print(f"   ✅ Minimum cosine after int8 round trip: {cosine.min():.4f}")
+    return True
+
+
+def test_refresh_downloads_only_changes():
+    """Unchanged hashes are reused, changed and new ads are fetched, missing ads removed"""
+    print("🧪 Testing incremental refresh...")
+
+    rng = np.random.default_rng(2)
+    vectors = {f"ad_{i}": rng.normal(size=8).astype(np.float32) for i in range(5)}
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = RecordedEmbeddingStore(store_dir, 'float32', _keys([(f"ad_{i}", 'v1') for i in range(4)]), vectors)
+        store.refresh()
+
+        vectors['ad_1'] = rng.normal(size=8).astype(np.float32)
+        store.keys = _keys([('ad_0', 'v1'), ('ad_1', 'v2'), ('ad_2', 'v1'), ('ad_4', 'v1')])
+        store.fetched_ids = []
+        stats = store.refresh()
+        snapshot = store.load()
+
+        assert sorted(store.fetched_ids) == ['ad_1', 'ad_4']
+        assert stats == {'total': 4, 'fetched': 2, 'reused': 2, 'removed': 1}
+        rows = snapshot.row_index()
+        assert 'ad_3' not in rows
+        assert np.array_equal(snapshot.vectors[rows['ad_1']], vectors['ad_1'])
+    print(f"   ✅ Refresh stats: {stats}")
+    return True
+
+
+def test_brand_refresh_keeps_other_brands():
+    """Refreshing one brand leaves every other brand's vectors in the shared snapshot"""
+    print("🧪 Testing brand-filtered refresh...")
+
+    rng = np.random.default_rng(3)
+    vectors = {f"ad_{i}": rng.normal(size=8).astype(np.float32) for i in range(6)}
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = RecordedEmbeddingStore(store_dir, 'float32', _keys([(f"ad_{i}", 'v1') for i in range(6)]), vectors)
+        store.refresh()
+
+        # Odd ads are Warby Parker; ad_1 changed, ad_5 was removed from BigQuery
+        vectors['ad_1'] = rng.normal(size=8).astype(np.float32)
+        store.keys = _keys([(f"ad_{i}", 'v2' if i == 1 else 'v1') for i in range(5)])
+        store.fetched_ids = []
+        stats = store.refresh(brands=['Warby Parker'])
+        snapshot = store.load()
+
+        assert store.fetched_ids == ['ad_1']
+        assert stats == {'total': 5, 'fetched': 1, 'reused': 4, 'removed': 1}
+        rows = snapshot.row_index()
+        assert sorted(rows) == ['ad_0', 'ad_1', 'ad_2', 'ad_3', 'ad_4']
+        for ad_id, row in rows.items():
+            assert np.array_equal(snapshot.vectors[row], vectors[ad_id])
+        assert list(snapshot.brands) == sorted(snapshot.brands)
+
+        store.fetched_ids = []
+        assert store.refresh()['fetched'] == 0 and store.fetched_ids == []
+    print(f"   ✅ Refresh stats: {stats}")
+    return True
+
+
+def test_interrupted_write_keeps_old_snapshot():
+    """A write that dies before the manifest swap leaves the previous snapshot intact"""
+    print("🧪 Testing interrupted snapshot write...")
+
+    rng = np.random.default_rng(5)
+    old_vectors = rng.normal(size=(4, 8)).astype(np.float32)
+    new_vectors = rng.normal(size=(6, 8)).astype(np.float32)
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = LocalEmbeddingStore(store_dir, 'float32')
+        store.write(_keys([(f"ad_{i}", 'v1') for i in range(4)]), old_vectors)
+        before = store.load()
+
+        with patch.object(embedding_store.os, "replace", side_effect=OSError("killed")):
+            try:
+                store.write(_keys([(f"ad_{i}", 'v2') for i in range(6)]), new_vectors)
+                raise AssertionError("write succeeded")
+            except OSError:
+                pass
+
+        after = store.load()
+        assert store.exists() and len(after) == 4
+        assert np.array_equal(after.vectors, old_vectors)
+        assert after.metadata.column('embedding_hash').to_pylist() == ['v1'] * 4
+
+        store.write(_keys([(f"ad_{i}", 'v2') for i in range(6)]), new_vectors)
+        assert len(store.load()) == 6 and np.array_equal(before.vectors, old_vectors)
+        assert len(os.listdir(store_dir)) == 3  # Manifest plus one version's matrix and metadata
+    print("   ✅ Old snapshot served until the manifest swap")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_load_is_memory_mapped, test_int8_quantization_preserves_cosine, test_refresh_downloads_only_changes,
+             test_brand_refresh_keeps_other_brands, test_interrupted_write_keeps_old_snapshot]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 Embedding store: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
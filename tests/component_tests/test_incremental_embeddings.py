@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test incremental embedding generation in EmbeddingsStage
+
+With an existing ads_embeddings table only changed rows are embedded and
+MERGEd through a per-run delta table, which is always dropped; --reembed
+rebuilds the whole table.
+"""
+import os
+import sys
+from unittest.mock import patch
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.pipeline.core.base import PipelineContext
+from src.pipeline.models.candidates import StrategicLabelResults
+from src.pipeline.stages.embeddings import EmbeddingsStage
+
+
+def _run_stage(reembed: bool, fail_merge: bool = False):
+    executed = []
+
+    def fake_run_query(sql, *args):
+        executed.append(sql)
+        if fail_merge and 'MERGE `' in sql:
+            raise RuntimeError("MERGE failed")
+        if 'SELECT DISTINCT brand' in sql:
+            return pd.DataFrame({'brand': ['Warby Parker', 'Zenni Optical']})
+        return pd.DataFrame({'count': [10], 'existing_count': [10], 'brands_with_embeddings': [2]})
+
+    stage = EmbeddingsStage(PipelineContext("Warby Parker", "Eyewear", "test_run"), reembed=reembed)
+    labels = StrategicLabelResults(table_id="proj.ds.ads_with_dates", labeled_ads=10, generation_time=0.0)
+    with patch('src.pipeline.stages.embeddings.run_query', side_effect=fake_run_query), \
+            patch('src.pipeline.stages.embeddings.ensure_ad_table_layout') as ensure_layout:
+        result = stage.execute(labels)
+    assert ensure_layout.called == (not reembed)
+    return result, executed
+
+
+def test_existing_table_embeds_only_changes():
+    """Default mode MERGEs embeddings for changed rows only"""
+    print("🧪 Testing incremental embedding SQL...")
+
+    result, executed = _run_stage(reembed=False)
+    generation_sql = next(sql for sql in executed if 'ML.GENERATE_EMBEDDING' in sql)
+
+    assert 'MERGE' in generation_sql and 'CREATE OR REPLACE TABLE `' + result.table_id not in generation_sql
+    assert 'FROM (SELECT * FROM changed_content)' in generation_sql
+    assert 'existing.embedding_hash != sc.embedding_hash' in generation_sql
+    assert any(sql.startswith('DROP TABLE IF EXISTS') for sql in executed)
+    print(f"   ✅ Incremental MERGE into {result.table_id}")
+    return True
+
+
+def test_reembed_rebuilds_table():
+    """--reembed regenerates every embedding"""
+    print("🧪 Testing --reembed...")
+
+    result, executed = _run_stage(reembed=True)
+    generation_sql = next(sql for sql in executed if 'ML.GENERATE_EMBEDDING' in sql)
+
+    assert f"CREATE OR REPLACE TABLE `{result.table_id}`" in generation_sql
+    assert 'MERGE' not in generation_sql
+    assert 'embedding_hash' in generation_sql
+    print(f"   ✅ Full rebuild of {result.table_id}")
+    return True
+
+
+def test_delta_dropped_when_merge_fails():
+    """The per-run delta table is dropped even when the MERGE script raises"""
+    print("🧪 Testing delta cleanup on failure...")
+
+    result, executed = _run_stage(reembed=False, fail_merge=True)
+    delta_table = "bigquery-ai-kaggle-469620.ads_demo.ads_embedding_delta_test_run"
+
+    assert result.embedding_count == 10  # Existing embeddings are still reported
+    assert executed[-1] == f"DROP TABLE IF EXISTS `{delta_table}`"
+    assert not any(f"COUNT(*) as count FROM `{delta_table}`" in sql for sql in executed)
+    print("   ✅ Delta table dropped")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_existing_table_embeds_only_changes, test_reembed_rebuilds_table, test_delta_dropped_when_merge_fails]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 Incremental embeddings: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test incremental strategic labeling in StrategicLabelingStage
+
+With an existing ads_with_dates table only new or changed ads are labeled and
+MERGEd through a per-run delta table, which is always dropped; otherwise the
+full batch script rebuilds the table.
+"""
+import os
+import sys
+from contextlib import nullcontext
+from unittest.mock import patch
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.pipeline.core.base import PipelineContext
+from src.pipeline.models.candidates import IngestionResults
+from src.pipeline.stages.strategic_labeling import StrategicLabelingStage
+from src.utils.bigquery_client import TableReadiness
+
+ADS_TABLE = "proj.ds.ads_raw_test_run"
+
+
+def _run_stage(labels_exist: bool, fail_labeling: bool = False):
+    executed = []
+    submitted = []
+
+    def fake_run_query(sql, *args):
+        executed.append(sql)
+        if '__TABLES_SUMMARY__' in sql:
+            return pd.DataFrame({'count': [1 if labels_exist else 0]})
+        if 'relabeled_ads' in sql:
+            return pd.DataFrame({'total_ads': [10], 'relabeled_ads': [3]})
+        return pd.DataFrame({'count': [10], 'total_records': [10], 'with_temporal_labels': [10],
+                             'with_funnel_labels': [10], 'with_angle_labels': [10], 'invalid_funnel_values': [0]})
+
+    def fake_submit_query(sql, *args, **kwargs):
+        submitted.append(sql)
+        return sql
+
+    stage = StrategicLabelingStage(PipelineContext("Warby Parker", "Eyewear", "test_run"))
+    ads = IngestionResults(ads=[], brands=["Warby Parker"], total_ads=10, ingestion_time=0.0, ads_table_id=ADS_TABLE)
+    readiness = TableReadiness("job", "MERGE", "proj.ds.ads_with_dates", 3)
+    with patch('src.pipeline.stages.strategic_labeling.run_query', side_effect=fake_run_query), \
+            patch('src.pipeline.stages.strategic_labeling.submit_query', side_effect=fake_submit_query), \
+            patch('src.pipeline.stages.strategic_labeling.wait_for_table', return_value=readiness), \
+            patch('src.pipeline.stages.strategic_labeling.ensure_ad_table_layout') as ensure_layout, \
+            patch.object(StrategicLabelingStage, '_execute_strategic_sql', autospec=True,
+                         side_effect=RuntimeError("labeling failed")) if fail_labeling else nullcontext():
+        result = stage.execute(ads)
+    assert ensure_layout.called == labels_exist
+    return result, submitted, executed
+
+
+def test_existing_table_labels_only_changes():
+    """An existing ads_with_dates routes to the incremental MERGE script"""
+    print("🧪 Testing incremental labeling SQL...")
+
+    result, submitted, executed = _run_stage(labels_exist=True)
+    labeling_sql = submitted[0]
+    delta_table = "bigquery-ai-kaggle-469620.ads_demo.ads_label_delta_test_run"
+
+    assert 'yourproj' not in labeling_sql
+    assert f"CREATE OR REPLACE TABLE `{delta_table}`" in labeling_sql
+    assert f"FROM `{ADS_TABLE}`" in labeling_sql
+    assert "MERGE `bigquery-ai-kaggle-469620.ads_demo.ads_with_dates` target" in labeling_sql
+    assert f"USING `{delta_table}` delta" in labeling_sql
+    assert executed[-1] == f"DROP TABLE IF EXISTS `{delta_table}`"
+    assert result.labeled_ads == 10
+    print(f"   ✅ Incremental MERGE via {delta_table}")
+    return True
+
+
+def test_missing_table_runs_full_script():
+    """Without ads_with_dates the batch script builds it from scratch"""
+    print("🧪 Testing first-run labeling...")
+
+    result, submitted, executed = _run_stage(labels_exist=False)
+    labeling_sql = submitted[0]
+
+    assert 'yourproj' not in labeling_sql
+    assert "CREATE OR REPLACE TABLE `bigquery-ai-kaggle-469620.ads_demo.ads_with_dates`" in labeling_sql
+    assert "ads_label_delta" not in labeling_sql and 'MERGE' not in labeling_sql
+    assert not any('ads_label_delta' in sql for sql in executed)
+    print(f"   ✅ Full rebuild of {result.table_id}")
+    return True
+
+
+def test_delta_dropped_when_labeling_fails():
+    """The per-run delta table is dropped even when labeling raises"""
+    print("🧪 Testing delta cleanup on failure...")
+
+    result, _, executed = _run_stage(labels_exist=True, fail_labeling=True)
+
+    assert result.table_id == "ads_with_dates_fallback"
+    assert executed[-1] == "DROP TABLE IF EXISTS `bigquery-ai-kaggle-469620.ads_demo.ads_label_delta_test_run`"
+    print("   ✅ Delta table dropped")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_existing_table_labels_only_changes, test_missing_table_runs_full_script,
+             test_delta_dropped_when_labeling_fails]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 Incremental labeling: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Test Stage 9's concurrent intelligence module executor
+
+Modules overlap, failures and timeouts stay per module, and latency and
+BigQuery bytes are recorded for each module separately.
+"""
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.pipeline.models.results import AnalysisResults
+from src.pipeline.stages.multidimensional_intelligence import MultiDimensionalIntelligenceStage
+from src.utils.bigquery_client import _record_job, track_queries
+
+
+class FakeJob:
+    def __init__(self, bytes_processed):
+        self.total_bytes_processed = bytes_processed
+        self.slot_millis = 10
+
+
+def _stage():
+    return MultiDimensionalIntelligenceStage("Multi-Dimensional Intelligence", 9, "test_run")
+
+
+def _module(seconds, bytes_per_query=0, queries=0):
+    def run():
+        for _ in range(queries):
+            _record_job(FakeJob(bytes_per_query))
+        time.sleep(seconds)
+        return {'status': 'success'}
+    return run
+
+
+def test_modules_run_concurrently_with_per_module_bytes():
+    """Stage time tracks the slowest module; bytes are attributed per thread"""
+    print("🧪 Testing concurrent module execution...")
+
+    modules = {
+        'audience_intelligence': _module(0.3, bytes_per_query=1000, queries=2),
+        'creative_intelligence': _module(0.3, bytes_per_query=5000, queries=1),
+        'channel_intelligence': _module(0.3),
+        'visual_intelligence_metrics': _module(0.1, bytes_per_query=7, queries=3),
+        'whitespace_intelligence': _module(0.3),
+    }
+
+    start = time.perf_counter()
+    results, stats = _stage()._run_modules(modules)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.8, f"expected ~0.3s, took {elapsed:.2f}s"
+    assert all(result['status'] == 'success' for result in results.values())
+    assert stats['audience_intelligence']['bytes_processed'] == 2000
+    assert stats['audience_intelligence']['queries'] == 2
+    assert stats['creative_intelligence']['bytes_processed'] == 5000
+    assert stats['visual_intelligence_metrics']['bytes_processed'] == 21
+    assert stats['channel_intelligence']['queries'] == 0
+    assert stats['audience_intelligence']['seconds'] >= 0.3
+    print(f"   ✅ Five modules in {elapsed:.2f}s (sequential would be ~1.3s)")
+    return True
+
+
+def test_failures_and_timeouts_are_isolated():
+    """A raising module and a slow module become error dicts; others succeed"""
+    print("🧪 Testing failure and timeout isolation...")
+
+    def broken():
+        raise RuntimeError("table creation failed")
+
+    modules = {
+        'audience_intelligence': broken,
+        'creative_intelligence': _module(2.0),
+        'channel_intelligence': _module(0.05),
+    }
+
+    start = time.perf_counter()
+    results, stats = _stage()._run_modules(modules, timeout=0.5)
+    elapsed = time.perf_counter() - start
+
+    assert results['audience_intelligence'] == {
+        'status': 'error', 'error': 'table creation failed', 'analysis_type': 'audience_intelligence'}
+    assert results['creative_intelligence']['status'] == 'error'
+    assert 'Timed out' in results['creative_intelligence']['error']
+    assert results['channel_intelligence']['status'] == 'success'
+    assert stats['creative_intelligence']['status'] == 'error'
+    assert elapsed < 1.5, "timed-out module must not block the stage"
+    print(f"   ✅ Errors isolated, stage returned in {elapsed:.2f}s")
+    return True
+
+
+def test_nested_tracking_counts_towards_module():
+    """Queries a module tracks itself (e.g. the whitespace engine) still count for the module"""
+    print("🧪 Testing nested query tracking...")
+
+    def tracked_module():
+        with track_queries() as inner:
+            _record_job(FakeJob(300))
+            _record_job(FakeJob(200))
+        assert inner.queries == 2 and inner.bytes_processed == 500
+        _record_job(FakeJob(50))
+        return {'status': 'success'}
+
+    results, stats = _stage()._run_modules({'whitespace_intelligence': tracked_module})
+
+    assert results['whitespace_intelligence']['status'] == 'success'
+    assert stats['whitespace_intelligence']['queries'] == 3
+    assert stats['whitespace_intelligence']['bytes_processed'] == 550
+    print("   ✅ Inner stats added to the module's stats")
+    return True
+
+
+def test_feature_failure_only_fails_feature_modules():
+    """A failed ad_features pass fails the modules reading it; the others still run"""
+    print("🧪 Testing shared feature failure isolation...")
+
+    stage = _stage()
+    stage.competitor_brands = ['Warby Parker', 'Zenni Optical']
+    ok = {'status': 'success'}
+    with patch.object(stage, '_materialize_ad_features', side_effect=RuntimeError("CTAS quota exceeded")), \
+            patch.object(stage, '_execute_audience_intelligence', return_value=ok) as audience, \
+            patch.object(stage, '_execute_creative_intelligence', return_value=ok), \
+            patch.object(stage, '_execute_channel_intelligence', return_value=ok), \
+            patch.object(stage, '_execute_visual_intelligence_metrics', return_value=ok), \
+            patch.object(stage, '_execute_whitespace_intelligence', return_value=ok), \
+            patch.object(stage, '_generate_intelligence_summary', return_value={}), \
+            patch.object(stage, '_calculate_data_completeness', return_value=80.0):
+        results = stage.execute(AnalysisResults())
+
+    assert results.status == 'success'
+    for module in (results.audience_intelligence, results.creative_intelligence, results.channel_intelligence):
+        assert module['status'] == 'error' and "CTAS quota exceeded" in module['error']
+    assert not audience.called
+    assert results.visual_intelligence == ok and results.whitespace_intelligence == ok
+    print("   ✅ Visual metrics and whitespace unaffected")
+    return True
+
+
+def test_timeout_counts_from_module_start():
+    """Modules queued behind max_workers keep their full timeout"""
+    print("🧪 Testing per-module timeout clock...")
+
+    modules = {
+        'audience_intelligence': _module(0.3),
+        'creative_intelligence': _module(0.3),
+        'channel_intelligence': _module(2.0),
+    }
+
+    start = time.perf_counter()
+    results, stats = _stage()._run_modules(modules, timeout=0.5, max_workers=1)
+    elapsed = time.perf_counter() - start
+
+    assert results['audience_intelligence']['status'] == 'success'
+    assert results['creative_intelligence']['status'] == 'success'  # Queued 0.3s, ran 0.3s
+    assert 'Timed out' in results['channel_intelligence']['error']
+    assert list(results) == list(modules)
+    assert 1.0 < elapsed < 1.6, f"expected ~1.1s, took {elapsed:.2f}s"
+    print(f"   ✅ Queued module succeeded, slow module timed out at {elapsed:.2f}s")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_modules_run_concurrently_with_per_module_bytes, test_failures_and_timeouts_are_isolated,
+             test_nested_tracking_counts_towards_module, test_feature_failure_only_fails_feature_modules,
+             test_timeout_counts_from_module_start]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 Intelligence module executor: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
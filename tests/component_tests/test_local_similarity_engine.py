@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test the local similarity engine against the Stage 8 SQL semantics
+
+A pair-by-pair reference of the fatigue and copying queries must give the
+same outputs as the blocked NumPy engine.
+"""
+import os
+import sys
+import tempfile
+from collections import defaultdict
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.competitive_intel.analysis.local_similarity_engine import LocalSimilarityEngine
+from src.utils import embedding_store
+from src.utils.embedding_store import LocalEmbeddingStore
+
+BRANDS = ['Warby Parker', 'Zenni Optical', 'EyeBuyDirect']
+
+
+def _dataset(seed: int, count: int = 90, dim: int = 12):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=(4, dim))
+    # Clustered vectors so plenty of pairs fall under the copying threshold
+    vectors = (base[rng.integers(0, 4, count)] + 0.3 * rng.normal(size=(count, dim))).astype(np.float32)
+    start = np.datetime64('2025-01-01T00:00:00')
+    # Hour offsets over ~90 days: produces same-day pairs and exact timestamp ties
+    timestamps = start + rng.integers(0, 90 * 24, count).astype('timedelta64[h]')
+    timestamps[::17] = np.datetime64('NaT', 's')
+    brands = np.array(BRANDS, dtype=object)[rng.integers(0, len(BRANDS), count)]
+    ad_ids = np.array([f"ad_{i}" for i in range(count)], dtype=object)
+    return brands, ad_ids, timestamps, vectors
+
+
+def _cosine_distance(a, b):
+    a, b = a.astype(np.float64), b.astype(np.float64)
+    return 1 - a.dot(b) / (np.linalg.norm(a) * np.linalg.norm(b))
+
+
+def _reference_fatigue(brands, timestamps, vectors, brand, window_days=30):
+    rows = [i for i in range(len(brands)) if brands[i] == brand and not np.isnat(timestamps[i])]
+    days = timestamps.astype('datetime64[D]')
+    averages = []
+    for i in rows:
+        sims = [1 - _cosine_distance(vectors[i], vectors[j]) for j in rows
+                if timestamps[j] < timestamps[i] and (days[i] - days[j]).astype(int) <= window_days]
+        if sims:
+            averages.append(np.mean(sims))
+    return np.mean(averages), (np.std(averages, ddof=1) if len(averages) > 1 else None), len(averages)
+
+
+def _reference_copying(brands, timestamps, vectors, brand, threshold=0.3):
+    valid = [i for i in range(len(brands)) if not np.isnat(timestamps[i])]
+    days = timestamps.astype('datetime64[D]').astype(np.int64)
+    per_copier = defaultdict(list)
+    for a in valid:
+        if brands[a] != brand:
+            continue
+        for b in valid:
+            if brands[b] == brand or days[b] < days[a]:
+                continue
+            distance = _cosine_distance(vectors[a], vectors[b])
+            if distance < threshold:
+                per_copier[brands[b]].append((distance, days[b] - days[a]))
+    best = min(per_copier, key=lambda name: np.mean([d for d, _ in per_copier[name]]))
+    pairs = per_copier[best]
+    return best, np.mean([d for d, _ in pairs]), min(lag for _, lag in pairs), len(pairs)
+
+
+def test_fatigue_matches_reference():
+    """Windowed recent-similarity metrics equal the pair-by-pair reference"""
+    print("🧪 Testing creative fatigue against reference...")
+
+    brands, ad_ids, timestamps, vectors = _dataset(seed=7)
+    engine = LocalSimilarityEngine(brands, ad_ids, timestamps, vectors, block_size=8)
+
+    for brand in BRANDS:
+        repetition, variance, analyzed = _reference_fatigue(brands, timestamps, vectors, brand)
+        result = engine.creative_fatigue(brand)
+        assert result['analyzed_ads'] == analyzed, brand
+        assert abs(result['avg_semantic_repetition'] - repetition) < 1e-9, brand
+        assert abs(result['repetition_variance'] - variance) < 1e-9, brand
+        assert abs(result['originality_score'] - max(0.0, 1 - repetition)) < 1e-9, brand
+        print(f"   ✅ {brand}: {analyzed} ads, repetition {repetition:.4f}, level {result['fatigue_level']}")
+    return True
+
+
+def test_copying_matches_reference():
+    """Top copier, mean distance, minimum lag and pair count equal the exhaustive reference"""
+    print("🧪 Testing copying detection against reference...")
+
+    brands, ad_ids, timestamps, vectors = _dataset(seed=11)
+    engine = LocalSimilarityEngine(brands, ad_ids, timestamps, vectors, block_size=5)
+
+    for brand in BRANDS:
+        copier, distance, lag, pairs = _reference_copying(brands, timestamps, vectors, brand)
+        result = engine.copying(brand)
+        assert result['potential_copier'] == copier, brand
+        assert abs(result['avg_similarity'] - distance) < 1e-9, brand
+        assert result['min_lag_days'] == lag and result['comparison_count'] == pairs, brand
+        print(f"   ✅ {brand}: copier {copier} ({pairs} pairs, min lag {lag}d)")
+    return True
+
+
+def test_no_pairs_returns_none():
+    """A single ad has no earlier ads and no competitors"""
+    print("🧪 Testing empty results...")
+
+    engine = LocalSimilarityEngine(np.array(['Solo'], dtype=object), np.array(['ad_0'], dtype=object),
+                                   np.array(['2025-01-01'], dtype='datetime64[us]'), np.ones((1, 4), np.float32))
+    assert engine.creative_fatigue('Solo') is None and engine.copying('Solo') is None
+    print("   ✅ No fatigue or copying rows")
+    return True
+
+
+def test_store_inputs_match_sql():
+    """Only float32 stores are used, and start_timestamp is joined on (ad_archive_id, brand)"""
+    print("🧪 Testing embedding store inputs...")
+
+    keys = pd.DataFrame({'ad_archive_id': ['ad_0', 'ad_1'], 'brand': ['Warby Parker', 'Zenni Optical'],
+                         'start_timestamp': pd.to_datetime(['2025-01-01', '2025-01-02'], utc=True),
+                         'embedding_hash': ['h0', 'h1']})
+    vectors = np.eye(2, 4, dtype=np.float32)
+    with tempfile.TemporaryDirectory() as store_dir:
+        LocalEmbeddingStore(store_dir, 'int8').write(keys, vectors)
+        try:
+            LocalSimilarityEngine.from_store(LocalEmbeddingStore(store_dir, 'int8'), refresh=False)
+            raise AssertionError("int8 store accepted")
+        except ValueError as e:
+            assert "float32" in str(e)
+
+        # A float32 store over an int8 snapshot is rebuilt before use
+        store = LocalEmbeddingStore(store_dir, 'float32')
+        with patch.object(store, 'refresh', side_effect=lambda: store.write(keys, vectors)) as refresh:
+            engine = LocalSimilarityEngine.from_store(store, refresh=False)
+        assert refresh.called and len(engine) == 2
+        assert np.array_equal(engine.unit_vectors, vectors.astype(np.float64))
+
+    with patch.object(embedding_store, 'run_query', return_value=pd.DataFrame()) as run_query:
+        LocalEmbeddingStore(tempfile.gettempdir())._fetch_keys()
+    sql = run_query.call_args[0][0]
+    assert "GROUP BY ad_archive_id, brand" in sql
+    assert "ON e.ad_archive_id = s.ad_archive_id AND e.brand = s.brand" in sql
+    print("   ✅ float32 vectors, (ad_archive_id, brand) timestamps")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_fatigue_matches_reference, test_copying_matches_reference, test_no_pairs_returns_none,
+             test_store_inputs_match_sql]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 Local similarity engine: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
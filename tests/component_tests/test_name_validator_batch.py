@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test batch scoring in CompetitorNameValidator
+
+score_series must agree row-for-row with validate_name, including
+duplicates and missing names.
+"""
+import os
+import sys
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.competitive_intel.curation.competitor_name_validator import CompetitorNameValidator
+
+TEST_NAMES = [
+    "PayPal", "Zenni Optical", "EyeBuyDirect", "Top 10", "Market Share",
+    "Risk Management Solutions", "ABC Management Inc", "Warby Parker vs Zenni",
+    "IBM", "2024 Outlook", "Eyewear Companies", "Management", "A", "",
+    "Zenni Optical", "PayPal",
+]
+
+
+def test_score_series_matches_validate_name():
+    """Batch scores equal per-name validation for every row"""
+    print("🧪 Testing score_series against validate_name...")
+
+    validator = CompetitorNameValidator()
+    names = pd.Series(TEST_NAMES + [None])
+    scores = validator.score_series(names)
+
+    assert len(scores) == len(names)
+    for name, row in zip(names, scores):
+        expected = CompetitorNameValidator().validate_name(name)
+        assert bool(row['is_valid']) == expected.is_valid, name
+        assert row['confidence'] == expected.confidence, name
+        assert row['category'] == expected.category, name
+        assert row['reasons'] == expected.reasons, name
+
+    print(f"   ✅ {len(scores)} rows match per-name validation")
+    return True
+
+
+def test_pattern_reason_reports_first_listed_pattern():
+    """The combined pattern scan still reports the first matching pattern in list order"""
+    print("🧪 Testing suspicious pattern reasons...")
+
+    validator = CompetitorNameValidator()
+    result = validator.validate_name("Top 5 Eyewear Alternatives")
+
+    assert not result.is_valid
+    assert result.reasons == ["Suspicious pattern: ^top \\d+"]
+    print(f"   ✅ {result.reasons[0]}")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_score_series_matches_validate_name, test_pattern_reason_reports_first_listed_pattern]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 Name validator batch scoring: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
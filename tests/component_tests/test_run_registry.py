@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Test the run artifact registry
+
+Registering a temporary table must set its expiration immediately, registrations
+must be written in one load job, and GC must drop only the registry's due
+artifacts without listing the dataset.
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils import run_registry
+from src.utils.run_registry import RunTableRegistry, collect_garbage
+
+
+class FakeTable:
+    def __init__(self, table_id):
+        self.table_id = table_id
+        self.expires = None
+
+
+class FakeLoadJob:
+    def result(self):
+        return None
+
+
+class FakeClient:
+    def __init__(self, missing=()):
+        self.tables = {}
+        self.missing = set(missing)
+        self.updates = []
+        self.loads = []
+        self.created = []
+        self.deleted = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get_table(self, table_id):
+        if table_id in self.missing:
+            raise Exception(f"Not found: {table_id}")
+        return self.tables.setdefault(table_id, FakeTable(table_id))
+
+    def update_table(self, table, fields):
+        self.updates.append((table.table_id, tuple(fields)))
+
+    def create_table(self, table, exists_ok=False):
+        self.created.append(table)
+
+    def load_table_from_json(self, rows, table_id, job_config=None):
+        self.loads.append((table_id, rows))
+        return FakeLoadJob()
+
+    def delete_table(self, table_id, not_found_ok=False):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+            self.deleted.append(table_id)
+
+    def list_tables(self, dataset):
+        raise AssertionError("GC must not list the dataset")
+
+
+def test_register_sets_expiration():
+    """Temporary objects get an expiration at registration; kept ones do not"""
+    print("🧪 Testing expiration at registration...")
+
+    client = FakeClient(missing={"p.d.gone_run1"})
+    registry = RunTableRegistry("run1", ttl_hours=24, project_id="p", dataset_id="d", client=client)
+
+    before = datetime.now(timezone.utc)
+    expires_at = registry.register("p.d.ads_raw_run1")
+    assert timedelta(hours=23.9) < expires_at - before < timedelta(hours=24.1)
+    assert client.tables["p.d.ads_raw_run1"].expires == expires_at
+    assert client.updates == [("p.d.ads_raw_run1", ("expires",))]
+
+    assert registry.register("p.d.v_intelligence_summary_run1", "VIEW", temporary=False) is None
+    assert len(client.updates) == 1
+
+    # A failed expiration update is reported but still registered
+    registry.register("p.d.gone_run1")
+    rows = {row["object_id"]: row for row in registry.pending()}
+    assert set(rows) == {"p.d.ads_raw_run1", "p.d.v_intelligence_summary_run1", "p.d.gone_run1"}
+    assert rows["p.d.v_intelligence_summary_run1"]["object_type"] == "VIEW"
+    assert rows["p.d.v_intelligence_summary_run1"]["expires_at"] is None
+    print("   ✅ Expiration set at creation time")
+    return True
+
+
+def test_flush_writes_one_load_job():
+    """Buffered registrations go out in a single append load, re-registration is deduplicated"""
+    print("🧪 Testing registry flush...")
+
+    client = FakeClient()
+    registry = RunTableRegistry("run2", project_id="p", dataset_id="d", client=client)
+    registry.register("p.d.competitors_raw_run2")
+    registry.register("p.d.competitors_batch_run2_all")
+    registry.register("p.d.competitors_raw_run2")
+
+    assert registry.flush() == 2
+    assert len(client.loads) == 1
+    table_id, rows = client.loads[0]
+    assert table_id == "p.d.run_artifacts"
+    assert {row["run_id"] for row in rows} == {"run2"}
+    assert registry.pending() == []
+    assert registry.flush() == 0 and len(client.loads) == 1
+    print("   ✅ One load job per run")
+    return True
+
+
+def test_gc_drops_due_artifacts_in_parallel():
+    """GC drops registry candidates concurrently and marks them dropped"""
+    print("🧪 Testing parallel GC...")
+
+    client = FakeClient()
+    candidates = [f"p.d.audience_intelligence_run{i}" for i in range(8)]
+    queries = []
+
+    def fake_run_query(sql, project_id=None):
+        queries.append(sql)
+        if "SELECT DISTINCT object_id" in sql:
+            return pd.DataFrame({"object_id": candidates})
+        return pd.DataFrame()
+
+    with patch.object(run_registry, "run_query", side_effect=fake_run_query):
+        preview = collect_garbage(dry_run=True, project_id="p", dataset_id="d", client=client)
+        assert preview["candidates"] == candidates and client.deleted == []
+        assert "expires_at <= CURRENT_TIMESTAMP()" in queries[0]
+
+        start = time.perf_counter()
+        result = collect_garbage(max_workers=8, project_id="p", dataset_id="d", client=client)
+        elapsed = time.perf_counter() - start
+
+    assert sorted(result["dropped"]) == sorted(candidates) and result["failed"] == []
+    assert sorted(client.deleted) == sorted(candidates)
+    assert client.max_active > 1, "Drops should overlap"
+    assert elapsed < 0.05 * len(candidates)
+    assert "UPDATE" in queries[-1] and "dropped_at = CURRENT_TIMESTAMP()" in queries[-1]
+    print(f"   ✅ Dropped {len(candidates)} artifacts with {client.max_active} concurrent drops in {elapsed:.2f}s")
+    return True
+
+
+def test_gc_by_run_id():
+    """--run-id drops a run's artifacts regardless of expiration"""
+    print("🧪 Testing GC for a single run...")
+
+    queries = []
+
+    def fake_run_query(sql, project_id=None):
+        queries.append(sql)
+        return pd.DataFrame({"object_id": []})
+
+    with patch.object(run_registry, "run_query", side_effect=fake_run_query):
+        result = collect_garbage(run_id="run9", project_id="p", dataset_id="d", client=FakeClient())
+
+    assert result == {"candidates": [], "dropped": [], "failed": []}
+    assert "run_id = 'run9'" in queries[0] and "expires_at" not in queries[0]
+    assert len(queries) == 1
+    print("   ✅ Run-scoped GC ignores expiration")
+    return True
+
+
+def main():
+    """Run all run registry tests"""
+    print("🗂️  RUN ARTIFACT REGISTRY TESTS")
+    print("=" * 50)
+
+    tests = [
+        test_register_sets_expiration,
+        test_flush_writes_one_load_job,
+        test_gc_drops_due_artifacts_in_parallel,
+        test_gc_by_run_id,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"   ❌ {test.__name__} failed: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
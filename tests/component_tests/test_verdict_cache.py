@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test the cross-run competitor verdict cache in CurationStage
+
+Cached candidates must skip AI validation, and rejected verdicts must be
+kept by consensus so they can be cached too.
+"""
+import os
+import sys
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.pipeline.core.base import PipelineContext
+from src.pipeline.stages.curation import CurationStage
+from src.competitive_intel.curation.verdict_cache import CompetitorVerdictCache
+
+
+class RecordedVerdictCache(CompetitorVerdictCache):
+    """Verdict cache serving a fixed set of cached rows"""
+
+    def __init__(self, cached_rows):
+        super().__init__("test")
+        self.cached_rows = cached_rows
+
+    def lookup(self, brand, vertical, names):
+        return pd.DataFrame(self.cached_rows)
+
+
+def _verdict(normalized_name, is_competitor):
+    return {
+        'normalized_name': normalized_name,
+        'is_competitor': is_competitor,
+        'tier': 'Direct-Rival',
+        'market_overlap_pct': 70,
+        'customer_substitution_ease': 'Easy',
+        'confidence': 0.9,
+        'reasoning': 'Consensus (3/3 votes): cached',
+        'evidence_sources': 'cache',
+    }
+
+
+def test_cached_verdicts_skip_ai():
+    """Cache hits are removed from the AI batch; only cached competitors are returned"""
+    print("🧪 Testing verdict cache split...")
+
+    stage = CurationStage(PipelineContext("Warby Parker", "Eyewear", "test_run"), dry_run=True)
+    stage.verdict_cache = RecordedVerdictCache([
+        _verdict('zenni optical', True),
+        _verdict('ray-ban', False),
+    ])
+    prefiltered = pd.DataFrame({
+        'company_name': ['Zenni Optical Inc', 'Ray-Ban', 'EyeBuyDirect'],
+        'raw_score': [3.0, 2.5, 2.0],
+        'discovery_method': ['standard'] * 3,
+    })
+
+    misses, cached_competitors = stage._apply_cached_verdicts(prefiltered)
+
+    assert list(misses['company_name']) == ['EyeBuyDirect']
+    assert list(cached_competitors['company_name']) == ['Zenni Optical Inc']
+    assert cached_competitors.iloc[0]['raw_score'] == 3.0
+    assert cached_competitors.iloc[0]['tier'] == 'Direct-Rival'
+    print(f"   ✅ {len(misses)} miss sent to AI, {len(cached_competitors)} cached competitor reused")
+    return True
+
+
+def test_consensus_keeps_rejections_for_cache():
+    """include_rejected returns negative verdicts with is_competitor False"""
+    print("🧪 Testing rejected verdicts in consensus...")
+
+    rounds = pd.DataFrame([
+        {'company_name': name, 'round_num': r, 'is_competitor': vote, 'confidence': 0.8,
+         'market_overlap_pct': 50, 'tier': 'Adjacent', 'customer_substitution_ease': 'Hard',
+         'reasoning': 'test', 'evidence_sources': 'test'}
+        for name, votes in [('Zenni Optical', [True, True]), ('Ray-Ban', [False, False])]
+        for r, vote in enumerate(votes)
+    ])
+    prefiltered = pd.DataFrame({'company_name': ['Zenni Optical', 'Ray-Ban']})
+    stage = CurationStage(PipelineContext("Warby Parker", "Eyewear", "test_run"), dry_run=True)
+
+    competitors_only = stage._compute_consensus_results(rounds, prefiltered, min_rounds=2)
+    all_verdicts = stage._compute_consensus_results(rounds, prefiltered, min_rounds=2, include_rejected=True)
+
+    assert list(competitors_only['company_name']) == ['Zenni Optical']
+    assert dict(zip(all_verdicts['company_name'], all_verdicts['is_competitor'])) == {
+        'Zenni Optical': True, 'Ray-Ban': False
+    }
+    print(f"   ✅ {len(all_verdicts)} verdicts kept for caching")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_cached_verdicts_skip_ai, test_consensus_keeps_rejections_for_cache]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 Verdict cache: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
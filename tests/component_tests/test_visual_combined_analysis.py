@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Test combined-mode visual intelligence
+
+Combined mode must make one AI.GENERATE call per ad, run one INSERT job per
+brand in parallel, retry only the rows whose AI call failed, and reuse cached
+analyses without spending AI calls on them.
+"""
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.bigquery_client import TableReadiness
+from src.pipeline.core.base import PipelineContext
+from src.pipeline.stages import visual_intelligence
+from src.pipeline.stages.visual_intelligence import VisualIntelligenceStage
+
+
+class FakeWarehouse:
+    """Simulates the sample table and per-brand INSERT jobs with scripted AI failures (row counts) or job errors"""
+
+    def __init__(self, brand_sizes, failures, cached=0):
+        self.brand_sizes = dict(brand_sizes)
+        self.cached = cached
+        self.failures = {brand: list(failures.get(brand, [])) for brand in brand_sizes}
+        self.written = {brand: 0 for brand in brand_sizes}
+        self.inserts = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def submit_query(self, sql, project_id=None, job_config=None):
+        params = {p.name: p.value for p in job_config.query_parameters} if job_config else {}
+        return sql, params.get("brand")
+
+    def wait_for_table(self, job, timeout=None):
+        sql, brand = job
+        if "CREATE OR REPLACE TABLE" in sql and "visual_sample_" in sql.split("\n")[1]:
+            total = sum(self.brand_sizes.values()) + self.cached
+            return TableReadiness("sample", "CREATE_TABLE_AS_SELECT", "visual_sample", total)
+        if "INSERT INTO" not in sql:
+            return TableReadiness("ddl", "CREATE_TABLE_AS_SELECT", None, 0)
+        if "-- Reuse cached visual analyses" in sql:
+            return TableReadiness("cached", "INSERT", "visual_intelligence", self.cached)
+
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+
+        remaining = self.brand_sizes[brand] - self.written[brand]
+        failed = self.failures[brand].pop(0) if self.failures[brand] else 0
+        if isinstance(failed, Exception):
+            with self._lock:
+                self.active -= 1
+                self.inserts.append((brand, remaining, 0, None))
+            raise failed
+        keeps_only_successes = "WHERE analysis.status = ''" in sql
+        rows = remaining - failed if keeps_only_successes else remaining
+        with self._lock:
+            self.active -= 1
+            self.written[brand] += rows
+            self.inserts.append((brand, remaining, rows, keeps_only_successes))
+        return TableReadiness("insert", "INSERT", "visual_intelligence", rows)
+
+    def run_query(self, sql, project_id=None):
+        return pd.DataFrame({"brand": list(self.brand_sizes), "sampled_ads": list(self.brand_sizes.values())})
+
+
+class FakeCache:
+    def __init__(self):
+        self.ensured = False
+        self.stored_from = None
+
+    def ensure_table(self):
+        self.ensured = True
+
+    def fresh_entries_sql(self):
+        return "SELECT * FROM `proj.ads_demo.visual_analysis_cache`"
+
+    def input_hash_sql(self, alias):
+        return f"{alias}.input_hash"
+
+    def store(self, source_table_id):
+        self.stored_from = source_table_id
+
+
+def _run_combined(warehouse, cache=None, stage=None, **stage_kwargs):
+    stage = stage or VisualIntelligenceStage(PipelineContext("Warby Parker", "eyewear", "test_run"),
+                                             use_visual_cache=False, **stage_kwargs)
+    stage.visual_cache = cache
+    with patch.object(visual_intelligence, "submit_query", side_effect=warehouse.submit_query), \
+         patch.object(visual_intelligence, "wait_for_table", side_effect=warehouse.wait_for_table), \
+         patch.object(visual_intelligence, "run_query", side_effect=warehouse.run_query), \
+         patch.object(visual_intelligence, "register_run_table"):
+        return stage._run_combined_analysis()
+
+
+def test_single_ai_call_per_ad():
+    """The combined SQL calls AI.GENERATE once with an output schema; separate mode calls it twice"""
+    print("🧪 Testing combined prompt...")
+
+    stage = VisualIntelligenceStage(PipelineContext("Warby Parker", "eyewear", "test_run"), use_visual_cache=False)
+    combined = stage._generate_combined_analysis_sql(1, final_attempt=False)
+    assert combined.count("AI.GENERATE(") == 1
+    assert "output_schema =>" in combined
+    assert "luxury_positioning_score FLOAT64" in combined and "visual_text_alignment_score FLOAT64" in combined
+    assert "REGEXP_EXTRACT" not in combined
+    assert "WHERE s.brand = @brand" in combined
+
+    final = stage._generate_combined_analysis_sql(3, final_attempt=True)
+    assert "analysis.status = ''" not in final
+
+    assert stage._generate_visual_analysis_sql().count("AI.GENERATE(") == 2
+    print("   ✅ One multimodal call per ad")
+    return True
+
+
+def test_parallel_brands_retry_failed_rows():
+    """Brands run concurrently and retries cover only the failed rows"""
+    print("🧪 Testing per-brand parallel jobs with retry...")
+
+    warehouse = FakeWarehouse({"Warby Parker": 10, "Zenni": 8, "EyeBuyDirect": 6},
+                              failures={"Warby Parker": [3], "Zenni": [0], "EyeBuyDirect": [2, 1]})
+    written, ai_calls, cached = _run_combined(warehouse, max_workers=4, max_attempts=3)
+
+    assert written == 24 and cached == 0
+    assert warehouse.written == {"Warby Parker": 10, "Zenni": 8, "EyeBuyDirect": 6}
+    # 24 first-attempt calls + 3 Warby Parker retries + 2 + 1 EyeBuyDirect retries
+    assert ai_calls == 24 + 3 + 2 + 1
+    assert warehouse.max_active > 1, "Brand jobs should overlap"
+
+    warby_attempts = [insert for insert in warehouse.inserts if insert[0] == "Warby Parker"]
+    assert [attempted for _, attempted, _, _ in warby_attempts] == [10, 3]
+    eyebuy_attempts = [insert for insert in warehouse.inserts if insert[0] == "EyeBuyDirect"]
+    assert [attempted for _, attempted, _, _ in eyebuy_attempts] == [6, 2, 1]
+    assert eyebuy_attempts[-1][3] is False, "Last attempt keeps failed rows"
+    print(f"   ✅ {written} ads, {ai_calls} AI calls, {warehouse.max_active} concurrent brand jobs")
+    return True
+
+
+def test_empty_sample_skips_analysis():
+    """No sampled ads means no INSERT jobs"""
+    print("🧪 Testing empty sample...")
+
+    warehouse = FakeWarehouse({}, failures={})
+    assert _run_combined(warehouse) == (0, 0, 0)
+    assert warehouse.inserts == []
+    print("   ✅ No AI calls for an empty sample")
+    return True
+
+
+def test_cached_analyses_are_reused():
+    """Cached ads are copied from the cache, cost no AI calls and stay outside the budget"""
+    print("🧪 Testing visual analysis cache reuse...")
+
+    stage = VisualIntelligenceStage(PipelineContext("Warby Parker", "eyewear", "test_run"))
+    assert stage.visual_cache is not None
+    key = stage.visual_cache.prompt_hash
+    assert VisualIntelligenceStage(PipelineContext("Zenni", "eyewear", "other_run")).visual_cache.prompt_hash == key
+    assert VisualIntelligenceStage(PipelineContext("Zenni", "eyewear", "r"), dry_run=True).visual_cache is None
+    sample_sql = stage._sampled_ads_sql()
+    assert "visual_analysis_cache" in sample_sql
+    assert "WHERE is_cached OR brand_rank <= final_sample_size" in sample_sql
+    assert "AND NOT s.is_cached" in stage._generate_combined_analysis_sql(1, final_attempt=False)
+
+    cache = FakeCache()
+    warehouse = FakeWarehouse({"Warby Parker": 4, "Zenni": 3}, failures={}, cached=9)
+    analyzed, ai_calls, cached = _run_combined(warehouse, cache=cache)
+
+    assert cache.ensured
+    assert cached == 9 and analyzed == 16
+    assert ai_calls == 7, "Only uncached ads reach AI.GENERATE"
+    assert cache.stored_from.endswith("visual_intelligence_test_run")
+    print(f"   ✅ {cached} analyses reused, {ai_calls} new AI calls")
+    return True
+
+
+def test_failed_brand_job_is_isolated():
+    """A brand job that raises is retried; a brand that keeps failing does not abort the others"""
+    print("🧪 Testing per-brand job errors...")
+
+    warehouse = FakeWarehouse({"Warby Parker": 10, "Zenni": 8, "EyeBuyDirect": 6},
+                              failures={"Warby Parker": [TimeoutError("job timed out"), 0],
+                                        "Zenni": [RuntimeError("quota exceeded")] * 3})
+    stage = VisualIntelligenceStage(PipelineContext("Warby Parker", "eyewear", "test_run"),
+                                    use_visual_cache=False, max_workers=4, max_attempts=3)
+    written, ai_calls, _ = _run_combined(warehouse, stage=stage)
+
+    assert warehouse.written == {"Warby Parker": 10, "Zenni": 0, "EyeBuyDirect": 6}
+    assert written == 16
+    assert stage.failed_brands == ["Zenni"]
+    assert [attempted for brand, attempted, _, _ in warehouse.inserts if brand == "Warby Parker"] == [10, 10]
+    assert len([insert for insert in warehouse.inserts if insert[0] == "Zenni"]) == 3
+    assert ai_calls == 10 + 10 + 3 * 8 + 6
+    print(f"   ✅ {written} ads written, failed brands: {stage.failed_brands}")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_single_ai_call_per_ad, test_parallel_brands_retry_failed_rows, test_empty_sample_skips_analysis,
+             test_cached_analyses_are_reused, test_failed_brand_job_is_isolated]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 Combined visual analysis: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
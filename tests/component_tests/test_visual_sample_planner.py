@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test the budget-aware visual sample planner
+
+The planner must turn a dollar budget into an image count, spend it on one
+medoid per creative cluster before any near-duplicate, give diverse brands more
+of the budget, and treat cached analyses as free coverage.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.competitive_intel.analysis.visual_sample_planner import VisualSamplePlanner, PLAN_COLUMNS
+from src.pipeline.core.base import PipelineContext
+from src.pipeline.stages.visual_intelligence import VisualIntelligenceStage
+
+
+def _clustered_ads(clusters_per_brand, ads_per_cluster=8, dimension=32, seed=0):
+    """Candidates where each brand's ads form tight, well separated clusters"""
+    rng = np.random.default_rng(seed)
+    rows, vectors = [], {}
+    for brand, clusters in clusters_per_brand.items():
+        for cluster in range(clusters):
+            center = rng.normal(size=dimension)
+            for i in range(ads_per_cluster):
+                ad_id = f"{brand}_{cluster}_{i}"
+                rows.append((brand, ad_id, f"gs://bucket/{ad_id}.jpg", False))
+                vectors[ad_id] = center + 0.05 * rng.normal(size=dimension)
+    return pd.DataFrame(rows, columns=['brand', 'ad_archive_id', 'media_storage_path', 'is_cached']), vectors
+
+
+def _cluster(ad_id):
+    return ad_id.rsplit('_', 1)[0]
+
+
+def test_budget_buys_one_medoid_per_cluster():
+    """Every cluster is covered once before any cluster gets a second image"""
+    print("🧪 Testing medoid selection under budget...")
+
+    candidates, vectors = _clustered_ads({'Warby Parker': 4, 'Zenni': 2})
+    planner = VisualSamplePlanner(budget_usd=0.015, cost_per_image=0.0025)
+    plan, summary = planner.plan(candidates, vectors)
+
+    assert list(plan.columns) == PLAN_COLUMNS
+    assert summary['image_budget'] == 6 and summary['new_images'] == 6
+    assert abs(summary['estimated_cost'] - 0.015) < 1e-9
+    assert plan['ad_archive_id'].map(_cluster).nunique() == 6, "One pick per cluster"
+    assert (plan['represented_ads'] == 8).all()
+    assert list(plan['plan_rank']) == list(range(1, 7))
+    assert all(coverage > 0.95 for coverage in summary['brand_coverage'].values())
+    print(f"   ✅ 6 clusters covered with 6 images ({summary['brand_coverage']})")
+    return True
+
+
+def test_diverse_brands_get_more_budget():
+    """With a tight budget, the brand with more distinct creative gets more images"""
+    print("🧪 Testing budget allocation by diversity...")
+
+    candidates, vectors = _clustered_ads({'Diverse': 5, 'Repetitive': 1}, ads_per_cluster=10)
+    plan, summary = VisualSamplePlanner(budget_usd=0.01, cost_per_image=0.0025).plan(candidates, vectors)
+
+    picks = plan['brand'].value_counts()
+    assert picks['Diverse'] == 3 and picks['Repetitive'] == 1
+    print(f"   ✅ Diverse: {picks['Diverse']} images, Repetitive: {picks['Repetitive']} image")
+    return True
+
+
+def test_cached_ads_are_free_coverage():
+    """Cached ads are in the plan at no cost and the budget avoids their clusters"""
+    print("🧪 Testing cached coverage...")
+
+    candidates, vectors = _clustered_ads({'Warby Parker': 3})
+    candidates.loc[candidates['ad_archive_id'].isin(['Warby Parker_0_0', 'Warby Parker_1_0']), 'is_cached'] = True
+    plan, summary = VisualSamplePlanner(budget_usd=0.0025, cost_per_image=0.0025).plan(candidates, vectors)
+
+    new = plan[~plan['is_cached']]
+    assert summary['new_images'] == 1 and summary['cached_images'] == 2
+    assert summary['estimated_cost'] == 0.0025
+    assert _cluster(new['ad_archive_id'].iloc[0]) == 'Warby Parker_2', "Budget goes to the uncovered cluster"
+    assert (plan.loc[plan['is_cached'], 'plan_rank'] == 0).all()
+
+    # Nothing left to cover means nothing is bought
+    plan, summary = VisualSamplePlanner(budget_usd=1.0, cost_per_image=0.0025).plan(
+        candidates.assign(is_cached=True), vectors)
+    assert summary['new_images'] == 0 and len(plan) == len(candidates)
+    print("   ✅ Cached analyses stretch the budget")
+    return True
+
+
+def test_ads_without_embeddings_are_distinct():
+    """Ads missing an embedding only cover themselves"""
+    print("🧪 Testing ads without embeddings...")
+
+    candidates, vectors = _clustered_ads({'Zenni': 1}, ads_per_cluster=4)
+    extra = pd.DataFrame([('Zenni', 'no_vector', 'gs://bucket/no_vector.jpg', False)], columns=candidates.columns)
+    plan, _ = VisualSamplePlanner(budget_usd=0.005, cost_per_image=0.0025).plan(
+        pd.concat([candidates, extra], ignore_index=True), vectors)
+
+    assert len(plan) == 2 and 'no_vector' in set(plan['ad_archive_id'])
+    assert plan.loc[plan['ad_archive_id'] == 'no_vector', 'represented_ads'].iloc[0] == 1
+    print("   ✅ Missing embeddings handled")
+    return True
+
+
+def test_analysis_sql_reads_plan():
+    """With a plan table, the sample SQL selects exactly the planned ads"""
+    print("🧪 Testing plan-driven sample SQL...")
+
+    stage = VisualIntelligenceStage(PipelineContext("Warby Parker", "eyewear", "test_run"), use_visual_cache=False)
+    assert "visual_sampling_strategy" in stage._sampled_ads_sql()
+
+    stage.sample_plan_table = "proj.ads_demo.visual_sample_plan_test_run"
+    sample_sql = stage._sampled_ads_sql()
+    assert "JOIN `proj.ads_demo.visual_sample_plan_test_run` p" in sample_sql
+    assert "visual_sampling_strategy" not in sample_sql
+    assert "p.is_cached" in sample_sql
+    print("   ✅ Analysis SQL consumes the plan table")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_budget_buys_one_medoid_per_cluster, test_diverse_brands_get_more_budget,
+             test_cached_ads_are_free_coverage, test_ads_without_embeddings_are_distinct,
+             test_analysis_sql_reads_plan]
+    passed = sum(1 for test_func in tests if test_func())
+    print(f"\n🏁 Visual sample planner: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
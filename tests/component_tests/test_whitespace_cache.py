@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test the whitespace chunk cache
+
+Both whitespace detectors must fingerprint each (period, brand) ad set, send only
+uncached chunks to AI.GENERATE, merge cached results back in before scoring, and
+key the cache by a prompt version that follows the prompt, not the run.
+"""
+import os
+import sys
+from unittest.mock import patch
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.competitive_intel.analysis.hybrid_whitespace_detection import HybridWhiteSpaceDetector
+from src.competitive_intel.analysis.parallel_whitespace_detection import ParallelWhiteSpaceDetector
+from src.competitive_intel.analysis.whitespace_cache import ad_set_fingerprint_sql
+
+COMPETITORS = ['LensCrafters', 'EyeBuyDirect']
+
+
+def _detectors(**kwargs):
+    return [
+        (HybridWhiteSpaceDetector("proj", "ads_demo", "Warby Parker", COMPETITORS, **kwargs),
+         'analyze_hybrid_strategic_positions', 'hybrid_intelligence_json'),
+        (ParallelWhiteSpaceDetector("proj", "ads_demo", "Warby Parker", COMPETITORS, **kwargs),
+         'analyze_strategic_positions_parallel', 'strategic_positions_json'),
+    ]
+
+
+def test_only_uncached_chunks_reach_ai():
+    """AI.GENERATE runs once, over chunks missing from the cache; cached results are unioned back"""
+    print("🧪 Testing cached chunk analysis SQL...")
+
+    for detector, method, result_column in _detectors(use_cache=True):
+        sql = getattr(detector, method)("test_run")
+        assert sql.count("AI.GENERATE(") == 1, detector.cache.detector
+        analyzed = sql[sql.index("analyzed_chunks AS ("):sql.index("UNION ALL\n        SELECT i.*")]
+        assert "AI.GENERATE(i.prompt" in analyzed and "WHERE c.ai_result IS NULL" in analyzed
+        assert f"c.ai_result as {result_column}, TRUE as from_cache" in sql
+        assert ad_set_fingerprint_sql('r') in sql
+        assert "USING (brand, period_name, ad_set_fingerprint)" in sql
+        assert f"prompt_version = '{detector.cache.prompt_version}'" in sql
+        assert "MERGE `bigquery-ai-kaggle-469620.ads_demo.whitespace_chunk_cache`" in sql
+        assert "WHERE NOT from_cache" in sql
+        assert "FROM whitespace_chunks" in sql.split("MERGE")[-1].split(";", 1)[1]
+        assert "as cached_chunks" in sql
+    print("   ✅ Changed chunks analyzed, unchanged chunks reused")
+    return True
+
+
+def test_fingerprint_orders_ad_ids():
+    """The fingerprint hashes distinct ad ids in a fixed order"""
+    print("🧪 Testing ad set fingerprint...")
+
+    fingerprint = ad_set_fingerprint_sql('r')
+    assert "STRING_AGG(DISTINCT CAST(r.ad_archive_id AS STRING), ','" in fingerprint
+    assert "ORDER BY CAST(r.ad_archive_id AS STRING)" in fingerprint
+    assert fingerprint.startswith("TO_HEX(SHA256(")
+    print("   ✅ Fingerprint independent of row order")
+    return True
+
+
+def test_prompt_version_follows_prompt():
+    """Prompt versions are shared across brands and runs but differ between detectors"""
+    print("🧪 Testing prompt version...")
+
+    hybrid = HybridWhiteSpaceDetector("proj", "ads_demo", "Warby Parker", COMPETITORS)
+    other_brand = HybridWhiteSpaceDetector("proj", "ads_demo", "Zenni", ['Warby Parker'])
+    parallel = ParallelWhiteSpaceDetector("proj", "ads_demo", "Warby Parker", COMPETITORS)
+    assert hybrid.cache.prompt_version == other_brand.cache.prompt_version
+    assert hybrid.cache.prompt_version != parallel.cache.prompt_version
+
+    with patch.object(HybridWhiteSpaceDetector, "_chunk_prompt_sql", return_value="CONCAT('v2', r.brand)"):
+        edited = HybridWhiteSpaceDetector("proj", "ads_demo", "Warby Parker", COMPETITORS)
+    assert edited.cache.prompt_version != hybrid.cache.prompt_version
+    print(f"   ✅ Prompt version {hybrid.cache.prompt_version}")
+    return True
+
+
+def test_cache_disabled_analyzes_every_chunk():
+    """Without the cache every chunk is analyzed and nothing is merged"""
+    print("🧪 Testing disabled cache...")
+
+    for detector, method, _ in _detectors(use_cache=False):
+        sql = getattr(detector, method)("test_run")
+        assert detector.cache is None
+        assert sql.count("AI.GENERATE(") == 1
+        assert "whitespace_chunk_cache" not in sql and "MERGE" not in sql
+        assert "FALSE as from_cache" in sql
+    print("   ✅ Full analysis without cache")
+    return True
+
+
+def test_performance_reports_chunk_reuse():
+    """Chunk counts from the script are reported by both detectors"""
+    print("🧪 Testing chunk reuse reporting...")
+
+    results = pd.DataFrame([{
+        'space_type': 'UNDERSERVED', 'messaging_angle': 'EMOTIONAL', 'funnel_stage': 'AWARENESS',
+        'target_persona': 'Young Professionals', 'overall_score': 0.5, 'analyzed_chunks': 2, 'cached_chunks': 7,
+    }])
+    with patch("src.utils.bigquery_client.run_query", return_value=results):
+        hybrid = HybridWhiteSpaceDetector("proj", "ads_demo", "Warby Parker", COMPETITORS).analyze_hybrid_performance("r")
+        parallel = ParallelWhiteSpaceDetector("proj", "ads_demo", "Warby Parker", COMPETITORS).analyze_parallel_performance("r")
+
+    for performance in (hybrid, parallel):
+        assert performance['status'] == 'success', performance
+        assert performance['analyzed_chunks'] == 2 and performance['cached_chunks'] == 7
+    print("   ✅ 7 of 9 chunks reused")
+    return True
+
+
+def main():
+    """Run all whitespace cache tests"""
+    print("♻️  WHITESPACE CHUNK CACHE TESTS")
+    print("=" * 50)
+
+    tests = [
+        test_only_uncached_chunks_reach_ai,
+        test_fingerprint_orders_ad_ids,
+        test_prompt_version_follows_prompt,
+        test_cache_disabled_analyzes_every_chunk,
+        test_performance_reports_chunk_reuse,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"   ❌ {test.__name__} failed: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Test the unified whitespace engine and its benchmark
+
+Every strategy must return opportunities in the common schema, the configured
+chain must fall back in order, and the benchmark must replay one recorded dataset
+for all strategies and compare them on latency, AI calls and opportunity overlap.
+"""
+import os
+import sys
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.competitive_intel.analysis import whitespace_benchmark, whitespace_engine
+from src.competitive_intel.analysis.whitespace_engine import (
+    OPPORTUNITY_FIELDS, STRATEGIES, WhitespaceEngine, WhitespaceStrategy, categorize_performance, parse_strategies
+)
+from src.utils.bigquery_client import QueryStats
+
+COMPETITORS = ['LensCrafters', 'EyeBuyDirect']
+
+HYBRID_ROW = {
+    'space_type': 'UNDERSERVED', 'messaging_angle': 'EMOTIONAL', 'funnel_stage': 'AWARENESS',
+    'target_persona': 'Young Professionals', 'overall_score': 0.7, 'enhanced_market_potential': 0.8,
+    'competitor_count': 1, 'hybrid_investment_recommendation': 'HIGH', 'predicted_success_metrics': 'CTR',
+    'campaign_readiness': 'CAMPAIGN_READY', 'sample_headlines': 'See clearly | Look sharp',
+    'recommended_ctas': 'Shop now | Try on', 'analyzed_chunks': 4, 'cached_chunks': 5,
+}
+PARALLEL_ROW = {
+    'space_type': 'MONOPOLY', 'messaging_angle': 'EMOTIONAL', 'funnel_stage': 'AWARENESS',
+    'target_persona': 'young professionals', 'overall_score': 0.5, 'market_potential': 0.6,
+    'competitor_count': 1, 'recommended_investment': 'MEDIUM', 'success_indicators': 'CTR',
+    'analyzed_chunks': 9, 'cached_chunks': 0,
+}
+
+
+@contextmanager
+def _tracked():
+    yield QueryStats(queries=1, bytes_processed=1000, slot_millis=50)
+
+
+def _fake_queries(failing=()):
+    """run_query stand-in: detector SQL by its shape, plus the per-brand sample counts"""
+    def run_query(sql, project_id=None):
+        if "hybrid_intelligence_json" in sql:
+            if 'hybrid' in failing:
+                raise RuntimeError("hybrid quota exceeded")
+            return pd.DataFrame([HYBRID_ROW])
+        if "strategic_positions_json" in sql:
+            return pd.DataFrame([PARALLEL_ROW])
+        if "as sampled" in sql:
+            return pd.DataFrame([{'sampled': 2 if "batch_id" in sql else 9}])
+        return pd.DataFrame([PARALLEL_ROW])
+    return run_query
+
+
+def test_fallback_chain():
+    """The first strategy that succeeds wins; failures fall through in order"""
+    print("🧪 Testing strategy fallback chain...")
+
+    engine = WhitespaceEngine("Warby Parker", COMPETITORS, ['hybrid', 'parallel'], use_cache=False)
+    with patch.object(whitespace_engine, "run_query", side_effect=_fake_queries()), \
+            patch.object(whitespace_engine, "track_queries", _tracked):
+        first = engine.detect("r")
+    with patch.object(whitespace_engine, "run_query", side_effect=_fake_queries(failing={'hybrid'})), \
+            patch.object(whitespace_engine, "track_queries", _tracked):
+        fallback = engine.detect("r")
+
+    assert first.strategy == 'hybrid' and first.succeeded and first.ai_calls == 4 and first.cached_chunks == 5
+    assert fallback.strategy == 'parallel' and fallback.succeeded and fallback.bytes_processed == 1000
+    assert WhitespaceEngine("Warby Parker", COMPETITORS, []).strategies == ['hybrid', 'parallel']
+    print("   ✅ hybrid → parallel")
+    return True
+
+
+def test_common_opportunity_schema():
+    """Every strategy maps its rows to the same opportunity fields"""
+    print("🧪 Testing common opportunity schema...")
+
+    engine = WhitespaceEngine("Warby Parker", COMPETITORS, list(STRATEGIES), use_cache=False)
+    with patch.object(whitespace_engine, "run_query", side_effect=_fake_queries()), \
+            patch.object(whitespace_engine, "track_queries", _tracked):
+        results = {name: engine.run(name, "r", count_ai_calls=True) for name in STRATEGIES}
+
+    for name, result in results.items():
+        assert result.succeeded, result.error
+        assert set(result.opportunities[0]) == set(OPPORTUNITY_FIELDS), name
+    hybrid = results['hybrid'].opportunities[0]
+    assert hybrid['campaign_ready'] and hybrid['sample_headline'] == 'See clearly'
+    assert hybrid['sample_cta'] == 'Shop now' and hybrid['confidence_level'] == 'HIGH'
+    assert results['parallel'].opportunities[0]['recommended_investment'] == 'MEDIUM'
+    assert results['batched'].ai_calls == 2 and results['enhanced'].ai_calls == 27
+    print(f"   ✅ {len(results)} strategies, {len(OPPORTUNITY_FIELDS)} shared fields")
+    return True
+
+
+def test_strategy_config():
+    """Unknown strategy names are rejected; benchmark tables replace the ads source"""
+    print("🧪 Testing strategy configuration...")
+
+    assert parse_strategies(" Hybrid, batched ") == ['hybrid', 'batched']
+    try:
+        parse_strategies("hybrid,turbo")
+        raise AssertionError("unknown strategy accepted")
+    except ValueError as e:
+        assert "turbo" in str(e)
+
+    engine = WhitespaceEngine("Warby Parker", COMPETITORS, use_cache=False, ads_table="p.d.replay")
+    for name in STRATEGIES:
+        strategy = engine.strategy(name)
+        assert "`p.d.replay`" in strategy.sql("r") and "ads_with_dates" not in strategy.sql("r"), name
+
+    assert categorize_performance(10, 60) == 'EXCELLENT'
+    assert categorize_performance(30, 60) == 'GOOD'
+    assert categorize_performance(60, 60) == 'ACCEPTABLE'
+    assert categorize_performance(61, 60) == 'SLOW'
+    print("   ✅ Strategies selectable by config")
+    return True
+
+
+def test_strategies_use_engine_dataset():
+    """Detector SQL and AI call counts read the engine's project and dataset"""
+    print("🧪 Testing strategy project/dataset...")
+
+    try:
+        WhitespaceStrategy(None)
+        raise AssertionError("abstract strategy instantiated")
+    except TypeError:
+        pass
+
+    engine = WhitespaceEngine("Warby Parker", COMPETITORS, use_cache=False, project_id="p", dataset_id="d")
+    queries = []
+    with patch.object(whitespace_engine, "run_query",
+                      side_effect=lambda sql: queries.append(sql) or pd.DataFrame([{'sampled': 4}])):
+        for name in STRATEGIES:
+            strategy = engine.strategy(name)
+            sql = strategy.sql("r")
+            assert "`p.d.cta_aggressiveness_analysis`" in sql and "`p.d.ads_with_dates`" in sql, name
+            strategy.ai_calls(pd.DataFrame())
+
+    assert len(queries) == 2  # batched and enhanced count their sample
+    assert all("`p.d.cta_aggressiveness_analysis`" in sql and "`p.d.ads_with_dates`" in sql for sql in queries)
+    print(f"   ✅ {len(STRATEGIES)} strategies on p.d")
+    return True
+
+
+def test_benchmark_replays_recorded_dataset():
+    """All strategies run on one shifted replay and are compared with the reference"""
+    print("🧪 Testing whitespace benchmark...")
+
+    queries = []
+
+    def run_query(sql, project_id=None):
+        queries.append(sql)
+        if "ANY_VALUE(recorded_target_brand)" in sql:
+            return pd.DataFrame([{'target_brand': 'Warby Parker', 'brands': ['Warby Parker'] + COMPETITORS}])
+        return pd.DataFrame()
+
+    engine_queries = _fake_queries()
+    with patch.object(whitespace_benchmark, "run_query", side_effect=run_query), \
+            patch.object(whitespace_engine, "run_query", side_effect=lambda sql, project_id=None:
+                         queries.append(sql) or engine_queries(sql)), \
+            patch.object(whitespace_engine, "track_queries", _tracked):
+        report = whitespace_benchmark.run_benchmark("eyewear", ['parallel', 'batched'])
+
+    replay = next(sql for sql in queries if "whitespace_replay_eyewear_" in sql and "CREATE" in sql)
+    assert "DATE_DIFF(CURRENT_DATE(), recorded_on, DAY)" in replay and "expiration_timestamp" in replay
+    replay_table = replay.split("`")[1]
+    assert all(replay_table in sql for sql in queries if "hybrid_intelligence_json" in sql)
+    assert not any("whitespace_chunk_cache" in sql for sql in queries)
+
+    assert list(report['strategy']) == ['hybrid', 'parallel', 'batched']
+    assert list(report['reference']) == [True, False, False]
+    assert report.set_index('strategy')['overlap'].to_dict() == {'hybrid': 1.0, 'parallel': 1.0, 'batched': 1.0}
+    assert report.set_index('strategy')['ai_calls'].to_dict() == {'hybrid': 4, 'parallel': 9, 'batched': 2}
+
+    report.loc[report['strategy'] == 'batched', 'overlap'] = 0.2
+    report['duration_seconds'] = [30.0, 5.0, 1.0]
+    assert whitespace_benchmark.recommend(report) == 'parallel'
+    assert whitespace_benchmark.opportunity_overlap([], []) is None
+    print("   ✅ Fastest adequate strategy: parallel")
+    return True
+
+
+def _report(rows):
+    """Benchmark report from (strategy, reference, status, seconds, overlap) rows"""
+    return pd.DataFrame([{'strategy': strategy, 'reference': reference, 'status': status,
+                          'duration_seconds': seconds, 'overlap': overlap}
+                         for strategy, reference, status, seconds, overlap in rows])
+
+
+def test_opportunity_overlap():
+    """Jaccard over normalized opportunity keys; None only when both lists are empty"""
+    print("🧪 Testing opportunity overlap...")
+
+    def opp(angle, segment):
+        return {'messaging_angle': angle, 'funnel_stage': 'AWARENESS', 'segment': segment}
+
+    reference = [opp('EMOTIONAL', 'Young Professionals'), opp('RATIONAL', 'Parents'), opp('EMOTIONAL', 'Students')]
+    candidate = [opp('EMOTIONAL', 'young-professionals'), opp('RATIONAL', 'Parents'), opp('URGENCY', 'Retirees')]
+
+    assert whitespace_benchmark.opportunity_overlap(candidate, reference) == 0.5
+    assert whitespace_benchmark.opportunity_overlap(reference, reference) == 1.0
+    assert whitespace_benchmark.opportunity_overlap([], reference) == 0.0
+    assert whitespace_benchmark.opportunity_overlap(reference, []) == 0.0
+    assert whitespace_benchmark.opportunity_overlap([], []) is None
+    print("   ✅ 2 shared of 4 distinct opportunities → 0.5")
+    return True
+
+
+def test_recommend_requires_reference():
+    """No recommendation without a successful reference; empty-vs-empty counts as agreement"""
+    print("🧪 Testing strategy recommendation...")
+
+    rows = [('hybrid', True, 'success', 30.0, 1.0), ('parallel', False, 'success', 5.0, 0.6),
+            ('batched', False, 'success', 1.0, 0.2)]
+    assert whitespace_benchmark.recommend(_report(rows)) == 'parallel'
+    assert whitespace_benchmark.recommend(_report(rows), min_overlap=0.1) == 'batched'
+    assert whitespace_benchmark.recommend(_report(rows), min_overlap=1.1) is None
+
+    failed_reference = [('hybrid', True, 'error', 2.0, None), ('parallel', False, 'success', 5.0, None),
+                        ('batched', False, 'error', 1.0, None)]
+    assert whitespace_benchmark.recommend(_report(failed_reference)) is None
+
+    nothing_found = [('hybrid', True, 'success', 30.0, None), ('parallel', False, 'success', 5.0, None),
+                     ('batched', False, 'error', 1.0, None)]
+    assert whitespace_benchmark.recommend(_report(nothing_found)) == 'parallel'
+    print("   ✅ Failed reference → no recommendation")
+    return True
+
+
+def main():
+    """Run all whitespace engine tests"""
+    print("🧭 WHITESPACE ENGINE TESTS")
+    print("=" * 50)
+
+    tests = [
+        test_fallback_chain,
+        test_common_opportunity_schema,
+        test_strategy_config,
+        test_strategies_use_engine_dataset,
+        test_benchmark_replays_recorded_dataset,
+        test_opportunity_overlap,
+        test_recommend_requires_reference,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"   ❌ {test.__name__} failed: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)